@@ -1,5 +1,508 @@
-"""Stub Azure indexer for demonstration."""
+"""Indexation incrémentale d'un dossier (local ou conteneur Blob) dans Azure Search.
 
+Les fichiers sont hachés pour ignorer ceux qui n'ont pas changé, leur texte
+est extrait dans un pool de processus avec les lecteurs de
+``DocumentManager``, découpé en morceaux puis envoyé par lots à
+``AzureSearchManager``. Un manifeste local enregistre l'avancement après
+chaque lot : une exécution interrompue reprend là où elle s'était arrêtée.
 
-def index_folder(folder: str):
-    print(f"indexing {folder}")
+Usage en ligne de commande ::
+
+    python azure_indexer.py documents/dossier_A
+    python azure_indexer.py azure://conteneur/dossier_A --workers 8
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.pdf_extraction import PageIndex
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.json', '.xlsx', '.csv')
+MANIFEST_NAME = '.azure_index_manifest.json'
+MANIFEST_DIR = Path('.index_manifests')
+BLOB_SCHEME = 'azure://'
+
+# Découpage : taille des morceaux et recouvrement (en caractères)
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
+# Nombre de morceaux accumulés avant un envoi (et un point de reprise)
+FLUSH_CHUNKS = 500
+
+
+@dataclass
+class SourceFile:
+    """Fichier à indexer"""
+    key: str
+    size: int
+    modified: str
+    date: str
+    path: Optional[str] = None
+
+
+@dataclass
+class IndexReport:
+    """Bilan d'une indexation"""
+    scanned: int = 0
+    unchanged: int = 0
+    indexed: int = 0
+    failed: int = 0
+    removed: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'scanned': self.scanned,
+            'unchanged': self.unchanged,
+            'indexed': self.indexed,
+            'failed': self.failed,
+            'removed': self.removed,
+            'chunks': self.chunks,
+            'elapsed': round(self.elapsed, 2),
+            'errors': dict(self.errors),
+            'error': self.error,
+        }
+
+
+# ========== SOURCES ==========
+
+class FolderSource:
+    """Dossier local parcouru récursivement"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def list_files(self) -> Iterator[SourceFile]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.startswith('.') or Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                path = Path(dirpath) / filename
+                stat = path.stat()
+                yield SourceFile(
+                    key=path.relative_to(self.root).as_posix(),
+                    size=stat.st_size,
+                    modified=str(stat.st_mtime_ns),
+                    date=datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                    path=str(path),
+                )
+
+    def read(self, source_file: SourceFile) -> bytes:
+        return Path(source_file.path).read_bytes()
+
+
+class BlobSource:
+    """Conteneur Azure Blob (``azure://conteneur/préfixe``)"""
+
+    def __init__(self, container: str, prefix: str = '', blob_manager=None):
+        if blob_manager is None:
+            from managers.azure_blob_manager import AzureBlobManager
+            blob_manager = AzureBlobManager()
+        if not blob_manager.is_connected():
+            raise RuntimeError(blob_manager.get_connection_error() or "Azure Blob Storage non connecté")
+        self.container = container
+        self.prefix = prefix.strip('/')
+        self._client = blob_manager.blob_service_client.get_container_client(container)
+
+    def list_files(self) -> Iterator[SourceFile]:
+        prefix = f"{self.prefix}/" if self.prefix else ''
+        for blob in self._client.list_blobs(name_starts_with=prefix or None):
+            if Path(blob.name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            yield SourceFile(
+                key=blob.name[len(prefix):],
+                size=blob.size,
+                # L'ETag change à chaque réécriture du blob
+                modified=str(blob.etag),
+                date=blob.last_modified.isoformat() if blob.last_modified else '',
+            )
+
+    def read(self, source_file: SourceFile) -> bytes:
+        prefix = f"{self.prefix}/" if self.prefix else ''
+        return self._client.download_blob(prefix + source_file.key).readall()
+
+
+def make_source(folder: str):
+    """Source correspondant à un chemin local ou à une URL ``azure://``"""
+    if folder.startswith(BLOB_SCHEME):
+        container, _, prefix = folder[len(BLOB_SCHEME):].partition('/')
+        return BlobSource(container, prefix)
+    return FolderSource(folder)
+
+
+# ========== MANIFESTE ==========
+
+class IndexManifest:
+    """
+    État d'indexation de chaque fichier (empreinte, taille, date, morceaux).
+
+    Écrit de façon atomique (fichier temporaire puis renommage) : une
+    interruption pendant l'écriture laisse le manifeste précédent intact.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+                if data.get('version') == self.VERSION:
+                    self.files = data.get('files', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Manifeste illisible ({e}), réindexation complète")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(key)
+
+    def record(self, key: str, entry: Dict[str, Any]):
+        self.files[key] = entry
+
+    def remove(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.files.pop(key, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.manifest-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'files': self.files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+# ========== EXTRACTION ET DÉCOUPAGE ==========
+
+def extract_text(name: str, data: bytes) -> str:
+    """Extrait le texte d'un fichier avec les lecteurs de DocumentManager"""
+    extension = Path(name).suffix.lower()
+    if extension == '.txt':
+        return data.decode('utf-8', errors='replace')
+
+    from managers.document_manager import DocumentManager
+    stream = io.BytesIO(data)
+    if extension == '.pdf':
+        return DocumentManager._extract_pdf_content(stream)
+    if extension == '.docx':
+        return DocumentManager._extract_docx_content(stream)
+    if extension == '.json':
+        return DocumentManager._extract_json_content(stream)
+    if extension in ('.xlsx', '.csv'):
+        return DocumentManager._extract_table_content(stream, extension)
+    raise ValueError(f"Format non supporté: {extension}")
+
+
+def _process_file(task: Tuple[str, Optional[str], Optional[bytes], Optional[str]]):
+    """
+    Travail exécuté dans le pool : hachage puis extraction si le contenu a changé.
+
+    Returns:
+        (clé, empreinte, texte ou None si inchangé, erreur éventuelle)
+    """
+    key, path, data, known_hash = task
+    try:
+        if data is None:
+            data = Path(path).read_bytes()
+        file_hash = hashlib.sha256(data).hexdigest()
+        if file_hash == known_hash:
+            return key, file_hash, None, None
+        return key, file_hash, extract_text(key, data), None
+    except Exception as e:
+        return key, None, None, f"{type(e).__name__}: {e}"
+
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Découpe un texte en morceaux d'au plus ``size`` caractères.
+
+    Les coupures se font de préférence entre paragraphes, sinon entre mots ;
+    deux morceaux consécutifs partagent ``overlap`` caractères.
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind('\n\n', start + size // 2, end)
+            if cut == -1:
+                cut = text.rfind(' ', start + size // 2, end)
+            if cut != -1:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def chunk_pages(text: str, chunks: List[str]) -> List[Optional[int]]:
+    """Page (d'après les en-têtes de page du texte extrait) où commence chaque morceau"""
+    text = text.strip()
+    index = PageIndex.from_text(text)
+    if not index:
+        return [None] * len(chunks)
+    pages = []
+    cursor = 0
+    for chunk in chunks:
+        start = text.find(chunk, cursor)
+        if start == -1:
+            start = cursor
+        pages.append(index.page_at(start) or index.numbers[0])
+        cursor = start + 1
+    return pages
+
+
+def chunk_id(key: str, index: int) -> str:
+    """Identifiant stable (caractères admis par Azure) d'un morceau de fichier"""
+    return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]}_{index}"
+
+
+# ========== INDEXATION ==========
+
+class FolderIndexer:
+    """Indexation incrémentale et reprenable d'une source"""
+
+    def __init__(self, source, manager, manifest: IndexManifest, workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                 force: bool = False, flush_chunks: int = FLUSH_CHUNKS):
+        self.source = source
+        self.manager = manager
+        self.manifest = manifest
+        self.workers = min(4, os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.force = force
+        self.flush_chunks = flush_chunks
+        self.report = IndexReport()
+        self._pending: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]], List[str]]] = []
+        self._pending_chunks = 0
+
+    def run(self) -> IndexReport:
+        start = time.monotonic()
+        seen = set()
+        files: deque = deque()
+
+        def tasks() -> Iterator[tuple]:
+            for source_file in self.source.list_files():
+                seen.add(source_file.key)
+                self.report.scanned += 1
+                entry = self.manifest.get(source_file.key)
+                if (not self.force and entry
+                        and entry.get('size') == source_file.size
+                        and entry.get('modified') == source_file.modified):
+                    self.report.unchanged += 1
+                    continue
+                known_hash = None if self.force or not entry else entry.get('hash')
+                data = None if source_file.path else self.source.read(source_file)
+                files.append(source_file)
+                yield source_file.key, source_file.path, data, known_hash
+
+        for result in self._map(tasks()):
+            self._handle(files.popleft(), *result)
+        self._flush()
+        self._remove_missing(seen)
+
+        self.report.elapsed = time.monotonic() - start
+        return self.report
+
+    def _map(self, tasks: Iterable[tuple]) -> Iterator[tuple]:
+        """Applique ``_process_file`` dans l'ordre, avec peu de tâches en attente"""
+        if self.workers <= 1:
+            yield from map(_process_file, tasks)
+            return
+
+        window = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures: deque = deque()
+            for task in tasks:
+                futures.append(executor.submit(_process_file, task))
+                if len(futures) >= window:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    def _handle(self, source_file: SourceFile, key: str, file_hash: Optional[str],
+                text: Optional[str], error: Optional[str]):
+        previous = self.manifest.get(key) or {}
+        if error:
+            logger.error(f"Échec extraction {key}: {error}")
+            self.report.failed += 1
+            self.report.errors[key] = error
+            return
+
+        entry = {
+            'hash': file_hash,
+            'size': source_file.size,
+            'modified': source_file.modified,
+            'chunks': previous.get('chunks', 0),
+            'indexed_at': datetime.now(timezone.utc).isoformat(),
+        }
+        if text is None:
+            # Seule la date a changé : contenu identique, rien à renvoyer
+            self.manifest.record(key, entry)
+            self.report.unchanged += 1
+            return
+
+        chunks = chunk_text(text, self.chunk_size, self.chunk_overlap)
+        entry['chunks'] = len(chunks)
+        name = Path(key).name
+        # Page de départ de chaque morceau, pour ouvrir le PDF au bon endroit
+        pages = chunk_pages(text, chunks)
+        documents = [
+            {
+                'id': chunk_id(key, i),
+                'title': name if len(chunks) == 1 else f"{name} ({i + 1}/{len(chunks)})",
+                'content': chunk,
+                'source': key,
+                'date': source_file.date,
+                'reference': key,
+                'metadata': {'path': key, 'chunk': i, 'chunks': len(chunks), 'hash': file_hash,
+                             'page': page},
+            }
+            for i, (chunk, page) in enumerate(zip(chunks, pages))
+        ]
+        stale = [chunk_id(key, i) for i in range(len(chunks), previous.get('chunks', 0))]
+        self._pending.append((key, entry, documents, stale))
+        self._pending_chunks += len(documents)
+        if self._pending_chunks >= self.flush_chunks:
+            self._flush()
+
+    def _flush(self):
+        """Envoie les morceaux en attente puis enregistre le point de reprise"""
+        documents = [doc for _, _, docs, _ in self._pending for doc in docs]
+        failed_keys = set()
+        if documents:
+            self.manager.index_documents_batch(documents)
+            failed_keys = set(self.manager.get_indexing_stats().get('failed_keys', []))
+
+        stale_ids = []
+        for key, entry, docs, stale in self._pending:
+            if any(doc['id'] in failed_keys for doc in docs):
+                self.report.failed += 1
+                self.report.errors[key] = "indexation incomplète"
+                continue
+            stale_ids.extend(stale)
+            self.manifest.record(key, entry)
+            self.report.indexed += 1
+            self.report.chunks += len(docs)
+
+        if stale_ids:
+            self.manager.delete_documents_batch(stale_ids)
+        self.manifest.save()
+        self._pending.clear()
+        self._pending_chunks = 0
+
+    def _remove_missing(self, seen: set):
+        """Retire de l'index les fichiers disparus de la source"""
+        missing = [key for key in self.manifest.files if key not in seen]
+        if not missing:
+            return
+        ids = []
+        for key in missing:
+            entry = self.manifest.remove(key)
+            ids.extend(chunk_id(key, i) for i in range(entry.get('chunks', 0)))
+        if ids:
+            self.manager.delete_documents_batch(ids)
+        self.report.removed += len(missing)
+        self.manifest.save()
+
+
+def default_manifest_path(folder: str) -> Path:
+    """Manifeste dans le dossier indexé, ou sous MANIFEST_DIR pour un conteneur"""
+    if folder.startswith(BLOB_SCHEME):
+        name = folder[len(BLOB_SCHEME):].strip('/').replace('/', '_') or 'conteneur'
+        return MANIFEST_DIR / f"{name}.json"
+    return Path(folder) / MANIFEST_NAME
+
+
+def index_folder(folder: str, manager=None, manifest_path: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                 chunk_overlap: int = CHUNK_OVERLAP, force: bool = False) -> IndexReport:
+    """
+    Indexe (ou met à jour) le contenu d'un dossier dans Azure Search
+
+    Args:
+        folder: Dossier local ou ``azure://conteneur/préfixe``
+        manager: Gestionnaire d'index (AzureSearchManager par défaut)
+        manifest_path: Manifeste d'avancement (voir default_manifest_path)
+        workers: Processus d'extraction (1 = extraction dans le processus courant)
+        chunk_size: Taille maximale des morceaux indexés
+        chunk_overlap: Recouvrement entre morceaux
+        force: Ignorer le manifeste et tout réindexer
+
+    Returns:
+        Bilan de l'indexation
+    """
+    if manager is None:
+        from managers.azure_search_manager import AzureSearchManager
+        manager = AzureSearchManager()
+    if hasattr(manager, 'is_connected') and not manager.is_connected():
+        report = IndexReport(error=manager.get_connection_error() or "Azure Search non connecté")
+        logger.error(f"Indexation impossible: {report.error}")
+        return report
+
+    try:
+        source = make_source(folder)
+    except Exception as e:
+        logger.error(f"Source inaccessible {folder}: {e}")
+        return IndexReport(error=str(e))
+
+    manifest = IndexManifest(Path(manifest_path) if manifest_path else default_manifest_path(folder))
+    indexer = FolderIndexer(source, manager, manifest, workers=workers, chunk_size=chunk_size,
+                            chunk_overlap=chunk_overlap, force=force)
+    report = indexer.run()
+    logger.info(
+        f"Indexation de {folder}: {report.indexed} indexés, {report.unchanged} inchangés, "
+        f"{report.failed} échecs, {report.removed} retirés ({report.elapsed:.1f}s)"
+    )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Indexe un dossier dans Azure Search")
+    parser.add_argument('folder', help="Dossier local ou azure://conteneur/préfixe")
+    parser.add_argument('--manifest', help="Chemin du manifeste d'avancement")
+    parser.add_argument('--workers', type=int, default=None, help="Processus d'extraction")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--chunk-overlap', type=int, default=CHUNK_OVERLAP)
+    parser.add_argument('--force', action='store_true', help="Tout réindexer")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    report = index_folder(args.folder, manifest_path=args.manifest, workers=args.workers,
+                          chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+                          force=args.force)
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.error or report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
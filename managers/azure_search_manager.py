@@ -2,13 +2,15 @@
 Gestionnaire Azure Cognitive Search pour la recherche de documents juridiques
 """
 
+import asyncio
 import json
 import logging
 import os
 import re
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +32,17 @@ from azure.search.documents.models import (
     VectorizedQuery,
 )
 
+from utils.bulk_indexer import BulkIndexer
+
+# Client asynchrone (SDK aio + transport aiohttp) optionnel
+try:
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.search.documents.aio import SearchClient as AsyncSearchClient
+    ASYNC_SEARCH_AVAILABLE = True
+except ImportError:
+    ASYNC_SEARCH_AVAILABLE = False
+
 @dataclass
 class SearchResult:
     """Résultat de recherche structuré"""
@@ -44,15 +57,40 @@ class SearchResult:
 class AzureSearchManager:
     """Gestionnaire pour Azure Cognitive Search"""
     
-    def __init__(self):
-        """Initialise le gestionnaire Azure Search"""
+    # Connexions HTTP simultanées du pool partagé par les appels asynchrones
+    ASYNC_POOL_SIZE = 20
+    # Délai maximal par défaut d'une recherche asynchrone (secondes)
+    DEFAULT_TIMEOUT = 15.0
+    # Taille des pages du parcours paginé
+    PAGE_SIZE = 50
+    # Champs nécessaires au classement (sans le contenu, récupéré à la demande)
+    SUMMARY_FIELDS = ["id", "title", "source", "document_type", "date",
+                      "parties", "infractions", "reference"]
+    
+    def __init__(self, endpoint: Optional[str] = None, key: Optional[str] = None,
+                 index_name: Optional[str] = None, ensure_index: bool = True):
+        """
+        Initialise le gestionnaire Azure Search
+        
+        Args:
+            endpoint: URL du service (par défaut AZURE_SEARCH_ENDPOINT)
+            key: Clé d'API (par défaut AZURE_SEARCH_KEY)
+            index_name: Nom de l'index (par défaut AZURE_SEARCH_INDEX)
+            ensure_index: Vérifier/créer l'index à la connexion
+        """
         self.search_client = None
         self.index_client = None
-        self.index_name = os.getenv('AZURE_SEARCH_INDEX', 'juridique-index')
-        self.endpoint = os.getenv('AZURE_SEARCH_ENDPOINT')
-        self.key = os.getenv('AZURE_SEARCH_KEY')
+        self.index_name = index_name or os.getenv('AZURE_SEARCH_INDEX', 'juridique-index')
+        self.endpoint = endpoint or os.getenv('AZURE_SEARCH_ENDPOINT')
+        self.key = key or os.getenv('AZURE_SEARCH_KEY')
         self.connection_error = None
         
+        # Client asynchrone et pool de connexions par boucle, tant qu'un appel les utilise
+        self._async_clients: Dict[Any, Dict[str, Any]] = {}
+        
+        # Statistiques de la dernière indexation par lots
+        self.last_indexing_stats = None
+        
         logger.info(f"Initialisation Azure Search - Index: {self.index_name}")
         
         if not self.endpoint or not self.key:
@@ -76,7 +114,8 @@ class AzureSearchManager:
             )
             
             # Vérifier la connexion et créer l'index si nécessaire
-            self._ensure_index_exists()
+            if ensure_index:
+                self._ensure_index_exists()
             
             logger.info(f"✅ Azure Search connecté avec succès à l'index '{self.index_name}'")
             
@@ -204,24 +243,113 @@ class AzureSearchManager:
             logger.error(f"Erreur lors de la création de l'index: {e}")
             raise
     
+    def _build_search_params(self, query: str, filters: Optional[Dict] = None,
+                             filter_string: Optional[str] = None,
+                             top: int = 50, skip: int = 0,
+                             include_total_count: bool = True,
+                             search_mode: str = "any",
+                             query_type: str = "simple",
+                             use_semantic_search: bool = False,
+                             select: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Construit les paramètres communs aux recherches synchrones et asynchrones"""
+        search_params = {
+            "search_text": query,
+            "top": top,
+            "skip": skip,
+            "include_total_count": include_total_count,
+            "search_mode": search_mode,
+            "query_type": QueryType.SIMPLE if query_type == "simple" else QueryType.FULL,
+            "highlight_fields": "title,content",
+            "highlight_pre_tag": "<mark>",
+            "highlight_post_tag": "</mark>"
+        }
+        
+        # Filtres OData : dictionnaire de filtres et/ou expression brute
+        filter_expressions = []
+        if filters:
+            if "document_type" in filters:
+                filter_expressions.append(f"document_type eq '{filters['document_type']}'")
+            
+            if "partie" in filters:
+                filter_expressions.append(f"parties/any(p: p eq '{filters['partie']}')")
+            
+            if "infractions" in filters:
+                infraction_filters = [f"infractions/any(i: i eq '{inf}')" for inf in filters['infractions']]
+                filter_expressions.append(f"({' or '.join(infraction_filters)})")
+            
+            if "date_range" in filters and len(filters["date_range"]) == 2:
+                start_date = filters["date_range"][0].isoformat()
+                end_date = filters["date_range"][1].isoformat()
+                filter_expressions.append(f"date ge {start_date} and date le {end_date}")
+        
+        if filter_string:
+            filter_expressions.append(f"({filter_string})")
+        
+        if filter_expressions:
+            search_params["filter"] = " and ".join(filter_expressions)
+        
+        # Projection : seuls les champs demandés transitent sur le réseau
+        if select:
+            search_params["select"] = list(select)
+        
+        # Ajouter la recherche sémantique si activée
+        if use_semantic_search and query_type == "semantic":
+            search_params["query_type"] = QueryType.SEMANTIC
+            search_params["semantic_configuration_name"] = "my-semantic-config"
+            search_params["query_caption"] = QueryCaptionType.EXTRACTIVE
+            search_params["query_answer"] = QueryAnswerType.EXTRACTIVE
+        
+        return search_params
+    
+    @staticmethod
+    def _to_search_result(result: Dict[str, Any]) -> SearchResult:
+        """Convertit un résultat brut du SDK en SearchResult"""
+        search_result = SearchResult(
+            id=result.get("id", ""),
+            title=result.get("title", "Sans titre"),
+            content=result.get("content", ""),
+            source=result.get("source", "Unknown"),
+            score=result.get("@search.score", 0.0),
+            metadata={
+                "document_type": result.get("document_type", ""),
+                "date": result.get("date", ""),
+                "parties": result.get("parties", []),
+                "infractions": result.get("infractions", []),
+                "reference": result.get("reference", "")
+            }
+        )
+        
+        # Ajouter les highlights si disponibles
+        if result.get("@search.highlights"):
+            highlights = []
+            for field_name, values in result["@search.highlights"].items():
+                highlights.extend(values)
+            search_result.highlights = highlights
+        
+        return search_result
+    
     def search(self, query: str, filters: Optional[Dict] = None, 
                top: int = 50, skip: int = 0,
                include_total_count: bool = True,
                search_mode: str = "any",
                query_type: str = "simple",
-               use_semantic_search: bool = False) -> Dict[str, Any]:
+               use_semantic_search: bool = False,
+               filter_string: Optional[str] = None,
+               select: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
         Effectue une recherche dans l'index
         
         Args:
             query: Requête de recherche
-            filters: Filtres OData optionnels
+            filters: Filtres optionnels (document_type, partie, infractions, date_range)
             top: Nombre maximum de résultats
             skip: Nombre de résultats à ignorer
             include_total_count: Inclure le nombre total
             search_mode: "any" ou "all"
             query_type: "simple", "full", ou "semantic"
             use_semantic_search: Utiliser la recherche sémantique
+            filter_string: Expression OData brute ajoutée aux filtres
+            select: Champs à récupérer (tous par défaut)
             
         Returns:
             Dictionnaire avec les résultats et métadonnées
@@ -234,84 +362,21 @@ class AzureSearchManager:
             }
         
         try:
-            # Construire les paramètres de recherche
-            search_params = {
-                "search_text": query,
-                "top": top,
-                "skip": skip,
-                "include_total_count": include_total_count,
-                "search_mode": search_mode,
-                "query_type": QueryType.SIMPLE if query_type == "simple" else QueryType.FULL,
-                "highlight_fields": "title,content",
-                "highlight_pre_tag": "<mark>",
-                "highlight_post_tag": "</mark>"
-            }
-            
-            # Ajouter les filtres OData si fournis
-            if filters:
-                filter_expressions = []
-                
-                if "document_type" in filters:
-                    filter_expressions.append(f"document_type eq '{filters['document_type']}'")
-                
-                if "partie" in filters:
-                    filter_expressions.append(f"parties/any(p: p eq '{filters['partie']}')")
-                
-                if "infractions" in filters:
-                    infraction_filters = [f"infractions/any(i: i eq '{inf}')" for inf in filters['infractions']]
-                    filter_expressions.append(f"({' or '.join(infraction_filters)})")
-                
-                if "date_range" in filters and len(filters["date_range"]) == 2:
-                    start_date = filters["date_range"][0].isoformat()
-                    end_date = filters["date_range"][1].isoformat()
-                    filter_expressions.append(f"date ge {start_date} and date le {end_date}")
-                
-                if filter_expressions:
-                    search_params["filter"] = " and ".join(filter_expressions)
-            
-            # Ajouter la recherche sémantique si activée
-            if use_semantic_search and query_type == "semantic":
-                search_params["query_type"] = QueryType.SEMANTIC
-                search_params["semantic_configuration_name"] = "my-semantic-config"
-                search_params["query_caption"] = QueryCaptionType.EXTRACTIVE
-                search_params["query_answer"] = QueryAnswerType.EXTRACTIVE
+            search_params = self._build_search_params(
+                query, filters, filter_string, top, skip,
+                include_total_count, search_mode, query_type, use_semantic_search, select
+            )
             
             # Effectuer la recherche
             results = self.search_client.search(**search_params)
             
             # Traiter les résultats
-            search_results = []
+            search_results = [self._to_search_result(result) for result in results]
             facets = {}
             
-            for result in results:
-                # Créer un objet SearchResult
-                search_result = SearchResult(
-                    id=result.get("id", ""),
-                    title=result.get("title", "Sans titre"),
-                    content=result.get("content", ""),
-                    source=result.get("source", "Unknown"),
-                    score=result.get("@search.score", 0.0),
-                    metadata={
-                        "document_type": result.get("document_type", ""),
-                        "date": result.get("date", ""),
-                        "parties": result.get("parties", []),
-                        "infractions": result.get("infractions", []),
-                        "reference": result.get("reference", "")
-                    }
-                )
-                
-                # Ajouter les highlights si disponibles
-                if "@search.highlights" in result:
-                    highlights = []
-                    for field, values in result["@search.highlights"].items():
-                        highlights.extend(values)
-                    search_result.highlights = highlights
-                
-                search_results.append(search_result)
-            
             # Récupérer les facettes si disponibles
-            if hasattr(results, "facets") and results.facets:
-                facets = dict(results.facets)
+            if hasattr(results, "get_facets") and results.get_facets():
+                facets = dict(results.get_facets())
             
             # Récupérer le nombre total si disponible
             total_count = 0
@@ -334,6 +399,262 @@ class AzureSearchManager:
                 "error": str(e)
             }
     
+    # ========== API ASYNCHRONE ==========
+    
+    @asynccontextmanager
+    async def _async_client_lease(self):
+        """
+        Client aio partagé par les appels en cours sur la boucle courante.
+        
+        Les appels concurrents (``gather``) se partagent un seul pool de
+        connexions (session aiohttp) ; le dernier appel à se terminer le ferme,
+        avant l'arrêt de la boucle (chaque ``asyncio.run`` de Streamlit crée
+        une nouvelle boucle, où un pool abandonné ne pourrait plus être fermé).
+        Sans SDK aio, ne fournit aucun client (None).
+        """
+        if not ASYNC_SEARCH_AVAILABLE:
+            yield None
+            return
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            entry = self._async_clients[loop] = self._open_async_client()
+        entry['users'] += 1
+        try:
+            yield entry['client']
+        finally:
+            entry['users'] -= 1
+            if entry['users'] == 0 and self._async_clients.get(loop) is entry:
+                del self._async_clients[loop]
+                await self._close_async_client(entry)
+    
+    def _open_async_client(self) -> Dict[str, Any]:
+        connector = aiohttp.TCPConnector(limit=self.ASYNC_POOL_SIZE)
+        session = aiohttp.ClientSession(connector=connector)
+        transport = AioHttpTransport(session=session, session_owner=False)
+        client = AsyncSearchClient(
+            endpoint=self.endpoint,
+            index_name=self.index_name,
+            credential=AzureKeyCredential(self.key),
+            transport=transport
+        )
+        return {'client': client, 'session': session, 'users': 0}
+    
+    @staticmethod
+    async def _close_async_client(entry: Dict[str, Any]):
+        try:
+            await entry['client'].close()
+        finally:
+            await entry['session'].close()
+    
+    async def aclose(self):
+        """Ferme le client asynchrone de la boucle courante, même si des appels l'utilisent encore"""
+        entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await self._close_async_client(entry)
+    
+    async def asearch(self, query: str, filters: Optional[Dict] = None,
+                      top: int = 50, skip: int = 0,
+                      include_total_count: bool = True,
+                      search_mode: str = "any",
+                      query_type: str = "simple",
+                      use_semantic_search: bool = False,
+                      filter_string: Optional[str] = None,
+                      select: Optional[Sequence[str]] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Variante asynchrone de :meth:`search` (mêmes paramètres et même retour)
+        
+        N'occupe pas la boucle d'événements : elle utilise le SDK aio et le pool
+        partagé, ou à défaut la recherche synchrone dans un thread. L'annulation
+        de la tâche appelante interrompt la requête en cours.
+        
+        Args:
+            timeout: Délai maximal en secondes (DEFAULT_TIMEOUT par défaut)
+        """
+        if not self.is_connected():
+            return {
+                "results": [],
+                "total_count": 0,
+                "error": self.connection_error or "Client de recherche non initialisé"
+            }
+        
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        
+        if not ASYNC_SEARCH_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            call = loop.run_in_executor(
+                None,
+                lambda: self.search(query, filters, top, skip, include_total_count,
+                                    search_mode, query_type, use_semantic_search, filter_string, select)
+            )
+            try:
+                return await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Recherche Azure expirée après {timeout}s")
+                return {"results": [], "total_count": 0, "error": "timeout"}
+        
+        search_params = self._build_search_params(
+            query, filters, filter_string, top, skip,
+            include_total_count, search_mode, query_type, use_semantic_search, select
+        )
+        
+        async def _run():
+            async with self._async_client_lease() as client:
+                results = await client.search(**search_params)
+                search_results = [self._to_search_result(result) async for result in results]
+                facets = await results.get_facets() or {}
+                total_count = await results.get_count() if include_total_count else None
+            return {
+                "results": search_results,
+                "total_count": total_count or len(search_results),
+                "facets": dict(facets),
+                "query": query,
+                "filters": filters
+            }
+        
+        try:
+            return await asyncio.wait_for(_run(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Recherche Azure expirée après {timeout}s")
+            return {"results": [], "total_count": 0, "error": "timeout"}
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche asynchrone: {e}")
+            return {"results": [], "total_count": 0, "error": str(e)}
+    
+    async def iter_search(self, query: str, filters: Optional[Dict] = None,
+                          filter_string: Optional[str] = None,
+                          select: Optional[Sequence[str]] = None,
+                          page_size: Optional[int] = None,
+                          max_results: Optional[int] = None,
+                          search_mode: str = "any",
+                          query_type: str = "simple",
+                          timeout: Optional[float] = None) -> AsyncIterator[SearchResult]:
+        """
+        Parcourt les résultats page par page (générateur asynchrone)
+        
+        Chaque page n'est demandée qu'une fois la précédente consommée : le
+        premier résultat est disponible dès la première page et l'appelant
+        peut s'arrêter à tout moment. Par défaut seuls les champs de
+        SUMMARY_FIELDS sont récupérés ; le contenu s'obtient ensuite pour les
+        meilleurs résultats avec :meth:`afetch_content`.
+        
+        Args:
+            select: Champs à récupérer (SUMMARY_FIELDS par défaut)
+            page_size: Résultats par page (PAGE_SIZE par défaut)
+            max_results: Nombre maximal de résultats produits
+            timeout: Délai maximal par page en secondes
+        """
+        if not self.is_connected():
+            return
+        
+        select = self.SUMMARY_FIELDS if select is None else select
+        page_size = page_size or self.PAGE_SIZE
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        produced = 0
+        skip = 0
+        
+        # Un seul pool pour toutes les pages, fermé quand le parcours se termine ou est abandonné
+        async with self._async_client_lease():
+            while max_results is None or produced < max_results:
+                top = page_size if max_results is None else min(page_size, max_results - produced)
+                try:
+                    page = await asyncio.wait_for(
+                        self._fetch_page(query, filters, filter_string, select, top, skip,
+                                         search_mode, query_type),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Page de résultats Azure expirée après {timeout}s (skip={skip})")
+                    return
+                except Exception as e:
+                    logger.error(f"Erreur lors du parcours des résultats: {e}")
+                    return
+            
+                for result in page:
+                    yield result
+                produced += len(page)
+                skip += len(page)
+            
+                # Page incomplète : plus rien à lire
+                if len(page) < top:
+                    return
+    
+    async def _fetch_page(self, query: str, filters: Optional[Dict], filter_string: Optional[str],
+                          select: Optional[Sequence[str]], top: int, skip: int,
+                          search_mode: str, query_type: str) -> List[SearchResult]:
+        """Récupère une page de résultats"""
+        if not ASYNC_SEARCH_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None,
+                lambda: self.search(query, filters, top, skip, False, search_mode,
+                                    query_type, False, filter_string, select)
+            )
+            if response.get("error"):
+                raise RuntimeError(response["error"])
+            return response["results"]
+        
+        search_params = self._build_search_params(
+            query, filters, filter_string, top, skip, False,
+            search_mode, query_type, False, select
+        )
+        async with self._async_client_lease() as client:
+            results = await client.search(**search_params)
+            return [self._to_search_result(result) async for result in results]
+    
+    async def afetch_content(self, results: List[SearchResult],
+                             fields: Sequence[str] = ("content",),
+                             timeout: Optional[float] = None) -> List[SearchResult]:
+        """
+        Complète des résultats partiels avec les champs manquants (contenu)
+        
+        Les documents sont lus en parallèle sur le pool de connexions. Un
+        document introuvable ou en erreur garde ses valeurs actuelles.
+        
+        Returns:
+            Les mêmes résultats, complétés sur place
+        """
+        if not results or not self.is_connected():
+            return results
+        
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        fields = list(fields)
+        
+        if ASYNC_SEARCH_AVAILABLE:
+            async def _get(key):
+                # Lectures parallèles : elles partagent le même pool
+                async with self._async_client_lease() as client:
+                    return await client.get_document(key=key, selected_fields=fields)
+        else:
+            loop = asyncio.get_running_loop()
+            
+            async def _get(key):
+                return await loop.run_in_executor(
+                    None, lambda: self.search_client.get_document(key=key, selected_fields=fields)
+                )
+        
+        try:
+            documents = await asyncio.wait_for(
+                asyncio.gather(*(_get(result.id) for result in results), return_exceptions=True),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Récupération du contenu expirée après {timeout}s")
+            return results
+        
+        for result, document in zip(results, documents):
+            if isinstance(document, Exception):
+                logger.warning(f"Contenu indisponible pour {result.id}: {document}")
+                continue
+            for field_name in fields:
+                if field_name in document:
+                    if hasattr(result, field_name):
+                        setattr(result, field_name, document[field_name])
+                    else:
+                        result.metadata[field_name] = document[field_name]
+        return results
+    
     def index_document(self, document: Dict[str, Any]) -> bool:
         """
         Indexe un document dans Azure Search
@@ -350,22 +671,7 @@ class AzureSearchManager:
         
         try:
             # Valider et préparer le document
-            doc_to_index = {
-                "id": document.get("id", ""),
-                "title": document.get("title", ""),
-                "content": document.get("content", ""),
-                "source": document.get("source", ""),
-                "document_type": document.get("document_type", "unknown"),
-                "date": document.get("date", datetime.now().isoformat()),
-                "parties": document.get("parties", []),
-                "infractions": document.get("infractions", []),
-                "reference": document.get("reference", ""),
-                "metadata": json.dumps(document.get("metadata", {}))
-            }
-            
-            # Ajouter le vecteur si fourni
-            if "content_vector" in document:
-                doc_to_index["content_vector"] = document["content_vector"]
+            doc_to_index = self._prepare_document(document)
             
             # Indexer le document
             result = self.search_client.upload_documents(documents=[doc_to_index])
@@ -381,67 +687,82 @@ class AzureSearchManager:
             logger.error(f"Erreur lors de l'indexation: {e}")
             return False
     
-    def index_documents_batch(self, documents: List[Dict[str, Any]], 
-                            batch_size: int = 100) -> Tuple[int, int]:
+    @staticmethod
+    def _prepare_document(document: Dict[str, Any]) -> Dict[str, Any]:
+        """Met un document au format de l'index"""
+        doc_to_index = {
+            "id": document.get("id", ""),
+            "title": document.get("title", ""),
+            "content": document.get("content", ""),
+            "source": document.get("source", ""),
+            "document_type": document.get("document_type", "unknown"),
+            "date": document.get("date", datetime.now().isoformat()),
+            "parties": document.get("parties", []),
+            "infractions": document.get("infractions", []),
+            "reference": document.get("reference", ""),
+            "metadata": json.dumps(document.get("metadata", {}))
+        }
+        
+        # Ajouter le vecteur si fourni
+        if "content_vector" in document:
+            doc_to_index["content_vector"] = document["content_vector"]
+        
+        return doc_to_index
+    
+    def _upload_batch(self, batch: List[Dict[str, Any]]) -> List[Tuple[str, bool, int]]:
+        """Envoie un lot et retourne le statut de chaque document"""
+        results = self.search_client.upload_documents(documents=batch)
+        return [(result.key, result.succeeded, result.status_code) for result in results]
+    
+    def index_documents_batch(self, documents: Iterable[Dict[str, Any]], 
+                            batch_size: int = 1000,
+                            max_in_flight: int = 4,
+                            max_batch_bytes: int = 4 * 1024 * 1024,
+                            max_retries: int = 5) -> Tuple[int, int]:
         """
-        Indexe plusieurs documents par batch
+        Indexe plusieurs documents par lots parallèles
+        
+        Les lots sont dimensionnés selon leur volume et envoyés en parallèle ;
+        en cas de réponse partielle (207) ou de limitation (503), seuls les
+        documents en échec sont renvoyés après un délai croissant. Le détail
+        est disponible via :meth:`get_indexing_stats`.
         
         Args:
-            documents: Liste de documents à indexer
-            batch_size: Taille des batchs
+            documents: Documents à indexer (liste ou générateur)
+            batch_size: Nombre maximal de documents par lot
+            max_in_flight: Nombre maximal de lots envoyés simultanément
+            max_batch_bytes: Volume visé par lot (ajusté en cours d'envoi)
+            max_retries: Nombre maximal de nouvelles tentatives par document
             
         Returns:
             Tuple (nombre de succès, nombre d'échecs)
         """
         if not self.search_client:
             logger.error("Client de recherche non initialisé")
-            return 0, len(documents)
+            count = len(documents) if hasattr(documents, "__len__") else 0
+            return 0, count
         
-        success_count = 0
-        failure_count = 0
+        indexer = BulkIndexer(
+            self._upload_batch,
+            max_in_flight=max_in_flight,
+            max_batch_docs=batch_size,
+            target_bytes=max_batch_bytes,
+            max_retries=max_retries
+        )
+        stats = indexer.run(self._prepare_document(doc) for doc in documents)
+        self.last_indexing_stats = stats
         
-        # Traiter par batch
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            try:
-                # Préparer les documents
-                docs_to_index = []
-                for doc in batch:
-                    doc_to_index = {
-                        "id": doc.get("id", ""),
-                        "title": doc.get("title", ""),
-                        "content": doc.get("content", ""),
-                        "source": doc.get("source", ""),
-                        "document_type": doc.get("document_type", "unknown"),
-                        "date": doc.get("date", datetime.now().isoformat()),
-                        "parties": doc.get("parties", []),
-                        "infractions": doc.get("infractions", []),
-                        "reference": doc.get("reference", ""),
-                        "metadata": json.dumps(doc.get("metadata", {}))
-                    }
-                    
-                    if "content_vector" in doc:
-                        doc_to_index["content_vector"] = doc["content_vector"]
-                    
-                    docs_to_index.append(doc_to_index)
-                
-                # Indexer le batch
-                results = self.search_client.upload_documents(documents=docs_to_index)
-                
-                # Compter les succès et échecs
-                for result in results:
-                    if result.succeeded:
-                        success_count += 1
-                    else:
-                        failure_count += 1
-                        
-            except Exception as e:
-                logger.error(f"Erreur lors de l'indexation du batch: {e}")
-                failure_count += len(batch)
-        
-        logger.info(f"Indexation terminée: {success_count} succès, {failure_count} échecs")
-        return success_count, failure_count
+        logger.info(
+            f"Indexation terminée: {stats.succeeded} succès, {stats.failed} échecs "
+            f"({stats.docs_per_second:.0f} docs/s, {stats.retried} reprises)"
+        )
+        return stats.succeeded, stats.failed
+    
+    def get_indexing_stats(self) -> Dict[str, Any]:
+        """Statistiques de la dernière indexation par lots"""
+        if self.last_indexing_stats is None:
+            return {}
+        return self.last_indexing_stats.to_dict()
     
     def delete_document(self, document_id: str) -> bool:
         """
@@ -463,6 +784,26 @@ class AzureSearchManager:
             logger.error(f"Erreur lors de la suppression: {e}")
             return False
     
+    def delete_documents_batch(self, document_ids: List[str]) -> Tuple[int, int]:
+        """
+        Supprime plusieurs documents de l'index en une requête
+        
+        Returns:
+            Tuple (nombre de succès, nombre d'échecs)
+        """
+        if not self.search_client or not document_ids:
+            return 0, len(document_ids)
+        
+        try:
+            results = self.search_client.delete_documents(
+                documents=[{"id": document_id} for document_id in document_ids]
+            )
+            succeeded = sum(1 for result in results if result.succeeded)
+            return succeeded, len(document_ids) - succeeded
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression par lot: {e}")
+            return 0, len(document_ids)
+    
     def get_document_count(self) -> int:
         """Retourne le nombre total de documents dans l'index"""
         if not self.search_client:
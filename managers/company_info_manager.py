@@ -5,8 +5,7 @@ import asyncio
 import json
 import logging
 import re
-from dataclasses import asdict
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
@@ -22,6 +21,10 @@ import streamlit as st
 from models.dataclasses import (InformationEntreprise, Partie, PhaseProcedure,
                                 SourceEntreprise, StatutProcedural, TypePartie,
                                 create_partie_from_name_with_lookup)
+from utils.company_cache import get_company_cache
+
+# Type des fiches InformationEntreprise dans le cache partagé
+CACHE_KIND = 'information_entreprise'
 
 
 class CompanyInfoManager:
@@ -29,8 +32,8 @@ class CompanyInfoManager:
     
     def __init__(self):
         self.pappers_api_key = st.secrets.get("PAPPERS_API_KEY", "")
-        self.cache = {}  # Cache en mémoire
-        self.cache_duration = timedelta(days=7)  # Cache valide 7 jours
+        # Cache entreprises partagé avec CompanyInfoService (7 jours)
+        self.cache = get_company_cache()
         
         # Session HTTP
         self.session = httpx.AsyncClient(
@@ -65,11 +68,12 @@ class CompanyInfoManager:
         """
         # Vérifier le cache
         cache_key = f"{company_name.lower()}_{source_preference.value}"
-        if not force_refresh and cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if datetime.now() - cached['timestamp'] < self.cache_duration:
+        if not force_refresh:
+            cached = (self.cache.get(cache_key)
+                      or self.cache.get_by_name(company_name, CACHE_KIND))
+            if cached:
                 logger.info(f"Utilisation du cache pour {company_name}")
-                return cached['data']
+                return cached
         
         # Essayer la source préférée d'abord
         info = None
@@ -92,10 +96,7 @@ class CompanyInfoManager:
         
         # Mettre en cache si trouvé
         if info:
-            self.cache[cache_key] = {
-                'data': info,
-                'timestamp': datetime.now()
-            }
+            self.cache.set(cache_key, info, CACHE_KIND, siren=info.siren, name=info.denomination)
             logger.info(f"Informations trouvées et mises en cache pour {company_name}")
         
         return info
@@ -695,20 +696,16 @@ class CompanyInfoManager:
         return output.getvalue()
     
     def save_cache(self, filepath: str = "company_cache.json"):
-        """Sauvegarde le cache dans un fichier"""
-        cache_data = {}
-        
-        for key, value in self.cache.items():
-            cache_data[key] = {
-                'data': asdict(value['data']),
-                'timestamp': value['timestamp'].isoformat()
-            }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        """
+        Compacte le cache partagé.
+
+        Les entrées sont écrites au fil de l'eau : ``filepath`` n'est plus
+        utilisé et reste accepté pour les appels existants.
+        """
+        self.cache.compact()
     
     def load_cache(self, filepath: str = "company_cache.json"):
-        """Charge le cache depuis un fichier"""
+        """Reprend dans le cache partagé un ancien fichier de cache JSON"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 cache_data = json.load(f)
@@ -725,12 +722,11 @@ class CompanyInfoManager:
                 if info_dict.get('source'):
                     info_dict['source'] = SourceEntreprise(info_dict['source'])
                 
-                self.cache[key] = {
-                    'data': InformationEntreprise(**info_dict),
-                    'timestamp': datetime.fromisoformat(value['timestamp'])
-                }
+                info = InformationEntreprise(**info_dict)
+                self.cache.set(key, info, CACHE_KIND, siren=info.siren, name=info.denomination,
+                               created=datetime.fromisoformat(value['timestamp']).timestamp())
             
-            logger.info(f"Cache chargé: {len(self.cache)} entreprises")
+            logger.info(f"Cache chargé: {len(cache_data)} entreprises")
         except FileNotFoundError:
             logger.info("Aucun fichier de cache trouvé")
         except Exception as e:
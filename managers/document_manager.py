@@ -9,14 +9,17 @@ import logging
 import os
 import re
 import uuid
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import openpyxl
 import pandas as pd
-import PyPDF2
 import streamlit as st
 # Import des bibliothèques de traitement de documents
 from docx import Document
@@ -33,6 +36,11 @@ from managers.llm_manager import LLMManager
 from managers.template_manager import TemplateManager
 # Utils
 from utils import generate_document_summary
+from utils.document_store import IMPORT_DOSSIER, DocumentHandle, get_document_store
+from utils.minhash import LSHIndex
+from utils.pdf_extraction import PageIndex, extract_pdf
+from utils.search_index import content_signature
+from utils.token_budget import TRUNCATE, PromptPart, TokenBudgeter
 # CORRECTION : Import depuis modules au lieu de models
 from modules.dataclasses import (AnalyseJuridique, CasJuridique,
                                  DocumentJuridique)
@@ -41,6 +49,36 @@ from modules.dataclasses import (AnalyseJuridique, CasJuridique,
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokens réservés à la réponse (max_tokens par défaut de LLMManager.generate)
+PROMPT_RESPONSE_TOKENS = 4000
+
+# Processus d'extraction pour les imports en lot
+IMPORT_WORKERS = min(4, os.cpu_count() or 1)
+# Formats dont l'analyse (coûteuse en CPU) est confiée au pool de processus
+PROCESS_POOL_FORMATS = ('.pdf', '.docx', '.xlsx')
+
+
+def _release_imports(documents: List[Dict[str, Any]]):
+    """Retire du stockage les références tenues par une liste d'imports"""
+    for document in documents:
+        handle = document.get('handle')
+        if handle is not None:
+            handle.release()
+
+
+def _import_key(handle: DocumentHandle) -> str:
+    """Identifiant d'un import : sa référence dans le stockage, unique même entre homonymes"""
+    return handle.ref or handle.digest
+
+
+def _extract_upload(task: Tuple[str, bytes]) -> Tuple[Optional[str], Optional[str]]:
+    """Travail exécuté dans le pool : (texte, None) ou (None, erreur)"""
+    name, data = task
+    try:
+        return DocumentManager._extract_content(io.BytesIO(data), Path(name).suffix.lower()), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
 class DocumentManager:
     """Gestionnaire centralisé pour tous les documents juridiques"""
     
@@ -63,6 +101,12 @@ class DocumentManager:
         # Stockage local
         self.imported_documents = []
         self.processed_texts = []
+        self._duplicate_index = LSHIndex()
+        # Contenus rangés une fois par empreinte, partagés entre dossiers et sessions
+        self.document_store = get_document_store()
+        self._signatures: Dict[str, Any] = {}
+        # Session terminée (gestionnaire libéré) : ses imports ne retiennent plus leur contenu
+        weakref.finalize(self, _release_imports, self.imported_documents)
         
         # Mapping des types de documents
         self.document_types = {
@@ -77,71 +121,228 @@ class DocumentManager:
     
     # ========== MÉTHODES D'IMPORT ==========
     
-    def import_document(self, file) -> Tuple[bool, str, str]:
+    def import_document(self, file, dossier: Optional[str] = None) -> Tuple[bool, str, str]:
         """
         Importe un document et extrait son contenu
         Retourne: (succès, contenu, message)
         """
+        handle = None
         try:
             file_extension = Path(file.name).suffix.lower()
             
             if file_extension not in self.SUPPORTED_FORMATS['import']:
                 return False, "", f"Format non supporté: {file_extension}"
             
-            # Traitement selon le type
-            if file_extension == '.pdf':
-                content = self._extract_pdf_content(file)
-            elif file_extension == '.docx':
-                content = self._extract_docx_content(file)
-            elif file_extension == '.txt':
-                content = str(file.read(), 'utf-8')
-            elif file_extension == '.json':
-                content = self._extract_json_content(file)
-            elif file_extension in ['.xlsx', '.csv']:
-                content = self._extract_table_content(file, file_extension)
-            else:
-                return False, "", "Format non reconnu"
-            
-            # Stocker le document importé
-            self.imported_documents.append({
-                'filename': file.name,
-                'content': content,
-                'import_date': datetime.now(),
-                'size': file.size
-            })
+            data = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+            handle = self.document_store.put(data, file.name, dossier or IMPORT_DOSSIER)
+            # Une pièce déjà importée (ici ou dans un autre dossier) n'est pas réanalysée
+            content = self.document_store.text_for(
+                handle.digest, lambda raw: self._extract_content(io.BytesIO(raw), file_extension)
+            )
+            self._register_import(handle, content)
             
             return True, content, f"Document '{file.name}' importé avec succès"
             
         except Exception as e:
             logger.error(f"Erreur import document: {e}")
+            # Import abandonné : aucune liste ne retient cette référence
+            if handle is not None:
+                handle.release()
             return False, "", f"Erreur lors de l'import: {str(e)}"
     
-    def batch_import(self, files: List) -> Dict[str, Any]:
-        """Import en lot de plusieurs documents"""
+    def _register_import(self, handle: DocumentHandle, content: str):
+        """Enregistre un document extrait (index des doublons et liste des imports)"""
+        # Signature MinHash calculée une fois par contenu pour repérer les doublons
+        signature = self._signatures.get(handle.digest)
+        if signature is None:
+            signature = self._signatures[handle.digest] = content_signature(content)
+        # Clé propre à l'import : deux fichiers homonymes ne s'écrasent pas
+        self._duplicate_index.insert(_import_key(handle), signature)
+        
+        # Le texte reste dans le stockage : la poignée suffit
+        document = {
+            'filename': handle.name,
+            'handle': handle,
+            'digest': handle.digest,
+            'import_date': datetime.now(),
+            'size': handle.size,
+            'signature': signature
+        }
+        if handle.name.lower().endswith('.pdf'):
+            # Pour renvoyer un passage trouvé vers sa page
+            document['page_index'] = PageIndex.from_text(content)
+        self.imported_documents.append(document)
+    
+    def iter_batch_import(self, files: List, workers: Optional[int] = None,
+                          dossier: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Importe plusieurs documents en parallèle et rend chaque résultat dès
+        qu'il est prêt (ordre d'achèvement, ``index`` = rang dans ``files``).
+        
+        Chaque contenu n'est analysé qu'une fois : les pièces déjà présentes
+        dans le stockage, ou en double dans le lot, reprennent le texte
+        extrait. L'analyse des PDF, DOCX et XLSX est confiée à un pool de
+        processus ; les formats légers sont lus sur place pendant ce temps.
+        """
+        workers = IMPORT_WORKERS if workers is None else workers
+        tasks = []
+        # Empreinte -> fichiers du lot ayant ce contenu (le premier est analysé)
+        same_content: Dict[str, List[Tuple[int, str, bytes, DocumentHandle]]] = {}
+        for index, file in enumerate(files):
+            extension = Path(file.name).suffix.lower()
+            if extension not in self.SUPPORTED_FORMATS['import']:
+                yield self._import_result(index, file.name, 0, None, f"Format non supporté: {extension}")
+                continue
+            data = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+            handle = self.document_store.put(data, file.name, dossier or IMPORT_DOSSIER)
+            task = (index, file.name, data, handle)
+            cached = self.document_store.read_text(handle.digest)
+            if cached is not None:
+                yield self._finish_import(task, cached, None)
+            elif handle.digest in same_content:
+                same_content[handle.digest].append(task)
+            else:
+                same_content[handle.digest] = [task]
+                tasks.append(task)
+        
+        for task, content, error in self._extract_tasks(tasks, workers):
+            for same in same_content[task[3].digest]:
+                yield self._finish_import(same, content, error)
+    
+    def _extract_tasks(self, tasks: List[Tuple[int, str, bytes, DocumentHandle]],
+                       workers: int) -> Iterator[Tuple[Tuple[int, str, bytes, DocumentHandle], Optional[str], Optional[str]]]:
+        """(tâche, texte, erreur) dans l'ordre d'achèvement"""
+        pooled = [task for task in tasks if Path(task[1]).suffix.lower() in PROCESS_POOL_FORMATS]
+        local = [task for task in tasks if Path(task[1]).suffix.lower() not in PROCESS_POOL_FORMATS]
+        if workers <= 1 or len(pooled) <= 1:
+            local, pooled = tasks, []
+        
+        executor = None
+        if pooled:
+            try:
+                executor = ProcessPoolExecutor(max_workers=min(workers, len(pooled)))
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Pool de processus indisponible, import séquentiel: {e}")
+                local, pooled = tasks, []
+        
+        try:
+            pending = {}
+            queue = deque(pooled)
+            window = workers * 2
+            
+            def submit():
+                while executor and queue and len(pending) < window:
+                    task = queue.popleft()
+                    pending[executor.submit(_extract_upload, task[1:3])] = task
+            
+            submit()
+            for task in local:
+                yield (task, *_extract_upload(task[1:3]))
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool:
+                        # Processus tué (mémoire) : la suite est extraite ici
+                        if executor:
+                            logger.warning("Pool de processus interrompu, fin de l'import en séquentiel")
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            executor = None
+                        outcome = _extract_upload(task[1:3])
+                    yield (task, *outcome)
+                if executor is None:
+                    queue.extendleft(reversed(list(pending.values())))
+                    pending.clear()
+                submit()
+            while queue:
+                task = queue.popleft()
+                yield (task, *_extract_upload(task[1:3]))
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _finish_import(self, task: Tuple[int, str, bytes, DocumentHandle], content: Optional[str],
+                       error: Optional[str]) -> Dict[str, Any]:
+        index, filename, data, handle = task
+        if error is None:
+            if self.document_store.read_text(handle.digest) is None:
+                self.document_store.write_text(handle.digest, content)
+            self._register_import(handle, content)
+        else:
+            logger.error(f"Erreur import document {filename}: {error}")
+            handle.release()
+            error = f"Erreur lors de l'import: {error}"
+        return self._import_result(index, filename, len(data), content, error)
+    
+    @staticmethod
+    def _import_result(index: int, filename: str, size: int, content: Optional[str],
+                       error: Optional[str]) -> Dict[str, Any]:
+        return {
+            'index': index,
+            'filename': filename,
+            'size': size,
+            'success': error is None,
+            'content': content or "",
+            'message': error or f"Document '{filename}' importé avec succès",
+        }
+    
+    def batch_import(self, files: List, workers: Optional[int] = None,
+                     progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                     dossier: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Import en lot de plusieurs documents (en parallèle)
+        
+        Args:
+            files: Fichiers téléversés
+            workers: Processus d'extraction (IMPORT_WORKERS par défaut)
+            progress: Appelé après chaque fichier avec (traités, total, résultat)
+            dossier: Dossier de rattachement dans le stockage (IMPORT_DOSSIER par défaut)
+        """
         results = {
             'success': [],
             'failed': [],
             'total_content': ""
         }
+        # Contenus rangés dans l'ordre des fichiers, assemblés une seule fois
+        parts: List[Optional[str]] = [None] * len(files)
         
-        for file in files:
-            success, content, message = self.import_document(file)
-            
-            if success:
+        for done, result in enumerate(self.iter_batch_import(files, workers, dossier), 1):
+            if result['success']:
                 results['success'].append({
-                    'filename': file.name,
-                    'message': message,
-                    'content_length': len(content)
+                    'filename': result['filename'],
+                    'message': result['message'],
+                    'content_length': len(result['content'])
                 })
-                results['total_content'] += f"\n\n--- {file.name} ---\n{content}"
+                parts[result['index']] = f"\n\n--- {result['filename']} ---\n{result['content']}"
             else:
                 results['failed'].append({
-                    'filename': file.name,
-                    'error': message
+                    'filename': result['filename'],
+                    'error': result['message']
                 })
+            if progress:
+                progress(done, len(files), result)
         
+        results['total_content'] = "".join(part for part in parts if part)
         return results
     
+    def find_duplicates(self, threshold: float = 0.85) -> List[List[str]]:
+        """
+        Regroupe les documents importés dont le contenu est quasi identique
+        
+        Returns:
+            Groupes de noms de fichiers (signatures MinHash + LSH)
+        """
+        names = {
+            _import_key(doc['handle']): doc['filename']
+            for doc in self.imported_documents if doc.get('handle') is not None
+        }
+        return [
+            [names.get(key, key) for key in group]
+            for group in self._duplicate_index.duplicate_groups(threshold)
+        ]
+    
     # ========== MÉTHODES DE CRÉATION DE DOCUMENTS JURIDIQUES ==========
     
     def creer_document(self, 
@@ -336,22 +537,34 @@ class DocumentManager:
     
     # ========== MÉTHODES D'EXTRACTION DE CONTENU ==========
     
-    def _extract_pdf_content(self, file) -> str:
+    @staticmethod
+    def _extract_content(file, extension: str) -> str:
+        """Extrait le texte d'un fichier selon son extension"""
+        if extension == '.pdf':
+            return DocumentManager._extract_pdf_content(file)
+        if extension == '.docx':
+            return DocumentManager._extract_docx_content(file)
+        if extension == '.txt':
+            return str(file.read(), 'utf-8')
+        if extension == '.json':
+            return DocumentManager._extract_json_content(file)
+        if extension in ['.xlsx', '.csv']:
+            return DocumentManager._extract_table_content(file, extension)
+        raise ValueError(f"Format non reconnu: {extension}")
+    
+    @staticmethod
+    def _extract_pdf_content(file) -> str:
         """Extrait le texte d'un PDF"""
         try:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                text += f"\n--- Page {page_num + 1} ---\n"
-                text += page.extract_text()
-                
-            return text.strip()
+            # Pages lues au fil de l'eau (par lots parallèles pour les gros fichiers)
+            with extract_pdf(file) as pdf_text:
+                return pdf_text.read()
         except Exception as e:
             logger.error(f"Erreur extraction PDF: {e}")
             raise
     
-    def _extract_docx_content(self, file) -> str:
+    @staticmethod
+    def _extract_docx_content(file) -> str:
         """Extrait le texte d'un DOCX"""
         try:
             doc = Document(file)
@@ -371,7 +584,8 @@ class DocumentManager:
             logger.error(f"Erreur extraction DOCX: {e}")
             raise
     
-    def _extract_json_content(self, file) -> str:
+    @staticmethod
+    def _extract_json_content(file) -> str:
         """Extrait et formate le contenu JSON"""
         try:
             data = json.load(file)
@@ -380,7 +594,8 @@ class DocumentManager:
             logger.error(f"Erreur extraction JSON: {e}")
             raise
     
-    def _extract_table_content(self, file, extension: str) -> str:
+    @staticmethod
+    def _extract_table_content(file, extension: str) -> str:
         """Extrait le contenu d'un fichier tabulaire"""
         try:
             if extension == '.csv':
@@ -685,17 +900,8 @@ class DocumentManager:
         return contexte_enrichi
     
     def _construire_prompt(self, type_doc: str, contexte: Dict, template: str, style: str) -> str:
-        """Construit le prompt pour la génération LLM"""
-        prompt = f"""
-        Rédigez un(e) {self.document_types.get(type_doc, 'document juridique')} 
-        en respectant le style {style} et les informations suivantes:
-        
-        Contexte:
-        {json.dumps(contexte, indent=2, ensure_ascii=False)}
-        
-        Template de base:
-        {template}
-        
+        """Construit le prompt pour la génération LLM (contexte et template ajustés au budget de tokens)"""
+        instructions = f"""
         Instructions:
         - Respectez le formalisme juridique français
         - Utilisez un ton {style}
@@ -704,6 +910,24 @@ class DocumentManager:
         - Assurez la cohérence juridique
         """
         
+        # Provider choisi au moment de l'appel : fenêtre la plus petite par défaut
+        budget = TokenBudgeter(reserve_tokens=PROMPT_RESPONSE_TOKENS).fit([
+            PromptPart('instructions', instructions, required=True),
+            PromptPart('contexte', json.dumps(contexte, indent=2, ensure_ascii=False, default=str), priority=1),
+            PromptPart('template', str(template), priority=2, strategy=TRUNCATE),
+        ])
+        
+        prompt = f"""
+        Rédigez un(e) {self.document_types.get(type_doc, 'document juridique')} 
+        en respectant le style {style} et les informations suivantes:
+        
+        Contexte:
+        {budget['contexte']}
+        
+        Template de base:
+        {budget['template']}
+        {budget['instructions']}"""
+        
         return prompt
     
     def _generer_reference(self, type_doc: str) -> str:
@@ -818,6 +1042,13 @@ class DocumentManager:
         b64 = base64.b64encode(content).decode()
         return f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}">{text}</a>'
     
+    def clear_imports(self):
+        """Oublie les documents importés et libère leurs contenus dans le stockage"""
+        _release_imports(self.imported_documents)
+        self.imported_documents.clear()
+        self._duplicate_index = LSHIndex()
+        self.document_store.collect_garbage()
+    
     def get_import_stats(self) -> Dict[str, Any]:
         """Retourne des statistiques sur les imports"""
         if not self.imported_documents:
@@ -916,45 +1147,53 @@ def display_import_interface():
         doc_manager = st.session_state.doc_manager
         
         if st.button("🚀 Importer", type="primary"):
-            with st.spinner("Import en cours..."):
-                if process_option == "Fusionné":
-                    results = doc_manager.batch_import(uploaded_files)
+            progress_bar = st.progress(0.0, text="Import en cours...")
+            
+            def show_progress(done: int, total: int, result: Dict[str, Any]):
+                progress_bar.progress(done / total, text=f"{done}/{total} : {result['filename']}")
+            
+            if process_option == "Fusionné":
+                results = doc_manager.batch_import(uploaded_files, progress=show_progress)
+                progress_bar.empty()
+                
+                # Afficher les résultats
+                if results['success']:
+                    st.success(f"✅ {len(results['success'])} fichiers importés avec succès")
                     
-                    # Afficher les résultats
-                    if results['success']:
-                        st.success(f"✅ {len(results['success'])} fichiers importés avec succès")
+                    # Afficher le contenu fusionné
+                    with st.expander("Contenu importé", expanded=True):
+                        st.text_area(
+                            "Texte extrait",
+                            value=results['total_content'],
+                            height=400
+                        )
                         
-                        # Afficher le contenu fusionné
-                        with st.expander("Contenu importé", expanded=True):
+                    # Stocker dans session_state
+                    st.session_state['imported_content'] = results['total_content']
+                
+                if results['failed']:
+                    st.error(f"❌ {len(results['failed'])} échecs")
+                    for fail in results['failed']:
+                        st.caption(f"- {fail['filename']}: {fail['error']}")
+            else:
+                # Import individuel : chaque fichier est affiché dès qu'il est prêt
+                total = len(uploaded_files)
+                for done, result in enumerate(doc_manager.iter_batch_import(uploaded_files), 1):
+                    show_progress(done, total, result)
+                    content = result['content']
+                    
+                    if result['success']:
+                        st.success(f"✅ {result['message']}")
+                        with st.expander(f"Contenu de {result['filename']}"):
                             st.text_area(
                                 "Texte extrait",
-                                value=results['total_content'],
-                                height=400
+                                value=content[:1000] + "..." if len(content) > 1000 else content,
+                                height=200,
+                                key=f"content_{result['filename']}"
                             )
-                            
-                        # Stocker dans session_state
-                        st.session_state['imported_content'] = results['total_content']
-                    
-                    if results['failed']:
-                        st.error(f"❌ {len(results['failed'])} échecs")
-                        for fail in results['failed']:
-                            st.caption(f"- {fail['filename']}: {fail['error']}")
-                else:
-                    # Import individuel
-                    for file in uploaded_files:
-                        success, content, message = doc_manager.import_document(file)
-                        
-                        if success:
-                            st.success(f"✅ {message}")
-                            with st.expander(f"Contenu de {file.name}"):
-                                st.text_area(
-                                    "Texte extrait",
-                                    value=content[:1000] + "..." if len(content) > 1000 else content,
-                                    height=200,
-                                    key=f"content_{file.name}"
-                                )
-                        else:
-                            st.error(f"❌ {message}")
+                    else:
+                        st.error(f"❌ {result['message']}")
+                progress_bar.empty()
         
         # Statistiques
         if 'doc_manager' in st.session_state:
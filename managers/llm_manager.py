@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from utils.prompt_rewriter import rewrite_prompt
+from utils.rate_limiter import Priority
 
 # Import du gestionnaire multi-LLM
 from managers.multi_llm_manager import MultiLLMManager
@@ -20,6 +21,9 @@ from openai import OpenAI
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Providers essayés au plus par generate() quand aucun n'est imposé
+MAX_ROUTED_ATTEMPTS = 2
+
 class LLMManager:
     """
     Gestionnaire LLM unifié qui peut utiliser MultiLLMManager ou des providers directs
@@ -76,7 +80,9 @@ class LLMManager:
         system_prompt: str = "Tu es un assistant juridique expert en droit français.",
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        provider: Optional[str] = None
+        provider: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        use_cache: Optional[bool] = None
     ) -> str:
         """
         Génère une réponse en utilisant le LLM
@@ -86,7 +92,10 @@ class LLMManager:
             system_prompt: Le prompt système
             temperature: Température de génération
             max_tokens: Nombre max de tokens
-            provider: Provider spécifique à utiliser
+            provider: Provider spécifique à utiliser (sinon choisi par le routeur
+                selon la santé et la latence des providers)
+            priority: Priorité de l'appel (Priority.BATCH pour les traitements de fond)
+            use_cache: Cache des réponses (None : seulement à température nulle)
             
         Returns:
             La réponse générée
@@ -96,19 +105,27 @@ class LLMManager:
         try:
             # Utiliser MultiLLMManager si disponible
             if self.multi_llm and (provider in self.multi_llm.get_available_providers() or not provider):
-                result = self.multi_llm.query_single_llm(
-                    provider or self.default_provider,
-                    prompt,
-                    system_prompt,
-                    temperature,
-                    max_tokens
-                )
-                
-                if result['success']:
-                    return result['response']
+                if provider:
+                    attempts = [provider]
                 else:
-                    logger.error(f"Erreur MultiLLM: {result.get('error')}")
-                    # Continuer avec fallback
+                    ranking = self.multi_llm.rank_providers(prompt, max_tokens)
+                    attempts = ranking[:MAX_ROUTED_ATTEMPTS] or [self.default_provider]
+                
+                for candidate in attempts:
+                    result = self.multi_llm.query_single_llm(
+                        candidate,
+                        prompt,
+                        system_prompt,
+                        temperature,
+                        max_tokens,
+                        priority,
+                        use_cache
+                    )
+                    
+                    if result['success']:
+                        return result['response']
+                    logger.error(f"Erreur MultiLLM ({candidate}): {result.get('error')}")
+                # Continuer avec fallback
             
             # Fallback sur Groq direct
             if self.groq_client and (provider == "groq" or not provider):
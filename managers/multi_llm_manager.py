@@ -6,11 +6,20 @@ import logging
 import os
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, contextmanager
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 import streamlit as st
 from utils.prompt_rewriter import rewrite_prompt
+from utils.llm_cache import get_llm_cache, make_cache_key
+from utils.llm_fusion import FUSION_TOKEN_BUDGET, dedupe_paragraphs, tree_fuse
+from utils.llm_policies import ALL, TIMED_OUT, QueryPolicy, arun_policy, as_policy, run_policy
+from utils.llm_router import get_llm_router
+from utils.llm_streaming import FakeStreamingLLM, LLMStream, StreamMetrics
+from utils.rate_limiter import Priority, RateLimitTimeout, estimate_tokens, get_llm_scheduler
+from utils.token_budget import fit_prompt
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -45,12 +54,60 @@ except ImportError:
         MISTRAL = "mistral"
         GROQ = "groq"
 
+# Pool partagé par toutes les instances pour les SDK uniquement synchrones
+# (et pour l'API synchrone parallèle) au lieu d'un pool créé à chaque appel
+_SYNC_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+
+# Correspondance des noms de providers
+PROVIDER_MAPPING = {
+    'openai': 'openai',
+    'anthropic': 'anthropic',
+    'anthropic_claude': 'anthropic',
+    'google': 'google',
+    'google_gemini': 'google',
+    'mistral': 'mistral',
+    'mistral_ai': 'mistral',
+    'groq': 'groq',
+    'azure_openai': 'azure_openai'
+}
+
+# Modèle interrogé pour chaque provider (Azure : nom du déploiement)
+PROVIDER_MODELS = {
+    'openai': 'gpt-4-turbo-preview',
+    'anthropic': 'claude-3-opus-20240229',
+    'google': 'gemini-pro',
+    'mistral': 'mistral-large-latest',
+    'groq': 'mixtral-8x7b-32768',
+    'fake': 'fake',
+}
+
+DEFAULT_SYSTEM_PROMPT = "Tu es un assistant juridique expert en droit pénal des affaires français."
+
+FUSION_INSTRUCTIONS = """Voici plusieurs analyses juridiques du même sujet par différents experts.
+Fusionne-les en gardant les meilleurs éléments de chaque analyse.
+Présente une synthèse structurée et complète.
+"""
+FUSION_SYSTEM_PROMPT = "Tu es un expert en synthèse juridique. Fusionne les analyses en gardant le meilleur de chaque."
+# Longueur maximale d'une synthèse intermédiaire (tokens)
+FUSION_MAX_TOKENS = 4000
+
+
 class MultiLLMManager:
     """Gestionnaire pour interroger plusieurs LLMs"""
     
     def __init__(self):
         self.clients = {}
         self._initialize_clients()
+        
+        # Débit et concurrence par fournisseur, partagés par toutes les sessions
+        self.scheduler = get_llm_scheduler()
+        # Réponses déjà obtenues, partagées par toutes les sessions
+        self.cache = get_llm_cache()
+        # Santé des providers (latences, erreurs, disjoncteurs)
+        self.router = get_llm_router()
+        
+        # Clients asynchrones par boucle, tant qu'un appel les utilise
+        self._async_clients: Dict[Any, Dict[str, Any]] = {}
 
     def register_model(self, name: str, client: Any) -> None:
         """Enregistre dynamiquement un client LLM."""
@@ -117,7 +174,7 @@ class MultiLLMManager:
         if os.getenv("GOOGLE_API_KEY"):
             try:
                 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-                self.clients["google"] = genai.GenerativeModel('gemini-pro')
+                self.clients["google"] = genai.GenerativeModel(PROVIDER_MODELS['google'])
                 logger.info("Google Gemini initialisé")
             except Exception as e:
                 logger.error(f"Erreur initialisation Google Gemini: {e}")
@@ -141,39 +198,30 @@ class MultiLLMManager:
                 logger.info("Groq initialisé")
             except Exception as e:
                 logger.error(f"Erreur initialisation Groq: {e}")
+        
+        # Fournisseur simulé (tests hors ligne)
+        if os.getenv("LLM_FAKE_PROVIDER"):
+            self.clients["fake"] = FakeStreamingLLM(delay=float(os.getenv("LLM_FAKE_DELAY", "0.02")))
+            logger.info("Fournisseur simulé initialisé")
     
     def query_single_llm(
         self, 
         provider: Any,  # Peut être string ou enum
         prompt: str,
-        system_prompt: str = "Tu es un assistant juridique expert en droit pénal des affaires français.",
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
         temperature: float = 0.7,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        priority: Priority = Priority.INTERACTIVE,
+        use_cache: Optional[bool] = None
     ) -> Dict[str, Any]:
-        """Interroge un LLM spécifique de manière synchrone"""
-        
-        # Normaliser le provider en string
-        if hasattr(provider, 'value'):
-            provider_name = provider.value
-            provider_key = provider.name.lower()
-        else:
-            provider_name = str(provider)
-            provider_key = provider_name.lower().replace(' ', '_')
+        """
+        Interroge un LLM spécifique de manière synchrone
         
-        # Mapping pour compatibilité
-        provider_mapping = {
-            'openai': 'openai',
-            'anthropic': 'anthropic',
-            'anthropic_claude': 'anthropic',
-            'google': 'google',
-            'google_gemini': 'google',
-            'mistral': 'mistral',
-            'mistral_ai': 'mistral',
-            'groq': 'groq',
-            'azure_openai': 'azure_openai'
-        }
+        ``use_cache`` : None met en cache les appels déterministes
+        (température nulle), True force le cache, False le contourne.
+        """
         
-        provider_key = provider_mapping.get(provider_key, provider_key)
+        provider_name, provider_key = self._normalize_provider(provider)
 
         if provider_key not in self.clients:
             return {
@@ -189,23 +237,24 @@ class MultiLLMManager:
 
             # Rewrite prompt for clarity
             prompt = rewrite_prompt(prompt)
+            # Ne pas dépasser la fenêtre de contexte du provider
+            prompt = fit_prompt(prompt, system_prompt, provider_key, max_tokens)
 
-            if provider_key == "openai" or provider_key == "azure_openai":
-                response = self._query_openai(provider_key, prompt, system_prompt, temperature, max_tokens)
-            elif provider_key == "anthropic":
-                response = self._query_claude(prompt, system_prompt, temperature, max_tokens)
-            elif provider_key == "google":
-                response = self._query_gemini(prompt, system_prompt, temperature, max_tokens)
-            elif provider_key == "mistral":
-                response = self._query_mistral(prompt, system_prompt, temperature, max_tokens)
-            elif provider_key == "groq":
-                response = self._query_groq(prompt, system_prompt, temperature, max_tokens)
-            else:
-                return {
-                    'success': False,
-                    'provider': provider_name,
-                    'error': f"Provider {provider_name} non implémenté"
-                }
+            cache_key = self._cache_key(provider_key, prompt, system_prompt, temperature, max_tokens, use_cache)
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return self._cached_result(provider_name, cached, start_time)
+
+            if not self.router.allow(provider_key):
+                return self._circuit_open_result(provider_name)
+
+            cost = estimate_tokens(system_prompt + prompt, max_tokens)
+            with self._probe_guard(provider_key), self.scheduler.slot(provider_key, cost, priority):
+                with self._track(provider_key, system_prompt + prompt) as call:
+                    response = call['response'] = self._query_provider(
+                        provider_key, prompt, system_prompt, temperature, max_tokens
+                    )
+            self._cache_store(cache_key, provider_key, prompt, system_prompt, response)
             
             elapsed_time = time.time() - start_time
             
@@ -224,16 +273,127 @@ class MultiLLMManager:
                 'error': str(e)
             }
     
+    @contextmanager
+    def _probe_guard(self, provider_key: str):
+        """
+        Entoure un appel autorisé par ``router.allow``. S'il n'aboutit pas au
+        provider (pas de créneau, annulation), l'appel de test réservé d'un
+        circuit semi-ouvert est libéré au lieu d'attendre un nouveau délai.
+        """
+        try:
+            yield
+        except BaseException:
+            self.router.release(provider_key)
+            raise
+    
+    @contextmanager
+    def _track(self, provider_key: str, sent_text: str):
+        """
+        Mesure un appel au provider pour le routeur. Le bloc renseigne
+        ``['response']`` ; une annulation n'est comptée ni en succès ni en échec.
+        """
+        call: Dict[str, Any] = {}
+        start = time.monotonic()
+        try:
+            yield call
+        except Exception:
+            self.router.record(provider_key, time.monotonic() - start, False, estimate_tokens(sent_text))
+            raise
+        else:
+            tokens = estimate_tokens(sent_text + (call.get('response') or ''))
+            self.router.record(provider_key, time.monotonic() - start, True, tokens)
+    
+    @staticmethod
+    def _circuit_open_result(provider_name: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'provider': provider_name,
+            'status': 'circuit_open',
+            'error': f"{provider_name} temporairement écarté après des échecs répétés"
+        }
+    
+    def rank_providers(self, prompt: str = "", max_tokens: int = 4000,
+                       candidates: Optional[List[str]] = None) -> List[str]:
+        """
+        Providers disponibles et sains, du plus adapté au moins adapté à une
+        requête de cette taille (voir utils.llm_router). ``candidates`` fixe
+        l'ordre de préférence à score égal.
+        """
+        candidates = [c for c in (candidates or list(self.clients)) if c in self.clients]
+        return self.router.ranked(candidates, estimate_tokens(prompt) + max_tokens)
+    
+    def select_provider(self, prompt: str = "", max_tokens: int = 4000,
+                        candidates: Optional[List[str]] = None) -> Optional[str]:
+        """Meilleur provider sain pour la requête, ou None"""
+        ranking = self.rank_providers(prompt, max_tokens, candidates)
+        return ranking[0] if ranking else None
+    
+    @staticmethod
+    def _model_name(provider_key: str) -> str:
+        if provider_key == "azure_openai":
+            return os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
+        return PROVIDER_MODELS.get(provider_key, provider_key)
+    
+    def _cache_key(self, provider_key: str, prompt: str, system_prompt: str, temperature: float,
+                   max_tokens: int, use_cache: Optional[bool]) -> Optional[str]:
+        """Clé de cache de l'appel, ou None s'il ne doit pas être mis en cache"""
+        if not self.cache.should_cache(temperature, use_cache):
+            self.cache.skip()
+            return None
+        return make_cache_key(prompt, system_prompt, provider_key, self._model_name(provider_key),
+                              temperature, max_tokens)
+    
+    def _cache_store(self, cache_key: Optional[str], provider_key: str, prompt: str,
+                     system_prompt: str, response: Optional[str]):
+        if cache_key and response:
+            self.cache.set(cache_key, response, provider_key, self._model_name(provider_key),
+                           tokens=estimate_tokens(system_prompt + prompt + response))
+    
+    @staticmethod
+    def _cached_result(provider_name: str, cached: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'provider': provider_name,
+            'response': cached['response'],
+            'elapsed_time': time.time() - start_time,
+            'cached': True
+        }
+    
+    def _query_provider(self, provider_key: str, prompt: str, system_prompt: str,
+                        temperature: float, max_tokens: int) -> str:
+        """Appel synchrone du SDK correspondant au provider"""
+        if provider_key == "openai" or provider_key == "azure_openai":
+            return self._query_openai(provider_key, prompt, system_prompt, temperature, max_tokens)
+        if provider_key == "anthropic":
+            return self._query_claude(prompt, system_prompt, temperature, max_tokens)
+        if provider_key == "google":
+            return self._query_gemini(prompt, system_prompt, temperature, max_tokens)
+        if provider_key == "mistral":
+            return self._query_mistral(prompt, system_prompt, temperature, max_tokens)
+        if provider_key == "groq":
+            return self._query_groq(prompt, system_prompt, temperature, max_tokens)
+        if provider_key == "fake":
+            return self.clients["fake"].complete(prompt, system_prompt)
+        raise ValueError(f"Provider {provider_key} non implémenté")
+    
+    @staticmethod
+    def _normalize_provider(provider: Any) -> Tuple[str, str]:
+        """Retourne (nom affiché, clé du client) pour un provider (string ou enum)"""
+        if hasattr(provider, 'value'):
+            provider_name = provider.value
+            provider_key = provider.name.lower()
+        else:
+            provider_name = str(provider)
+            provider_key = provider_name.lower().replace(' ', '_')
+        
+        return provider_name, PROVIDER_MAPPING.get(provider_key, provider_key)
+    
     def _query_openai(self, provider_key, prompt: str, system_prompt: str, temperature: float, max_tokens: int) -> str:
         """Interroge OpenAI ou Azure OpenAI"""
         client = self.clients[provider_key]
         
-        model = "gpt-4-turbo-preview"
-        if provider_key == "azure_openai":
-            model = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
-        
         response = client.chat.completions.create(
-            model=model,
+            model=self._model_name(provider_key),
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
@@ -249,7 +409,7 @@ class MultiLLMManager:
         client = self.clients["anthropic"]
         
         response = client.messages.create(
-            model="claude-3-opus-20240229",
+            model=PROVIDER_MODELS['anthropic'],
             system=system_prompt,
             messages=[{"role": "user", "content": prompt}],
             temperature=temperature,
@@ -285,7 +445,7 @@ class MultiLLMManager:
         ]
         
         response = client.chat(
-            model="mistral-large-latest",
+            model=PROVIDER_MODELS['mistral'],
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens
@@ -298,7 +458,7 @@ class MultiLLMManager:
         client = self.clients["groq"]
         
         response = client.chat.completions.create(
-            model="mixtral-8x7b-32768",
+            model=PROVIDER_MODELS['groq'],
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
@@ -313,12 +473,23 @@ class MultiLLMManager:
         self,
         providers: List[Any],
         prompt: str,
-        system_prompt: str = "Tu es un assistant juridique expert en droit pénal des affaires français.",
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        parallel: bool = True
+        parallel: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+        policy: Union[None, str, QueryPolicy] = None,
+        timeout: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Interroge plusieurs LLMs"""
+        """
+        Interroge plusieurs LLMs
+        
+        ``policy`` (utils.llm_policies : first_success(), quorum(k),
+        hedged(delay_ms)) permet de rendre la main sans attendre les plus
+        lents ; ``timeout`` borne l'attente globale en secondes. Chaque
+        résultat indique alors son ``status`` : finished, cancelled,
+        timed_out ou skipped.
+        """
 
         prompt = self._prepend_prioritized_pieces(prompt)
         
@@ -340,87 +511,610 @@ class MultiLLMManager:
                 'error': 'Aucun provider disponible'
             }]
         
+        policy = as_policy(policy)
+        if policy != ALL or timeout is not None:
+            return self._query_with_policy(normalized_providers, prompt, system_prompt, temperature,
+                                           max_tokens, priority, policy, timeout)
+        
         if parallel:
-            return self._query_parallel(normalized_providers, prompt, system_prompt, temperature, max_tokens)
+            return self._query_parallel(normalized_providers, prompt, system_prompt, temperature, max_tokens, priority)
         else:
-            return self._query_sequential(normalized_providers, prompt, system_prompt, temperature, max_tokens)
+            return self._query_sequential(normalized_providers, prompt, system_prompt, temperature, max_tokens, priority)
     
-    def _query_parallel(self, providers, prompt, system_prompt, temperature, max_tokens):
+    def _query_parallel(self, providers, prompt, system_prompt, temperature, max_tokens,
+                        priority=Priority.INTERACTIVE):
         """Interroge les LLMs en parallèle"""
         results = []
         
-        with ThreadPoolExecutor(max_workers=len(providers)) as executor:
-            future_to_provider = {
-                executor.submit(
-                    self.query_single_llm,
-                    provider,
-                    prompt,
-                    system_prompt,
-                    temperature,
-                    max_tokens
-                ): provider for provider in providers
-            }
-            
-            for future in as_completed(future_to_provider):
-                result = future.result()
-                results.append(result)
+        future_to_provider = {
+            _SYNC_EXECUTOR.submit(
+                self.query_single_llm,
+                provider,
+                prompt,
+                system_prompt,
+                temperature,
+                max_tokens,
+                priority
+            ): provider for provider in providers
+        }
+        
+        for future in as_completed(future_to_provider):
+            result = future.result()
+            results.append(result)
         
         return results
     
-    def _query_sequential(self, providers, prompt, system_prompt, temperature, max_tokens):
+    def _query_with_policy(self, providers, prompt, system_prompt, temperature, max_tokens,
+                           priority, policy: QueryPolicy, timeout: Optional[float]):
+        """Interroge les LLMs en parallèle et rend la main dès que la politique est satisfaite"""
+        calls = [
+            (self._normalize_provider(provider)[0],
+             partial(self.query_single_llm, provider, prompt, system_prompt, temperature, max_tokens, priority))
+            for provider in providers
+        ]
+        outcomes = run_policy(calls, policy, _SYNC_EXECUTOR, timeout)
+        return [outcome.to_result() for outcome in outcomes]
+    
+    def _query_sequential(self, providers, prompt, system_prompt, temperature, max_tokens,
+                          priority=Priority.INTERACTIVE):
         """Interroge les LLMs en séquence"""
         results = []
         
         for provider in providers:
-            result = self.query_single_llm(provider, prompt, system_prompt, temperature, max_tokens)
+            result = self.query_single_llm(provider, prompt, system_prompt, temperature, max_tokens, priority)
             results.append(result)
-            time.sleep(0.5)  # Petit délai pour éviter le rate limiting
         
         return results
     
-    def fusion_responses(self, responses: List[Dict[str, Any]], fusion_prompt: Optional[str] = None) -> str:
-        """Fusionne intelligemment plusieurs réponses de LLMs"""
+    # ========== API ASYNCHRONE ==========
+    
+    @asynccontextmanager
+    async def _async_clients_lease(self):
+        """
+        Clients asynchrones de la boucle courante, partagés par les appels en cours
         
-        # Filtrer les réponses valides
-        valid_responses = [r for r in responses if r.get('success') and r.get('response')]
+        Le dernier appel à se terminer les ferme (pools httpx compris) avant
+        l'arrêt de la boucle : chaque ``asyncio.run`` en crée une nouvelle, où
+        des clients abandonnés ne pourraient plus être fermés.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.setdefault(loop, {'clients': {}, 'users': 0})
+        entry['users'] += 1
+        try:
+            yield
+        finally:
+            entry['users'] -= 1
+            if entry['users'] == 0 and self._async_clients.get(loop) is entry:
+                del self._async_clients[loop]
+                await self._close_async_clients(entry['clients'])
+    
+    def _get_async_client(self, provider_key: str) -> Optional[Any]:
+        """
+        Client asynchrone (pool de connexions réutilisé) du provider
         
-        if not valid_responses:
-            return "Aucune réponse valide à fusionner."
+        Retourne None si le SDK n'en propose pas : l'appel synchrone est
+        alors exécuté dans le pool de threads partagé.
+        """
+        entry = self._async_clients.setdefault(asyncio.get_running_loop(), {'clients': {}, 'users': 0})
+        clients = entry['clients']
+        if provider_key in clients:
+            return clients[provider_key]
         
-        if len(valid_responses) == 1:
-            return valid_responses[0]['response']
+        client = None
+        try:
+            if provider_key == "openai":
+                client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            elif provider_key == "azure_openai":
+                client = openai.AsyncAzureOpenAI(
+                    api_key=os.getenv("AZURE_OPENAI_KEY"),
+                    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+                )
+            elif provider_key == "anthropic":
+                client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            elif provider_key == "groq":
+                from groq import AsyncGroq
+                client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+            elif provider_key == "google":
+                # GenerativeModel expose directement generate_content_async
+                client = self.clients.get("google")
+            elif provider_key == "mistral":
+                from mistralai.async_client import MistralAsyncClient
+                client = MistralAsyncClient(api_key=os.getenv("MISTRAL_API_KEY"))
+            elif provider_key == "fake":
+                client = self.clients.get("fake")
+        except Exception as e:
+            logger.warning(f"Client asynchrone {provider_key} indisponible, repli synchrone: {e}")
+            client = None
         
-        # Construire le prompt de fusion
-        if not fusion_prompt:
-            fusion_prompt = """Voici plusieurs analyses juridiques du même sujet par différents experts.
-Fusionne-les en gardant les meilleurs éléments de chaque analyse.
-Présente une synthèse structurée et complète.
-"""
+        clients[provider_key] = client
+        return client
+    
+    async def aquery_single_llm(
+        self,
+        provider: Any,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        use_cache: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Interroge un LLM de manière asynchrone (même retour et même cache
+        que query_single_llm)
         
-        for i, response in enumerate(valid_responses):
-            fusion_prompt += f"\n### Analyse {i+1} ({response['provider']}):\n{response['response']}\n"
+        Débit et concurrence par provider sont régulés par l'ordonnanceur
+        partagé (utils.rate_limiter), qui sert d'abord les appels
+        interactifs. L'annulation de la tâche appelante interrompt la
+        requête ; ``timeout`` la borne en secondes.
+        """
+        provider_name, provider_key = self._normalize_provider(provider)
+        
+        if provider_key not in self.clients:
+            return {
+                'success': False,
+                'provider': provider_name,
+                'error': f"Provider {provider_name} non disponible. Providers disponibles: {list(self.clients.keys())}"
+            }
         
-        fusion_prompt += "\n### Synthèse fusionnée:\n"
+        async with self._async_clients_lease():
+            prompt = fit_prompt(rewrite_prompt(self._prepend_prioritized_pieces(prompt)),
+                                system_prompt, provider_key, max_tokens)
         
-        # Utiliser le premier LLM disponible pour la fusion
-        if self.clients:
-            provider = list(self.clients.keys())[0]
+            try:
+                start_time = time.time()
+                cache_key = self._cache_key(provider_key, prompt, system_prompt, temperature, max_tokens, use_cache)
+                cached = self.cache.get(cache_key) if cache_key else None
+                if cached is not None:
+                    return self._cached_result(provider_name, cached, start_time)
             
-            result = self.query_single_llm(
-                provider,
-                fusion_prompt,
-                "Tu es un expert en synthèse juridique. Fusionne les analyses en gardant le meilleur de chaque."
+                if not self.router.allow(provider_key):
+                    return self._circuit_open_result(provider_name)
+            
+                cost = estimate_tokens(system_prompt + prompt, max_tokens)
+                with self._probe_guard(provider_key):
+                    async with self.scheduler.slot(provider_key, cost, priority):
+                        start_time = time.time()
+                        with self._track(provider_key, system_prompt + prompt) as tracked:
+                            call = self._acall_provider(provider_key, prompt, system_prompt, temperature, max_tokens)
+                            response = tracked['response'] = await asyncio.wait_for(call, timeout) if timeout else await call
+                self._cache_store(cache_key, provider_key, prompt, system_prompt, response)
+            
+                return {
+                    'success': True,
+                    'provider': provider_name,
+                    'response': response,
+                    'elapsed_time': time.time() - start_time
+                }
+        
+            except RateLimitTimeout as e:
+                logger.error(f"{provider_name}: {e}")
+                return {
+                    'success': False,
+                    'provider': provider_name,
+                    'error': str(e)
+                }
+            except asyncio.TimeoutError:
+                logger.error(f"Délai dépassé pour {provider_name} ({timeout}s)")
+                return {
+                    'success': False,
+                    'provider': provider_name,
+                    'status': TIMED_OUT,
+                    'error': f"Délai dépassé ({timeout}s)"
+                }
+            except Exception as e:
+                logger.error(f"Erreur requête {provider_name}: {str(e)}")
+                return {
+                    'success': False,
+                    'provider': provider_name,
+                    'error': str(e)
+                }
+    
+    async def _acall_provider(self, provider_key: str, prompt: str, system_prompt: str,
+                              temperature: float, max_tokens: int) -> str:
+        """Appelle le provider avec son client asynchrone, ou dans le pool partagé"""
+        client = self._get_async_client(provider_key)
+        
+        if client is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _SYNC_EXECUTOR, self._query_provider,
+                provider_key, prompt, system_prompt, temperature, max_tokens
+            )
+        
+        if provider_key == "fake":
+            return await client.acomplete(prompt, system_prompt)
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if provider_key in ("openai", "azure_openai"):
+            response = await client.chat.completions.create(
+                model=self._model_name(provider_key), messages=messages, temperature=temperature, max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+        
+        if provider_key == "anthropic":
+            response = await client.messages.create(
+                model=PROVIDER_MODELS['anthropic'],
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            return response.content[0].text
+        
+        if provider_key == "google":
+            response = await client.generate_content_async(
+                f"{system_prompt}\n\n{prompt}",
+                generation_config={'temperature': temperature, 'max_output_tokens': max_tokens}
+            )
+            return response.text
+        
+        if provider_key == "mistral":
+            response = await client.chat(
+                model=PROVIDER_MODELS['mistral'],
+                messages=[ChatMessage(**message) for message in messages],
+                temperature=temperature,
+                max_tokens=max_tokens
             )
+            return response.choices[0].message.content
+        
+        if provider_key == "groq":
+            response = await client.chat.completions.create(
+                model=PROVIDER_MODELS['groq'], messages=messages, temperature=temperature, max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+        
+        raise ValueError(f"Provider {provider_key} non implémenté")
+    
+    async def aquery_multiple_llms(
+        self,
+        providers: List[Any],
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        policy: Union[None, str, QueryPolicy] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Interroge plusieurs LLMs simultanément
+        
+        ``timeout`` s'applique à chaque appel. Avec une ``policy`` autre que
+        ALL, les appels devenus inutiles sont annulés et chaque résultat
+        porte son ``status`` (voir query_multiple_llms).
+        
+        Returns:
+            Un résultat par provider disponible, dans l'ordre demandé
+        """
+        available = [
+            p for p in providers
+            if self._normalize_provider(p)[1] in self.clients
+        ]
+        
+        if not available:
+            return [{
+                'success': False,
+                'error': 'Aucun provider disponible'
+            }]
+        
+        policy = as_policy(policy)
+        if policy != ALL:
+            calls = [
+                (self._normalize_provider(p)[0],
+                 partial(self.aquery_single_llm, p, prompt, system_prompt, temperature, max_tokens, timeout, priority))
+                for p in available
+            ]
+            outcomes = await arun_policy(calls, policy)
+            return [outcome.to_result() for outcome in outcomes]
+        
+        return list(await asyncio.gather(*(
+            self.aquery_single_llm(p, prompt, system_prompt, temperature, max_tokens, timeout, priority)
+            for p in available
+        )))
+    
+    # ========== RÉPONSES EN FLUX ==========
+    
+    def stream_single_llm(
+        self,
+        provider: Any,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        priority: Priority = Priority.INTERACTIVE,
+        use_cache: Optional[bool] = None
+    ) -> LLMStream:
+        """
+        Interroge un LLM en flux : l'objet retourné s'itère (``for``) sur les
+        fragments de texte au fur et à mesure de leur génération.
+        
+        Les erreurs n'interrompent pas l'itération : elles sont consignées
+        dans ``stream.metrics.error`` et ``stream.result()``.
+        """
+        provider_name, provider_key = self._normalize_provider(provider)
+        metrics = StreamMetrics(provider=provider_name)
+        return LLMStream(
+            self._stream_deltas(provider_key, prompt, system_prompt, temperature, max_tokens,
+                                priority, use_cache, metrics),
+            metrics
+        )
+    
+    def astream_single_llm(
+        self,
+        provider: Any,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        priority: Priority = Priority.INTERACTIVE,
+        use_cache: Optional[bool] = None
+    ) -> LLMStream:
+        """Version asynchrone de stream_single_llm (``async for``)"""
+        provider_name, provider_key = self._normalize_provider(provider)
+        metrics = StreamMetrics(provider=provider_name)
+        return LLMStream(
+            self._astream_deltas(provider_key, prompt, system_prompt, temperature, max_tokens,
+                                 priority, use_cache, metrics),
+            metrics
+        )
+    
+    def _stream_deltas(self, provider_key, prompt, system_prompt, temperature, max_tokens,
+                       priority, use_cache, metrics: StreamMetrics) -> Iterator[str]:
+        if provider_key not in self.clients:
+            metrics.error = f"Provider {metrics.provider} non disponible. Providers disponibles: {list(self.clients.keys())}"
+            return
+        
+        prompt = fit_prompt(rewrite_prompt(self._prepend_prioritized_pieces(prompt)),
+                            system_prompt, provider_key, max_tokens)
+        
+        try:
+            cache_key = self._cache_key(provider_key, prompt, system_prompt, temperature, max_tokens, use_cache)
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                metrics.cached = True
+                yield cached['response']
+                return
             
-            if result['success']:
-                return result['response']
+            if not self.router.allow(provider_key):
+                metrics.error = self._circuit_open_result(metrics.provider)['error']
+                return
+            
+            parts = []
+            cost = estimate_tokens(system_prompt + prompt, max_tokens)
+            with self._probe_guard(provider_key), self.scheduler.slot(provider_key, cost, priority):
+                with self._track(provider_key, system_prompt + prompt) as call:
+                    for delta in self._stream_provider(provider_key, prompt, system_prompt, temperature, max_tokens):
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                    call['response'] = ''.join(parts)
+            self._cache_store(cache_key, provider_key, prompt, system_prompt, ''.join(parts))
+        
+        except Exception as e:
+            logger.error(f"Erreur flux {metrics.provider}: {str(e)}")
+            metrics.error = str(e)
+    
+    async def _astream_deltas(self, provider_key, prompt, system_prompt, temperature, max_tokens,
+                              priority, use_cache, metrics: StreamMetrics) -> AsyncIterator[str]:
+        if provider_key not in self.clients:
+            metrics.error = f"Provider {metrics.provider} non disponible. Providers disponibles: {list(self.clients.keys())}"
+            return
+        
+        async with self._async_clients_lease():
+            prompt = fit_prompt(rewrite_prompt(self._prepend_prioritized_pieces(prompt)),
+                                system_prompt, provider_key, max_tokens)
+        
+            try:
+                cache_key = self._cache_key(provider_key, prompt, system_prompt, temperature, max_tokens, use_cache)
+                cached = self.cache.get(cache_key) if cache_key else None
+                if cached is not None:
+                    metrics.cached = True
+                    yield cached['response']
+                    return
+            
+                if not self.router.allow(provider_key):
+                    metrics.error = self._circuit_open_result(metrics.provider)['error']
+                    return
+            
+                parts = []
+                cost = estimate_tokens(system_prompt + prompt, max_tokens)
+                with self._probe_guard(provider_key):
+                    async with self.scheduler.slot(provider_key, cost, priority):
+                        with self._track(provider_key, system_prompt + prompt) as call:
+                            async for delta in self._astream_provider(provider_key, prompt, system_prompt, temperature, max_tokens):
+                                if delta:
+                                    parts.append(delta)
+                                    yield delta
+                            call['response'] = ''.join(parts)
+                self._cache_store(cache_key, provider_key, prompt, system_prompt, ''.join(parts))
+        
+            except Exception as e:
+                logger.error(f"Erreur flux {metrics.provider}: {str(e)}")
+                metrics.error = str(e)
+    
+    def _stream_provider(self, provider_key: str, prompt: str, system_prompt: str,
+                         temperature: float, max_tokens: int) -> Iterator[str]:
+        """Fragments de réponse émis par le SDK synchrone du provider"""
+        client = self.clients[provider_key]
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if provider_key in ("openai", "azure_openai", "groq"):
+            response = client.chat.completions.create(
+                model=self._model_name(provider_key), messages=messages,
+                temperature=temperature, max_tokens=max_tokens, stream=True
+            )
+            for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        
+        elif provider_key == "anthropic":
+            with client.messages.stream(
+                model=PROVIDER_MODELS['anthropic'],
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            ) as stream:
+                yield from stream.text_stream
+        
+        elif provider_key == "google":
+            response = client.generate_content(
+                f"{system_prompt}\n\n{prompt}",
+                generation_config={'temperature': temperature, 'max_output_tokens': max_tokens},
+                stream=True
+            )
+            for chunk in response:
+                yield chunk.text
+        
+        elif provider_key == "mistral":
+            response = client.chat_stream(
+                model=PROVIDER_MODELS['mistral'],
+                messages=[ChatMessage(**message) for message in messages],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            for chunk in response:
+                yield chunk.choices[0].delta.content or ""
+        
+        elif provider_key == "fake":
+            yield from client.stream(prompt, system_prompt)
+        
+        else:
+            raise ValueError(f"Provider {provider_key} non implémenté")
+    
+    async def _astream_provider(self, provider_key: str, prompt: str, system_prompt: str,
+                                temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Fragments de réponse émis par le client asynchrone, ou par le SDK synchrone dans le pool"""
+        client = self._get_async_client(provider_key)
+        
+        if client is None:
+            loop = asyncio.get_running_loop()
+            deltas = self._stream_provider(provider_key, prompt, system_prompt, temperature, max_tokens)
+            done = object()
+            while True:
+                delta = await loop.run_in_executor(_SYNC_EXECUTOR, next, deltas, done)
+                if delta is done:
+                    return
+                yield delta
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if provider_key in ("openai", "azure_openai", "groq"):
+            response = await client.chat.completions.create(
+                model=self._model_name(provider_key), messages=messages,
+                temperature=temperature, max_tokens=max_tokens, stream=True
+            )
+            async for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        
+        elif provider_key == "anthropic":
+            async with client.messages.stream(
+                model=PROVIDER_MODELS['anthropic'],
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        
+        elif provider_key == "google":
+            response = await client.generate_content_async(
+                f"{system_prompt}\n\n{prompt}",
+                generation_config={'temperature': temperature, 'max_output_tokens': max_tokens},
+                stream=True
+            )
+            async for chunk in response:
+                yield chunk.text
+        
+        elif provider_key == "mistral":
+            async for chunk in client.chat_stream(
+                model=PROVIDER_MODELS['mistral'],
+                messages=[ChatMessage(**message) for message in messages],
+                temperature=temperature,
+                max_tokens=max_tokens
+            ):
+                yield chunk.choices[0].delta.content or ""
+        
+        elif provider_key == "fake":
+            async for delta in client.astream(prompt, system_prompt):
+                yield delta
+        
+        else:
+            raise ValueError(f"Provider {provider_key} non implémenté")
+    
+    async def aclose(self):
+        """Ferme les clients asynchrones de la boucle courante, même si des appels les utilisent encore"""
+        entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await self._close_async_clients(entry['clients'])
+    
+    async def _close_async_clients(self, clients: Dict[str, Any]):
+        for provider_key, client in clients.items():
+            close = getattr(client, "close", None) or getattr(client, "aclose", None)
+            if close is None or client is self.clients.get(provider_key):
+                continue
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.debug(f"Fermeture client {provider_key}: {e}")
+    
+    def fusion_responses(self, responses: List[Dict[str, Any]], fusion_prompt: Optional[str] = None,
+                         budget: int = FUSION_TOKEN_BUDGET, use_cache: Optional[bool] = None) -> str:
+        """
+        Fusionne intelligemment plusieurs réponses de LLMs.
+
+        Les paragraphes identiques sont retirés, puis les réponses sont
+        fusionnées deux à deux en parallèle jusqu'à une synthèse unique
+        (voir utils.llm_fusion), chaque étape restant sous ``budget`` tokens.
+        """
         
-        # Fallback : concaténation simple
-        combined = "## Synthèse des analyses\n\n"
-        for response in valid_responses:
-            combined += f"### {response['provider']}\n{response['response']}\n\n"
+        # Filtrer les réponses valides
+        valid_responses = [r for r in responses if r.get('success') and r.get('response')]
+        
+        if not valid_responses:
+            return "Aucune réponse valide à fusionner."
+        
+        if len(valid_responses) == 1:
+            return valid_responses[0]['response']
+        
+        items = [(r['provider'], r['response']) for r in valid_responses]
+        merge = partial(self._merge_group, fusion_prompt or FUSION_INSTRUCTIONS, use_cache) if self.clients else None
+        fused = tree_fuse(items, merge, budget=budget)
+        
+        if merge is None and len(dedupe_paragraphs(items)) > 1:
+            # Fallback : concaténation simple
+            return "## Synthèse des analyses\n\n" + fused
+        return fused
+    
+    def _merge_group(self, instructions: str, use_cache: Optional[bool],
+                     group: List[Tuple[str, str]]) -> Optional[str]:
+        """Une étape de fusion : un appel au provider le plus adapté"""
+        prompt = instructions.rstrip() + "\n"
+        for i, (label, text) in enumerate(group):
+            prompt += f"\n### Analyse {i+1} ({label}):\n{text}\n"
+        prompt += "\n### Synthèse fusionnée:\n"
         
-        return combined
+        provider = self.select_provider(prompt, FUSION_MAX_TOKENS) or next(iter(self.clients))
+        result = self.query_single_llm(provider, prompt, FUSION_SYSTEM_PROMPT,
+                                       max_tokens=FUSION_MAX_TOKENS, use_cache=use_cache)
+        return result['response'] if result['success'] else None
     
     def get_available_providers(self) -> List[str]:
         """Retourne la liste des providers disponibles"""
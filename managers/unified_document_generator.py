@@ -17,6 +17,7 @@ from managers.jurisprudence_verifier import JurisprudenceVerifier
 from managers.multi_llm_manager import MultiLLMManager
 from managers.style_analyzer import StyleAnalyzer
 from managers.template_manager import TemplateManager
+from utils.token_budget import PromptPart, TokenBudgeter
 # Import des dataclasses
 from config.app_config import DocumentType
 from modules.dataclasses import (DocumentJuridique, InfractionIdentifiee,
@@ -24,6 +25,9 @@ from modules.dataclasses import (DocumentJuridique, InfractionIdentifiee,
 
 logger = logging.getLogger(__name__)
 
+# Tokens réservés à la réponse lors de la génération d'une section longue
+SECTION_RESPONSE_TOKENS = 4000
+
 # =============== ENUMS SPÉCIFIQUES ===============
 
 class DocumentLength(Enum):
@@ -162,6 +166,18 @@ class LongDocumentPlugin(GenerationPlugin):
                                    base_generator: 'UnifiedDocumentGenerator') -> str:
         """Génère une section longue avec contenu approfondi"""
         
+        provider = base_generator._select_best_provider(request)
+        system_prompt = self._get_long_doc_system_prompt(request.style)
+        
+        # Le contexte du dossier est résumé s'il dépasse la fenêtre du provider
+        budget = TokenBudgeter(provider, reserve_tokens=SECTION_RESPONSE_TOKENS).fit([
+            PromptPart('system', system_prompt, required=True),
+            PromptPart('instructions', self._get_section_instructions_long(section), required=True),
+            PromptPart('parties', self._format_parties(request), priority=1),
+            PromptPart('infractions', self._format_infractions_detail(request.infractions), priority=1),
+            PromptPart('contexte', request.contexte, priority=2),
+        ])
+        
         prompt = f"""
         Rédige la section '{section}' d'un document juridique LONG et DÉTAILLÉ.
         
@@ -170,17 +186,16 @@ class LongDocumentPlugin(GenerationPlugin):
         Style: {request.style.value}
         
         CONTEXTE COMPLET:
-        {request.contexte}
+        {budget['contexte']}
         
         PARTIES IMPLIQUÉES:
-        Demandeurs: {', '.join([p.nom for p in request.parties.get('demandeurs', [])])}
-        Défendeurs: {', '.join([p.nom for p in request.parties.get('defendeurs', [])])}
+        {budget['parties']}
         
         INFRACTIONS À ANALYSER:
-        {self._format_infractions_detail(request.infractions)}
+        {budget['infractions']}
         
         INSTRUCTIONS SPÉCIFIQUES SECTION '{section}':
-        {self._get_section_instructions_long(section)}
+        {budget['instructions']}
         
         CONSIGNES IMPÉRATIVES:
         - NE JAMAIS résumer ou condenser
@@ -193,10 +208,11 @@ class LongDocumentPlugin(GenerationPlugin):
         - Viser {target_words} mots MINIMUM
         """
         
-        response = await base_generator.llm_manager.query_single_llm_async(
-            provider=base_generator._select_best_provider(request),
-            query=prompt,
-            system_prompt=self._get_long_doc_system_prompt(request.style)
+        response = await base_generator.llm_manager.aquery_single_llm(
+            provider=provider,
+            prompt=prompt,
+            system_prompt=system_prompt,
+            max_tokens=SECTION_RESPONSE_TOKENS
         )
         
         if response.get('success'):
@@ -239,6 +255,31 @@ class LongDocumentPlugin(GenerationPlugin):
         
         return instructions.get(section, "Développer de manière exhaustive et détaillée")
     
+    def _format_parties(self, request: UnifiedGenerationRequest) -> str:
+        """Parties du dossier, une ligne par qualité"""
+        
+        return (
+            f"Demandeurs: {', '.join([p.nom for p in request.parties.get('demandeurs', [])])}\n"
+            f"Défendeurs: {', '.join([p.nom for p in request.parties.get('defendeurs', [])])}"
+        )
+    
+    def _format_infractions_detail(self, infractions: List[InfractionIdentifiee]) -> str:
+        """Infractions avec articles, éléments constitutifs et preuves"""
+        
+        blocs = []
+        for infraction in infractions:
+            infraction_type = getattr(infraction.type, 'value', infraction.type)
+            bloc = f"- {infraction_type} : {infraction.description}"
+            if infraction.articles_code_penal:
+                bloc += f"\n  Articles : {', '.join(infraction.articles_code_penal)}"
+            if infraction.elements_constitutifs:
+                bloc += f"\n  Éléments constitutifs : {'; '.join(infraction.elements_constitutifs)}"
+            if infraction.preuves:
+                bloc += f"\n  Preuves : {'; '.join(infraction.preuves)}"
+            blocs.append(bloc)
+        
+        return '\n\n'.join(blocs) or "Aucune infraction identifiée"
+    
     def _get_long_doc_system_prompt(self, style: StyleRedaction) -> str:
         """System prompt pour documents longs"""
         
@@ -293,36 +334,38 @@ class PlaidoiriePlugin(GenerationPlugin):
         # Structure adaptée au temps
         structure = self._calculate_plaidoirie_structure(duration_minutes, request)
         
-        # Générer chaque partie
-        sections = {}
+        # Générer chaque partie (simultanément, l'ordre est conservé)
+        parts = {}
         
         # 1. Introduction percutante
-        sections['introduction'] = await self._generate_introduction_orale(
+        parts['introduction'] = self._generate_introduction_orale(
             request, structure['introduction'], base_generator
         )
         
         # 2. Narration des faits (si temps suffisant)
         if duration_minutes >= 20:
-            sections['narration'] = await self._generate_narration_orale(
+            parts['narration'] = self._generate_narration_orale(
                 request, structure['narration'], base_generator
             )
         
         # 3. Arguments principaux
-        sections['arguments'] = await self._generate_arguments_oraux(
+        parts['arguments'] = self._generate_arguments_oraux(
             request, structure['arguments'], base_generator
         )
         
         # 4. Réfutation (si temps suffisant)
         if duration_minutes >= 45:
-            sections['refutation'] = await self._generate_refutation_orale(
+            parts['refutation'] = self._generate_refutation_orale(
                 request, structure['refutation'], base_generator
             )
         
         # 5. Conclusion forte
-        sections['conclusion'] = await self._generate_conclusion_orale(
+        parts['conclusion'] = self._generate_conclusion_orale(
             request, structure['conclusion'], base_generator
         )
         
+        sections = dict(zip(parts, await asyncio.gather(*parts.values())))
+        
         # Assembler avec marqueurs temporels
         content = self._assemble_plaidoirie_with_timing(sections, duration_minutes)
         
@@ -404,9 +447,9 @@ class PlaidoiriePlugin(GenerationPlugin):
         - Annonce du plan (15%)
         """
         
-        response = await base_generator.llm_manager.query_single_llm_async(
+        response = await base_generator.llm_manager.aquery_single_llm(
             provider=base_generator._select_best_provider(request),
-            query=prompt,
+            prompt=prompt,
             system_prompt="""Tu es un avocat plaidant expérimenté, maître dans l'art oratoire.
             Tu sais captiver ton auditoire dès les premiers mots et créer une atmosphère dramatique appropriée."""
         )
@@ -467,9 +510,9 @@ class PlaidoiriePlugin(GenerationPlugin):
         4. Conclusion partielle forte
         """
         
-        response = await base_generator.llm_manager.query_single_llm_async(
+        response = await base_generator.llm_manager.aquery_single_llm(
             provider=base_generator._select_best_provider(request),
-            query=prompt
+            prompt=prompt
         )
         
         if response.get('success'):
@@ -564,11 +607,12 @@ class StandardDocumentPlugin(GenerationPlugin):
         # Utiliser la logique existante de base_generator
         structure = base_generator._get_standard_structure(request.document_type)
         
-        sections = {}
-        for section in structure['sections']:
-            sections[section] = await base_generator._generate_section_standard(
-                section, request
-            )
+        # Les sections sont indépendantes : elles sont générées simultanément
+        contents = await asyncio.gather(*(
+            base_generator._generate_section_standard(section, request)
+            for section in structure['sections']
+        ))
+        sections = dict(zip(structure['sections'], contents))
         
         return base_generator._assemble_final_document(sections, request)
     
@@ -667,19 +711,21 @@ class UnifiedDocumentGenerator:
         if not providers:
             raise ValueError("Aucun provider LLM disponible")
         
-        # Préférences selon le type
+        # Préférences selon le type : elles départagent les providers dont
+        # la santé et la latence mesurées sont équivalentes
+        preferred = []
         if request.length in [DocumentLength.LONG, DocumentLength.VERY_LONG]:
             # Claude pour les longs documents
-            if 'anthropic' in providers:
-                return 'anthropic'
+            preferred.append('anthropic')
         
         if request.document_type == DocumentType.PLAIDOIRIE:
             # GPT-4 pour l'oralité
-            if 'openai' in providers:
-                return 'openai'
+            preferred.append('openai')
+        
+        candidates = [p for p in preferred if p in providers] + [p for p in providers if p not in preferred]
         
-        # Par défaut
-        return providers[0]
+        # Si tous les circuits sont ouverts, on tente tout de même le préféré
+        return self.llm_manager.select_provider(candidates=candidates) or candidates[0]
     
     def _get_standard_structure(self, doc_type: DocumentType) -> Dict[str, List[str]]:
         """Retourne la structure standard d'un document"""
@@ -756,9 +802,9 @@ class UnifiedDocumentGenerator:
         {self._get_section_instructions(section, request.document_type)}
         """
         
-        response = await self.llm_manager.query_single_llm_async(
+        response = await self.llm_manager.aquery_single_llm(
             provider=self._select_best_provider(request),
-            query=prompt
+            prompt=prompt
         )
         
         if response.get('success'):
@@ -2,12 +2,20 @@
 """Service de recherche universelle avec améliorations UX - Version optimisée"""
 
 import asyncio
-import difflib
+import json
 import re
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+from utils.highlighting import HighlightExtractor
+from utils.lru_cache import LRUCache
+from utils.mapped_text import MappedText, document_text, matched_terms
+from utils.minhash import LSHIndex
+from utils.search_index import (InvertedIndex, analyze_text, content_signature,
+                                 title_signature)
+from utils.search_ranking import BM25FScorer, contains_reference
+
 
 # Classes de données nécessaires
 class Partie:
@@ -112,6 +120,24 @@ class UniversalSearchService:
         'recel': 'Recel'
     }
     
+    # Cache des résultats : durée de vie (s), nombre d'entrées et taille maximale
+    CACHE_TTL = 300
+    CACHE_MAX_ENTRIES = 200
+    CACHE_MAX_BYTES = 64 * 1024 * 1024
+    
+    # Facteur d'échelle du score BM25F (comparable aux anciens bonus)
+    BM25_SCORE_SCALE = 10
+    
+    # Similarité (Jaccard estimée) au-delà de laquelle deux résultats sont des doublons
+    DUPLICATE_THRESHOLD = 0.85
+    
+    # Délai maximal accordé à la recherche Azure (s) avant de ne garder que le local
+    AZURE_TIMEOUT = 10.0
+    # Nombre de résultats Azure dont le contenu complet est récupéré
+    AZURE_CONTENT_TOP_K = 20
+    # Début du texte gardé dans un résultat pour un document projeté en mémoire
+    MAPPED_PREVIEW_CHARS = 1000
+    
     DOCUMENT_TYPES = {
         r'\b(conclusions?|conclusion)\b': 'CONCLUSIONS',
         r'\b(plaintes?|dépôt de plainte)\b': 'PLAINTE',
@@ -125,7 +151,14 @@ class UniversalSearchService:
     
     def __init__(self):
         """Initialisation du service avec cache et optimisations"""
-        self._cache = {}
+        self._cache = LRUCache(
+            max_entries=self.CACHE_MAX_ENTRIES,
+            max_bytes=self.CACHE_MAX_BYTES,
+            ttl=self.CACHE_TTL
+        )
+        # Dernière version vue de chaque corpus (un par session), bornée comme les résultats
+        self._cache_versions = LRUCache(max_entries=self.CACHE_MAX_ENTRIES, ttl=self.CACHE_TTL)
+        self._standalone_index = InvertedIndex()  # Hors Streamlit
         self._search_history = []
         self._common_terms = set(['le', 'la', 'les', 'de', 'des', 'un', 'une', 'et', 'ou', 'à', 'dans', 'pour'])
         self._executor = ThreadPoolExecutor(max_workers=3)
@@ -150,13 +183,15 @@ class UniversalSearchService:
         Returns:
             SearchResult avec documents et métadonnées
         """
-        # Vérifier le cache
-        cache_key = f"{query}_{str(filters)}"
-        if cache_key in self._cache:
-            cached_result = self._cache[cache_key]
-            # Vérifier si le cache est récent (moins de 5 minutes)
-            if (datetime.now() - cached_result.timestamp).seconds < 300:
-                return cached_result
+        # Vérifier le cache (clé canonique liée à la version du corpus)
+        try:
+            index, _ = self._get_local_index()
+        except ImportError:
+            index = self._session_index()
+        cache_key = self._make_cache_key(query, filters, index)
+        cached_result = self._cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
         
         # Analyser la requête
         query_analysis = self.analyze_query_advanced(query)
@@ -164,14 +199,15 @@ class UniversalSearchService:
         # Recherches parallèles dans différentes sources
         search_tasks = []
         
-        # Tâche 1: Recherche locale
+        # Tâche 1: Recherche Azure, lancée en premier pour que la requête
+        # réseau soit en vol pendant la recherche locale
+        azure_task = asyncio.ensure_future(self._search_azure_documents(query_analysis, filters))
+        search_tasks.append(azure_task)
+        
+        # Tâche 2: Recherche locale
         local_task = self._search_local_documents(query_analysis, filters)
         search_tasks.append(local_task)
         
-        # Tâche 2: Recherche Azure
-        azure_task = self._search_azure_documents(query_analysis, filters)
-        search_tasks.append(azure_task)
-        
         # Tâche 3: Recherche dans l'historique si référence @
         if query_analysis.reference:
             history_task = self._search_reference_history(query_analysis.reference)
@@ -190,14 +226,11 @@ class UniversalSearchService:
         unique_results = self._deduplicate_results(combined_results)
         scored_results = self._intelligent_scoring(unique_results, query_analysis)
         
-        # Extraction des highlights
-        highlighted_results = self._extract_highlights(scored_results, query_analysis)
-        
         # Tri par pertinence
-        sorted_results = sorted(highlighted_results, key=lambda x: x.get('score', 0), reverse=True)
+        sorted_results = sorted(scored_results, key=lambda x: x.get('score', 0), reverse=True)
         
-        # Limiter les résultats et créer des documents
-        top_results = sorted_results[:50]
+        # Limiter les résultats puis extraire les highlights des seuls résultats retenus
+        top_results = self._extract_highlights(sorted_results[:50], query_analysis)
         documents = [self._convert_to_document(r) for r in top_results]
         
         # Créer les facettes pour filtrage dynamique
@@ -216,7 +249,7 @@ class UniversalSearchService:
         result.suggestions = suggestions
         
         # Mettre en cache
-        self._cache[cache_key] = result
+        self._cache.set(cache_key, result)
         
         # Ajouter à l'historique
         self._search_history.append({
@@ -227,6 +260,20 @@ class UniversalSearchService:
         
         return result
     
+    def _make_cache_key(self, query: str, filters: Optional[Dict[str, Any]], index: InvertedIndex) -> Tuple:
+        """Clé canonique : requête normalisée, filtres triés et version du corpus"""
+        normalized_query = ' '.join(query.lower().split())
+        normalized_filters = json.dumps(filters or {}, sort_keys=True, default=str)
+        
+        # Le corpus a changé : les résultats calculés sur l'ancienne version sont purgés
+        uid, version = index.corpus_version
+        previous_version = self._cache_versions.get(uid)
+        if previous_version is not None and previous_version != version:
+            self._cache.remove_where(lambda key: key[0] == uid)
+        self._cache_versions.set(uid, version)
+        
+        return (uid, version, normalized_query, normalized_filters)
+    
     def analyze_query_advanced(self, query: str) -> QueryAnalysis:
         """Analyse avancée de la requête avec extraction d'entités et détection de commande"""
         
@@ -472,35 +519,48 @@ class UniversalSearchService:
         
         return results
     
+    def _get_local_index(self) -> Tuple[InvertedIndex, Dict[str, Any]]:
+        """Retourne l'index inversé de la session, synchronisé avec ses documents"""
+        import streamlit as st
+
+        # Collecter tous les documents
+        all_documents = {}
+        all_documents.update(st.session_state.get('azure_documents', {}))
+        all_documents.update(st.session_state.get('imported_documents', {}))
+        
+        index = st.session_state.get('search_index')
+        if index is None:
+            index = InvertedIndex()
+            st.session_state.search_index = index
+        
+        # Mise à jour incrémentale : seuls les documents ajoutés, modifiés
+        # ou supprimés depuis la dernière recherche sont réindexés
+        index.sync(all_documents)
+        
+        return index, all_documents
+    
     async def _search_local_documents(self, query_analysis: QueryAnalysis, filters: Optional[Dict] = None) -> List[Dict]:
-        """Recherche optimisée dans les documents locaux"""
+        """Recherche optimisée dans les documents locaux via l'index inversé"""
         
         results = []
         
         try:
-            import streamlit as st
-
-            # Collecter tous les documents
-            all_documents = {}
-            all_documents.update(st.session_state.get('azure_documents', {}))
-            all_documents.update(st.session_state.get('imported_documents', {}))
+            index, all_documents = self._get_local_index()
             
-            # Recherche parallèle avec ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = []
-                
-                for doc_id, doc in all_documents.items():
-                    future = executor.submit(
-                        self._check_document_match,
-                        doc_id, doc, query_analysis, filters
-                    )
-                    futures.append(future)
-                
-                # Collecter les résultats
-                for future in futures:
-                    match_result = future.result()
-                    if match_result:
-                        results.append(match_result)
+            # Les postings donnent directement les candidats, sans parcours complet
+            # Référence : tous ses termes dans l'index, puis l'expression exacte dans le document
+            reference = query_analysis.reference.lower() if query_analysis.reference else None
+            matching_ids = index.search(
+                ' '.join(query_analysis.keywords),
+                min_match_ratio=0.3,
+                required_terms=analyze_text(reference) if reference else None,
+                confirm=lambda doc_id: self._contains_reference(all_documents[doc_id], reference)
+            )
+            
+            for doc_id in matching_ids:
+                match_result = self._check_document_match(doc_id, all_documents[doc_id], query_analysis, filters)
+                if match_result:
+                    results.append(match_result)
         
         except ImportError:
             pass
@@ -534,68 +594,125 @@ class UniversalSearchService:
                 # Construire la requête
                 azure_query = ' '.join(search_terms)
                 
-                # Construire les filtres Azure
-                azure_filters = []
+                # Filtres Azure (mêmes clés que le gestionnaire)
+                azure_filters = {}
                 if filters:
                     if 'document_type' in filters:
-                        azure_filters.append(f"documentType eq '{filters['document_type']}'")
+                        azure_filters['document_type'] = filters['document_type']
                     if 'date_range' in filters and len(filters['date_range']) == 2:
-                        start_date = filters['date_range'][0].isoformat()
-                        end_date = filters['date_range'][1].isoformat()
-                        azure_filters.append(f"date ge {start_date} and date le {end_date}")
+                        azure_filters['date_range'] = filters['date_range']
                 
-                # Effectuer la recherche
-                azure_results = await search_manager.search(
-                    azure_query,
-                    filter_string=' and '.join(azure_filters) if azure_filters else None,
-                    top=100  # Récupérer plus de résultats pour un meilleur scoring
-                )
+                # Parcours paginé limité aux champs de classement, puis contenu
+                # récupéré uniquement pour les meilleurs résultats
+                if hasattr(search_manager, 'iter_search'):
+                    async def _fetch():
+                        hits = []
+                        async for hit in search_manager.iter_search(
+                            azure_query, filters=azure_filters or None, max_results=100
+                        ):
+                            hits.append(hit)
+                        await search_manager.afetch_content(hits[:self.AZURE_CONTENT_TOP_K])
+                        return hits
+                    
+                    azure_results = await asyncio.wait_for(_fetch(), self.AZURE_TIMEOUT)
+                    # Résultats classés au-delà du top-K : champs de résumé seulement
+                    unfetched = {hit.id for hit in azure_results[self.AZURE_CONTENT_TOP_K:]}
+                else:
+                    loop = asyncio.get_running_loop()
+                    azure_response = await asyncio.wait_for(
+                        loop.run_in_executor(
+                            None, lambda: search_manager.search(azure_query, filters=azure_filters or None, top=100)
+                        ),
+                        self.AZURE_TIMEOUT
+                    )
+                    if azure_response.get('error'):
+                        print(f"Erreur recherche Azure: {azure_response['error']}")
+                    azure_results = azure_response.get('results', [])
+                    unfetched = set()
                 
-                # Convertir les résultats
+                # Convertir les résultats (SearchResult du gestionnaire Azure)
                 for result in azure_results:
-                    results.append({
-                        'id': result.get('id'),
-                        'title': result.get('title', 'Sans titre'),
-                        'content': result.get('content', ''),
+                    metadata = getattr(result, 'metadata', None) or {}
+                    converted = {
+                        'id': result.id,
+                        'title': result.title or 'Sans titre',
+                        'content': result.content or '',
                         'source': 'Azure Search',
-                        'type': result.get('documentType', 'document'),
-                        'score': result.get('@search.score', 0) * 10,  # Normaliser le score
+                        'type': metadata.get('document_type') or 'document',
+                        'score': (result.score or 0) * 10,
                         'metadata': {
-                            'date': result.get('date'),
-                            'author': result.get('author')
+                            'date': metadata.get('date'),
+                            'reference': metadata.get('reference'),
+                            'parties': metadata.get('parties', [])
                         }
-                    })
-        
+                    }
+                    if result.id in unfetched:
+                        # Contenu non récupéré : ni pénalité de longueur, ni extraits, ni dédoublonnage par contenu
+                        converted['content_fetched'] = False
+                    results.append(converted)
+
+        except asyncio.TimeoutError:
+            print(f"Recherche Azure interrompue après {self.AZURE_TIMEOUT}s")
         except Exception as e:
             print(f"Erreur recherche Azure: {e}")
         
         return results
     
-    def _check_document_match(self, doc_id: str, doc: Dict, query_analysis: QueryAnalysis, filters: Optional[Dict]) -> Optional[Dict]:
-        """Vérifie si un document correspond aux critères (thread-safe)"""
+    def _check_document_match(self, doc_id: str, doc: Union[Dict, Document], query_analysis: QueryAnalysis, filters: Optional[Dict]) -> Optional[Dict]:
+        """Applique les filtres à un document retenu par l'index"""
         
-        if not self._document_matches(doc, query_analysis, filters):
+        if isinstance(doc, dict):
+            doc_type = doc.get('type')
+        else:
+            doc_type = getattr(doc, 'type', None)
+        
+        if filters and 'document_type' in filters and doc_type != filters['document_type']:
             return None
         
-        return {
+        if isinstance(doc, dict):
+            return {
+                'id': doc_id,
+                'title': doc.get('title', 'Sans titre'),
+                'content': doc.get('content', ''),
+                'source': doc.get('source', 'Local'),
+                'type': doc.get('type', 'document'),
+                'metadata': doc.get('metadata', {})
+            }
+        
+        result = {
             'id': doc_id,
-            'title': doc.get('title', 'Sans titre'),
-            'content': doc.get('content', ''),
-            'source': doc.get('source', 'Local'),
-            'type': doc.get('type', 'document'),
-            'metadata': doc.get('metadata', {})
+            'title': getattr(doc, 'title', 'Sans titre'),
+            'source': getattr(doc, 'source', 'Local'),
+            'type': doc_type or 'document',
+            'metadata': getattr(doc, 'metadata', {}) or {}
         }
+        text = document_text(doc)
+        if isinstance(text, MappedText):
+            # Texte projeté : le résultat n'en garde qu'un aperçu, les extraits,
+            # la longueur et l'index sont calculés sur le fichier
+            result['content'] = text.preview(self.MAPPED_PREVIEW_CHARS)
+            result['text'] = text
+            if getattr(doc, 'digest', None):
+                result['digest'] = doc.digest
+        else:
+            result['content'] = text
+        return result
+    
+    def _contains_reference(self, doc: Union[Dict, Document], reference: str) -> bool:
+        """Expression exacte de la référence dans le titre ou le contenu (sans casse)"""
+        title = doc.get('title', '') if isinstance(doc, dict) else getattr(doc, 'title', '')
+        return reference in (title or '').lower() or bool(matched_terms(document_text(doc), [reference]))
     
     def _document_matches(self, doc: Union[Dict, Document], query_analysis: QueryAnalysis, filters: Optional[Dict] = None) -> bool:
         """Vérification optimisée de correspondance"""
         
         # Obtenir le contenu
+        # Texte projeté en mémoire s'il existe : parcouru sans être chargé
+        content = document_text(doc)
         if isinstance(doc, dict):
-            content = doc.get('content', '').lower()
             title = doc.get('title', '').lower()
             doc_type = doc.get('type')
         else:
-            content = getattr(doc, 'content', '').lower()
             title = getattr(doc, 'title', '').lower()
             doc_type = getattr(doc, 'type', None)
         
@@ -606,7 +723,7 @@ class UniversalSearchService:
         
         # Vérification de la référence (prioritaire)
         if query_analysis.reference:
-            if query_analysis.reference.lower() in title or query_analysis.reference.lower() in content:
+            if self._contains_reference(doc, query_analysis.reference.lower()):
                 return True
         
         # Vérification des mots-clés
@@ -614,56 +731,72 @@ class UniversalSearchService:
             return False
         
         # Au moins 30% des mots-clés doivent matcher
-        matches = sum(1 for keyword in query_analysis.keywords if keyword in content or keyword in title)
+        found = matched_terms(content, query_analysis.keywords)
+        matches = sum(1 for keyword in query_analysis.keywords if keyword.lower() in found or keyword in title)
         match_ratio = matches / len(query_analysis.keywords)
         
         return match_ratio >= 0.3
     
-    def _intelligent_scoring(self, results: List[Dict], query_analysis: QueryAnalysis) -> List[Dict]:
-        """Scoring intelligent basé sur multiple critères"""
+    def _session_index(self) -> InvertedIndex:
+        """Index de la session courante (vide hors Streamlit)"""
+        try:
+            import streamlit as st
+            index = st.session_state.get('search_index')
+        except ImportError:
+            index = self._standalone_index
+        return index if index is not None else InvertedIndex()
+    
+    def _intelligent_scoring(self, results: List[Dict], query_analysis: QueryAnalysis, index: Optional[InvertedIndex] = None) -> List[Dict]:
+        """Classement BM25F avec bonus référence, type, parties et fraîcheur"""
+        scorer = BM25FScorer(index if index is not None else self._session_index())
+        
+        # Termes de la requête analysés une seule fois
+        keyword_terms = analyze_text(' '.join(query_analysis.keywords))
+        parties_terms = [
+            analyze_text(partie)
+            for partie in query_analysis.parties['demandeurs'] + query_analysis.parties['defendeurs']
+        ]
+        infraction_terms = analyze_text(' '.join(query_analysis.infractions))
+        query_terms = list(dict.fromkeys(
+            keyword_terms + [term for terms in parties_terms for term in terms] + infraction_terms
+        ))
+        reference = query_analysis.reference.lower() if query_analysis.reference else None
+        reference_terms = analyze_text(reference) if reference else []
+        document_type = query_analysis.document_type.lower() if query_analysis.document_type else None
+        now = datetime.now()
         
         for result in results:
             score = result.get('score', 0)
             
-            content = result.get('content', '').lower()
             title = result.get('title', '').lower()
+            doc_terms = scorer.document_terms(result.get('id'), result)
             
-            # Score basé sur la correspondance exacte de la référence
-            if query_analysis.reference:
-                if query_analysis.reference.lower() in title:
+            # Pertinence BM25F (titre, contenu, parties, infractions)
+            score += scorer.score(doc_terms, query_terms) * self.BM25_SCORE_SCALE
+            
+            # Bonus référence
+            if reference:
+                if reference in title:
                     score += 20
-                if query_analysis.reference.lower() in content:
+                if contains_reference(doc_terms, document_text(result), reference, reference_terms):
                     score += 10
             
-            # Score basé sur le type de document
-            if query_analysis.document_type:
-                if query_analysis.document_type.lower() in title:
-                    score += 15
+            # Bonus type de document
+            if document_type and document_type in title:
+                score += 15
             
-            # Score pour les mots-clés
-            for keyword in query_analysis.keywords:
-                # Titre = plus de poids
-                score += title.count(keyword) * 3
-                # Contenu
-                score += min(content.count(keyword), 10) * 1  # Limiter pour éviter le spam
-            
-            # Score pour les parties mentionnées
-            for partie in query_analysis.parties['demandeurs'] + query_analysis.parties['defendeurs']:
-                if partie.lower() in title:
+            # Bonus parties
+            for terms in parties_terms:
+                if doc_terms.contains_all('title', terms):
                     score += 10
-                if partie.lower() in content:
+                if doc_terms.contains_all('content', terms):
                     score += 5
             
-            # Score pour les infractions
-            for infraction in query_analysis.infractions:
-                if infraction.lower() in content:
-                    score += 8
-            
-            # Bonus pour la fraîcheur (si metadata contient une date)
+            # Bonus fraîcheur
             if 'date' in result.get('metadata', {}):
                 try:
                     doc_date = datetime.fromisoformat(result['metadata']['date'])
-                    days_old = (datetime.now() - doc_date).days
+                    days_old = (now - doc_date).days
                     if days_old < 30:
                         score += 5
                     elif days_old < 90:
@@ -671,8 +804,8 @@ class UniversalSearchService:
                 except:
                     pass
             
-            # Pénalité pour les documents trop courts
-            if len(content) < 100:
+            # Pénalité documents courts (contenu effectivement récupéré)
+            if result.get('content_fetched', True) and len(document_text(result)) < 100:
                 score *= 0.5
             
             result['score'] = score
@@ -680,69 +813,59 @@ class UniversalSearchService:
         return results
     
     def _extract_highlights(self, results: List[Dict], query_analysis: QueryAnalysis) -> List[Dict]:
-        """Extrait les passages pertinents pour chaque résultat"""
+        """Extrait les passages pertinents en un seul passage par document"""
+        # Un seul automate par requête pour tous les mots-clés et la référence
+        extractor = HighlightExtractor(
+            query_analysis.keywords[:5],
+            reference=query_analysis.reference
+        )
         
         for result in results:
-            content = result.get('content', '')
-            highlights = []
-            
-            # Rechercher les contextes autour des mots-clés
-            for keyword in query_analysis.keywords[:5]:  # Limiter aux 5 premiers
-                pattern = re.compile(
-                    rf'(.{{0,50}}\b{re.escape(keyword)}\b.{{0,50}})',
-                    re.IGNORECASE | re.DOTALL
-                )
-                matches = pattern.findall(content)
-                
-                for match in matches[:2]:  # Max 2 highlights par mot-clé
-                    highlight = match.strip()
-                    if highlight and highlight not in highlights:
-                        highlights.append(highlight)
-            
-            # Ajouter un highlight pour la référence si présente
-            if query_analysis.reference:
-                ref_pattern = re.compile(
-                    rf'(.{{0,100}}{re.escape(query_analysis.reference)}.{{0,100}})',
-                    re.IGNORECASE | re.DOTALL
-                )
-                ref_matches = ref_pattern.findall(content)
-                for match in ref_matches[:1]:
-                    highlights.insert(0, match.strip())
-            
-            result['highlights'] = highlights[:3]  # Maximum 3 highlights
+            if not result.get('content_fetched', True):
+                result['highlights'] = []
+                result['highlight_offsets'] = []
+                continue
+            snippets = extractor.extract(document_text(result), max_snippets=3)
+            result['highlights'] = [snippet.text for snippet in snippets]
+            result['highlight_offsets'] = [(snippet.start, snippet.end) for snippet in snippets]
         
         return results
     
-    def _deduplicate_results(self, results: List[Dict]) -> List[Dict]:
-        """Déduplication intelligente basée sur la similarité"""
-        
+    def _deduplicate_results(self, results: List[Dict], index: Optional[InvertedIndex] = None) -> List[Dict]:
+        """Déduplication par signatures MinHash et buckets LSH (coût quasi linéaire)"""
         if not results:
             return []
         
+        index = index if index is not None else self._session_index()
+        content_lsh = LSHIndex()
+        title_lsh = LSHIndex()
         unique_results = []
-        seen_contents = []
         
-        for result in results:
-            # Créer une signature du document
-            title = result.get('title', '')
-            content_preview = result.get('content', '')[:200]
+        for position, result in enumerate(results):
+            title_sig = title_signature(result.get('title', ''))
+            if not result.get('content_fetched', True):
+                # Sans contenu, seul le titre permet de repérer un doublon
+                if title_lsh.query(title_sig, self.DUPLICATE_THRESHOLD):
+                    continue
+                title_lsh.insert(position, title_sig)
+                unique_results.append(result)
+                continue
             
-            # Vérifier la similarité avec les documents déjà vus
-            is_duplicate = False
+            # Signature calculée à l'indexation si le document est connu
+            doc_id = result.get('id')
+            content_sig = None
+            if doc_id is not None and doc_id in index and index.is_current(doc_id, result):
+                content_sig = index.signature(doc_id)
+            if content_sig is None:
+                content_sig = content_signature(document_text(result))
             
-            for seen_title, seen_content in seen_contents:
-                # Calculer la similarité
-                title_similarity = difflib.SequenceMatcher(None, title, seen_title).ratio()
-                content_similarity = difflib.SequenceMatcher(None, content_preview, seen_content).ratio()
-                
-                # Si très similaire, considérer comme duplicata
-                if title_similarity > 0.85 or content_similarity > 0.85:
-                    is_duplicate = True
-                    break
+            if (content_lsh.query(content_sig, self.DUPLICATE_THRESHOLD) or
+                    title_lsh.query(title_sig, self.DUPLICATE_THRESHOLD)):
+                continue
             
-            if not is_duplicate:
-                unique_results.append(result)
-                seen_contents.append((title, content_preview))
+            content_lsh.insert(position, content_sig)
+            title_lsh.insert(position, title_sig)
+            unique_results.append(result)
         
         return unique_results
     
@@ -817,7 +940,8 @@ class UniversalSearchService:
             metadata={
                 'score': result.get('score', 0),
                 'type': result.get('type', 'unknown'),
-                'date': result.get('metadata', {}).get('date')
+                'date': result.get('metadata', {}).get('date'),
+                'highlight_offsets': result.get('highlight_offsets', [])
             }
         )
         
@@ -832,6 +956,7 @@ class UniversalSearchService:
         stats = {
             'total_searches': len(self._search_history),
             'cache_size': len(self._cache),
+            'cache': self._cache.stats(),
             'recent_searches': self._search_history[-10:],
             'popular_keywords': {},
             'average_results': 0
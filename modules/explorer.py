@@ -18,6 +18,7 @@ from managers.azure_blob_manager import AzureBlobManager
 from models.dataclasses import Document
 from utils.text_processing import calculate_read_time
 from utils.file_utils import get_file_icon, sanitize_filename, format_file_size
+from utils.mapped_text import document_text, word_count
 try:
     from utils.helpers import clean_key, truncate_text
     from utils.date_time import format_legal_date
@@ -383,8 +384,8 @@ def show_enhanced_list_view(documents: Dict[str, Document]):
         "Date ↑": lambda x: x[1].created_at,
         "Titre A-Z": lambda x: x[1].title.lower(),
         "Titre Z-A": lambda x: x[1].title.lower(),
-        "Taille ↓": lambda x: len(x[1].content),
-        "Taille ↑": lambda x: len(x[1].content),
+        "Taille ↓": lambda x: len(document_text(x[1])),
+        "Taille ↑": lambda x: len(document_text(x[1])),
         "Pertinence IA": lambda x: x[1].metadata.get('ai_relevance_score', 0)
     }
     
@@ -453,7 +454,7 @@ def show_enhanced_document_item(doc_id: str, doc: Document, compact: bool, previ
             if doc.source:
                 meta_parts.append(f"📂 {doc.source}")
             meta_parts.append(f"📅 {doc.created_at.strftime('%d/%m/%Y')}")
-            meta_parts.append(f"📏 {format_file_size(len(doc.content))}")
+            meta_parts.append(f"📏 {format_file_size(len(document_text(doc)))}")
             
             st.caption(" • ".join(meta_parts))
         
@@ -514,18 +515,19 @@ def show_enhanced_document_item(doc_id: str, doc: Document, compact: bool, previ
             
             # Métadonnées détaillées
             meta_cols = st.columns(4)
+            text = document_text(doc)
             
             with meta_cols[0]:
                 st.metric("Source", doc.source or "Non spécifié")
             
             with meta_cols[1]:
-                st.metric("Taille", format_file_size(len(doc.content)))
+                st.metric("Taille", format_file_size(len(text)))
             
             with meta_cols[2]:
-                st.metric("Mots", f"{len(doc.content.split()):,}")
+                st.metric("Mots", f"{word_count(text):,}")
             
             with meta_cols[3]:
-                read_time = calculate_read_time(doc.content)
+                read_time = calculate_read_time(text)
                 st.metric("Lecture", f"{read_time} min")
             
             # Tags
@@ -533,10 +535,10 @@ def show_enhanced_document_item(doc_id: str, doc: Document, compact: bool, previ
                 st.write("🏷️ **Tags:** " + ", ".join([f"`{tag}`" for tag in doc.tags]))
             
             # Aperçu si activé
-            if preview and doc.content:
+            if preview and text:
                 with st.expander("📄 Aperçu du contenu", expanded=False):
-                    preview_text = doc.content[:500]
-                    if len(doc.content) > 500:
+                    preview_text = text[:500]
+                    if len(text) > 500:
                         preview_text += "..."
                     st.text(preview_text)
             
@@ -641,7 +643,7 @@ def show_ai_analysis_interface():
                 st.write(f"{i+1}. {doc.title}")
             
             with col2:
-                st.caption(format_file_size(len(doc.content)))
+                st.caption(format_file_size(len(document_text(doc))))
             
             with col3:
                 if st.button("❌", key=f"remove_queue_{doc_id}"):
@@ -875,10 +877,11 @@ def show_global_statistics(documents: Dict[str, Document]):
     # Préparer les données
     df_data = []
     for doc_id, doc in documents.items():
+        text = document_text(doc)
         df_data.append({
             'Titre': doc.title,
-            'Taille': len(doc.content),
-            'Mots': len(doc.content.split()),
+            'Taille': len(text),
+            'Mots': word_count(text),
             'Date': doc.created_at,
             'Source': doc.source or 'Non spécifié',
             'Type': get_document_type(doc),
@@ -973,7 +976,7 @@ def show_kanban_view(documents: Dict[str, Document]):
                         <div style='background: white; padding: 10px; border-radius: 5px; 
                                    margin-bottom: 10px; border-left: 3px solid #667eea;'>
                             <strong>{get_file_icon(doc.title)} {truncate_text(doc.title, 25)}</strong><br>
-                            <small>{format_file_size(len(doc.content))} • {doc.created_at.strftime('%d/%m')}</small>
+                            <small>{format_file_size(len(document_text(doc)))} • {doc.created_at.strftime('%d/%m')}</small>
                         </div>
                     """, unsafe_allow_html=True)
                     
@@ -1237,7 +1240,8 @@ def get_filtered_documents(search_query: str, quick_filter: str) -> Dict[str, Do
                 pass
             else:
                 # Recherche normale
-                searchable = f"{doc.title} {doc.content[:1000]} {' '.join(doc.tags)} {doc.source or ''}".lower()
+                # Seul le début du texte est lu (tranche du fichier projeté pour un document stocké)
+                searchable = f"{doc.title} {document_text(doc)[:1000]} {' '.join(doc.tags)} {doc.source or ''}".lower()
                 if search_lower not in searchable:
                     continue
         
@@ -1316,20 +1320,22 @@ def show_document_stats(doc_id: str, doc: Document):
     """Affiche les statistiques détaillées d'un document"""
     with st.expander(f"📊 Statistiques - {doc.title}", expanded=True):
         col1, col2, col3 = st.columns(3)
+        content = doc.content
+        paragraphs = [p for p in content.split('\n\n') if p.strip()]
         
         with col1:
-            st.metric("Caractères", f"{len(doc.content):,}")
-            st.metric("Mots", f"{len(doc.content.split()):,}")
-            st.metric("Lignes", f"{len(doc.content.splitlines()):,}")
+            st.metric("Caractères", f"{len(content):,}")
+            st.metric("Mots", f"{len(content.split()):,}")
+            st.metric("Lignes", f"{len(content.splitlines()):,}")
         
         with col2:
-            st.metric("Paragraphes", f"{len([p for p in doc.content.split('\n\n') if p.strip()]):,}")
-            st.metric("Phrases (approx.)", f"{doc.content.count('.') + doc.content.count('!') + doc.content.count('?'):,}")
-            read_time = calculate_read_time(doc.content)
+            st.metric("Paragraphes", f"{len(paragraphs):,}")
+            st.metric("Phrases (approx.)", f"{content.count('.') + content.count('!') + content.count('?'):,}")
+            read_time = calculate_read_time(content)
             st.metric("Temps de lecture", f"{read_time} min")
         
         with col3:
-            st.metric("Taille", format_file_size(len(doc.content)))
+            st.metric("Taille", format_file_size(len(content)))
             st.metric("Tags", len(doc.tags))
             st.metric("Créé il y a", f"{(datetime.now() - doc.created_at).days} jours")
 
@@ -1388,6 +1394,10 @@ def delete_document(doc_id: str):
     if doc_id in st.session_state.azure_documents:
         del st.session_state.azure_documents[doc_id]
         
+        # Retirer de l'index de recherche de la session
+        if st.session_state.get('search_index') is not None:
+            st.session_state.search_index.remove_document(doc_id)
+        
         # Retirer des favoris et sélections
         if doc_id in st.session_state.explorer_state.get('favorite_docs', []):
             st.session_state.explorer_state['favorite_docs'].remove(doc_id)
@@ -28,6 +28,7 @@ try:
 except Exception:  # pragma: no cover - fallback for standalone use
     from utils.fallback import clean_key, format_legal_date, truncate_text
 from utils.decorators import decorate_public_functions
+from utils.document_store import IMPORT_DOSSIER, DocumentHandle, get_document_store
 
 # Enregistrement automatique des fonctions publiques pour le module
 decorate_public_functions(sys.modules[__name__])
@@ -265,9 +266,18 @@ def show_file_upload_interface(auto_analyze: bool, validate_format: bool):
         
         with col3:
             if st.button("❌ Annuler", use_container_width=True):
+                release_imported_documents(st.session_state.import_export_state['imported_documents'])
                 st.session_state.import_export_state['imported_documents'] = []
                 st.rerun()
 
+def release_imported_documents(docs: List[Any]):
+    """Libère dans le stockage les contenus des documents importés abandonnés"""
+    for doc in docs:
+        handle = doc.get('handle') if isinstance(doc, dict) else doc
+        if isinstance(handle, DocumentHandle):
+            handle.release()
+    get_document_store().collect_garbage()
+
 def show_folder_upload_interface(auto_analyze: bool, validate_format: bool):
     """Interface d'upload de dossiers compressés"""
     uploaded_zips = st.file_uploader(
@@ -928,12 +938,14 @@ def process_file_import(files, auto_analyze: bool):
         # Simulation du traitement
         time.sleep(0.5)
         
-        # Création du document
+        # Création du document : le contenu est rangé une fois dans le stockage,
+        # la session n'en garde que la poignée
+        data = file.getvalue() if hasattr(file, 'getvalue') else file.read()
         doc = {
             'name': file.name,
             'type': file.type,
             'size': file.size,
-            'content': file.read() if hasattr(file, 'read') else None,
+            'handle': get_document_store().put(data, file.name, IMPORT_DOSSIER, mime_type=file.type),
             'imported_at': datetime.now(),
             'metadata': extract_file_metadata(file)
         }
@@ -956,22 +968,33 @@ def process_folder_import(zip_files, auto_analyze: bool):
     """Traite l'import de dossiers compressés"""
     imported_docs = []
 
+    store = get_document_store()
     for zip_file in zip_files:
+        # Chaque archive est un dossier : une pièce commune à plusieurs
+        # dossiers n'est stockée qu'une fois
+        dossier = Path(getattr(zip_file, 'name', IMPORT_DOSSIER)).stem
         with zipfile.ZipFile(zip_file) as archive:
             for info in archive.infolist():
                 if info.is_dir():
                     continue
                 data = archive.read(info.filename)
                 mime_type, _ = mimetypes.guess_type(info.filename)
-                doc = {
-                    'name': Path(info.filename).name,
-                    'path': info.filename,
-                    'type': mime_type or 'application/octet-stream',
-                    'size': len(data),
-                    'content': data,
-                    'imported_at': datetime.now(),
-                }
+                # Référence stable (chemin dans l'archive) : réimporter l'archive
+                # remplace la pièce au lieu d'en ajouter une référence
+                doc = store.put(
+                    data, info.filename, dossier,
+                    mime_type=mime_type or 'application/octet-stream',
+                    metadata={'path': info.filename, 'imported_at': datetime.now().isoformat()},
+                    ref=info.filename
+                )
+                # Texte extrait une fois à l'import, lu ensuite par tranches
+                store.text_for(doc.digest, lambda raw, name=info.filename: _extract_member(name, raw))
+                previous = st.session_state.imported_documents.get(info.filename)
+                if isinstance(previous, DocumentHandle) and (previous.dossier, previous.ref) != (doc.dossier, doc.ref):
+                    previous.release()
                 st.session_state.imported_documents[info.filename] = doc
+                if st.session_state.get('search_index') is not None:
+                    st.session_state.search_index.add_document(info.filename, doc)
                 imported_docs.append(doc)
 
     st.session_state.import_export_state['imported_documents'].extend(imported_docs)
@@ -982,6 +1005,15 @@ def process_folder_import(zip_files, auto_analyze: bool):
         st.session_state.import_export_state['ai_analysis_queue'].extend(imported_docs)
         st.info("🤖 Les fichiers ont été ajoutés à la file d'analyse IA")
 
+def _extract_member(name: str, data: bytes) -> str:
+    """Texte d'une pièce d'archive, avec les lecteurs de DocumentManager"""
+    from managers.document_manager import DocumentManager
+    try:
+        return DocumentManager._extract_content(io.BytesIO(data), Path(name).suffix.lower())
+    except Exception:
+        # Format non reconnu ou illisible : contenu décodé, comme le ferait la poignée
+        return data.decode('utf-8', errors='ignore')
+
 def extract_file_metadata(file) -> dict:
     """Extrait les métadonnées d'un fichier"""
     return {
@@ -7,7 +7,7 @@ import re
 import sys
 import time
 from datetime import datetime
-from functools import lru_cache
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -17,6 +17,7 @@ import plotly.graph_objects as go
 import streamlit as st
 from config.ai_models import AI_MODELS
 from utils.decorators import decorate_public_functions
+from utils.llm_policies import ALL, arun_policy, quorum
 
 # Enregistrement automatique des fonctions publiques pour le module
 decorate_public_functions(sys.modules[__name__])
@@ -37,6 +38,9 @@ def lazy_load_components():
 
 # Configuration des modèles IA importée depuis config.ai_models
 
+# Attente maximale de l'ensemble des modèles (s)
+GENERATION_TIMEOUT = 120
+
 # ========================= ANALYSEUR DE REQUÊTES JURIDIQUES =========================
 
 class AnalyseurRequeteJuridiqueAvance:
@@ -511,20 +515,23 @@ PAR CES MOTIFS
         # Préparer le prompt
         prompt = self._prepare_prompt(type_acte, params)
         
-        # Générer avec chaque modèle
-        generations = {}
-        
         progress_bar = st.progress(0)
         status_text = st.empty()
+        status_text.text(f"🤖 Génération avec {len(models_selected)} modèle(s) en parallèle...")
         
-        for i, model_id in enumerate(models_selected):
-            status_text.text(f"🤖 Génération avec {self.models[model_id]['name']}...")
-            
-            # Simuler la génération (remplacer par l'appel API réel)
-            generation = await self._generate_with_model(model_id, prompt, params)
-            generations[model_id] = generation
-            
-            progress_bar.progress((i + 1) / len(models_selected))
+        # Tous les modèles en parallèle ; les retardataires sont annulés
+        # dès que la fusion choisie dispose de suffisamment de versions
+        calls = [
+            (model_id, partial(self._generate_with_model, model_id, prompt, params))
+            for model_id in models_selected
+        ]
+        outcomes = await arun_policy(
+            calls, self._fusion_policy(fusion_mode, len(models_selected)),
+            timeout=GENERATION_TIMEOUT, is_success=bool
+        )
+        generations = {outcome.name: outcome.result for outcome in outcomes if outcome.succeeded}
+        
+        progress_bar.progress(0.8)
         
         # Fusionner les résultats
         status_text.text("🔄 Fusion des résultats...")
@@ -543,6 +550,13 @@ PAR CES MOTIFS
         
         return result
     
+    @staticmethod
+    def _fusion_policy(fusion_mode: str, model_count: int):
+        """Le consensus et la fusion complémentaire se contentent des deux premières versions"""
+        if fusion_mode in ('consensus', 'complementaire') and model_count > 2:
+            return quorum(2)
+        return ALL
+    
     def _prepare_prompt(self, type_acte: str, params: Dict[str, Any]) -> str:
         """Prépare le prompt pour les modèles"""
         
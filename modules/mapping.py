@@ -19,6 +19,7 @@ from utils.helpers import clean_key, truncate_text
 from utils.date_time import format_legal_date
 from utils.decorators import decorate_public_functions
 from utils.session import initialize_session_state
+from utils.rate_limiter import Priority
 
 import networkx as nx
 import plotly.graph_objects as go
@@ -943,7 +944,8 @@ Profondeur : {config['depth']}
         model,
         prompt,
         "Tu es un expert en analyse de réseaux et relations dans les documents juridiques.",
-        temperature=0.3
+        temperature=0.3,
+        priority=Priority.BATCH
     )
     
     if response['success']:
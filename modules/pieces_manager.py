@@ -19,7 +19,7 @@ import streamlit as st
 
 # Ajouter le chemin parent pour les imports
 
-from managers.azure_search_manager import AzureSearchManager
+from managers.azure_search_manager import AzureSearchManager, SearchResult
 from managers.export_manager import ExportManager
 # Import des gestionnaires
 from managers.multi_llm_manager import MultiLLMManager
@@ -29,6 +29,7 @@ from models.dataclasses import (Document, ElementProcedure, ForceProbante,
                                 PieceSelectionnee)
 # Import des utilitaires
 from utils.file_utils import sanitize_filename, format_file_size
+from utils.search_index import InvertedIndex
 from utils.text_processing import extract_key_phrases
 try:
     from utils.helpers import clean_key, truncate_text
@@ -251,13 +252,35 @@ class GestionnairePiecesUnifie:
         
         # Recherche Azure si disponible
         if self.search_manager and st.session_state.get('azure_documents'):
-            results = self.search_manager.search_documents(query, top=20)
-            for result in results:
+            response = self.search_manager.search(query, top=20)
+            for result in response.get('results', []):
                 piece = self._search_result_to_piece(result, len(pieces) + 1)
                 pieces.append(piece)
         
         return pieces
     
+    def detecter_doublons(self, seuil: float = 0.85) -> Dict[str, List[str]]:
+        """Repère les pièces quasi identiques, y compris entre dossiers
+        
+        Réutilise les signatures MinHash calculées par l'index de recherche.
+        Retourne pour chaque document la liste de ses doublons probables.
+        """
+        documents = {}
+        documents.update(st.session_state.get('azure_documents', {}))
+        documents.update(st.session_state.get('imported_documents', {}))
+        
+        index = st.session_state.get('search_index')
+        if index is None:
+            index = InvertedIndex()
+            st.session_state.search_index = index
+        index.sync(documents)
+        
+        doublons = {}
+        for groupe in index.duplicate_groups(seuil):
+            for doc_id in groupe:
+                doublons[doc_id] = [autre for autre in groupe if autre != doc_id]
+        return doublons
+    
     def _match_document(self, doc: Document, query: str) -> bool:
         """Vérifie si un document correspond à la recherche"""
         query_lower = query.lower()
@@ -284,15 +307,15 @@ class GestionnairePiecesUnifie:
             document_source=doc
         )
     
-    def _search_result_to_piece(self, result: dict, numero: int) -> PieceSelectionnee:
+    def _search_result_to_piece(self, result: SearchResult, numero: int) -> PieceSelectionnee:
         """Convertit un résultat de recherche en pièce"""
         return PieceSelectionnee(
             numero=numero,
-            titre=result.get('title', 'Sans titre'),
-            description=result.get('content', '')[:200],
+            titre=result.title or 'Sans titre',
+            description=(result.content or '')[:200],
             categorie="Résultat de recherche",
             source="Azure Search",
-            pertinence=result.get('@search.score', 0.5)
+            pertinence=result.score or 0.5
         )
     
     # ==================================================
@@ -972,14 +995,16 @@ def display_enhanced_imported_documents(gestionnaire: GestionnairePiecesUnifie):
             st.rerun()
     
     # Affichage des documents
+    doublons = gestionnaire.detecter_doublons()
     for i, (doc_id, doc) in enumerate(docs):
-        display_enhanced_document_card(gestionnaire, doc, doc_id, i)
+        display_enhanced_document_card(gestionnaire, doc, doc_id, i, doublons.get(doc_id))
 
 def display_enhanced_document_card(
     gestionnaire: GestionnairePiecesUnifie,
     doc: Document,
     doc_id: str,
-    index: int
+    index: int,
+    doublons: Optional[List[str]] = None
 ):
     """Affiche une carte de document améliorée"""
     
@@ -1006,6 +1031,9 @@ def display_enhanced_document_card(
             if doc.metadata and doc.metadata.get('date'):
                 tags_html += f' <span class="category-badge">📅 {doc.metadata["date"]}</span>'
             st.markdown(tags_html, unsafe_allow_html=True)
+            
+            if doublons:
+                st.caption(f"⚠️ Doublon probable de : {', '.join(doublons[:3])}")
         
         with col2:
             if doc.metadata:
@@ -25,10 +25,20 @@ except Exception:  # pragma: no cover - fallback for standalone use
     from utils.fallback import clean_key, format_legal_date, truncate_text
     from utils.date_time import format_duration
 from utils.decorators import decorate_public_functions
+from utils.llm_policies import quorum
 
 # Enregistrement automatique des fonctions publiques pour le module
 decorate_public_functions(sys.modules[__name__])
 
+# Attente maximale des modèles en mode multi / fusion (s)
+PLAIDOIRIE_TIMEOUT = 180
+
+PLAIDOIRIE_FUSION_INSTRUCTIONS = """Voici plusieurs versions d'une même plaidoirie.
+Fusionne-les en une plaidoirie unique : garde l'accroche la plus forte, les arguments
+les plus solides de chaque version et la péroraison la plus percutante.
+Conserve le style oral (adresses à la juridiction, pauses, effets rhétoriques).
+"""
+
 
 def run():
     """Fonction principale du module pour le lazy loading"""
@@ -605,6 +615,7 @@ def generate_plaidoirie_with_progress():
             ]
         
         results = []
+        generated = False
         
         for phase_name, progress_value in phases:
             status_text.text(f"⏳ {phase_name}...")
@@ -616,33 +627,18 @@ def generate_plaidoirie_with_progress():
                 prompt = build_enhanced_plaidoirie_prompt(config, analysis)
                 system_prompt = build_enhanced_system_prompt(config)
                 
-            elif "Génération" in phase_name and mode != "fusion":
-                # Extraire le nom du modèle
-                for model in selected_models:
-                    if model.value in phase_name:
-                        result = generate_with_model(
-                            model, 
-                            prompt, 
-                            system_prompt,
-                            st.session_state.plaidoirie_state.get('model_params', {})
-                        )
-                        if result:
-                            results.append(result)
-                        break
-            
-            elif "Génération" in phase_name and mode == "fusion":
-                # Mode fusion : génération parallèle
-                for model in selected_models:
-                    if model.value in phase_name:
-                        result = generate_with_model(
-                            model, 
-                            prompt, 
-                            system_prompt,
-                            st.session_state.plaidoirie_state.get('model_params', {})
-                        )
-                        if result:
-                            results.append(result)
-                        break
+            elif "Génération" in phase_name and not generated:
+                # Tous les modèles sont interrogés en parallèle ; en fusion,
+                # les deux premières plaidoiries suffisent
+                policy = quorum(2) if mode == "fusion" and len(selected_models) > 2 else None
+                results.extend(generate_with_models(
+                    selected_models,
+                    prompt,
+                    system_prompt,
+                    st.session_state.plaidoirie_state.get('model_params', {}),
+                    policy
+                ))
+                generated = True
             
             elif "Fusion intelligente" in phase_name:
                 # Fusionner les résultats
@@ -959,57 +955,86 @@ def analyze_documents(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     return analysis
 
-def generate_with_model(
-    provider: LLMProvider,
+def generate_with_models(
+    providers: List[LLMProvider],
     prompt: str,
     system_prompt: str,
-    params: Dict[str, Any]
-) -> Optional[PlaidoirieResult]:
-    """Génère une plaidoirie avec un modèle spécifique"""
+    params: Dict[str, Any],
+    policy=None
+) -> List[PlaidoirieResult]:
+    """Génère une plaidoirie par modèle, en parallèle, selon la politique d'attente"""
     
     llm_manager = MultiLLMManager()
     
-    # Paramètres de génération
-    generation_params = {
-        'temperature': params.get('temperature', 0.8),
-        'max_tokens': params.get('max_tokens', 5000),
-        'top_p': params.get('top_p', 0.9),
-        'frequency_penalty': params.get('frequency_penalty', 0.3)
-    }
-    
-    response = llm_manager.query_single_llm(
-        provider,
+    responses = llm_manager.query_multiple_llms(
+        providers,
         prompt,
         system_prompt,
-        **generation_params
+        temperature=params.get('temperature', 0.8),
+        max_tokens=params.get('max_tokens', 5000),
+        policy=policy,
+        timeout=PLAIDOIRIE_TIMEOUT
     )
     
-    if response['success']:
-        content = response['response']
-        
-        # Créer le résultat
-        result = PlaidoirieResult(
-            content=content,
-            type=st.session_state.plaidoirie_state['config'].get('audience_type', 'correctionnelle'),
-            style=st.session_state.plaidoirie_state['config'].get('style', 'classique'),
-            duration_estimate=st.session_state.plaidoirie_state['config'].get('duree', '20 min'),
-            key_points=extract_key_points(content),
-            structure=extract_plaidoirie_structure(content),
-            oral_markers=extract_oral_markers(content),
-            metadata={
-                'provider': provider.value,
-                'timestamp': datetime.now().isoformat(),
-                **st.session_state.plaidoirie_state['config']
-            }
-        )
-        
-        return result
+    return [
+        build_plaidoirie_result(response['provider'], response['response'])
+        for response in responses if response.get('success')
+    ]
+
+def build_plaidoirie_result(provider_name: str, content: str) -> PlaidoirieResult:
+    """Construit le résultat d'une plaidoirie générée"""
     
-    return None
+    return PlaidoirieResult(
+        content=content,
+        type=st.session_state.plaidoirie_state['config'].get('audience_type', 'correctionnelle'),
+        style=st.session_state.plaidoirie_state['config'].get('style', 'classique'),
+        duration_estimate=st.session_state.plaidoirie_state['config'].get('duree', '20 min'),
+        key_points=extract_key_points(content),
+        structure=extract_plaidoirie_structure(content),
+        oral_markers=extract_oral_markers(content),
+        metadata={
+            'provider': provider_name,
+            'timestamp': datetime.now().isoformat(),
+            **st.session_state.plaidoirie_state['config']
+        }
+    )
 
 def fusion_plaidoiries(results: List[PlaidoirieResult], config: Dict[str, Any]) -> PlaidoirieResult:
     """Fusionne intelligemment plusieurs plaidoiries"""
     
+    llm_manager = MultiLLMManager()
+    if llm_manager.clients:
+        # Fusion hiérarchique par les modèles, deux plaidoiries à la fois
+        final_content = llm_manager.fusion_responses(
+            [
+                {'success': True, 'provider': r.metadata.get('provider', 'Unknown'), 'response': r.content}
+                for r in results
+            ],
+            PLAIDOIRIE_FUSION_INSTRUCTIONS
+        )
+    else:
+        final_content = fusion_plaidoiries_locally(results, config)
+    
+    # Créer le résultat fusionné
+    return PlaidoirieResult(
+        content=final_content,
+        type=config.get('audience_type', 'correctionnelle'),
+        style=config.get('style', 'mixte'),
+        duration_estimate=config.get('duree', '20 min'),
+        key_points=extract_key_points(final_content),
+        structure=extract_plaidoirie_structure(final_content),
+        oral_markers=extract_oral_markers(final_content),
+        metadata={
+            'provider': 'Fusion',
+            'sources': [r.metadata.get('provider') for r in results],
+            'timestamp': datetime.now().isoformat(),
+            **config
+        }
+    )
+
+def fusion_plaidoiries_locally(results: List[PlaidoirieResult], config: Dict[str, Any]) -> str:
+    """Fusion sans modèle : meilleures sections de chaque plaidoirie"""
+    
     # Extraire les meilleures parties de chaque plaidoirie
     best_parts = {
         'introduction': [],
@@ -1032,24 +1057,7 @@ def fusion_plaidoiries(results: List[PlaidoirieResult], config: Dict[str, Any])
                 })
     
     # Sélectionner les meilleures parties
-    final_content = build_fused_plaidoirie(best_parts, config)
-    
-    # Créer le résultat fusionné
-    return PlaidoirieResult(
-        content=final_content,
-        type=config.get('audience_type', 'correctionnelle'),
-        style=config.get('style', 'mixte'),
-        duration_estimate=config.get('duree', '20 min'),
-        key_points=extract_key_points(final_content),
-        structure=extract_plaidoirie_structure(final_content),
-        oral_markers=extract_oral_markers(final_content),
-        metadata={
-            'provider': 'Fusion',
-            'sources': [r.metadata.get('provider') for r in results],
-            'timestamp': datetime.now().isoformat(),
-            **config
-        }
-    )
+    return build_fused_plaidoirie(best_parts, config)
 
 def build_enhanced_plaidoirie_prompt(config: dict, analysis: dict) -> str:
     """Construit un prompt amélioré pour la génération"""
@@ -21,6 +21,7 @@ from utils.formatters import (
     create_letterhead_from_template,
 )
 from utils.legal_utils import extract_legal_references
+from utils.llm_streaming import render_stream
 from utils import clean_key, format_legal_date
 
 from docx import Document as DocxDocument
@@ -404,13 +405,18 @@ class UnifiedRedactionModule:
             # Génération simple
             provider = LLMProvider[providers[0]] if providers[0] in [p.name for p in LLMProvider] else providers[0]
             
-            response = self.llm_manager.query_single_llm(
+            # Affichage progressif pendant la génération
+            placeholder = st.empty()
+            stream = self.llm_manager.stream_single_llm(
                 provider,
                 prompt,
                 system_prompt,
                 temperature=0.7,
                 max_tokens=max_tokens
             )
+            render_stream(stream, placeholder)
+            placeholder.empty()
+            response = stream.result()
             
             if response['success']:
                 return RedactionResult(
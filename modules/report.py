@@ -6,14 +6,19 @@ import re
 import sys
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import streamlit as st
 from config.ai_models import AI_MODELS
+from managers.multi_llm_manager import MultiLLMManager
 from utils.decorators import decorate_public_functions
+from utils.llm_fusion import dedupe_paragraphs
+from utils.llm_policies import ALL, quorum, run_policy
 from utils.session import initialize_session_state
 
 # Enregistrement automatique des fonctions publiques pour le module
@@ -22,6 +27,16 @@ decorate_public_functions(sys.modules[__name__])
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
+# Attente maximale de l'ensemble des modèles (s)
+REPORT_TIMEOUT = 180
+# Sections fusionnées simultanément en stratégie « Consensus »
+REPORT_FUSION_WORKERS = 4
+
+CONSENSUS_INSTRUCTIONS = """Voici la même section d'un rapport juridique rédigée par plusieurs modèles.
+Rédige une synthèse consensuelle : garde les points sur lesquels les versions
+s'accordent, signale brièvement les divergences et élimine les redondances.
+"""
+
 # Configuration de la page pour une meilleure expérience
 def configure_page():
     """Configure les paramètres de la page pour une meilleure UX"""
@@ -633,27 +648,25 @@ def generate_report_with_ai(config: Dict[str, Any]):
             'metadata': {}
         }
         
-        total_steps = len(config['sections']) * len(config['ai_models'])
-        current_step = 0
+        models = config['ai_models']
+        status_placeholder.info(f"🤖 Génération avec {len(models)} modèle(s) en parallèle...")
+        progress_placeholder.progress(10)
         
-        # Génération avec chaque modèle
-        for model in config['ai_models']:
-            model_results = {}
-            status_placeholder.info(f"🤖 Génération avec {AI_MODELS[model]['name']}...")
-            
-            for section in config['sections']:
-                current_step += 1
-                progress = int((current_step / total_steps) * 100)
-                st.session_state.generation_progress = progress
-                progress_placeholder.progress(progress)
-                
-                # Simulation de génération
-                time.sleep(0.5)  # Remplacer par l'appel API réel
-                
-                content = generate_section_content(section, config, model)
-                model_results[section] = content
-            
-            report['ai_results'][model] = model_results
+        # Les modèles travaillent en parallèle ; en fusion, les deux
+        # premiers rapports complets suffisent
+        policy = quorum(2) if config['fusion_mode'] and len(models) > 2 else ALL
+        outcomes = run_policy(
+            [(model, partial(generate_model_sections, config, model)) for model in models],
+            policy, timeout=REPORT_TIMEOUT, is_success=bool
+        )
+        for outcome in outcomes:
+            if outcome.succeeded:
+                report['ai_results'][outcome.name] = outcome.result
+            else:
+                logger.warning(f"Rapport {outcome.name} : {outcome.status} {outcome.error or ''}")
+        
+        st.session_state.generation_progress = 90
+        progress_placeholder.progress(90)
         
         # Fusion des résultats si mode fusion activé
         if config['fusion_mode']:
@@ -661,7 +674,7 @@ def generate_report_with_ai(config: Dict[str, Any]):
             report['content'] = merge_ai_results(report['ai_results'], config['fusion_strategy'])
         else:
             # Utiliser le résultat du modèle unique
-            report['content'] = report['ai_results'][config['ai_models'][0]]
+            report['content'] = next(iter(report['ai_results'].values()), {})
         
         # Calcul des métadonnées
         report['metadata'] = calculate_report_metadata(report)
@@ -678,6 +691,17 @@ def generate_report_with_ai(config: Dict[str, Any]):
         with results_container:
             display_generated_report(report)
 
+def generate_model_sections(config: Dict[str, Any], model: str) -> Dict[str, str]:
+    """Génère toutes les sections du rapport avec un modèle (sans appel Streamlit : exécuté dans un thread)"""
+    model_results = {}
+    
+    for section in config['sections']:
+        # Simulation de génération
+        time.sleep(0.5)  # Remplacer par l'appel API réel
+        model_results[section] = generate_section_content(section, config, model)
+    
+    return model_results
+
 def generate_section_content(section: str, config: Dict[str, Any], model: str) -> str:
     """Génère le contenu d'une section avec un modèle spécifique"""
     # Simulation de génération - À remplacer par les appels API réels
@@ -754,12 +778,27 @@ def merge_ai_results(ai_results: Dict[str, Dict[str, str]], strategy: str) -> Di
     for model_results in ai_results.values():
         all_sections.update(model_results.keys())
     
-    for section in all_sections:
-        contents = []
-        for model, results in ai_results.items():
-            if section in results:
-                contents.append((model, results[section]))
-        
+    section_contents = {
+        section: [(model, results[section]) for model, results in ai_results.items() if section in results]
+        for section in all_sections
+    }
+    
+    if strategy == "🤝 Consensus":
+        llm_manager = MultiLLMManager()
+        if llm_manager.clients:
+            # Fusion hiérarchique par les modèles, toutes les sections en parallèle
+            with ThreadPoolExecutor(max_workers=REPORT_FUSION_WORKERS) as executor:
+                futures = {
+                    section: executor.submit(
+                        llm_manager.fusion_responses,
+                        [{'success': True, 'provider': model, 'response': content} for model, content in contents],
+                        CONSENSUS_INSTRUCTIONS
+                    )
+                    for section, contents in section_contents.items()
+                }
+            return {section: future.result() for section, future in futures.items()}
+    
+    for section, contents in section_contents.items():
         if strategy == "🏆 Meilleur résultat":
             # Sélectionner le contenu le plus long/détaillé
             best_content = max(contents, key=lambda x: len(x[1]))
@@ -780,10 +819,10 @@ def merge_ai_results(ai_results: Dict[str, Dict[str, str]], strategy: str) -> Di
             merged_content[section] = consensus
         
         else:  # Créativité maximale
-            # Combiner tous les contenus de manière créative
+            # Combiner tous les contenus de manière créative, sans répéter les paragraphes communs
             creative_merge = "**Fusion créative multi-IA :**\n\n"
             
-            for i, (model, content) in enumerate(contents):
+            for i, (model, content) in enumerate(dedupe_paragraphs(contents)):
                 if i > 0:
                     creative_merge += "\n\n---\n\n"
                 creative_merge += f"**Perspective {AI_MODELS[model]['icon']} {model} :**\n{content}"
@@ -822,19 +822,12 @@ def generate_with_multi_ai_fusion(prompt: str) -> str:
     return fuse_ai_responses(responses, prompt)
 
 def fuse_ai_responses(responses: List[Dict], original_prompt: str) -> str:
-    """Fusionne intelligemment les réponses de plusieurs IA"""
+    """Fusionne intelligemment les réponses de plusieurs IA (fusion hiérarchique deux à deux)"""
     
     if len(responses) == 1:
         return responses[0]['content']
     
-    # Analyser et extraire les meilleures parties
-    versions_text = chr(10).join([
-        f"VERSION {i+1} ({r['provider']}):\n{r['content']}\n" for i, r in enumerate(responses)
-    ])
-
-    fusion_prompt = f"""Fusionne ces {len(responses)} versions de template en gardant le meilleur de chaque :
-
-{versions_text}
+    fusion_instructions = """Fusionne ces versions de template en gardant le meilleur de chaque.
 
 INSTRUCTIONS DE FUSION :
 1. Garde la structure la plus complète et logique
@@ -843,20 +836,17 @@ INSTRUCTIONS DE FUSION :
 4. Conserve toutes les variables [NomVariable]
 5. Élimine les redondances
 
-Retourne la version fusionnée optimale."""
+Retourne uniquement la version fusionnée optimale.
+"""
     
-    # Utiliser le premier modèle disponible pour la fusion
     from managers.multi_llm_manager import MultiLLMManager
     llm_manager = MultiLLMManager()
     
-    provider = list(llm_manager.clients.keys())[0]
-    response = llm_manager.query_single_llm(
-        provider,
-        fusion_prompt,
-        "Tu es un expert en fusion de contenus juridiques."
+    return llm_manager.fusion_responses(
+        [{'success': True, 'provider': r['provider'], 'response': r['content']} for r in responses],
+        fusion_instructions,
+        use_cache=True
     )
-    
-    return response['response'] if response['success'] else responses[0]['content']
 
 def show_apply_wizard(template_id: str):
     """Assistant d'application de template avec IA avancée"""
@@ -1473,7 +1463,8 @@ Retourne le document enrichi."""
         response = llm_manager.query_single_llm(
             provider,
             prompt,
-            f"Tu es un expert en rédaction juridique spécialisé en {template.get('category', 'droit')}."
+            f"Tu es un expert en rédaction juridique spécialisé en {template.get('category', 'droit')}.",
+            use_cache=True
         )
         
         if response['success']:
@@ -1523,7 +1514,8 @@ Retourne le document enrichi en respectant le focus demandé."""
                 response = llm_manager.query_single_llm(
                     provider,
                     prompt,
-                    f"Tu es un expert en {focus_name.lower()} pour documents juridiques."
+                    f"Tu es un expert en {focus_name.lower()} pour documents juridiques.",
+                    use_cache=True
                 )
                 
                 if response['success']:
@@ -1551,9 +1543,7 @@ def fuse_specialized_responses(responses: List[Dict], template: Dict) -> str:
     from managers.multi_llm_manager import MultiLLMManager
     llm_manager = MultiLLMManager()
     
-    fusion_prompt = f"""Fusionne ces {len(responses)} versions enrichies en gardant le meilleur de chaque approche :
-
-{chr(10).join([f"{r['focus'].upper()} ({r['provider']}):\n{r['content']}\n" for r in responses])}
+    fusion_instructions = f"""Fusionne ces versions enrichies en gardant le meilleur de chaque approche.
 
 INSTRUCTIONS :
 1. Combine les forces de chaque version
@@ -1565,16 +1555,17 @@ INSTRUCTIONS :
 
 Type de document : {template.get('type')}
 
-Retourne la version fusionnée optimale."""
+Retourne uniquement la version fusionnée optimale.
+"""
     
-    provider = list(llm_manager.clients.keys())[0]
-    response = llm_manager.query_single_llm(
-        provider,
-        fusion_prompt,
-        "Tu es un expert en fusion de documents juridiques."
+    return llm_manager.fusion_responses(
+        [
+            {'success': True, 'provider': f"{r['focus'].upper()} - {r['provider']}", 'response': r['content']}
+            for r in responses
+        ],
+        fusion_instructions,
+        use_cache=True
     )
-    
-    return response['response'] if response['success'] else responses[0]['content']
 
 def add_jurisprudence_advanced(content: str, template: Dict) -> str:
     """Ajoute la jurisprudence de manière intelligente"""
@@ -1632,7 +1623,8 @@ Retourne une analyse concise en 5-10 lignes."""
         response = llm_manager.query_single_llm(
             provider,
             prompt,
-            "Tu es un analyste juridique expert."
+            "Tu es un analyste juridique expert.",
+            use_cache=True
         )
         
         if response['success']:
@@ -308,6 +308,54 @@ if st.button("📄 Générer rapport complet"):
         mime="text/plain"
     )
 
+# Section 6: Routage des LLM
+st.header("6️⃣ Routage des LLM")
+
+try:
+    from utils.llm_router import get_llm_router
+    from utils.rate_limiter import get_llm_scheduler
+
+    router = get_llm_router()
+    provider_stats = router.stats()
+    scheduler_stats = get_llm_scheduler().stats()
+
+    if provider_stats:
+        st.subheader("📡 Santé des providers")
+        state_labels = {'closed': '🟢 fermé', 'half_open': '🟡 semi-ouvert', 'open': '🔴 ouvert'}
+        rows = []
+        for provider, stats in provider_stats.items():
+            limits = scheduler_stats.get(provider, {})
+            rows.append({
+                'Provider': provider,
+                'Circuit': state_labels.get(stats['state'], stats['state']),
+                'Appels': stats['calls'],
+                'p50 (s)': round(stats['p50'], 2) if stats['p50'] is not None else None,
+                'p95 (s)': round(stats['p95'], 2) if stats['p95'] is not None else None,
+                "Taux d'erreur": f"{stats['error_rate']:.0%}",
+                'Coût estimé ($)': stats['cost_usd'],
+                'Concurrence': limits.get('concurrency_limit'),
+                'En attente': limits.get('queued'),
+            })
+        st.dataframe(rows, use_container_width=True)
+    else:
+        st.info("Aucun appel LLM enregistré depuis le démarrage")
+
+    if router.decisions:
+        st.subheader("🧭 Dernières décisions de routage")
+        st.dataframe([
+            {
+                'Heure': decision['time'],
+                'Taille': decision['size_class'],
+                'Tokens': decision['tokens'],
+                'Choix': decision['chosen'] or '—',
+                'Scores': ', '.join(f"{p}: {score}" for p, score in decision['scores'].items()),
+                'Écartés': ', '.join(f"{p} ({reason})" for p, reason in decision['skipped'].items()),
+            }
+            for decision in reversed(router.decisions)
+        ], use_container_width=True)
+except Exception as e:
+    st.error(f"Erreur: {e}")
+
 # Footer
 st.markdown("---")
 st.caption("💡 Après avoir appliqué les corrections, redémarrez l'application pour que les changements prennent effet.")
\ No newline at end of file
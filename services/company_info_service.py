@@ -2,10 +2,11 @@
 
 import asyncio
 import json
+import logging
 import os
 import re
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
 import httpx
@@ -13,10 +14,14 @@ import requests
 import streamlit as st
 from bs4 import BeautifulSoup
 
+from utils.cache_manager import cache_result
+from utils.company_cache import get_company_cache
+
+logger = logging.getLogger(__name__)
+
 # Configuration
 PAPPERS_API_KEY = os.getenv('PAPPERS_API_KEY') or st.secrets.get("PAPPERS_API_KEY", "")
 PAPPERS_BASE_URL = "https://api.pappers.fr/v2"
-CACHE_DURATION = timedelta(days=7)
 
 # ========================= STRUCTURES DE DONNÉES =========================
 
@@ -144,57 +149,62 @@ class InfosSociete:
 # ========================= CACHE LOCAL =========================
 
 class CacheSocietes:
-    """Cache local pour éviter les appels API répétés"""
-    
-    def __init__(self):
-        self.cache_file = "cache_societes.json"
-        self.memory_cache = {}
-        self.file_cache = self._load_cache()
-    
-    def _load_cache(self) -> Dict:
-        """Charge le cache depuis le fichier"""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    def _save_cache(self):
-        """Sauvegarde le cache dans le fichier"""
+    """
+    Accès du service au cache entreprises partagé (utils.company_cache).
+
+    Le type d'une entrée est déduit du préfixe de sa clé ; les fiches sont
+    indexées par SIREN et par nom pour être retrouvées sans la clé exacte.
+    """
+
+    KIND_PREFIXES = (
+        ('async_search_', 'infos_societe'),
+        ('siren_', 'pappers'),
+        ('search_', 'pappers_search'),
+    )
+
+    def __init__(self, legacy_file: str = "cache_societes.json"):
+        self.store = get_company_cache()
+        self._import_legacy(legacy_file)
+
+    @classmethod
+    def kind_for(cls, key: str) -> str:
+        for prefix, kind in cls.KIND_PREFIXES:
+            if key.startswith(prefix):
+                return kind
+        return 'societes'
+
+    def _import_legacy(self, legacy_file: str):
+        """Reprend une fois l'ancien fichier JSON puis le renomme"""
+        if not os.path.exists(legacy_file):
+            return
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.file_cache, f, ensure_ascii=False, indent=2)
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for key, entry in entries.items():
+                created = datetime.fromisoformat(entry['timestamp']).timestamp()
+                self.set(key, entry.get('data'), created=created)
+            os.replace(legacy_file, legacy_file + '.migrated')
+            logger.info(f"{len(entries)} entrée(s) reprise(s) de {legacy_file}")
         except Exception as e:
-            print(f"Erreur sauvegarde cache: {e}")
-    
-    def get(self, key: str) -> Optional[Dict]:
+            logger.warning(f"Reprise de {legacy_file} impossible: {e}")
+
+    def get(self, key: str) -> Optional[Any]:
         """Récupère une entrée du cache si elle est valide"""
-        # Vérifier d'abord le cache mémoire
-        if key in self.memory_cache:
-            return self.memory_cache[key]
-        
-        # Ensuite le cache fichier
-        if key in self.file_cache:
-            entry = self.file_cache[key]
-            if 'timestamp' in entry:
-                timestamp = datetime.fromisoformat(entry['timestamp'])
-                if datetime.now() - timestamp < CACHE_DURATION:
-                    # Mettre en cache mémoire pour accès plus rapide
-                    self.memory_cache[key] = entry.get('data')
-                    return entry.get('data')
-        return None
-    
-    def set(self, key: str, data: Dict):
-        """Ajoute une entrée au cache"""
-        entry = {
-            'data': data,
-            'timestamp': datetime.now().isoformat()
-        }
-        self.memory_cache[key] = data
-        self.file_cache[key] = entry
-        self._save_cache()
+        return self.store.get(key)
+
+    def get_by_siren(self, siren: str, kind: str) -> Optional[Any]:
+        return self.store.get_by_siren(siren, kind)
+
+    def get_by_name(self, name: str, kind: str) -> Optional[Any]:
+        return self.store.get_by_name(name, kind)
+
+    def set(self, key: str, data: Any, created: Optional[float] = None):
+        """Ajoute une entrée au cache (une ligne écrite, indexée par SIREN et nom)"""
+        siren = name = None
+        if isinstance(data, dict):
+            siren = data.get('siren')
+            name = data.get('nom') or data.get('nom_entreprise') or data.get('denomination')
+        self.store.set(key, data, self.kind_for(key), siren=siren, name=name, created=created)
 
 # ========================= SERVICE PRINCIPAL =========================
 
@@ -258,10 +268,14 @@ class CompanyInfoService:
         """Récupère les informations par SIREN (synchrone)"""
         siren = siren.replace(' ', '').replace('.', '')
         
-        cache_key = f"siren_{siren}"
-        cached_result = self.cache.get(cache_key)
+        cached_result = self.cache.get_by_siren(siren, 'pappers')
         if cached_result:
             return self._parse_entreprise(cached_result)
+        # Fiche déjà obtenue par une recherche par nom
+        cached_infos = self.cache.get_by_siren(siren, 'infos_societe')
+        if cached_infos:
+            return self._dict_to_infos_societe(cached_infos)
+        cache_key = f"siren_{siren}"
         
         if not self.pappers_api_key:
             return None
@@ -290,11 +304,19 @@ class CompanyInfoService:
     
     # ===== MÉTHODES ASYNCHRONES =====
     
+    @cache_result(
+        'enrichissement',
+        key_generator=lambda self, company_name, try_societe_com=True:
+            f"company_info|{company_name.strip().lower()}|{try_societe_com}"
+    )
     async def get_company_info(self, company_name: str, 
                              try_societe_com: bool = True) -> Optional[InfosSociete]:
         """
         Récupère les informations d'une entreprise (async)
         
+        Mis en cache 7 jours ; les sessions qui demandent la même entreprise
+        en même temps partagent un seul appel aux API.
+        
         Args:
             company_name: Nom de l'entreprise
             try_societe_com: Essayer Societe.com si Pappers échoue
@@ -317,7 +339,7 @@ class CompanyInfoService:
             return None
         
         cache_key = f"async_search_{company_name.lower()}"
-        cached = self.cache.get(cache_key)
+        cached = self.cache.get(cache_key) or self.cache.get_by_name(company_name, 'infos_societe')
         if cached:
             return self._dict_to_infos_societe(cached)
         
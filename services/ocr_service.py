@@ -1,10 +1,48 @@
 """Service d'OCR basé sur Tesseract."""
 
-from typing import Any
+import hashlib
+import io
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from PIL import Image
 import pytesseract
 
+from utils.pdf_extraction import iter_pdf_pages
+from utils.sqlite_cache import SQLiteCacheStore
+
+try:
+    from pdf2image import convert_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = min(4, os.cpu_count() or 1)
+OCR_DPI = 300
+OCR_LANG = 'fra'
+# Une page dont la couche texte compte au moins autant de caractères n'est pas OCRisée
+MIN_TEXT_LAYER_CHARS = 25
+OCR_CACHE_PATH = os.path.join("cache_juridique", "ocr.db")
+# Le texte reconnu d'une même image ne change pas : conservation longue
+OCR_CACHE_TTL = timedelta(days=180)
+
+TEXT_LAYER = 'text_layer'
+OCR = 'ocr'
+CACHED = 'cache'
+FAILED = 'error'
+
+# Tâche du pool : (type, chemin, page, dpi, langue, chemin du cache)
+OCRTask = Tuple[str, str, int, int, str, Optional[str]]
+
 
 class OCRService:
     """Fournit une extraction de texte simple depuis une image."""
@@ -14,3 +52,210 @@ class OCRService:
         image = Image.open(image_path)
         return pytesseract.image_to_string(image)
 
+
+@dataclass
+class PageOCR:
+    """Texte d'une page (ou d'une image) et la façon dont il a été obtenu"""
+    source: str
+    page: int
+    text: str
+    method: str
+    image_hash: Optional[str] = None
+    render_seconds: float = 0.0
+    ocr_seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return self.render_seconds + self.ocr_seconds
+
+
+@dataclass
+class OCRReport:
+    """Résultat d'un lot : pages (dans l'ordre d'achèvement) et durée totale"""
+    pages: List[PageOCR] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def text(self, source: str) -> str:
+        """Texte d'un fichier du lot, pages dans l'ordre"""
+        pages = sorted((p for p in self.pages if p.source == source), key=lambda p: p.page)
+        return "\n".join(p.text for p in pages if p.text)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for page in self.pages:
+            counts[page.method] = counts.get(page.method, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        ocr_pages = [p for p in self.pages if p.method == OCR]
+        return {
+            'pages': len(self.pages),
+            'methods': self.counts(),
+            'elapsed': round(self.elapsed, 3),
+            'ocr_seconds': round(sum(p.ocr_seconds for p in ocr_pages), 3),
+            'slowest': [
+                {'source': p.source, 'page': p.page, 'seconds': round(p.seconds, 3)}
+                for p in sorted(self.pages, key=lambda p: p.seconds, reverse=True)[:5]
+            ],
+            'failed': [f"{p.source}#{p.page}: {p.error}" for p in self.pages if p.method == FAILED],
+        }
+
+
+# ========== TRAVAIL DES PROCESSUS ==========
+
+_stores: Dict[str, SQLiteCacheStore] = {}
+
+
+def _ocr_store(path: str) -> SQLiteCacheStore:
+    """Cache OCR du processus courant (une connexion par processus)"""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = SQLiteCacheStore(path)
+    return store
+
+
+def _image_hash(image: Image.Image) -> str:
+    """Empreinte des pixels d'une page rendue"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _ocr_task(task: OCRTask) -> PageOCR:
+    """
+    Travail exécuté dans le pool : rendu de la page (PDF) ou lecture de
+    l'image, puis texte depuis le cache ou par Tesseract.
+    """
+    kind, path, page, dpi, lang, cache_path = task
+    start = time.perf_counter()
+    try:
+        data = None
+        if kind == 'pdf':
+            if not PDF2IMAGE_AVAILABLE:
+                raise ImportError("pdf2image est requis pour l'OCR des PDF numérisés")
+            image = convert_from_path(path, dpi=dpi, first_page=page, last_page=page)[0]
+            image_hash = _image_hash(image)
+        else:
+            # Image : l'empreinte du fichier suffit, inutile de la décoder si elle est en cache
+            data = Path(path).read_bytes()
+            image = None
+            image_hash = hashlib.sha256(data).hexdigest()
+        render_seconds = time.perf_counter() - start
+
+        store = _ocr_store(cache_path) if cache_path else None
+        key = f"{lang}:{image_hash}"
+        row = store.get(key) if store else None
+        if row is not None:
+            return PageOCR(path, page, row[0].decode('utf-8'), CACHED, image_hash, render_seconds)
+
+        if image is None:
+            image = Image.open(io.BytesIO(data))
+        start = time.perf_counter()
+        text = pytesseract.image_to_string(image, lang=lang)
+        ocr_seconds = time.perf_counter() - start
+        if store:
+            store.set(key, text.encode('utf-8'), 'ocr', OCR_CACHE_TTL.total_seconds())
+        return PageOCR(path, page, text, OCR, image_hash, render_seconds, ocr_seconds)
+    except Exception as e:
+        return PageOCR(path, page, '', FAILED, render_seconds=time.perf_counter() - start,
+                       error=f"{type(e).__name__}: {e}")
+
+
+# ========== SERVICE PAR LOTS ==========
+
+class BatchOCRService:
+    """
+    OCR par lots de PDF entiers et d'images.
+
+    Les pages d'un PDF qui ont déjà une couche texte sont reprises telles
+    quelles ; les autres sont rendues et reconnues dans un pool de
+    ``workers`` processus. Le texte reconnu est mis en cache par empreinte
+    de l'image de la page : une réimportation ne refait pas l'OCR.
+    """
+
+    PDF_EXTENSIONS = ('.pdf',)
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif', '.webp')
+
+    def __init__(self, workers: Optional[int] = None, dpi: int = OCR_DPI, lang: str = OCR_LANG,
+                 cache_path: Optional[str] = OCR_CACHE_PATH,
+                 min_text_chars: int = MIN_TEXT_LAYER_CHARS):
+        self.workers = OCR_WORKERS if workers is None else workers
+        self.dpi = dpi
+        self.lang = lang
+        self.cache_path = cache_path
+        self.min_text_chars = min_text_chars
+        if cache_path and os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    def has_text_layer(self, text: str) -> bool:
+        return len(''.join(text.split())) >= self.min_text_chars
+
+    def _plan(self, sources: Iterable[str]) -> Iterator[Any]:
+        """Pages déjà lisibles (PageOCR) et tâches d'OCR restantes, fichier par fichier"""
+        for source in sources:
+            source = os.fspath(source)
+            extension = Path(source).suffix.lower()
+            if extension in self.IMAGE_EXTENSIONS:
+                yield ('image', source, 1, self.dpi, self.lang, self.cache_path)
+            elif extension in self.PDF_EXTENSIONS:
+                try:
+                    pages = iter_pdf_pages(source, workers=1)
+                    for number, text in pages:
+                        if self.has_text_layer(text):
+                            yield PageOCR(source, number, text, TEXT_LAYER)
+                        else:
+                            yield ('pdf', source, number, self.dpi, self.lang, self.cache_path)
+                except Exception as e:
+                    yield PageOCR(source, 0, '', FAILED, error=f"{type(e).__name__}: {e}")
+            else:
+                yield PageOCR(source, 0, '', FAILED, error=f"Format non supporté: {extension}")
+
+    def iter_pages(self, sources: Iterable[str]) -> Iterator[PageOCR]:
+        """Résultats page par page, dès qu'ils sont prêts"""
+        plan = self._plan(sources)
+        if self.workers <= 1:
+            for item in plan:
+                yield item if isinstance(item, PageOCR) else _ocr_task(item)
+            return
+
+        window = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for item in plan:
+                if isinstance(item, PageOCR):
+                    yield item
+                    continue
+                pending.add(executor.submit(_ocr_task, item))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def process(self, sources: Iterable[str],
+                progress: Optional[Callable[[PageOCR], None]] = None) -> OCRReport:
+        """Traite un lot de PDF et d'images"""
+        report = OCRReport()
+        start = time.perf_counter()
+        for page in self.iter_pages(sources):
+            report.pages.append(page)
+            if page.method == FAILED:
+                logger.warning(f"OCR impossible {page.source} (page {page.page}): {page.error}")
+            if progress:
+                progress(page)
+        report.elapsed = time.perf_counter() - start
+        counts = report.counts()
+        logger.info(
+            f"OCR par lots : {len(report.pages)} page(s) en {report.elapsed:.1f}s "
+            f"({counts.get(TEXT_LAYER, 0)} couche texte, {counts.get(CACHED, 0)} en cache, "
+            f"{counts.get(OCR, 0)} reconnues)"
+        )
+        return report
+
+    def extract_text(self, source: str) -> str:
+        """Texte complet d'un PDF ou d'une image"""
+        return self.process([source]).text(os.fspath(source))
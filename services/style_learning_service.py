@@ -8,9 +8,10 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 import docx
-import PyPDF2
 import streamlit as st
 
+from utils.pdf_extraction import iter_pdf_pages
+
 # ========================= STRUCTURES DE DONNÉES =========================
 
 @dataclass
@@ -181,15 +182,8 @@ class StyleLearningService:
     def _extract_from_pdf(self, file_path: str) -> str:
         """Extrait le texte d'un fichier PDF"""
         try:
-            content = []
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        content.append(text)
-            
-            return "\n".join(content)
+            # Pages lues au fil de l'eau, sans garder le lecteur en mémoire
+            return "\n".join(text for _, text in iter_pdf_pages(file_path) if text)
         except Exception as e:
             st.error(f"Erreur lors de la lecture du fichier PDF: {e}")
             return ""
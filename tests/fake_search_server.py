@@ -0,0 +1,178 @@
+"""Faux service Azure Cognitive Search (API REST minimale) pour les tests"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_INDEX_PATH = re.compile(r"^/indexes(?:\('(?P<quoted>[^']+)'\)|/(?P<plain>[^/]+))/docs(?P<op>.*)$")
+_DOC_KEY = re.compile(r"^\('(?P<key>[^']+)'\)$")
+_EQ_FILTER = re.compile(r"(\w+) eq '([^']*)'")
+
+
+class FakeSearchServer:
+    """
+    Serveur HTTP local imitant un index Azure Search.
+
+    Gère la recherche (``search``, ``top``, ``skip``, ``select``, filtres
+    ``champ eq 'valeur'`` et ``@odata.count``), la lecture d'un document,
+    l'indexation par lots avec échecs simulés et le comptage. ``delay``
+    ralentit chaque réponse pour tester les délais et l'annulation.
+    """
+
+    def __init__(self, index_name: str = "juridique-index", delay: float = 0.0):
+        self.index_name = index_name
+        self.delay = delay
+        self.documents = {}
+        self.requests = []
+        # Clés dont l'indexation échoue (nombre d'échecs restants par clé)
+        self.failures = {}
+        self.throttle_next = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSearchServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake._handle(self, "GET")
+
+            def do_POST(self):
+                fake._handle(self, "POST")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- Traitement des requêtes ----
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        url = urlparse(handler.path)
+        path, query = url.path, parse_qs(url.query)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length) or b"{}") if length else {}
+        with self._lock:
+            self.requests.append((method, path, body))
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        match = _INDEX_PATH.match(path)
+        if not match:
+            return self._send(handler, 404, {"error": {"message": "not found"}})
+
+        op = match.group("op")
+        key = _DOC_KEY.match(op)
+        if method == "POST" and op.endswith("search.post.search"):
+            return self._send(handler, 200, self._search(body))
+        if method == "POST" and op.endswith("search.index"):
+            return self._index(handler, body)
+        if method == "GET" and key:
+            return self._get_document(handler, key.group("key"), query)
+        if method == "GET" and op.endswith("$count"):
+            return self._send_raw(handler, 200, str(len(self.documents)).encode(), "text/plain")
+        return self._send(handler, 404, {"error": {"message": "not found"}})
+
+    def _search(self, body: dict) -> dict:
+        terms = [t.lower() for t in (body.get("search") or "").split() if t != "*"]
+        filters = _EQ_FILTER.findall(body.get("filter") or "")
+        select = [f.strip() for f in (body.get("select") or "").split(",") if f.strip()]
+
+        hits = []
+        with self._lock:
+            documents = list(self.documents.values())
+        for doc in documents:
+            if any(str(doc.get(field)) != value for field, value in filters):
+                continue
+            text = f"{doc.get('title', '')} {doc.get('content', '')}".lower()
+            score = sum(text.count(term) for term in terms) if terms else 1
+            if score:
+                hits.append((score, doc))
+        hits.sort(key=lambda item: (-item[0], item[1].get("id", "")))
+
+        skip = body.get("skip") or 0
+        top = body.get("top") or 50
+        value = []
+        for score, doc in hits[skip:skip + top]:
+            item = {k: v for k, v in doc.items() if not select or k in select}
+            item["@search.score"] = float(score)
+            value.append(item)
+
+        response = {"value": value}
+        if body.get("count"):
+            response["@odata.count"] = len(hits)
+        return response
+
+    def _get_document(self, handler: BaseHTTPRequestHandler, key: str, query: dict):
+        with self._lock:
+            doc = self.documents.get(key)
+        if doc is None:
+            return self._send(handler, 404, {"error": {"message": f"document {key} not found"}})
+        select = [f for value in query.get("$select", []) for f in value.split(",") if f]
+        self._send(handler, 200, {k: v for k, v in doc.items() if not select or k in select})
+
+    def _index(self, handler: BaseHTTPRequestHandler, body: dict):
+        with self._lock:
+            if self.throttle_next:
+                self.throttle_next -= 1
+                return self._send(handler, 503, {"error": {"message": "Service Unavailable"}})
+
+            statuses = []
+            for action in body.get("value", []):
+                key = action.get("id")
+                remaining = self.failures.get(key, 0)
+                if remaining:
+                    self.failures[key] = remaining - 1
+                    statuses.append({"key": key, "status": False, "errorMessage": "throttled", "statusCode": 503})
+                    continue
+                kind = action.get("@search.action", "upload")
+                document = {k: v for k, v in action.items() if k != "@search.action"}
+                if kind == "delete":
+                    self.documents.pop(key, None)
+                elif kind in ("merge", "mergeOrUpload") and key in self.documents:
+                    self.documents[key].update(document)
+                else:
+                    self.documents[key] = document
+                statuses.append({"key": key, "status": True, "errorMessage": None, "statusCode": 201})
+
+        failed = any(not status["status"] for status in statuses)
+        self._send(handler, 207 if failed else 200, {"value": statuses})
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, payload: dict):
+        FakeSearchServer._send_raw(handler, status, json.dumps(payload).encode(), "application/json")
+
+    @staticmethod
+    def _send_raw(handler: BaseHTTPRequestHandler, status: int, data: bytes, content_type: str):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
@@ -0,0 +1,132 @@
+import os
+
+import azure_indexer
+from azure_indexer import chunk_id, chunk_pages, chunk_text, index_folder
+
+
+class FakeIndex:
+    """Index local imitant l'interface d'AzureSearchManager utilisée par l'indexeur"""
+
+    def __init__(self):
+        self.documents = {}
+        self.fail_sources = set()
+        self.uploads = 0
+        self._failed_keys = []
+
+    def is_connected(self):
+        return True
+
+    def index_documents_batch(self, documents):
+        self.uploads += 1
+        self._failed_keys = []
+        for doc in documents:
+            if doc["source"] in self.fail_sources:
+                self._failed_keys.append(doc["id"])
+            else:
+                self.documents[doc["id"]] = doc
+        return len(documents) - len(self._failed_keys), len(self._failed_keys)
+
+    def get_indexing_stats(self):
+        return {"failed_keys": list(self._failed_keys)}
+
+    def delete_documents_batch(self, ids):
+        for doc_id in ids:
+            self.documents.pop(doc_id, None)
+        return len(ids), 0
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_chunk_text_prefers_paragraph_boundaries():
+    text = "\n\n".join(f"Paragraphe {i} " + "mot " * 40 for i in range(10))
+    chunks = chunk_text(text, size=500, overlap=50)
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert chunks[0].startswith("Paragraphe 0")
+    assert "Paragraphe 9" in chunks[-1]
+    assert chunk_text("") == []
+
+
+def test_chunk_pages_follow_page_headers():
+    text = "\n".join(f"--- Page {n} ---\n" + f"Cote {n}. " * 60 for n in range(1, 4))
+    chunks = chunk_text(text, size=400, overlap=50)
+    pages = chunk_pages(text, chunks)
+    assert pages[0] == 1 and pages[-1] == 3
+    assert pages == sorted(pages)
+    assert chunk_pages("Sans pages", ["Sans pages"]) == [None]
+
+
+def test_index_folder_is_incremental(tmp_path):
+    root = tmp_path / "dossier"
+    write(root / "pv.txt", "Procès-verbal d'audition du gérant")
+    write(root / "sous" / "plainte.txt", "Plainte pour abus de biens sociaux")
+    write(root / "image.png", "ignoré")
+    index = FakeIndex()
+
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.scanned, report.indexed, report.failed) == (2, 2, 0)
+    assert {doc["source"] for doc in index.documents.values()} == {"pv.txt", "sous/plainte.txt"}
+    assert (root / azure_indexer.MANIFEST_NAME).exists()
+
+    # Deuxième passage : rien n'a changé, aucun envoi
+    uploads = index.uploads
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.unchanged, report.indexed) == (2, 0)
+    assert index.uploads == uploads
+
+    # Date modifiée mais contenu identique : pas de réindexation
+    os.utime(root / "pv.txt", (1, 1))
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.unchanged, report.indexed) == (2, 0)
+
+    # Fichier modifié puis fichier supprimé
+    write(root / "pv.txt", "Procès-verbal complété")
+    (root / "sous" / "plainte.txt").unlink()
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.indexed, report.removed) == (1, 1)
+    assert [doc["content"] for doc in index.documents.values()] == ["Procès-verbal complété"]
+
+
+def test_index_folder_resumes_after_failures(tmp_path):
+    root = tmp_path / "dossier"
+    for i in range(3):
+        write(root / f"piece{i}.txt", f"pièce numéro {i}")
+    index = FakeIndex()
+    index.fail_sources = {"piece1.txt"}
+
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.indexed, report.failed) == (2, 1)
+    assert "piece1.txt" in report.errors
+
+    # Reprise : seul le fichier en échec est renvoyé
+    index.fail_sources = set()
+    report = index_folder(str(root), manager=index, workers=1)
+    assert (report.indexed, report.unchanged) == (1, 2)
+    assert chunk_id("piece1.txt", 0) in index.documents
+
+
+def test_shrinking_file_removes_stale_chunks(tmp_path):
+    root = tmp_path / "dossier"
+    write(root / "long.txt", "\n\n".join("mot " * 100 for _ in range(6)))
+    index = FakeIndex()
+
+    index_folder(str(root), manager=index, workers=1, chunk_size=500, chunk_overlap=0)
+    assert len(index.documents) > 2
+
+    write(root / "long.txt", "texte court")
+    index_folder(str(root), manager=index, workers=1, chunk_size=500, chunk_overlap=0)
+    assert list(index.documents) == [chunk_id("long.txt", 0)]
+
+
+def test_index_folder_with_process_pool(tmp_path):
+    root = tmp_path / "dossier"
+    for i in range(6):
+        write(root / f"doc{i}.txt", f"contenu {i}")
+    index = FakeIndex()
+
+    report = index_folder(str(root), manager=index, workers=2,
+                          manifest_path=str(tmp_path / "manifest.json"))
+    assert report.indexed == 6 and report.failed == 0
+    assert (tmp_path / "manifest.json").exists()
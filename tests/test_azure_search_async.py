@@ -0,0 +1,125 @@
+"""Tests de la recherche Azure asynchrone contre un faux service local"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("azure.search.documents")
+pytest.importorskip("aiohttp")
+
+from managers.azure_search_manager import AzureSearchManager, SearchResult
+from tests.fake_search_server import FakeSearchServer
+
+
+@pytest.fixture
+def server():
+    with FakeSearchServer() as fake:
+        fake.documents = {
+            "1": {"id": "1", "title": "PV d'audition", "content": "audition du gérant", "document_type": "PV"},
+            "2": {"id": "2", "title": "Plainte", "content": "plainte pour abus de biens", "document_type": "PLAINTE"},
+            "3": {"id": "3", "title": "Audition témoin", "content": "audition audition", "document_type": "PV"},
+        }
+        yield fake
+
+
+def make_manager(server):
+    return AzureSearchManager(endpoint=server.endpoint, key="test", index_name=server.index_name,
+                              ensure_index=False)
+
+
+def test_asearch_returns_search_results(server):
+    manager = make_manager(server)
+
+    async def run():
+        try:
+            return await manager.asearch("audition", filters={"document_type": "PV"}, top=10)
+        finally:
+            await manager.aclose()
+
+    response = asyncio.run(run())
+    assert "error" not in response
+    assert [r.id for r in response["results"]] == ["3", "1"]
+    assert all(isinstance(r, SearchResult) for r in response["results"])
+    assert response["total_count"] == 2
+
+
+def test_asearch_timeout_returns_error(server):
+    server.delay = 0.5
+    manager = make_manager(server)
+
+    async def run():
+        try:
+            return await manager.asearch("audition", timeout=0.05)
+        finally:
+            await manager.aclose()
+
+    response = asyncio.run(run())
+    assert response["results"] == [] and response["error"] == "timeout"
+
+
+def test_concurrent_searches_share_one_client(server, monkeypatch):
+    manager = make_manager(server)
+    opened = []
+    open_client = manager._open_async_client
+    monkeypatch.setattr(manager, "_open_async_client", lambda: opened.append(open_client()) or opened[-1])
+
+    async def run():
+        return await asyncio.gather(*(manager.asearch("audition") for _ in range(5)))
+
+    # Sans aclose() : le pool est fermé par le dernier appel, avant la fin de la boucle
+    for _ in range(2):
+        responses = asyncio.run(run())
+        assert all(len(r["results"]) == 2 for r in responses)
+    assert len(opened) == 2
+    assert all(entry["session"].closed for entry in opened)
+    assert manager._async_clients == {}
+
+
+def test_iter_search_pages_with_projection(server):
+    server.documents = {
+        str(i): {"id": str(i), "title": f"PV {i}", "content": "audition " * (i + 1), "document_type": "PV"}
+        for i in range(7)
+    }
+    manager = make_manager(server)
+
+    async def run():
+        try:
+            hits = [hit async for hit in manager.iter_search("audition", page_size=3)]
+            await manager.afetch_content(hits[:2])
+            return hits
+        finally:
+            await manager.aclose()
+
+    hits = asyncio.run(run())
+    assert [hit.id for hit in hits] == ["6", "5", "4", "3", "2", "1", "0"]
+    searches = [body for method, path, body in server.requests if path.endswith("search.post.search")]
+    assert [body.get("skip", 0) for body in searches] == [0, 3, 6]
+    assert all("content" not in body["select"] for body in searches)
+    # Seuls les deux premiers résultats sont complétés
+    assert hits[0].content.startswith("audition") and hits[1].content
+    assert hits[2].content == ""
+
+
+def test_iter_search_stops_at_max_results(server):
+    manager = make_manager(server)
+
+    async def run():
+        try:
+            return [hit async for hit in manager.iter_search("audition", page_size=1, max_results=1)]
+        finally:
+            await manager.aclose()
+
+    assert len(asyncio.run(run())) == 1
+
+
+def test_index_documents_batch_retries_partial_failures(server):
+    server.documents = {}
+    server.failures = {"doc-2": 1}
+    manager = make_manager(server)
+
+    documents = ({"id": f"doc-{i}", "title": f"Pièce {i}", "content": "texte"} for i in range(5))
+    succeeded, failed = manager.index_documents_batch(documents, max_batch_bytes=64 * 1024)
+
+    assert (succeeded, failed) == (5, 0)
+    assert set(server.documents) == {f"doc-{i}" for i in range(5)}
+    assert manager.get_indexing_stats()["retried"] == 1
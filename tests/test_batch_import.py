@@ -0,0 +1,104 @@
+import io
+import json
+
+import pytest
+
+document_manager = pytest.importorskip("managers.document_manager")
+from utils.document_store import get_document_store
+from utils.minhash import LSHIndex
+
+
+class Upload(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def make_manager(tmp_path):
+    manager = document_manager.DocumentManager.__new__(document_manager.DocumentManager)
+    manager.imported_documents = []
+    manager._duplicate_index = LSHIndex()
+    manager.document_store = get_document_store(str(tmp_path / "store"))
+    manager._signatures = {}
+    return manager
+
+
+def test_batch_import_keeps_file_order_and_reports_progress(tmp_path):
+    files = [
+        Upload("a.txt", "Premier procès-verbal".encode("utf-8")),
+        Upload("b.json", json.dumps({"scelle": 12}).encode("utf-8")),
+        Upload("c.exe", b"\x00"),
+        Upload("d.txt", b"Dernier document"),
+    ]
+    seen = []
+    manager = make_manager(tmp_path)
+    results = manager.batch_import(files, workers=2, progress=lambda done, total, r: seen.append((done, total)))
+
+    assert [s["filename"] for s in results["success"]] == ["a.txt", "b.json", "d.txt"]
+    assert results["failed"][0]["filename"] == "c.exe"
+    content = results["total_content"]
+    assert content.index("--- a.txt ---") < content.index("--- b.json ---") < content.index("--- d.txt ---")
+    assert seen[-1] == (4, 4)
+    assert len(manager.imported_documents) == 3
+
+
+def test_iter_batch_import_reports_extraction_errors(tmp_path):
+    manager = make_manager(tmp_path)
+    results = list(manager.iter_batch_import([Upload("faux.json", b"{pas du json")], workers=1))
+
+    assert len(results) == 1
+    assert not results[0]["success"]
+    assert results[0]["message"].startswith("Erreur lors de l'import")
+    assert manager.imported_documents == []
+    # La référence prise avant l'extraction est rendue
+    assert manager.document_store.documents(document_manager.IMPORT_DOSSIER) == []
+
+    success, _, _ = manager.import_document(Upload("faux.json", b"{pas du json"))
+    assert not success
+    assert manager.document_store.documents(document_manager.IMPORT_DOSSIER) == []
+
+
+def test_identical_pieces_are_extracted_once(tmp_path, monkeypatch):
+    calls = []
+    extract = document_manager.DocumentManager._extract_content
+
+    def counting_extract(file, extension):
+        calls.append(extension)
+        return extract(file, extension)
+
+    monkeypatch.setattr(document_manager.DocumentManager, "_extract_content", staticmethod(counting_extract))
+    contrat = "Contrat de bail commercial".encode("utf-8")
+    manager = make_manager(tmp_path)
+
+    manager.batch_import([Upload("bail.txt", contrat), Upload("bail (copie).txt", contrat)],
+                         workers=1, dossier="affaire_A")
+    manager.batch_import([Upload("bail.txt", contrat)], workers=1, dossier="affaire_B")
+
+    assert len(calls) == 1
+    assert manager.document_store.refcount(manager.imported_documents[0]["digest"]) == 3
+    assert manager.imported_documents[-1]["handle"].content == "Contrat de bail commercial"
+
+
+def test_clear_imports_releases_store_references(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.batch_import([Upload("scan.txt", b"PV d'audition"), Upload("scan.txt", b"Facture")], workers=1)
+    digests = [doc["digest"] for doc in manager.imported_documents]
+    assert [manager.document_store.refcount(d) for d in digests] == [1, 1]
+
+    manager.clear_imports()
+    assert manager.imported_documents == []
+    assert [manager.document_store.refcount(d) for d in digests] == [0, 0]
+
+
+def test_homonymous_imports_are_compared_as_distinct_documents(tmp_path):
+    manager = make_manager(tmp_path)
+    bail = "Contrat de bail commercial conclu entre les parties pour neuf années".encode("utf-8")
+    manager.batch_import([
+        Upload("scan.txt", bail),
+        Upload("scan.txt", "Procès-verbal d'audition du témoin principal".encode("utf-8")),
+        Upload("bail.txt", bail),
+    ], workers=1)
+
+    assert len(manager._duplicate_index) == 3
+    assert [sorted(group) for group in manager.find_duplicates()] == [["bail.txt", "scan.txt"]]
@@ -0,0 +1,105 @@
+import threading
+
+from utils.bulk_indexer import BulkIndexer, estimate_payload_size
+
+
+class FakeIndex:
+    """Index simulé : échecs partiels par clé et limitations de lots entiers"""
+
+    def __init__(self, failures=None, throttle_batches=0, delay=0.0):
+        self.documents = {}
+        self.failures = dict(failures or {})
+        self.throttle_batches = throttle_batches
+        self.batch_sizes = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._delay = delay
+
+    def upload(self, batch):
+        with self._lock:
+            self.batch_sizes.append(len(batch))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            throttle = self.throttle_batches > 0
+            if throttle:
+                self.throttle_batches -= 1
+        try:
+            if self._delay:
+                threading.Event().wait(self._delay)
+            if throttle:
+                error = RuntimeError("Service Unavailable")
+                error.status_code = 503
+                raise error
+            statuses = []
+            with self._lock:
+                for doc in batch:
+                    key = doc["id"]
+                    if self.failures.get(key, 0):
+                        self.failures[key] -= 1
+                        statuses.append((key, False, 503))
+                    else:
+                        self.documents[key] = doc
+                        statuses.append((key, True, 201))
+            return statuses
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def make_docs(count, size=100):
+    return ({"id": str(i), "content": "x" * size} for i in range(count))
+
+
+def test_bulk_indexer_bounds_concurrency_and_batch_bytes():
+    index = FakeIndex(delay=0.01)
+    indexer = BulkIndexer(index.upload, max_in_flight=3, target_bytes=2000, min_bytes=500,
+                          max_bytes=2000, backoff_base=0)
+    stats = indexer.run(make_docs(200))
+
+    assert stats.succeeded == 200 and stats.failed == 0
+    assert len(index.documents) == 200
+    assert index.max_in_flight <= 3
+    assert max(index.batch_sizes) * estimate_payload_size({"id": "1", "content": "x" * 100}) <= 2200
+
+
+def test_bulk_indexer_retries_only_failed_keys():
+    index = FakeIndex(failures={"3": 2, "7": 1})
+    indexer = BulkIndexer(index.upload, target_bytes=10 ** 6, backoff_base=0)
+    stats = indexer.run(make_docs(10))
+
+    assert stats.succeeded == 10 and stats.failed == 0
+    # Premier envoi complet, puis uniquement les clés en échec
+    assert index.batch_sizes == [10, 2, 1]
+    assert stats.retried == 3
+
+
+def test_bulk_indexer_shrinks_batches_when_throttled():
+    index = FakeIndex(throttle_batches=1)
+    indexer = BulkIndexer(index.upload, max_in_flight=1, target_bytes=4000, min_bytes=500,
+                          backoff_base=0)
+    stats = indexer.run(make_docs(50))
+
+    assert stats.succeeded == 50
+    assert stats.throttled == 1 and stats.retried > 0
+    # Le premier lot limité est renvoyé après réduction de la taille cible
+    assert index.batch_sizes[1] <= index.batch_sizes[0]
+
+
+def test_bulk_indexer_gives_up_after_max_retries():
+    index = FakeIndex(failures={"1": 99})
+    stats = BulkIndexer(index.upload, max_retries=2, backoff_base=0).run(make_docs(3))
+
+    assert stats.succeeded == 2
+    assert stats.failed_keys == ["1"]
+    assert stats.to_dict()["failed"] == 1
+
+
+def test_bulk_indexer_does_not_retry_client_errors():
+    def upload(batch):
+        error = RuntimeError("Bad Request")
+        error.status_code = 400
+        raise error
+
+    stats = BulkIndexer(upload, backoff_base=0).run(make_docs(4))
+    assert stats.failed == 4 and stats.batches == 1
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import utils.cache_manager as cache_manager
+from utils.cache_manager import CacheJuridique, cache_result
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    instance = CacheJuridique(cache_dir=str(tmp_path))
+    monkeypatch.setattr(cache_manager, "get_cache", lambda: instance)
+    return instance
+
+
+def test_sync_calls_are_deduplicated(cache):
+    calls = []
+
+    @cache_result("jurisprudence")
+    def lookup(reference):
+        calls.append(reference)
+        time.sleep(0.1)
+        return {"reference": reference}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lookup("Cass. crim. 2021"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["Cass. crim. 2021"]
+    assert results == [{"reference": "Cass. crim. 2021"}] * 4
+    assert lookup("Cass. crim. 2021") == {"reference": "Cass. crim. 2021"}
+    assert len(calls) == 1
+
+
+def test_coroutines_are_cached_and_deduplicated(cache):
+    calls = []
+
+    @cache_result("enrichissement", key_generator=lambda name: name.lower())
+    async def company(name):
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        return {"nom": name}
+
+    assert asyncio.iscoroutinefunction(company)
+
+    async def scenario():
+        first = await asyncio.gather(company("Alpha"), company("ALPHA"), company("alpha"))
+        again = await company("Alpha")
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert len(calls) == 1 and first[1] == {"nom": "Alpha"} and again == {"nom": "Alpha"}
+
+
+def test_stale_entries_are_served_while_refreshing(cache, monkeypatch):
+    monkeypatch.setitem(cache_manager.CACHE_DURATION, "search", timedelta(seconds=0.2))
+    version = {"n": 0}
+
+    @cache_result("search")
+    def search(query):
+        version["n"] += 1
+        time.sleep(0.05)
+        return f"{query} v{version['n']}"
+
+    assert search("abus") == "abus v1"
+    time.sleep(0.25)
+
+    # Périmée : servie immédiatement, recalculée en arrière-plan
+    start = time.monotonic()
+    assert search("abus") == "abus v1"
+    assert time.monotonic() - start < 0.05
+    assert cache.stats["stale_hits"] == 1
+
+    time.sleep(0.15)
+    assert search("abus") == "abus v2"
+    assert version["n"] == 2
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from modules.dataclasses import Partie, TypePartie
+from utils.cache_manager import CacheActesJuridiques, CacheJuridique
+
+
+def test_cache_juridique_two_tiers(tmp_path):
+    cache = CacheJuridique(cache_dir=str(tmp_path), memory_entries=2)
+    partie = Partie(nom="SARL Alpha", type_partie=TypePartie.DEFENDEUR)
+    cache.set("alpha", {"parties": [partie]}, "document", metadata={"source": "test"})
+    lock = threading.Lock()
+    cache.set("lock", lock, "general")
+
+    # Nouveau processus : seul le disque est relu, les objets de l'application sont reconstruits
+    fresh = CacheJuridique(cache_dir=str(tmp_path))
+    restored = fresh.get("alpha", "document")["parties"][0]
+    assert restored == partie and restored.type_partie is TypePartie.DEFENDEUR
+    assert fresh.get("lock", "general") is None
+    assert cache.get("lock", "general") is lock
+
+    stats = fresh.get_stats()
+    assert stats["disk_entries"] == 1 and stats["by_type"] == {"document": 1}
+    assert stats["performance"]["hits"] == 1 and stats["performance"]["misses"] == 1
+
+    fresh.clear("document")
+    assert fresh.get("alpha", "document") is None
+    assert fresh.get_stats()["disk_entries"] == 0
+
+
+def test_recent_actes(tmp_path, monkeypatch):
+    cache = CacheJuridique(cache_dir=str(tmp_path))
+    monkeypatch.setattr("utils.cache_manager.get_cache", lambda: cache)
+    actes = CacheActesJuridiques()
+    actes.save_acte("plainte v1", "plainte", {"demandeurs": ["A"]}, ["abs"])
+    actes.save_acte("plainte v2", "plainte", {"demandeurs": ["B"]}, ["abs"])
+
+    recent = actes.get_recent_actes()
+    assert [r["acte"] for r in recent] == ["plainte v2", "plainte v1"]
+    assert recent[0]["metadata"]["nb_parties"] == 1
+    assert actes.get_acte("plainte", {"demandeurs": ["A"]}, ["abs"]) == "plainte v1"
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from utils.company_cache import CompanyCache, normalize_company_name, normalize_siren
+
+
+def test_normalization():
+    assert normalize_company_name("Société ALPHA, S.A.S.") == normalize_company_name("societe alpha")
+    assert normalize_company_name("SARL Béta-Conseil") == "beta conseil"
+    assert normalize_siren("123 456 789 00012") == "123456789"
+    assert normalize_siren("12345") is None
+
+
+def test_lookup_by_key_siren_and_name(tmp_path):
+    cache = CompanyCache(str(tmp_path / "companies.db"))
+    fiche = {"nom": "Alpha SAS", "siren": "123456789", "ville": "Paris"}
+    cache.set("async_search_alpha", fiche, "infos_societe", siren="123 456 789", name="Alpha SAS")
+
+    assert cache.get("async_search_alpha") == fiche
+    assert cache.get_by_siren("12345678900012", "infos_societe") == fiche
+    assert cache.get_by_name("ALPHA", "infos_societe") == fiche
+    assert cache.get_by_name("Alpha", "pappers") is None
+
+    # Les entrées survivent à la réouverture du fichier
+    reopened = CompanyCache(str(tmp_path / "companies.db"))
+    assert reopened.get_by_siren("123456789", "infos_societe") == fiche
+
+
+def test_expiry_and_periodic_compaction(tmp_path):
+    cache = CompanyCache(str(tmp_path / "companies.db"), ttl=timedelta(seconds=60), compact_every=3)
+    cache.set("ancienne", {"nom": "Gamma"}, "pappers", created=time.time() - 120)
+    assert cache.get("ancienne") is None
+    assert cache.count() == 1
+
+    cache.set("a", {"nom": "A"}, "pappers")
+    cache.set("b", {"nom": "B"}, "pappers")
+    # Troisième écriture : compactage, l'entrée expirée est supprimée
+    assert cache.stats["compactions"] == 1
+    assert cache.count() == 2
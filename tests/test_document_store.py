@@ -0,0 +1,70 @@
+from utils.document_store import content_digest, get_document_store
+
+
+def test_same_piece_in_several_dossiers_is_stored_once(tmp_path):
+    store = get_document_store(str(tmp_path / "store"))
+    contrat = b"Contrat de cession\r\nArticle 1 : objet\r\n"
+
+    first = store.put(contrat, "contrat.txt", dossier="affaire_A")
+    second = store.put(contrat.replace(b"\r\n", b"\n"), "contrat.txt", dossier="affaire_B", ref="contrat")
+
+    assert first.digest == second.digest == content_digest(contrat, "contrat.txt")
+    assert store.refcount(first.digest) == 2
+    assert store.dossiers_of(first.digest) == ["affaire_A", "affaire_B"]
+    stats = store.get_stats()
+    assert stats["blobs"] == 1 and stats["references"] == 2
+    assert stats["saved_bytes"] == len(contrat)
+
+    # Remplacer une référence décrémente l'ancien contenu
+    store.put(b"Avenant", "contrat.txt", dossier="affaire_B", ref="contrat")
+    assert store.refcount(first.digest) == 1
+    assert [h.name for h in store.documents("affaire_A")] == ["contrat.txt"]
+
+
+def test_text_is_extracted_once_and_read_lazily(tmp_path):
+    store = get_document_store(str(tmp_path / "store"))
+    handle = store.put(b"%PDF-fictif", "pv.pdf", dossier="affaire_A")
+    calls = []
+
+    def extract(data):
+        calls.append(data)
+        return "Procès-verbal d'audition"
+
+    assert store.text_for(handle.digest, extract) == "Procès-verbal d'audition"
+    assert store.text_for(handle.digest, extract) == "Procès-verbal d'audition"
+    assert len(calls) == 1
+    assert handle.content == "Procès-verbal d'audition"
+    assert handle.title == "pv.pdf" and handle.id == "affaire_A/pv.pdf"
+
+
+def test_garbage_collection_after_release(tmp_path):
+    store = get_document_store(str(tmp_path / "store"))
+    handle = store.put(b"Note interne", "note.txt", dossier="affaire_A")
+    store.write_text(handle.digest, "Note interne")
+
+    assert store.collect_garbage(grace=0) == 0
+    assert handle.release()
+    assert store.collect_garbage(grace=0) == 1
+    assert not store.contains(handle.digest)
+    assert store.read_text(handle.digest) is None
+
+
+def test_homonymous_imports_keep_their_own_reference(tmp_path):
+    store = get_document_store(str(tmp_path / "store"))
+    first = store.put(b"Scan du PV d'audition", "scan.pdf", dossier="imports")
+    second = store.put(b"Scan de la facture", "scan.pdf", dossier="imports")
+
+    assert first.ref != second.ref
+    assert store.refcount(first.digest) == store.refcount(second.digest) == 1
+    assert store.collect_garbage(grace=0) == 0
+    assert first.data == b"Scan du PV d'audition"
+
+
+def test_grace_period_starts_when_last_reference_goes(tmp_path):
+    store = get_document_store(str(tmp_path / "store"))
+    handle = store.put(b"Ancienne piece", "piece.txt", dossier="affaire_A")
+    store._conn.execute("UPDATE blobs SET created = created - 7200")
+
+    handle.release()
+    assert store.collect_garbage(grace=3600) == 0
+    assert store.collect_garbage(grace=0) == 1
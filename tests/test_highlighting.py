@@ -0,0 +1,19 @@
+from utils.highlighting import HighlightExtractor
+
+
+def test_single_pass_snippets_with_offsets():
+    text = ("x" * 200) + " audition du témoin " + ("y" * 200) + " perquisition au siège " + ("z" * 200)
+    extractor = HighlightExtractor(["audition", "perquisition"])
+    snippets = extractor.extract(text)
+    assert [s.terms for s in snippets] == [["audition"], ["perquisition"]]
+    for snippet in snippets:
+        assert snippet.text == text[snippet.start:snippet.end].strip()
+
+
+def test_overlapping_windows_are_merged_and_reference_first():
+    text = "Le contrat ABC12 signé, puis le contrat modifié. " + ("." * 300) + " Dossier ABC12 clos."
+    extractor = HighlightExtractor(["contrat"], reference="abc12")
+    snippets = extractor.extract(text)
+    assert snippets[0].is_reference
+    assert sorted(snippets[0].terms) == ["abc12", "contrat"]
+    assert len(snippets) == 1
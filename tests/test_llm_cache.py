@@ -0,0 +1,67 @@
+import json
+
+from utils.llm_cache import LLMResponseCache, make_cache_key, normalize_prompt
+
+
+def test_cache_key_depends_on_every_parameter():
+    base = dict(prompt="Analyse", system_prompt="Tu es juriste", provider="openai",
+                model="gpt-4", temperature=0, max_tokens=1000)
+    key = make_cache_key(**base)
+
+    assert make_cache_key(**{**base, "prompt": "Analyse \r\n"}) == key
+    for field, value in [("prompt", "Résume"), ("system_prompt", "Tu es avocat"),
+                         ("provider", "groq"), ("model", "gpt-3.5"),
+                         ("temperature", 0.2), ("max_tokens", 500)]:
+        assert make_cache_key(**{**base, field: value}) != key
+    assert normalize_prompt("  ligne  \r\nsuite\t") == "ligne\nsuite"
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    cache = LLMResponseCache(cache_dir=str(tmp_path))
+    key = make_cache_key("q", "s", "openai", "gpt-4", 0, 100)
+    assert cache.get(key) is None
+    cache.set(key, "réponse", "openai", "gpt-4", tokens=42)
+
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".db"] == ["llm.db"]
+    assert cache.stats()["disk_entries"] == 1
+
+    fresh = LLMResponseCache(cache_dir=str(tmp_path))
+    assert fresh.get(key)["response"] == "réponse"
+    assert fresh.get(key)["response"] == "réponse"
+    stats = fresh.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["tokens_saved"]) == (1, 1, 84)
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = LLMResponseCache(cache_dir=str(tmp_path), ttl=0)
+    cache.set("ab" * 32, "réponse")
+    assert LLMResponseCache(cache_dir=str(tmp_path), ttl=0).get("ab" * 32) is None
+
+
+def test_disk_tier_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.sqlite_cache.ACCESS_RESOLUTION", 0)
+    legacy = tmp_path / "ab" / ("ab" * 32 + ".json")
+    legacy.parent.mkdir()
+    legacy.write_text(json.dumps({"response": "ancien", "created": 0}), encoding="utf-8")
+
+    cache = LLMResponseCache(cache_dir=str(tmp_path), max_entries=1, max_disk_bytes=1000)
+    assert not legacy.parent.exists()
+    for i in range(20):
+        cache.set(f"{i:064x}", "réponse " * 10)
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 1000 and 0 < stats["disk_entries"] < 20
+    # Les plus anciennes sont évincées, les plus récentes restent lisibles
+    fresh = LLMResponseCache(cache_dir=str(tmp_path))
+    assert fresh.get(f"{0:064x}") is None
+    assert fresh.get(f"{19:064x}")["response"] == "réponse " * 10
+
+
+def test_temperature_policy():
+    cache = LLMResponseCache(cache_dir=None)
+    assert cache.should_cache(0)
+    assert not cache.should_cache(0.7)
+    assert cache.should_cache(0.7, use_cache=True)
+    assert not cache.should_cache(0, use_cache=False)
+    assert LLMResponseCache(cache_dir=None, allow_nondeterministic=True).should_cache(0.7)
+    assert not LLMResponseCache(cache_dir=None, enabled=False).should_cache(0, use_cache=True)
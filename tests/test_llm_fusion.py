@@ -0,0 +1,57 @@
+import threading
+
+from utils.llm_fusion import concatenate, dedupe_paragraphs, fit_to_budget, tree_fuse
+from utils.rate_limiter import estimate_tokens
+
+SHARED = "Le délit d'abus de biens sociaux suppose un usage contraire à l'intérêt social."
+
+
+def test_dedupe_removes_repeated_paragraphs():
+    items = [
+        ("openai", f"# Analyse\n\n{SHARED}\n\nPremier point propre."),
+        ("anthropic", f"# Analyse\n\n{SHARED.upper()}\n\nSecond point propre."),
+        ("groq", f"  {SHARED}  "),
+    ]
+    deduped = dedupe_paragraphs(items)
+
+    assert [label for label, _ in deduped] == ["openai", "anthropic"]
+    # Les titres courts sont conservés, le paragraphe commun n'apparaît qu'une fois
+    assert deduped[1][1] == "# Analyse\n\nSecond point propre."
+
+
+def test_fit_to_budget_cuts_on_paragraphs():
+    text = "\n\n".join(["a" * 400] * 5)
+    fitted = fit_to_budget(text, 250)
+    assert fitted == "\n\n".join(["a" * 400] * 2)
+    assert fit_to_budget("court", 250) == "court"
+
+
+def test_tree_fuse_merges_pairwise_within_budget():
+    items = [(f"m{i}", f"Réponse {i}. " + "x" * 2000) for i in range(5)]
+    calls = []
+    lock = threading.Lock()
+
+    def merge(group):
+        with lock:
+            calls.append([label for label, _ in group])
+        assert len(group) == 2
+        assert sum(estimate_tokens(text) for _, text in group) <= 600
+        return " | ".join(label for label, _ in group)
+
+    result = tree_fuse(items, merge, budget=600)
+
+    # 5 réponses -> 3 -> 2 -> 1 : quatre fusions
+    assert len(calls) == 4
+    assert sorted(calls[:2]) == [["m0", "m1"], ["m2", "m3"]]
+    assert result == "m0 + m1 + m2 + m3 | m4"
+
+
+def test_tree_fuse_falls_back_to_concatenation():
+    items = [("a", "Version A"), ("b", "Version B")]
+
+    def broken(group):
+        raise RuntimeError("Service Unavailable")
+
+    assert tree_fuse(items, broken) == concatenate(items)
+    assert tree_fuse(items) == "### a\nVersion A\n\n### b\nVersion B"
+    assert tree_fuse([("a", "Seule")], broken) == "Seule"
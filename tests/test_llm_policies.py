@@ -0,0 +1,82 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.llm_policies import (CANCELLED, FINISHED, SKIPPED, TIMED_OUT, as_policy, arun_policy,
+                                first_success, hedged, quorum, run_policy)
+
+
+def sync_call(name, delay, success=True):
+    def call():
+        time.sleep(delay)
+        return {"success": success, "provider": name, "response": name}
+    return name, call
+
+
+def async_call(name, delay, success=True, started=None):
+    async def call():
+        if started is not None:
+            started.append(name)
+        await asyncio.sleep(delay)
+        return {"success": success, "provider": name, "response": name}
+    return name, call
+
+
+def test_first_success_returns_with_the_fastest_provider():
+    executor = ThreadPoolExecutor(4)
+    start = time.monotonic()
+    outcomes = run_policy([sync_call("lent", 0.5), sync_call("rapide", 0.02)], first_success(), executor)
+
+    assert time.monotonic() - start < 0.3
+    assert [o.status for o in outcomes] == [CANCELLED, FINISHED]
+    assert outcomes[1].to_result()["response"] == "rapide"
+    assert outcomes[0].to_result()["success"] is False
+
+
+def test_quorum_ignores_failures():
+    outcomes = run_policy(
+        [sync_call("a", 0.01, success=False), sync_call("b", 0.02), sync_call("c", 0.04), sync_call("d", 0.5)],
+        quorum(2)
+    )
+    assert [o.status for o in outcomes] == [FINISHED, FINISHED, FINISHED, CANCELLED]
+    assert [o.succeeded for o in outcomes] == [False, True, True, False]
+
+
+def test_timeout_marks_stragglers():
+    outcomes = run_policy([sync_call("a", 0.01), sync_call("b", 0.5)], timeout=0.1)
+    assert [o.status for o in outcomes] == [FINISHED, TIMED_OUT]
+
+
+def test_hedged_launches_next_provider_only_when_needed():
+    started = []
+
+    async def run(delay_first):
+        return await arun_policy(
+            [async_call("principal", delay_first, started=started), async_call("secours", 0.01, started=started)],
+            hedged(50)
+        )
+
+    outcomes = asyncio.run(run(0.01))
+    assert started == ["principal"]
+    assert [o.status for o in outcomes] == [FINISHED, SKIPPED]
+
+    started.clear()
+    outcomes = asyncio.run(run(0.5))
+    assert started == ["principal", "secours"]
+    assert [o.status for o in outcomes] == [CANCELLED, FINISHED]
+
+
+def test_hedged_moves_on_immediately_after_a_failure():
+    start = time.monotonic()
+    outcomes = run_policy([sync_call("a", 0.01, success=False), sync_call("b", 0.01)], hedged(5000))
+    assert time.monotonic() - start < 1
+    assert [o.succeeded for o in outcomes] == [False, True]
+
+
+def test_policy_names():
+    assert as_policy("quorum:3") == quorum(3)
+    assert as_policy("hedged:200").delay == pytest.approx(0.2)
+    with pytest.raises(ValueError):
+        as_policy("majorite")
@@ -0,0 +1,79 @@
+import time
+
+from utils.llm_router import CLOSED, HALF_OPEN, OPEN, LLMRouter, size_class
+
+
+def feed(router, provider, latency, count, success=True, tokens=500):
+    for _ in range(count):
+        router.record(provider, latency, success, tokens)
+
+
+def test_routes_to_fastest_healthy_provider():
+    router = LLMRouter(failure_threshold=100)
+    assert router.choose(["openai", "anthropic"]) == "openai"
+
+    feed(router, "openai", 2.0, 10)
+    feed(router, "anthropic", 1.0, 10)
+    assert router.choose(["openai", "anthropic"], tokens=500) == "anthropic"
+
+    # Les erreurs pénalisent le score
+    feed(router, "anthropic", 1.0, 10, success=False)
+    assert router.ranked(["openai", "anthropic"], tokens=500) == ["openai", "anthropic"]
+
+    decision = router.decisions[-1]
+    assert decision["chosen"] == "openai" and decision["size_class"] == "small"
+
+
+def test_size_class_latencies_and_context_limits():
+    router = LLMRouter()
+    feed(router, "groq", 0.5, 10, tokens=500)
+    feed(router, "groq", 30.0, 10, tokens=20_000)
+    feed(router, "openai", 3.0, 10, tokens=20_000)
+
+    assert size_class(20_000) == "large"
+    assert router.choose(["groq", "openai"], tokens=500) == "groq"
+    assert router.choose(["groq", "openai"], tokens=20_000) == "openai"
+    assert router.choose(["groq", "openai"], tokens=60_000) == "openai"
+    assert router.decisions[-1]["skipped"] == {"groq": "contexte insuffisant"}
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    router = LLMRouter(failure_threshold=2, cooldown=0.05)
+    feed(router, "mistral", 1.0, 2, success=False)
+
+    assert router.stats()["mistral"]["state"] == OPEN
+    assert not router.allow("mistral")
+    assert router.choose(["mistral", "groq"]) == "groq"
+
+    time.sleep(0.06)
+    assert router.allow("mistral")
+    assert router.stats()["mistral"]["state"] == HALF_OPEN
+    # Un seul appel de test à la fois
+    assert not router.allow("mistral")
+
+    router.record("mistral", 1.0, False)
+    assert router.stats()["mistral"]["state"] == OPEN
+
+    time.sleep(0.06)
+    assert router.allow("mistral")
+    router.record("mistral", 1.0, True)
+    stats = router.stats()["mistral"]
+    assert stats["state"] == CLOSED and stats["consecutive_failures"] == 0
+
+
+def test_released_probe_can_be_retried_at_once():
+    router = LLMRouter(failure_threshold=1, cooldown=0.05)
+    router.record("mistral", 1.0, False)
+    time.sleep(0.06)
+
+    assert router.allow("mistral")
+    # L'appel de test n'a pas atteint le fournisseur (créneau refusé, annulation)
+    router.release("mistral")
+    assert router.stats()["mistral"]["state"] == HALF_OPEN
+    assert router.allow("mistral")
+    assert not router.allow("mistral")
+
+    # Sans effet sur un circuit fermé ou ouvert
+    router.record("mistral", 1.0, False)
+    router.release("mistral")
+    assert not router.allow("mistral")
@@ -0,0 +1,51 @@
+import asyncio
+
+from utils.llm_streaming import FakeStreamingLLM, LLMStream, StreamMetrics, render_stream
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.renders = []
+
+    def markdown(self, text):
+        self.renders.append(text)
+
+
+def test_stream_records_first_token_and_total_time():
+    fake = FakeStreamingLLM("Conclusions en défense", chunk_size=5, delay=0.01)
+    stream = LLMStream(fake.stream("q"), StreamMetrics(provider="fake"))
+
+    assert list(stream) == ["Concl", "usion", "s en ", "défen", "se"]
+    metrics = stream.metrics
+    assert metrics.chunks == 5 and metrics.characters == len("Conclusions en défense")
+    assert 0 < metrics.time_to_first_token < metrics.elapsed_time
+    assert stream.result()["response"] == "Conclusions en défense"
+
+
+def test_async_stream():
+    fake = FakeStreamingLLM(chunk_size=4)
+    stream = LLMStream(fake.astream("question"), StreamMetrics(provider="fake"))
+
+    async def collect():
+        return [delta async for delta in stream]
+
+    assert "".join(asyncio.run(collect())) == "Réponse simulée à : question"
+    assert stream.metrics.time_to_first_token is not None
+
+
+def test_render_stream_updates_placeholder_progressively():
+    placeholder = FakePlaceholder()
+    text = render_stream(FakeStreamingLLM("abcdef", chunk_size=2).stream("q"), placeholder, min_interval=0)
+
+    assert text == "abcdef"
+    assert placeholder.renders[0].startswith("ab") and placeholder.renders[0] != "ab"
+    assert placeholder.renders[-1] == "abcdef"
+    assert len(placeholder.renders) == 4
+
+
+def test_errors_are_reported_in_result():
+    metrics = StreamMetrics(provider="fake")
+    stream = LLMStream(iter(()), metrics)
+    metrics.error = "Délai dépassé"
+    assert list(stream) == []
+    assert stream.result() == {"success": False, "provider": "fake", "error": "Délai dépassé"}
@@ -0,0 +1,49 @@
+import time
+
+from utils.lru_cache import LRUCache, estimate_size
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound_and_ttl():
+    cache = LRUCache(max_entries=10, max_bytes=1000, ttl=0.05)
+    cache.set("petit", "x" * 100)
+    cache.set("gros", "y" * 5000)
+    assert "gros" not in cache
+    assert cache.size_bytes <= 1000
+    time.sleep(0.06)
+    assert cache.get("petit") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["misses"] == 1
+
+
+def test_remove_where():
+    cache = LRUCache()
+    cache.set(("idx", 1, "q"), "r1")
+    cache.set(("autre", 1, "q"), "r2")
+    assert cache.remove_where(lambda key: key[0] == "idx") == 1
+    assert len(cache) == 1
+
+
+def test_estimate_size_counts_text_of_nested_objects():
+    class Doc:
+        def __init__(self, content):
+            self.content = content
+
+    class Result:
+        def __init__(self, documents):
+            self.documents = documents
+
+    shared = "x" * 10_000
+    result = Result([Doc("y" * 100_000) for _ in range(5)] + [Doc(shared), Doc(shared)])
+    size = estimate_size(result)
+    assert 510_000 < size < 560_000
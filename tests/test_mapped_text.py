@@ -0,0 +1,65 @@
+import re
+
+from utils.document_store import get_document_store
+from utils.highlighting import HighlightExtractor
+from utils.mapped_text import MappedText, document_text, iter_matches, matched_terms, word_count
+
+
+def write_text(path, text):
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def test_slices_match_the_decoded_text(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.mapped_text.BLOCK_BYTES", 64)
+    text = "".join(f"Pièce n°{i} : procès-verbal d'audition — témoin é{i}\n" for i in range(200))
+    path = write_text(tmp_path / "pv.txt", text)
+    mapped = MappedText(path)
+
+    assert len(mapped) == len(text)
+    assert len(mapped.index.offsets) > 10
+    for start, stop in ((0, 10), (63, 65), (1000, 4321), (len(text) - 5, len(text) + 10)):
+        assert mapped[start:stop] == text[start:stop]
+    assert mapped[-3:] == text[-3:] and mapped[7] == text[7]
+    assert mapped.preview(20) == text[:20]
+    assert mapped.chunk(3, 100) == text[300:400]
+
+    # L'index enregistré est relu tel quel
+    reopened = MappedText(path)
+    assert list(reopened.index.offsets) == list(mapped.index.offsets)
+    assert reopened[2000:2100] == text[2000:2100]
+
+
+def test_search_and_pages_span_windows(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.mapped_text.WINDOW_CHARS", 50)
+    text = "--- Page 1 ---\n" + "x " * 40 + "Contrat de BAIL\n--- Page 2 ---\nscellé n°12 " + "y " * 40
+    mapped = MappedText(write_text(tmp_path / "pv.txt", text))
+
+    assert mapped.find("contrat de bail") == text.index("Contrat de BAIL")
+    assert "BAIL" in mapped and "bail" not in mapped
+    assert matched_terms(mapped, ["bail", "scellé", "absent"]) == {"bail", "scellé"}
+    assert word_count(mapped) == len(text.split())
+    assert mapped.page(2) == text[text.index("scellé"):]
+    assert mapped.page(3) == ""
+
+    pattern = re.compile(r"\by\b")
+    assert [start for start, _, _ in iter_matches(pattern, mapped, 1)] == \
+        [m.start() for m in pattern.finditer(text)]
+
+
+def test_highlights_and_document_accessor_use_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.mapped_text.WINDOW_CHARS", 40)
+    store = get_document_store(str(tmp_path / "store"))
+    text = "Préambule. " * 30 + "Le contrat de bail est résilié. " + "Annexe. " * 30
+    handle = store.put(text.encode("utf-8"), "bail.txt", dossier="affaire_A")
+    store.write_text(handle.digest, text)
+
+    mapped = document_text(handle)
+    assert isinstance(mapped, MappedText)
+    assert store.mapped_text(handle.digest) is mapped
+
+    snippets = HighlightExtractor(["bail"]).extract(mapped)
+    expected = HighlightExtractor(["bail"]).extract(text)
+    assert [(s.start, s.end, s.text) for s in snippets] == [(s.start, s.end, s.text) for s in expected]
+    assert document_text({"content": "brut"}) == "brut"
+
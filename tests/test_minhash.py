@@ -0,0 +1,23 @@
+from utils.minhash import LSHIndex, MinHasher, signature_similarity, word_shingles
+
+
+def test_signature_similarity_tracks_jaccard():
+    hasher = MinHasher()
+    words = [f"mot{i}" for i in range(200)]
+    sig_a = hasher.terms_signature(words)
+    sig_b = hasher.terms_signature(words[:190] + ["autre"] * 10)
+    sig_c = hasher.terms_signature([f"terme{i}" for i in range(200)])
+    assert sig_a == hasher.terms_signature(list(words))
+    assert signature_similarity(sig_a, sig_b) > 0.7
+    assert signature_similarity(sig_a, sig_c) < 0.2
+
+
+def test_lsh_query_and_remove():
+    hasher = MinHasher()
+    lsh = LSHIndex()
+    lsh.insert("a", hasher.signature(word_shingles("le contrat de vente signé".split())))
+    lsh.insert("b", hasher.signature(word_shingles("procès-verbal d'audition du témoin".split())))
+    query = hasher.signature(word_shingles("le contrat de vente signé".split()))
+    assert [key for key, _ in lsh.query(query)] == ["a"]
+    lsh.remove("a")
+    assert lsh.query(query) == []
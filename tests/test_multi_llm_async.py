@@ -0,0 +1,235 @@
+import asyncio
+import time
+
+import pytest
+pytest.importorskip("streamlit")
+
+import managers.multi_llm_manager as mlm
+from managers.multi_llm_manager import MultiLLMManager
+from utils.llm_cache import LLMResponseCache
+from utils.llm_policies import first_success
+from utils.llm_router import LLMRouter
+from utils.llm_streaming import FakeStreamingLLM
+from utils.rate_limiter import LLMScheduler, ProviderLimits
+
+
+def make_manager(monkeypatch, providers=("openai", "anthropic")):
+    monkeypatch.setattr(MultiLLMManager, "_initialize_clients", lambda self: None)
+    monkeypatch.setattr(mlm, "rewrite_prompt", lambda prompt: prompt)
+    manager = MultiLLMManager()
+    manager.clients = {name: object() for name in providers}
+    manager.scheduler = LLMScheduler(default_limits=ProviderLimits(6000, 10 ** 7, 8))
+    manager.cache = LLMResponseCache(cache_dir=None)
+    manager.router = LLMRouter(failure_threshold=2, cooldown=60)
+    # Pas de client asynchrone : les appels passent par le pool partagé
+    monkeypatch.setattr(MultiLLMManager, "_get_async_client", lambda self, key: None)
+    return manager
+
+
+def test_aquery_multiple_llms_runs_concurrently(monkeypatch):
+    manager = make_manager(monkeypatch)
+
+    def slow_openai(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        time.sleep(0.2)
+        return f"openai:{prompt}"
+
+    def slow_claude(self, prompt, system_prompt, temperature, max_tokens):
+        time.sleep(0.2)
+        return f"claude:{prompt}"
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", slow_openai)
+    monkeypatch.setattr(MultiLLMManager, "_query_claude", slow_claude)
+
+    start = time.monotonic()
+    results = asyncio.run(manager.aquery_multiple_llms(["openai", "anthropic", "mistral"], "question"))
+    elapsed = time.monotonic() - start
+
+    assert [r["response"] for r in results] == ["openai:question", "claude:question"]
+    assert elapsed < 0.35
+
+
+def test_aquery_single_llm_timeout_and_per_provider_limit(monkeypatch):
+    manager = make_manager(monkeypatch, providers=("openai",))
+    manager.scheduler = LLMScheduler({"openai": ProviderLimits(6000, 10 ** 7, max_concurrency=1)})
+    active = []
+
+    def openai_call(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        active.append(prompt)
+        assert len(active) == 1
+        time.sleep(0.05)
+        active.remove(prompt)
+        return prompt
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", openai_call)
+
+    async def run():
+        ok = await asyncio.gather(*(manager.aquery_single_llm("openai", f"q{i}") for i in range(3)))
+        slow = await manager.aquery_single_llm("openai", "lent", timeout=0.01)
+        return ok, slow
+
+    ok, slow = asyncio.run(run())
+    assert all(r["success"] for r in ok)
+    assert not slow["success"] and "Délai" in slow["error"]
+
+
+def test_aquery_single_llm_unknown_provider(monkeypatch):
+    manager = make_manager(monkeypatch, providers=())
+    result = asyncio.run(manager.aquery_single_llm("openai", "question"))
+    assert result["success"] is False
+
+
+def test_deterministic_calls_are_served_from_cache(monkeypatch):
+    manager = make_manager(monkeypatch, providers=("openai",))
+    calls = []
+
+    def openai_call(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        calls.append(prompt)
+        return f"réponse:{prompt}"
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", openai_call)
+
+    first = manager.query_single_llm("openai", "question", temperature=0)
+    second = asyncio.run(manager.aquery_single_llm("openai", "question  ", temperature=0))
+    manager.query_single_llm("openai", "question", temperature=0.7)
+
+    assert second["response"] == first["response"] and second["cached"]
+    assert len(calls) == 2
+    stats = manager.cache.stats()
+    assert (stats["hits"], stats["bypassed"]) == (1, 1)
+
+
+def test_streaming_with_fake_provider(monkeypatch):
+    manager = make_manager(monkeypatch, providers=())
+    manager.clients["fake"] = FakeStreamingLLM("Réponse en plusieurs fragments", chunk_size=6)
+
+    stream = manager.stream_single_llm("fake", "question", temperature=0)
+    assert len(list(stream)) == 5
+    assert stream.result()["response"] == "Réponse en plusieurs fragments"
+
+    async def collect():
+        astream = manager.astream_single_llm("fake", "question", temperature=0)
+        return [delta async for delta in astream], astream
+
+    deltas, astream = asyncio.run(collect())
+    # Deuxième appel identique : servi par le cache en un seul fragment
+    assert deltas == ["Réponse en plusieurs fragments"] and astream.metrics.cached
+
+    missing = manager.stream_single_llm("openai", "question")
+    assert list(missing) == [] and not missing.result()["success"]
+
+
+def test_query_multiple_llms_first_success(monkeypatch):
+    manager = make_manager(monkeypatch)
+
+    def slow_openai(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        time.sleep(0.5)
+        return "openai"
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", slow_openai)
+    monkeypatch.setattr(MultiLLMManager, "_query_claude", lambda self, *args: "claude")
+
+    start = time.monotonic()
+    results = manager.query_multiple_llms(["openai", "anthropic"], "question", policy=first_success())
+    assert time.monotonic() - start < 0.3
+    assert [(r["provider"], r["status"], r["success"]) for r in results] == [
+        ("openai", "cancelled", False), ("anthropic", "finished", True)]
+
+    results = asyncio.run(manager.aquery_multiple_llms(["openai", "anthropic"], "question", policy="first_success"))
+    assert [r["status"] for r in results] == ["cancelled", "finished"]
+
+
+def test_failing_provider_is_short_circuited(monkeypatch):
+    manager = make_manager(monkeypatch)
+    calls = []
+
+    def broken_openai(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        calls.append(prompt)
+        raise RuntimeError("Service Unavailable")
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", broken_openai)
+    monkeypatch.setattr(MultiLLMManager, "_query_claude", lambda self, *args: "claude")
+
+    for _ in range(3):
+        result = manager.query_single_llm("openai", "question")
+    assert len(calls) == 2 and result["status"] == "circuit_open"
+    assert manager.rank_providers("question") == ["anthropic"]
+    assert manager.router.stats()["anthropic"]["calls"] == 0
+
+
+
+def test_probe_is_released_when_no_slot_is_granted(monkeypatch):
+    manager = make_manager(monkeypatch, providers=("openai",))
+    manager.router = LLMRouter(failure_threshold=1, cooldown=0.05)
+    manager.router.record("openai", 1.0, False)
+    time.sleep(0.06)
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", lambda self, *args: "openai")
+
+    def no_slot(*args, **kwargs):
+        raise mlm.RateLimitTimeout("Aucun créneau openai")
+
+    slot = manager.scheduler.slot
+    monkeypatch.setattr(manager.scheduler, "slot", no_slot)
+    assert not asyncio.run(manager.aquery_single_llm("openai", "question"))["success"]
+    assert not manager.query_single_llm("openai", "question")["success"]
+
+    # Le circuit reste semi-ouvert : l'appel suivant sert de test
+    monkeypatch.setattr(manager.scheduler, "slot", slot)
+    assert manager.query_single_llm("openai", "question")["response"] == "openai"
+    assert manager.router.stats()["openai"]["state"] == "closed"
+
+
+def test_async_clients_are_closed_when_the_run_ends(monkeypatch):
+    manager = make_manager(monkeypatch, providers=("openai",))
+    created = []
+
+    class AsyncClient:
+        def __init__(self):
+            self.closed = False
+            created.append(self)
+
+        async def close(self):
+            self.closed = True
+
+    def get_client(self, provider_key):
+        clients = self._async_clients[asyncio.get_running_loop()]["clients"]
+        if provider_key not in clients:
+            clients[provider_key] = AsyncClient()
+        return clients[provider_key]
+
+    async def call(self, provider_key, *args):
+        self._get_async_client(provider_key)
+        await asyncio.sleep(0.01)
+        return "openai"
+
+    monkeypatch.setattr(MultiLLMManager, "_get_async_client", get_client)
+    monkeypatch.setattr(MultiLLMManager, "_acall_provider", call)
+
+    async def run(count):
+        return await asyncio.gather(*(manager.aquery_single_llm("openai", f"q{i}") for i in range(count)))
+
+    # Un client par exécution, partagé par les appels concurrents et fermé à la fin
+    for _ in range(2):
+        assert all(r["success"] for r in asyncio.run(run(3)))
+    assert len(created) == 2 and all(client.closed for client in created)
+    assert manager._async_clients == {}
+
+def test_fusion_responses_tree_reduces(monkeypatch):
+    manager = make_manager(monkeypatch, providers=("openai",))
+    prompts = []
+
+    def fuse(self, provider_key, prompt, system_prompt, temperature, max_tokens):
+        prompts.append(prompt)
+        return f"synthèse {len(prompts)}"
+
+    monkeypatch.setattr(MultiLLMManager, "_query_openai", fuse)
+    shared = "Paragraphe commun aux trois analyses, suffisamment long pour être dédupliqué."
+    responses = [
+        {"success": True, "provider": name, "response": f"{shared}\n\nAvis de {name}."}
+        for name in ("openai", "anthropic", "mistral")
+    ] + [{"success": False, "provider": "groq", "error": "indisponible"}]
+
+    result = manager.fusion_responses(responses)
+
+    assert result == "synthèse 2"
+    assert len(prompts) == 2
+    assert sum(prompt.count(shared) for prompt in prompts) == 1
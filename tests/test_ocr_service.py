@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("PIL")
+ocr_service = pytest.importorskip("services.ocr_service")
+from PIL import Image
+
+from services.ocr_service import CACHED, FAILED, OCR, TEXT_LAYER, BatchOCRService
+from tests.test_pdf_extraction import make_pdf
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    calls = []
+
+    def image_to_string(image, lang=None):
+        calls.append(image.size)
+        return f"Texte reconnu {image.size[0]}"
+
+    monkeypatch.setattr(ocr_service.pytesseract, "image_to_string", image_to_string)
+    return calls
+
+
+def test_images_are_cached_by_hash(tmp_path, fake_tesseract):
+    paths = []
+    for width in (40, 60):
+        path = tmp_path / f"pv_{width}.png"
+        Image.new("L", (width, 30), color=255).save(path)
+        paths.append(str(path))
+    service = BatchOCRService(workers=1, cache_path=str(tmp_path / "ocr.db"))
+
+    first = service.process(paths)
+    assert first.counts() == {OCR: 2}
+    assert first.text(paths[0]) == "Texte reconnu 40"
+
+    # Réimport (même contenu sous un autre nom) : aucun nouvel appel à Tesseract
+    copy = tmp_path / "copie.png"
+    copy.write_bytes((tmp_path / "pv_40.png").read_bytes())
+    second = service.process(paths + [str(copy)])
+    assert second.counts() == {CACHED: 3}
+    assert len(fake_tesseract) == 2
+    assert second.to_dict()["pages"] == 3
+
+
+def test_pdf_pages_with_text_layer_skip_ocr(tmp_path, fake_tesseract):
+    pytest.importorskip("PyPDF2")
+    path = tmp_path / "pv.pdf"
+    path.write_bytes(make_pdf(["Proces-verbal d'audition de M. Dupont, cote D12", "Cote D13 " * 5]))
+    service = BatchOCRService(workers=1, cache_path=None)
+
+    report = service.process([str(path), str(tmp_path / "notes.docx")])
+    assert report.counts() == {TEXT_LAYER: 2, FAILED: 1}
+    assert "cote D12" in report.text(str(path))
+    assert fake_tesseract == []
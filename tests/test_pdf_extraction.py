@@ -0,0 +1,60 @@
+import pytest
+
+from utils.pdf_extraction import PageIndex, PdfText
+
+
+def make_pdf(pages):
+    """PDF minimal d'une ligne de texte par page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def test_pdf_text_spools_and_indexes_pages():
+    with PdfText(spool_threshold=64) as pdf_text:
+        for number in range(1, 6):
+            pdf_text.append(number, f"Procès-verbal d'audition, cote {number}. " * 3)
+        text = pdf_text.read()
+
+        assert pdf_text.spooled
+        assert pdf_text.page_count == 5
+        assert pdf_text.page(3) == "Procès-verbal d'audition, cote 3. " * 3
+        assert pdf_text.index.page_at(text.index("cote 4")) == 4
+        assert PageIndex.from_text(text).offsets == pdf_text.index.offsets
+
+
+def test_iter_pages_in_order_across_workers(tmp_path):
+    pytest.importorskip("PyPDF2")
+    from utils.pdf_extraction import extract_page_range, extract_pdf, iter_pdf_pages
+
+    path = tmp_path / "scelle.pdf"
+    path.write_bytes(make_pdf([f"Cote {n}" for n in range(1, 8)]))
+
+    serial = list(iter_pdf_pages(str(path), workers=1))
+    parallel = list(iter_pdf_pages(str(path), workers=2, page_batch=2))
+    assert [number for number, _ in parallel] == list(range(1, 8))
+    assert parallel == serial
+    assert "Cote 5" in serial[4][1]
+
+    assert [t.strip() for t in extract_page_range(path.read_bytes(), 6, 7)] == ["Cote 6", "Cote 7"]
+    with extract_pdf(path.read_bytes(), workers=2, page_batch=3) as pdf_text:
+        assert pdf_text.read().startswith("--- Page 1 ---\nCote 1")
+        assert pdf_text.page(7).strip() == "Cote 7"
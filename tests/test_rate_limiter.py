@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.rate_limiter import (LLMScheduler, Priority, ProviderLimits, RateLimitTimeout,
+                                TokenBucket, classify_error, estimate_tokens)
+
+
+def fast_limits(concurrency=1):
+    return {"openai": ProviderLimits(6000, 10 ** 7, concurrency)}
+
+
+def test_interactive_calls_overtake_batch_calls():
+    scheduler = LLMScheduler(fast_limits())
+    order = []
+
+    def call(name, priority):
+        with scheduler.slot("openai", priority=priority):
+            order.append(name)
+            time.sleep(0.01)
+
+    holder = scheduler.slot("openai")
+    holder.__enter__()
+    threads = [threading.Thread(target=call, args=(f"batch{i}", Priority.BATCH)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=("interactive", Priority.INTERACTIVE))
+    interactive.start()
+    time.sleep(0.02)
+    holder.__exit__(None, None, None)
+    for thread in threads + [interactive]:
+        thread.join(2)
+
+    assert order == ["interactive", "batch0", "batch1"]
+
+
+def test_throttling_halves_concurrency_and_blocks_provider():
+    scheduler = LLMScheduler(fast_limits(concurrency=8))
+    with scheduler.slot("openai") as slot:
+        slot.report("throttled", retry_after=0.2)
+
+    stats = scheduler.stats()["openai"]
+    assert stats["concurrency_limit"] == 4
+    assert stats["throttled"] == 1 and stats["blocked_for"] > 0
+
+    start = time.monotonic()
+    with scheduler.slot("openai"):
+        pass
+    assert time.monotonic() - start >= 0.15
+    assert scheduler.stats()["openai"]["concurrency_limit"] > 4
+
+
+def test_sdk_errors_are_classified():
+    class RateLimitError(Exception):
+        pass
+
+    error = RuntimeError("Service Unavailable")
+    error.status_code = 429
+    assert classify_error(RateLimitError()) == "throttled"
+    assert classify_error(error) == "throttled"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(ValueError()) == "error"
+
+    scheduler = LLMScheduler(fast_limits(concurrency=4))
+    with pytest.raises(RateLimitError):
+        with scheduler.slot("openai"):
+            raise RateLimitError()
+    assert scheduler.stats()["openai"]["concurrency_limit"] == 2
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)
+    now = time.monotonic()
+    assert bucket.wait_time(10, now) == 0
+    bucket.take(10)
+    assert bucket.wait_time(5, now) == pytest.approx(0.5)
+    assert estimate_tokens("x" * 400, max_tokens=100) == 150
+
+
+def test_async_slots_respect_concurrency_and_timeout():
+    scheduler = LLMScheduler(fast_limits(concurrency=2))
+    active = []
+    peak = []
+
+    async def call():
+        async with scheduler.slot("openai"):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.02)
+            active.pop()
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+        async with scheduler.slot("openai"):
+            async with scheduler.slot("openai"):
+                with pytest.raises(RateLimitTimeout):
+                    async with scheduler.slot("openai", timeout=0.05):
+                        pass
+
+    asyncio.run(run())
+    assert max(peak) == 2
+    stats = scheduler.stats()["openai"]
+    assert stats["queued"] == 0 and stats["in_flight"] == 0
@@ -0,0 +1,79 @@
+from utils.search_index import InvertedIndex, analyze_text, fold_accents
+
+
+def test_analyze_text_folds_accents_and_stems():
+    assert fold_accents("Procès-Verbal Élaboré") == "proces-verbal elabore"
+    assert analyze_text("Escroqueries") == analyze_text("escroquerie")
+    assert analyze_text("abus de biens sociaux") == ["abus", "bien", "social"]
+
+
+def test_index_search_and_incremental_sync():
+    index = InvertedIndex()
+    documents = {
+        "D1_doc1": {"title": "Contrat A", "content": "contrat de vente pour Vinci"},
+        "D2_doc1": {"title": "Facture", "content": "facture simple"},
+    }
+    assert index.sync(documents) == 2
+    assert index.search("contrats") == ["D1_doc1"]
+
+    # Aucun changement : rien n'est réindexé
+    assert index.sync(documents) == 0
+
+    documents["D2_doc1"] = {"title": "Facture", "content": "facture liée au contrat"}
+    del documents["D1_doc1"]
+    assert index.sync(documents) == 2
+    assert index.search("contrat") == ["D2_doc1"]
+    assert "D1_doc1" not in index
+    assert index.document_frequency("vinci") == 0
+
+
+def test_index_required_terms_and_bytes_content():
+    index = InvertedIndex()
+    index.add_document("a", {"title": "PV", "content": b"audition dossier ABC123"})
+    index.add_document("b", {"title": "Note", "content": "rien"})
+    assert index.search("", required_terms=analyze_text("ABC123")) == ["a"]
+    index.remove_document("a")
+    assert len(index) == 1
+
+
+def test_reference_requires_every_term_and_confirmation():
+    index = InvertedIndex()
+    reference = "Cass. crim. 12 mars 2024"
+    index.add_document("arret", {"title": "Arrêt", "content": f"Vu {reference}, pourvoi rejeté"})
+    index.add_document("facture", {"title": "Facture", "content": "Facture n°12 émise en 2024"})
+    index.add_document("melange", {"title": "Note", "content": "crim 2024 ; cass. le 12 ; mars"})
+    required = analyze_text(reference)
+
+    assert sorted(index.search("", required_terms=required)) == ["arret", "melange"]
+    contents = {"arret": f"Vu {reference}", "melange": "crim 2024 ; cass. le 12 ; mars"}
+    assert index.search("", required_terms=required,
+                        confirm=lambda doc_id: reference.lower() in contents[doc_id].lower()) == ["arret"]
+
+
+def test_near_duplicates_across_dossiers():
+    contrat = "Contrat de sous-traitance entre la société Alpha et la société Beta " * 5
+    index = InvertedIndex()
+    index.sync({
+        "D1_contrat": {"title": "Contrat", "content": contrat},
+        "D2_contrat": {"title": "Contrat (copie)", "content": contrat + " Paraphé."},
+        "D3_facture": {"title": "Facture", "content": "facture de travaux de gros oeuvre"},
+    })
+    assert [doc_id for doc_id, _ in index.near_duplicates("D1_contrat")] == ["D2_contrat"]
+    assert index.duplicate_groups() == [["D1_contrat", "D2_contrat"]]
+
+
+def test_stored_handles_are_fingerprinted_without_reading(tmp_path, monkeypatch):
+    from utils.document_store import get_document_store
+
+    store = get_document_store(str(tmp_path / "store"))
+    handle = store.put(b"Contrat de bail commercial", "bail.txt", dossier="affaire_A", ref="bail.txt")
+    index = InvertedIndex()
+    assert index.add_document(handle.id, handle)
+    assert index.search("bail")
+
+    reads = []
+    read_bytes = store.read_bytes
+    monkeypatch.setattr(store, "read_bytes", lambda digest: reads.append(digest) or read_bytes(digest))
+    for _ in range(5):
+        assert not index.add_document(handle.id, handle)
+    assert reads == []
@@ -0,0 +1,50 @@
+from utils.search_index import InvertedIndex, analyze_text
+from utils.search_ranking import BM25FScorer, contains_reference
+
+
+def _build_index():
+    index = InvertedIndex()
+    index.sync({
+        "a": {"title": "Plainte pour escroquerie", "content": "escroquerie au préjudice de Vinci"},
+        "b": {"title": "Note", "content": "compte rendu de réunion, escroquerie évoquée"},
+        "c": {"title": "Facture", "content": "facture de travaux"},
+    })
+    return index
+
+
+def test_bm25f_prefers_title_matches():
+    index = _build_index()
+    scorer = BM25FScorer(index)
+    terms = analyze_text("escroquerie")
+    score_a = scorer.score(scorer.document_terms("a", None), terms)
+    score_b = scorer.score(scorer.document_terms("b", None), terms)
+    score_c = scorer.score(scorer.document_terms("c", None), terms)
+    assert score_a > score_b > score_c == 0
+
+
+def test_bm25f_scores_documents_outside_index():
+    index = _build_index()
+    scorer = BM25FScorer(index)
+    external = {"id": "azure-1", "title": "Escroquerie", "content": "escroquerie Vinci"}
+    doc_terms = scorer.document_terms("azure-1", external)
+    assert not doc_terms.indexed
+    assert doc_terms.contains_all("content", analyze_text("Vinci"))
+    assert scorer.score(doc_terms, analyze_text("escroquerie vinci")) > 0
+
+
+def test_reference_bonus_needs_the_exact_reference():
+    index = InvertedIndex()
+    documents = {
+        "conclusions": {"title": "Conclusions", "content": "Affaire RG 2024/123 : conclusions en réponse"},
+        "facture": {"title": "Facture", "content": "Facture 123 du RG, exercice 2024"},
+    }
+    for doc_id, doc in documents.items():
+        index.add_document(doc_id, doc)
+    scorer = BM25FScorer(index)
+
+    reference = "rg 2024/123"
+    found = {
+        doc_id: contains_reference(scorer.document_terms(doc_id, doc), doc["content"], reference)
+        for doc_id, doc in documents.items()
+    }
+    assert found == {"conclusions": True, "facture": False}
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "arrêt"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1] and results == ["arrêt"] * 5
+    assert not flight.in_flight("k")
+
+
+def test_errors_are_shared_then_forgotten():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("API indisponible")
+
+    async def scenario():
+        results = await asyncio.gather(*[flight.ado("k", failing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def ok():
+            return 42
+        assert await flight.ado("k", ok) == 42
+
+    asyncio.run(scenario())
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: int("x"))
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "arrêt"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.ado("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.ado("k", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "arrêt"
+        assert leader.cancelled() and calls == [1]
+
+        # Plus personne n'attend : le calcul est abandonné
+        alone = asyncio.create_task(flight.ado("k", compute))
+        await asyncio.sleep(0.01)
+        alone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await alone
+        await asyncio.sleep(0.01)
+        assert not flight.in_flight("k") and calls == [1, 1]
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import safe_serializer
+from utils.safe_serializer import SerializationError
+from utils.sqlite_cache import SQLiteCacheStore
+
+
+def test_safe_serializer_round_trip_and_refuses_foreign_classes():
+    value = {
+        "date": datetime(2024, 3, 1, 14, 30),
+        "delai": timedelta(days=7),
+        "parties": ("SARL Alpha", "M. Dupont"),
+        "tags": {"abs"},
+        "brut": b"\x00\xff",
+        1: [None, 2.5, {"__t__": "non"}],
+    }
+    assert safe_serializer.loads(safe_serializer.dumps(value)) == value
+
+    with pytest.raises(SerializationError):
+        safe_serializer.dumps(object())
+    forged = b'{"__t__":"dataclass","cls":"subprocess:Popen","v":{"args":"ls"}}'
+    with pytest.raises(SerializationError):
+        safe_serializer.loads(forged)
+
+
+def test_store_expiry_and_totals(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    store.set("a", b"x" * 10, "search", ttl=60, metadata='{"n": 1}')
+    store.set("a", b"x" * 30, "search", ttl=60)
+    store.set("b", b"y" * 5, "document", ttl=0.01)
+
+    assert store.totals() == {"search": {"entries": 1, "bytes": 30},
+                              "document": {"entries": 1, "bytes": 5}}
+    time.sleep(0.02)
+    assert store.get("b") is None
+    store.set("c", b"z", "document", ttl=0.01)
+    time.sleep(0.02)
+    assert store.purge_expired() == 1
+    assert store.totals() == {"search": {"entries": 1, "bytes": 30}}
+
+    # Réouverture : les données et les totaux sont persistés
+    store.close()
+    reopened = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    value, metadata, created, expires = reopened.get("a")
+    assert value == b"x" * 30 and metadata is None and expires > created
+
+
+def test_store_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.sqlite_cache.ACCESS_RESOLUTION", 0)
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"), max_bytes=250)
+    for key in "abc":
+        store.set(key, b"." * 100, "general", ttl=60)
+        time.sleep(0.01)
+
+    # "a" est évincée lors de l'écriture de "c" ; "b" est relue
+    assert store.get("a") is None
+    assert store.get("b") is not None
+    time.sleep(0.01)
+    store.set("d", b"." * 100, "general", ttl=60)
+
+    assert store.get("c") is None
+    assert store.get("b") is not None and store.get("d") is not None
+    assert store.totals()["general"] == {"entries": 2, "bytes": 200}
@@ -0,0 +1,57 @@
+from utils import token_budget
+from utils.token_budget import (TRUNCATE, PromptPart, TokenBudgeter, condense,
+                                count_tokens, fit_prompt)
+
+PARAGRAPH = ("Le gérant a consenti des avances à une société dans laquelle il était intéressé. "
+             + "Les flux sont détaillés dans les relevés bancaires. " * 20)
+
+
+def test_count_tokens_is_cached_by_hash(monkeypatch):
+    text = "Abus de biens sociaux : article L. 241-3 du Code de commerce. " * 10
+    first = count_tokens(text)
+    assert first > 0 and count_tokens("") == 0
+
+    monkeypatch.setattr(token_budget, "_get_encoding", lambda: 1 / 0)
+    assert count_tokens(text) == first
+
+
+def test_condense_keeps_every_paragraph_lead():
+    text = "\n\n".join(f"Point {i}. {PARAGRAPH}" for i in range(6))
+    budget = count_tokens(text) // 3
+    summary = condense(text, budget)
+
+    assert count_tokens(summary) <= budget
+    assert all(f"Point {i}." in summary for i in range(6))
+    # Les premiers paragraphes sont rétablis en entier
+    assert summary.startswith(f"Point 0. {PARAGRAPH.strip()}")
+    assert "[…]" in summary
+
+
+def test_budgeter_serves_required_then_priorities():
+    instructions = "Rédige la section en respectant le formalisme."
+    contexte = "\n\n".join([PARAGRAPH] * 40)
+    pieces = "\n\n".join([PARAGRAPH] * 40)
+    budgeter = TokenBudgeter(context_tokens=3000, reserve_tokens=500, margin=0)
+
+    result = budgeter.fit([
+        PromptPart("pieces", pieces, priority=2, strategy=TRUNCATE),
+        PromptPart("instructions", instructions, required=True),
+        PromptPart("contexte", contexte, priority=1),
+    ])
+
+    assert result.budget == 2500
+    assert result.total_tokens <= 2500
+    assert result["instructions"] == instructions
+    assert result.allocations["contexte"][1] > 0
+    assert set(result.trimmed) == {"contexte", "pieces"}
+    assert [part.name for part in result.parts] == ["pieces", "instructions", "contexte"]
+
+
+def test_fit_prompt_respects_provider_window():
+    short = "Résume les faits."
+    assert fit_prompt(short, "Tu es avocat.", "groq") is short
+
+    huge = "\n\n".join([PARAGRAPH] * 2000)
+    fitted = fit_prompt(huge, "Tu es avocat.", "groq", reserve_tokens=4000)
+    assert count_tokens(fitted) <= TokenBudgeter("groq", 4000).budget
+    assert count_tokens(fit_prompt(huge, "", "anthropic")) > count_tokens(fitted)
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from services.universal_search_service import QueryAnalysis, UniversalSearchService
+from utils.search_index import InvertedIndex
+
+
+def make_analysis(query, **fields):
+    return QueryAnalysis(original_query=query, query_lower=query.lower(), timestamp=datetime.now(), **fields)
+
+
+def test_azure_hits_without_content_keep_their_rank():
+    service = UniversalSearchService()
+    titles = ["Arrêt de la cour d'appel", "Ordonnance de non-lieu", "Procès-verbal de perquisition"]
+    unfetched = [
+        {'id': f'az{i}', 'title': title, 'content': '', 'content_fetched': False, 'score': 10, 'metadata': {}}
+        for i, title in enumerate(titles)
+    ]
+    short = {'id': 'az9', 'title': 'Note', 'content': 'Note brève', 'score': 10, 'metadata': {}}
+    analysis = make_analysis("bail", keywords=["bail"])
+
+    results = service._intelligent_scoring(unfetched + [short], analysis, InvertedIndex())
+    assert [r['score'] for r in results[:3]] == [10, 10, 10]
+    assert results[3]['score'] == 5
+
+    # Contenus vides : pas fusionnés comme doublons, pas d'extraits
+    assert len(service._deduplicate_results(results, InvertedIndex())) == 4
+    assert all(r['highlights'] == [] for r in service._extract_highlights(unfetched, analysis))
+
+
+def test_reference_must_appear_as_a_whole():
+    service = UniversalSearchService()
+    reference = "cass. crim. 12 mars 2024"
+    assert service._contains_reference({'title': 'Arrêt', 'content': 'Vu Cass. Crim. 12 mars 2024'}, reference)
+    assert not service._contains_reference({'title': 'Facture', 'content': 'n°12 de mars 2024'}, reference)
+
+
+def test_mapped_documents_are_not_materialized_in_results(tmp_path):
+    from utils.document_store import get_document_store
+    from utils.mapped_text import MappedText
+
+    store = get_document_store(str(tmp_path / "store"))
+    text = "Audition du témoin. " * 200 + "Le bail commercial est résilié."
+    handle = store.put(text.encode("utf-8"), "pv.txt", dossier="affaire_A")
+    store.write_text(handle.digest, text)
+    doc = handle
+    index = InvertedIndex()
+    index.add_document(doc.id, doc)
+
+    service = UniversalSearchService()
+    result = service._check_document_match(doc.id, doc, make_analysis("bail", keywords=["bail"]), None)
+    assert isinstance(result['text'], MappedText)
+    assert result['content'] == text[:service.MAPPED_PREVIEW_CHARS]
+    assert index.is_current(doc.id, result)
+
+    scored = service._intelligent_scoring([result], make_analysis("bail", keywords=["bail"]), index)
+    assert scored[0]['score'] > 0
+    highlights = service._extract_highlights(scored, make_analysis("bail", keywords=["bail"]))
+    assert "bail commercial" in highlights[0]['highlights'][0]
+
+
+def test_corpus_versions_are_bounded(monkeypatch):
+    monkeypatch.setattr(UniversalSearchService, "CACHE_MAX_ENTRIES", 3)
+    service = UniversalSearchService()
+    indexes = [InvertedIndex() for _ in range(10)]
+    keys = [service._make_cache_key("bail", None, index) for index in indexes]
+
+    assert len(service._cache_versions) == 3
+    assert len(set(keys)) == 10
@@ -0,0 +1,242 @@
+# utils/bulk_indexer.py
+"""
+Indexation par lots parallèle avec reprise des échecs partiels
+"""
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Codes HTTP qui justifient une nouvelle tentative
+RETRYABLE_STATUS = {409, 422, 429, 500, 502, 503, 504}
+# Lot trop volumineux : on le coupe en deux
+PAYLOAD_TOO_LARGE = 413
+
+# Résultat d'un document : (clé, succès, code HTTP)
+ItemStatus = Tuple[str, bool, int]
+UploadFunction = Callable[[List[Dict[str, Any]]], Sequence[ItemStatus]]
+
+
+@dataclass
+class BulkIndexStats:
+    """Statistiques d'une indexation par lots"""
+    documents: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retried: int = 0
+    batches: int = 0
+    bytes_sent: int = 0
+    throttled: int = 0
+    elapsed: float = 0.0
+    failed_keys: List[str] = field(default_factory=list)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.succeeded / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': self.documents,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'retried': self.retried,
+            'batches': self.batches,
+            'bytes_sent': self.bytes_sent,
+            'throttled': self.throttled,
+            'elapsed': round(self.elapsed, 3),
+            'docs_per_second': round(self.docs_per_second, 1),
+            'failed_keys': list(self.failed_keys),
+        }
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Code HTTP porté par une exception du SDK (None pour une erreur réseau)"""
+    code = getattr(error, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return code
+
+
+class BulkIndexer:
+    """
+    Envoie des documents par lots en parallèle.
+
+    - au plus ``max_in_flight`` lots en vol, les documents étant lus au fil
+      de l'eau (un générateur n'est jamais matérialisé en entier) ;
+    - taille des lots pilotée par le volume : on vise ``target_bytes`` en
+      réduisant de moitié à chaque limitation (503/429/413) et en
+      augmentant progressivement après les succès ;
+    - sur une réponse partielle (207) ou une limitation, seules les clés en
+      échec sont renvoyées, avec un délai exponentiel et aléatoire.
+
+    ``upload`` reçoit une liste de documents et retourne pour chacun
+    ``(clé, succès, code HTTP)`` ; une exception vaut échec du lot entier.
+    """
+
+    def __init__(self, upload: UploadFunction, key_field: str = 'id',
+                 max_in_flight: int = 4, max_batch_docs: int = 1000,
+                 target_bytes: int = 4 * 1024 * 1024, min_bytes: int = 64 * 1024,
+                 max_bytes: int = 15 * 1024 * 1024, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 sizeof: Optional[Callable[[Dict[str, Any]], int]] = None):
+        self.upload = upload
+        self.key_field = key_field
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_batch_docs = max_batch_docs
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sizeof = sizeof or estimate_payload_size
+        self._target_bytes = min(max(target_bytes, min_bytes), max_bytes)
+        self._lock = threading.Lock()
+        self.stats = BulkIndexStats()
+
+    @property
+    def target_bytes(self) -> int:
+        return self._target_bytes
+
+    def run(self, documents: Iterable[Dict[str, Any]]) -> BulkIndexStats:
+        """
+        Indexe tous les documents.
+
+        Returns:
+            Statistiques (les clés définitivement en échec sont dans ``failed_keys``)
+        """
+        self.stats = BulkIndexStats()
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                thread_name_prefix='bulk-index') as executor:
+            in_flight = set()
+            for batch in self._batches(documents):
+                if len(in_flight) >= self.max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(executor.submit(self._send, batch))
+            for future in in_flight:
+                future.result()
+
+        self.stats.elapsed = time.monotonic() - start
+        return self.stats
+
+    # ---- Constitution des lots ----
+
+    def _batches(self, documents: Iterable[Dict[str, Any]]):
+        batch: List[Tuple[Dict[str, Any], int]] = []
+        batch_bytes = 0
+        for doc in documents:
+            size = self.sizeof(doc)
+            with self._lock:
+                self.stats.documents += 1
+            # La cible est relue à chaque document : elle évolue pendant l'envoi
+            if batch and (batch_bytes + size > self._target_bytes or len(batch) >= self.max_batch_docs):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append((doc, size))
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    # ---- Envoi d'un lot ----
+
+    def _send(self, batch: List[Tuple[Dict[str, Any], int]], attempt: int = 0):
+        while batch:
+            payload = [doc for doc, _ in batch]
+            payload_bytes = sum(size for _, size in batch)
+            with self._lock:
+                self.stats.batches += 1
+                self.stats.bytes_sent += payload_bytes
+
+            try:
+                statuses = self.upload(payload)
+            except Exception as error:
+                code = _status_code(error)
+                if code == PAYLOAD_TOO_LARGE and len(batch) > 1:
+                    self._shrink()
+                    middle = len(batch) // 2
+                    self._send(batch[:middle], attempt)
+                    batch = batch[middle:]
+                    continue
+                if code is not None and code not in RETRYABLE_STATUS:
+                    self._give_up(batch)
+                    return
+                statuses = [(self._key(doc), False, code or 503) for doc in payload]
+
+            by_key = {self._key(doc): (doc, size) for doc, size in batch}
+            retry: List[Tuple[Dict[str, Any], int]] = []
+            succeeded = 0
+            throttled = False
+            for key, ok, code in statuses:
+                if ok:
+                    succeeded += 1
+                    by_key.pop(key, None)
+                elif code in RETRYABLE_STATUS and key in by_key:
+                    retry.append(by_key.pop(key))
+                    throttled = throttled or code in (429, 503)
+                elif key in by_key:
+                    self._give_up([by_key.pop(key)])
+            # Documents sans statut retourné : on les retente
+            retry.extend(by_key.values())
+
+            with self._lock:
+                self.stats.succeeded += succeeded
+            if throttled:
+                self._shrink()
+            elif not retry:
+                self._grow()
+
+            if not retry:
+                return
+            if attempt >= self.max_retries:
+                self._give_up(retry)
+                return
+
+            with self._lock:
+                self.stats.retried += len(retry)
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+            batch = retry
+
+    def _backoff(self, attempt: int) -> float:
+        """Délai exponentiel avec gigue complète"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _shrink(self):
+        with self._lock:
+            self.stats.throttled += 1
+            self._target_bytes = max(self.min_bytes, self._target_bytes // 2)
+
+    def _grow(self):
+        with self._lock:
+            self._target_bytes = min(self.max_bytes, int(self._target_bytes * 1.25))
+
+    def _give_up(self, batch: List[Tuple[Dict[str, Any], int]]):
+        with self._lock:
+            self.stats.failed += len(batch)
+            self.stats.failed_keys.extend(self._key(doc) for doc, _ in batch)
+
+    def _key(self, doc: Dict[str, Any]) -> str:
+        return str(doc.get(self.key_field, ''))
+
+
+def estimate_payload_size(doc: Dict[str, Any]) -> int:
+    """
+    Taille approximative d'un document une fois sérialisé en JSON.
+
+    Évite une sérialisation complète : seules les chaînes sont mesurées.
+    """
+    size = 2
+    for name, value in doc.items():
+        size += len(name) + 4
+        if isinstance(value, str):
+            size += len(value.encode('utf-8', errors='ignore')) if not value.isascii() else len(value)
+        elif isinstance(value, (list, tuple)):
+            size += sum(len(str(item)) + 3 for item in value)
+        else:
+            size += 16
+    return size
@@ -3,18 +3,38 @@
 Système de cache pour optimiser les performances du module juridique
 """
 
+import asyncio
 import hashlib
 import json
+import logging
 import os
-import pickle
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Union
+from functools import partial, wraps
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import streamlit as st
 
+from utils import safe_serializer
+from utils.llm_cache import get_llm_cache
+from utils.lru_cache import LRUCache
+from utils.safe_serializer import SerializationError
+from utils.single_flight import SingleFlight
+from utils.sqlite_cache import SQLiteCacheStore
+
+logger = logging.getLogger(__name__)
+
 # Configuration du cache
 CACHE_DIR = "cache_juridique"
+CACHE_DB_NAME = "cache.db"
+# Volume maximal sur disque (les entrées les moins récemment lues sont évincées)
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Bornes du cache mémoire
+MEMORY_CACHE_ENTRIES = 1000
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
 CACHE_DURATION = {
     'acte_genere': timedelta(hours=24),        # Actes générés : 24h
     'analyse_requete': timedelta(hours=1),      # Analyses : 1h
@@ -25,173 +45,186 @@ CACHE_DURATION = {
     'search': timedelta(hours=2),               # Recherches : 2 heures
     'general': timedelta(hours=6)               # Général : 6 heures
 }
+# Au-delà de leur durée, les entrées restent servies (périmées) pendant au plus
+# cette période, ou leur durée si elle est plus courte, le temps d'être recalculées
+STALE_GRACE = timedelta(days=1)
+REFRESH_WORKERS = 4
 
 
 class CacheJuridique:
-    """Gestionnaire de cache pour les opérations juridiques"""
+    """
+    Gestionnaire de cache pour les opérations juridiques
     
-    def __init__(self, cache_dir: str = CACHE_DIR):
+    Deux niveaux : mémoire (LRU borné en entrées et en octets) puis disque
+    (fichier SQLite unique, voir utils.sqlite_cache). Les valeurs sont
+    sérialisées en JSON balisé (utils.safe_serializer) ; celles qui ne s'y
+    prêtent pas restent en mémoire seulement.
+    """
+    
+    def __init__(self, cache_dir: str = CACHE_DIR, max_disk_bytes: int = CACHE_MAX_BYTES,
+                 memory_entries: int = MEMORY_CACHE_ENTRIES, memory_bytes: int = MEMORY_CACHE_BYTES):
         self.cache_dir = cache_dir
-        self._ensure_cache_dir()
-        self.memory_cache = {}  # Cache en mémoire pour la session
+        self.store = SQLiteCacheStore(os.path.join(cache_dir, CACHE_DB_NAME), max_bytes=max_disk_bytes)
+        self.memory_cache = LRUCache(max_entries=memory_entries, max_bytes=memory_bytes)
         self.stats = {
             'hits': 0,
+            'stale_hits': 0,
             'misses': 0,
             'writes': 0,
             'errors': 0
         }
     
-    def _ensure_cache_dir(self):
-        """Crée le répertoire de cache s'il n'existe pas"""
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-    
     def _get_cache_key(self, key: str, cache_type: str) -> str:
         """Génère une clé de cache unique"""
-        # Hasher la clé pour éviter les problèmes de noms de fichiers
+        # Hasher la clé pour borner sa taille
         key_data = f"{cache_type}:{key}"
         key_hash = hashlib.md5(key_data.encode()).hexdigest()
         return f"{cache_type}_{key_hash}"
     
-    def _get_cache_path(self, cache_key: str) -> str:
-        """Retourne le chemin complet du fichier de cache"""
-        return os.path.join(self.cache_dir, f"{cache_key}.cache")
+    def _ttl(self, cache_type: str) -> float:
+        return CACHE_DURATION.get(cache_type, timedelta(hours=1)).total_seconds()
+    
+    def _retention(self, cache_type: str) -> float:
+        """Durée de conservation : durée de validité + période où l'entrée peut être servie périmée"""
+        ttl = self._ttl(cache_type)
+        return ttl + min(ttl, STALE_GRACE.total_seconds())
     
     def get(self, key: str, cache_type: str = 'general') -> Optional[Any]:
-        """Récupère une valeur du cache"""
+        """Récupère une valeur du cache (None si absente ou périmée)"""
+        value, fresh = self.get_entry(key, cache_type)
+        return value if fresh else None
+    
+    def get_entry(self, key: str, cache_type: str = 'general',
+                  allow_stale: bool = False) -> Tuple[Optional[Any], bool]:
+        """
+        Récupère une valeur et sa fraîcheur : (valeur, True) si elle est
+        valide, (valeur, False) si elle est périmée mais encore conservée et
+        ``allow_stale`` est demandé, (None, False) sinon.
+        """
         try:
-            # Vérifier d'abord le cache mémoire
-            memory_key = f"{cache_type}:{key}"
-            if memory_key in self.memory_cache:
-                entry = self.memory_cache[memory_key]
-                if self._is_valid_entry(entry, cache_type):
+            entry = self._lookup(key, cache_type)
+            if entry is not None:
+                if time.time() - entry['created'] < self._ttl(cache_type):
                     self.stats['hits'] += 1
-                    return entry['data']
-            
-            # Sinon, vérifier le cache disque
-            cache_key = self._get_cache_key(key, cache_type)
-            cache_path = self._get_cache_path(cache_key)
-            
-            if os.path.exists(cache_path):
-                try:
-                    with open(cache_path, 'rb') as f:
-                        entry = pickle.load(f)
-                    
-                    if self._is_valid_entry(entry, cache_type):
-                        # Mettre aussi en cache mémoire
-                        self.memory_cache[memory_key] = entry
-                        self.stats['hits'] += 1
-                        return entry['data']
-                    else:
-                        # Supprimer l'entrée expirée
-                        os.remove(cache_path)
-                        
-                except Exception as e:
-                    self.stats['errors'] += 1
-                    print(f"Erreur lecture cache: {e}")
+                    return entry['data'], True
+                if allow_stale:
+                    self.stats['stale_hits'] += 1
+                    return entry['data'], False
             
             self.stats['misses'] += 1
-            return None
+            return None, False
             
         except Exception as e:
             self.stats['errors'] += 1
-            print(f"Erreur dans get: {e}")
+            logger.error(f"Erreur dans get: {e}")
+            return None, False
+    
+    def _lookup(self, key: str, cache_type: str) -> Optional[Dict[str, Any]]:
+        # Vérifier d'abord le cache mémoire
+        memory_key = f"{cache_type}:{key}"
+        entry = self.memory_cache.get(memory_key)
+        if entry is not None:
+            return entry
+        
+        # Sinon, vérifier le cache disque (les entrées échues y sont supprimées)
+        row = self.store.get(self._get_cache_key(key, cache_type))
+        if row is None:
             return None
+        value, metadata, created, expires = row
+        try:
+            entry = {
+                'data': safe_serializer.loads(value),
+                'created': created,
+                'timestamp': datetime.fromtimestamp(created).isoformat(),
+                'type': cache_type,
+                'metadata': json.loads(metadata) if metadata else {}
+            }
+        except (SerializationError, ValueError) as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Erreur lecture cache: {e}")
+            return None
+        
+        # Mettre aussi en cache mémoire
+        self.memory_cache.set(memory_key, entry, ttl=expires - time.time())
+        return entry
     
     def set(self, key: str, data: Any, cache_type: str = 'general', metadata: Dict = None):
         """Stocke une valeur dans le cache"""
         try:
+            now = time.time()
             entry = {
                 'data': data,
-                'timestamp': datetime.now().isoformat(),
+                'created': now,
+                'timestamp': datetime.fromtimestamp(now).isoformat(),
                 'type': cache_type,
                 'metadata': metadata or {}
             }
             
             # Stocker en cache mémoire
             memory_key = f"{cache_type}:{key}"
-            self.memory_cache[memory_key] = entry
+            self.memory_cache.set(memory_key, entry, ttl=self._retention(cache_type))
             
             # Stocker sur disque
-            cache_key = self._get_cache_key(key, cache_type)
-            cache_path = self._get_cache_path(cache_key)
-            
             try:
-                with open(cache_path, 'wb') as f:
-                    pickle.dump(entry, f)
+                self.store.set(
+                    self._get_cache_key(key, cache_type),
+                    safe_serializer.dumps(data),
+                    cache_type,
+                    self._retention(cache_type),
+                    json.dumps(metadata or {}, ensure_ascii=False, default=str)
+                )
                 self.stats['writes'] += 1
-            except Exception as e:
+            except SerializationError as e:
+                logger.debug(f"Valeur conservée en mémoire seulement ({cache_type}): {e}")
+            except sqlite3.Error as e:
                 self.stats['errors'] += 1
-                print(f"Erreur écriture cache: {e}")
+                logger.error(f"Erreur écriture cache: {e}")
                 
         except Exception as e:
             self.stats['errors'] += 1
-            print(f"Erreur dans set: {e}")
-    
-    def _is_valid_entry(self, entry: Dict, cache_type: str) -> bool:
-        """Vérifie si une entrée de cache est encore valide"""
-        if 'timestamp' not in entry:
-            return False
-        
-        try:
-            timestamp = datetime.fromisoformat(entry['timestamp'])
-            duration = CACHE_DURATION.get(cache_type, timedelta(hours=1))
-            return datetime.now() - timestamp < duration
-        except:
-            return False
+            logger.error(f"Erreur dans set: {e}")
     
     def clear(self, cache_type: Optional[str] = None):
         """Efface le cache (tout ou un type spécifique)"""
         try:
             # Effacer le cache mémoire
             if cache_type:
-                keys_to_remove = [k for k in self.memory_cache.keys() 
-                                if k.startswith(f"{cache_type}:")]
-                for k in keys_to_remove:
-                    del self.memory_cache[k]
+                self.memory_cache.remove_where(lambda k: k.startswith(f"{cache_type}:"))
             else:
                 self.memory_cache.clear()
             
             # Effacer le cache disque
-            if os.path.exists(self.cache_dir):
-                for filename in os.listdir(self.cache_dir):
-                    if cache_type and not filename.startswith(f"{cache_type}_"):
-                        continue
-                    
-                    file_path = os.path.join(self.cache_dir, filename)
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
+            self.store.clear(cache_type)
+            self._remove_legacy_files(cache_type)
                         
         except Exception as e:
-            print(f"Erreur dans clear: {e}")
+            logger.error(f"Erreur dans clear: {e}")
+    
+    def _remove_legacy_files(self, cache_type: Optional[str] = None):
+        """Supprime les anciens fichiers pickle (un par clé), jamais relus"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.cache'):
+                continue
+            if cache_type and not filename.startswith(f"{cache_type}_"):
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError:
+                pass
     
     def get_stats(self) -> Dict[str, Any]:
-        """Retourne des statistiques sur le cache"""
+        """Retourne des statistiques sur le cache (compteurs tenus par la base, sans parcours)"""
+        totals = self.store.totals()
         stats = {
             'memory_entries': len(self.memory_cache),
-            'disk_entries': 0,
-            'total_size': 0,
-            'by_type': {},
+            'disk_entries': sum(t['entries'] for t in totals.values()),
+            'total_size': sum(t['bytes'] for t in totals.values()),
+            'by_type': {cache_type: t['entries'] for cache_type, t in totals.items()},
             'performance': self.stats.copy()
         }
         
-        if os.path.exists(self.cache_dir):
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
-                try:
-                    stats['disk_entries'] += 1
-                    stats['total_size'] += os.path.getsize(file_path)
-                    
-                    # Compter par type
-                    cache_type = filename.split('_')[0]
-                    if cache_type not in stats['by_type']:
-                        stats['by_type'][cache_type] = 0
-                    stats['by_type'][cache_type] += 1
-                except:
-                    pass
-        
         # Calculer le taux de réussite
         total_requests = stats['performance']['hits'] + stats['performance']['misses']
         if total_requests > 0:
@@ -214,33 +247,7 @@ class CacheJuridique:
     
     def cleanup_expired(self):
         """Nettoie les entrées expirées du cache"""
-        if not os.path.exists(self.cache_dir):
-            return
-        
-        cleaned = 0
-        for filename in os.listdir(self.cache_dir):
-            file_path = os.path.join(self.cache_dir, filename)
-            
-            try:
-                with open(file_path, 'rb') as f:
-                    entry = pickle.load(f)
-                
-                # Déterminer le type de cache
-                cache_type = filename.split('_')[0]
-                
-                if not self._is_valid_entry(entry, cache_type):
-                    os.remove(file_path)
-                    cleaned += 1
-                    
-            except:
-                # Supprimer les fichiers corrompus
-                try:
-                    os.remove(file_path)
-                    cleaned += 1
-                except:
-                    pass
-        
-        return cleaned
+        return self.store.purge_expired()
 
 
 # Instance globale du cache
@@ -256,13 +263,132 @@ def get_cache() -> CacheJuridique:
 
 # ========================= DÉCORATEURS DE CACHE =========================
 
-def cache_result(cache_type: str = 'general', key_generator: Callable = None):
+# Calculs en cours, partagés par les sessions (threads) et les tâches asyncio
+_flights = SingleFlight()
+# Rafraîchissements des entrées périmées servies aux appelants
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def _default_cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Clé par défaut basée sur le nom de la fonction et les arguments"""
+    key_parts = [func.__name__]
+    key_parts.extend(str(arg) for arg in args if not callable(arg))
+    key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
+    return "|".join(key_parts)
+
+
+def _compute(cache: CacheJuridique, cache_key: str, cache_type: str, func: Callable,
+             args: tuple, kwargs: dict, recheck: bool = True) -> Any:
+    """Calcule et met en cache (sauf None), après avoir revérifié le cache si demandé"""
+    if recheck:
+        # Un calcul concurrent vient peut-être de se terminer
+        cached = cache.get(cache_key, cache_type)
+        if cached is not None:
+            return cached
+    result = func(*args, **kwargs)
+    if result is not None:
+        cache.set(cache_key, result, cache_type)
+    return result
+
+
+async def _acompute(cache: CacheJuridique, cache_key: str, cache_type: str, func: Callable,
+                    args: tuple, kwargs: dict, recheck: bool = True) -> Any:
+    if recheck:
+        cached = cache.get(cache_key, cache_type)
+        if cached is not None:
+            return cached
+    result = await func(*args, **kwargs)
+    if result is not None:
+        cache.set(cache_key, result, cache_type)
+    return result
+
+
+def _log_refresh_failure(flight_key: Tuple[str, str], outcome: Any):
+    if outcome.cancelled():
+        return
+    error = outcome.exception()
+    if error is not None:
+        logger.warning(f"Rafraîchissement du cache {flight_key[0]} impossible: {error}")
+
+
+def _refresh(cache: CacheJuridique, cache_key: str, cache_type: str, func: Callable,
+             args: tuple, kwargs: dict):
+    """Recalcule une entrée périmée en arrière-plan (une seule fois à la fois par clé)"""
+    flight_key = (cache_type, cache_key)
+    if _flights.in_flight(flight_key):
+        return
+    future = _refresh_executor.submit(
+        _flights.do, flight_key, partial(_compute, cache, cache_key, cache_type, func, args, kwargs, False)
+    )
+    future.add_done_callback(partial(_log_refresh_failure, flight_key))
+
+
+def _arefresh(cache: CacheJuridique, cache_key: str, cache_type: str, func: Callable,
+              args: tuple, kwargs: dict):
+    flight_key = (cache_type, cache_key)
+    if _flights.in_flight(flight_key):
+        return
+    task = asyncio.ensure_future(_flights.ado(
+        flight_key, partial(_acompute, cache, cache_key, cache_type, func, args, kwargs, False)
+    ))
+    # Référence conservée jusqu'à la fin de la tâche
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+    task.add_done_callback(partial(_log_refresh_failure, flight_key))
+
+
+def _cached_call(func: Callable, cache_type: str, cache_key: str, stale_while_revalidate: bool,
+                 args: tuple, kwargs: dict, on_hit: Optional[Callable] = None,
+                 around_compute: Optional[Callable] = None):
+    """
+    Appel synchrone ou asynchrone (selon ``func``) servi par le cache.
+
+    Une entrée périmée est servie immédiatement pendant qu'elle est
+    recalculée en arrière-plan ; sur absence, un seul calcul par clé est
+    lancé et les appels concurrents en attendent le résultat.
+    """
+    cache = get_cache()
+    flight_key = (cache_type, cache_key)
+    value, fresh = cache.get_entry(cache_key, cache_type, allow_stale=stale_while_revalidate)
+    is_async = asyncio.iscoroutinefunction(func)
+
+    if value is not None:
+        if not fresh:
+            (_arefresh if is_async else _refresh)(cache, cache_key, cache_type, func, args, kwargs)
+        if on_hit:
+            on_hit()
+        if is_async:
+            async def cached():
+                return value
+            return cached()
+        return value
+
+    if is_async:
+        async def compute():
+            with around_compute() if around_compute else nullcontext():
+                return await _flights.ado(
+                    flight_key, partial(_acompute, cache, cache_key, cache_type, func, args, kwargs)
+                )
+        return compute()
+
+    with around_compute() if around_compute else nullcontext():
+        return _flights.do(flight_key, partial(_compute, cache, cache_key, cache_type, func, args, kwargs))
+
+
+def cache_result(cache_type: str = 'general', key_generator: Callable = None,
+                 stale_while_revalidate: bool = True):
     """
     Décorateur pour mettre en cache le résultat d'une fonction
     
+    Fonctionne aussi sur les coroutines. Les appels concurrents pour une
+    même clé ne déclenchent qu'un calcul ; une entrée périmée (voir
+    STALE_GRACE) est servie pendant son recalcul en arrière-plan.
+    
     Args:
         cache_type: Type de cache à utiliser
         key_generator: Fonction pour générer la clé de cache
+        stale_while_revalidate: Servir les entrées périmées pendant leur recalcul
     """
     def decorator(func):
         @wraps(func)
@@ -271,61 +397,47 @@ def cache_result(cache_type: str = 'general', key_generator: Callable = None):
             if key_generator:
                 cache_key = key_generator(*args, **kwargs)
             else:
-                # Clé par défaut basée sur les arguments
-                key_parts = [func.__name__]
-                key_parts.extend(str(arg) for arg in args if not callable(arg))
-                key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
-                cache_key = "|".join(key_parts)
+                cache_key = _default_cache_key(func, args, kwargs)
             
-            # Vérifier le cache
-            cache = get_cache()
-            cached_result = cache.get(cache_key, cache_type)
-            
-            if cached_result is not None:
-                return cached_result
-            
-            # Sinon, exécuter la fonction
-            result = func(*args, **kwargs)
-            
-            # Mettre en cache le résultat
-            cache.set(cache_key, result, cache_type)
-            
-            return result
+            return _cached_call(func, cache_type, cache_key, stale_while_revalidate, args, kwargs)
         
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await wrapper(*args, **kwargs)
+            return async_wrapper
         return wrapper
     return decorator
 
 
-def cache_streamlit(cache_type: str = 'general', show_spinner: bool = True):
-    """Décorateur spécifique pour Streamlit avec gestion du spinner"""
+def cache_streamlit(cache_type: str = 'general', show_spinner: bool = True,
+                    stale_while_revalidate: bool = True):
+    """
+    Décorateur spécifique pour Streamlit avec gestion du spinner
+    
+    Mêmes garanties que cache_result. Le recalcul d'une entrée périmée
+    s'exécute hors de la session : la fonction ne doit pas y dépendre de
+    l'affichage Streamlit.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Générer la clé
-            key_parts = [func.__name__]
-            key_parts.extend(str(arg) for arg in args if not callable(arg))
-            cache_key = "|".join(key_parts)
-            
-            # Vérifier le cache
-            cache = get_cache()
-            cached_result = cache.get(cache_key, cache_type)
-            
-            if cached_result is not None:
-                st.info("📦 Résultat chargé depuis le cache")
-                return cached_result
+            cache_key = _default_cache_key(func, args, kwargs)
             
             # Exécuter avec spinner si demandé
-            if show_spinner:
-                with st.spinner(f"⏳ Génération en cours..."):
-                    result = func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
-            
-            # Mettre en cache
-            cache.set(cache_key, result, cache_type)
-            
-            return result
+            spinner = (lambda: st.spinner("⏳ Génération en cours...")) if show_spinner else None
+            return _cached_call(
+                func, cache_type, cache_key, stale_while_revalidate, args, kwargs,
+                on_hit=lambda: st.info("📦 Résultat chargé depuis le cache"),
+                around_compute=spinner
+            )
         
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await wrapper(*args, **kwargs)
+            return async_wrapper
         return wrapper
     return decorator
 
@@ -371,32 +483,15 @@ class CacheActesJuridiques:
         """Récupère les actes récents depuis le cache"""
         recent = []
         
-        if os.path.exists(self.cache.cache_dir):
-            files = []
-            
-            # Lister tous les fichiers d'actes
-            for filename in os.listdir(self.cache.cache_dir):
-                if filename.startswith('acte_genere_'):
-                    file_path = os.path.join(self.cache.cache_dir, filename)
-                    files.append((file_path, os.path.getmtime(file_path)))
-            
-            # Trier par date de modification
-            files.sort(key=lambda x: x[1], reverse=True)
-            
-            # Charger les plus récents
-            for file_path, mtime in files[:limit]:
-                try:
-                    with open(file_path, 'rb') as f:
-                        entry = pickle.load(f)
-                    
-                    if self.cache._is_valid_entry(entry, 'acte_genere'):
-                        recent.append({
-                            'acte': entry['data'],
-                            'date': datetime.fromtimestamp(mtime),
-                            'metadata': entry.get('metadata', {})
-                        })
-                except:
-                    pass
+        for value, metadata, created in self.cache.store.recent('acte_genere', limit):
+            try:
+                recent.append({
+                    'acte': safe_serializer.loads(value),
+                    'date': datetime.fromtimestamp(created),
+                    'metadata': json.loads(metadata) if metadata else {}
+                })
+            except (SerializationError, ValueError):
+                pass
         
         return recent
 
@@ -478,4 +573,22 @@ def show_cache_management():
         st.metric("Écritures", perf['writes'])
     
     with col4:
-        st.metric("Erreurs", perf['errors'])
\ No newline at end of file
+        st.metric("Erreurs", perf['errors'])
+    
+    # Réponses des LLM
+    st.subheader("🤖 Réponses IA")
+    
+    llm_stats = get_llm_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Taux de réussite", f"{llm_stats['hit_rate']:.1%}")
+    
+    with col2:
+        st.metric("Hits mémoire / disque", f"{llm_stats['memory_hits']} / {llm_stats['disk_hits']}")
+    
+    with col3:
+        st.metric("Appels hors cache", llm_stats['bypassed'])
+    
+    with col4:
+        st.metric("Tokens économisés", f"{llm_stats['tokens_saved']:,}".replace(',', ' '))
\ No newline at end of file
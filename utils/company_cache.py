@@ -0,0 +1,216 @@
+# utils/company_cache.py
+"""
+Cache partagé des informations d'entreprises (Pappers, Societe.com).
+
+Un fichier SQLite unique (mode WAL) remplace les fichiers JSON réécrits
+intégralement à chaque ajout : une écriture n'insère qu'une ligne. Les
+entrées sont retrouvées par clé, par SIREN ou par nom normalisé (forme
+juridique, accents et ponctuation ignorés), expirent après ``ttl`` et sont
+compactées périodiquement (purge des entrées échues et point de contrôle
+du journal).
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from utils import safe_serializer
+from utils.lru_cache import LRUCache
+from utils.safe_serializer import SerializationError
+
+logger = logging.getLogger(__name__)
+
+COMPANY_CACHE_PATH = os.path.join("cache_juridique", "companies.db")
+COMPANY_CACHE_TTL = timedelta(days=7)
+# Compactage automatique toutes les N écritures
+COMPACT_EVERY = 500
+MEMORY_ENTRIES = 1000
+
+LEGAL_FORMS = (
+    'sa', 'sas', 'sasu', 'sarl', 'eurl', 'sci', 'snc', 'scs', 'sca', 'scop', 'selarl', 'selas',
+    'gie', 'ei', 'eirl', 'societe anonyme', 'societe par actions simplifiee',
+    'societe a responsabilite limitee', 'societe civile immobiliere',
+)
+_LEGAL_FORMS_PATTERN = re.compile(
+    r'\b(' + '|'.join(sorted((re.escape(f) for f in LEGAL_FORMS), key=len, reverse=True)) + r')\b'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    siren TEXT,
+    name TEXT,
+    value BLOB NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS companies_siren ON companies (kind, siren);
+CREATE INDEX IF NOT EXISTS companies_name ON companies (kind, name);
+CREATE INDEX IF NOT EXISTS companies_expires ON companies (expires);
+"""
+
+
+def normalize_company_name(name: str) -> str:
+    """Nom comparable : sans accents, casse, ponctuation ni forme juridique"""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    # Sigles pointés (S.A.S. -> sas) avant de retirer la ponctuation
+    text = re.sub(r'(?<=\b\w)\.', '', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = _LEGAL_FORMS_PATTERN.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def normalize_siren(siren: Optional[str]) -> Optional[str]:
+    """SIREN sur 9 chiffres (les 9 premiers d'un SIRET), ou None"""
+    digits = re.sub(r'\D', '', str(siren or ''))
+    return digits[:9] if len(digits) >= 9 else None
+
+
+class CompanyCache:
+    """
+    Entrées (valeurs sérialisées sans pickle) classées par ``kind`` pour
+    que chaque service retrouve ses propres formats.
+    """
+
+    def __init__(self, path: Optional[str] = COMPANY_CACHE_PATH,
+                 ttl: timedelta = COMPANY_CACHE_TTL, compact_every: int = COMPACT_EVERY):
+        self.path = path or ':memory:'
+        self.ttl = ttl.total_seconds()
+        self.compact_every = compact_every
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._memory = LRUCache(max_entries=MEMORY_ENTRIES, ttl=self.ttl)
+        self._writes_since_compact = 0
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'compactions': 0, 'errors': 0}
+
+    # ---- Lecture ----
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valeur associée à la clé, ou None si absente ou expirée"""
+        value = self._memory.get(key)
+        if value is not None:
+            self.stats['hits'] += 1
+            return value
+        return self._fetch_one("key = ?", (key,))
+
+    def get_by_siren(self, siren: str, kind: str) -> Optional[Any]:
+        """Entrée la plus récente de ce type pour un SIREN (ou SIRET)"""
+        siren = normalize_siren(siren)
+        if not siren:
+            return None
+        return self._fetch_one("kind = ? AND siren = ?", (kind, siren))
+
+    def get_by_name(self, name: str, kind: str) -> Optional[Any]:
+        """Entrée la plus récente de ce type pour un nom d'entreprise (normalisé)"""
+        name = normalize_company_name(name)
+        if not name:
+            return None
+        return self._fetch_one("kind = ? AND name = ?", (kind, name))
+
+    def _fetch_one(self, where: str, params: tuple) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT key, value, expires FROM companies WHERE {where} AND expires > ? "
+                f"ORDER BY created DESC LIMIT 1",
+                params + (time.time(),)
+            ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        key, data, expires = row
+        try:
+            value = safe_serializer.loads(data)
+        except SerializationError as e:
+            logger.warning(f"Entrée du cache entreprises illisible ({key}): {e}")
+            self.stats['errors'] += 1
+            return None
+        self._memory.set(key, value, ttl=expires - time.time())
+        self.stats['hits'] += 1
+        return value
+
+    # ---- Écriture ----
+
+    def set(self, key: str, value: Any, kind: str, siren: Optional[str] = None,
+            name: Optional[str] = None, created: Optional[float] = None):
+        """Ajoute (ou remplace) une entrée : une seule ligne écrite"""
+        created = created or time.time()
+        try:
+            data = safe_serializer.dumps(value)
+        except SerializationError as e:
+            logger.warning(f"Entrée du cache entreprises non sérialisable ({key}): {e}")
+            self.stats['errors'] += 1
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO companies (key, kind, siren, name, value, created, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, normalize_siren(siren), normalize_company_name(name) or None,
+                 sqlite3.Binary(data), created, created + self.ttl)
+            )
+            self._writes_since_compact += 1
+            compact = self._writes_since_compact >= self.compact_every
+        remaining = created + self.ttl - time.time()
+        if remaining > 0:
+            self._memory.set(key, value, ttl=remaining)
+        else:
+            self._memory.pop(key)
+        self.stats['writes'] += 1
+        if compact:
+            self.compact()
+
+    def delete(self, key: str):
+        self._memory.pop(key)
+        with self._lock:
+            self._conn.execute("DELETE FROM companies WHERE key = ?", (key,))
+
+    # ---- Maintenance ----
+
+    def compact(self) -> int:
+        """Supprime les entrées échues et replie le journal dans la base"""
+        now = time.time()
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM companies WHERE expires <= ?", (now,)).rowcount
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._writes_since_compact = 0
+        self._memory.purge_expired()
+        self.stats['compactions'] += 1
+        if removed:
+            logger.info(f"Cache entreprises compacté : {removed} entrée(s) expirée(s) supprimée(s)")
+        return removed
+
+    def clear(self):
+        self._memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM companies")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'entries': self.count(), 'memory_entries': len(self._memory)}
+
+
+_company_cache: Optional[CompanyCache] = None
+_company_cache_lock = threading.Lock()
+
+
+def get_company_cache() -> CompanyCache:
+    """Cache entreprises unique du processus (CacheSocietes et CompanyInfoManager)"""
+    global _company_cache
+    with _company_cache_lock:
+        if _company_cache is None:
+            _company_cache = CompanyCache(os.getenv('COMPANY_CACHE_PATH', COMPANY_CACHE_PATH))
+        return _company_cache
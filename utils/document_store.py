@@ -0,0 +1,439 @@
+# utils/document_store.py
+"""
+Stockage des documents importés par contenu.
+
+Chaque fichier est rangé une seule fois sur disque sous l'empreinte SHA-256
+de son contenu normalisé, avec son texte extrait. Les dossiers n'en
+gardent que des références (comptées) : une même pièce versée dans
+plusieurs dossiers n'est stockée, analysée et indexée qu'une fois, et les
+sessions ne conservent que des poignées légères (DocumentHandle) dont le
+texte est lu à la demande, par tranches, dans le fichier projeté en
+mémoire (MappedText).
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from utils.lru_cache import LRUCache
+from utils.mapped_text import INDEX_SUFFIX, MappedText
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_STORE_DIR = "document_store"
+# Dossier de rattachement des imports sans dossier précisé
+IMPORT_DOSSIER = "imports"
+# Formats texte dont les fins de ligne et le BOM sont normalisés avant hachage
+TEXT_EXTENSIONS = ('.txt', '.csv', '.json', '.md', '.xml', '.html')
+# Textes extraits gardés en mémoire
+TEXT_CACHE_BYTES = 64 * 1024 * 1024
+# Textes projetés gardés ouverts (un descripteur de fichier chacun)
+MAPPED_TEXTS = 256
+# Un contenu sans référence n'est supprimé qu'après ce délai (s)
+GC_GRACE = 3600
+# Références du dossier d'import partagé abandonnées par des sessions terminées (s)
+IMPORT_REF_TTL = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mime_type TEXT,
+    has_text INTEGER NOT NULL DEFAULT 0,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    -- Moment où le contenu a perdu sa dernière référence (NULL s'il est référencé)
+    orphaned_at REAL
+);
+CREATE INDEX IF NOT EXISTS blobs_refcount ON blobs (refcount);
+
+CREATE TABLE IF NOT EXISTS refs (
+    dossier TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest),
+    added REAL NOT NULL,
+    PRIMARY KEY (dossier, ref)
+);
+CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest);
+CREATE INDEX IF NOT EXISTS refs_added ON refs (dossier, added);
+
+CREATE TRIGGER IF NOT EXISTS refs_insert AFTER INSERT ON refs BEGIN
+    UPDATE blobs SET refcount = refcount + 1, orphaned_at = NULL WHERE digest = NEW.digest;
+END;
+
+CREATE TRIGGER IF NOT EXISTS refs_delete AFTER DELETE ON refs BEGIN
+    UPDATE blobs SET refcount = refcount - 1,
+        orphaned_at = CASE WHEN refcount <= 1 THEN (julianday('now') - 2440587.5) * 86400.0 ELSE orphaned_at END
+    WHERE digest = OLD.digest;
+END;
+"""
+
+# Index créé avant les références uniques par import (clé (dossier, nom))
+_MIGRATE_V1 = """
+ALTER TABLE refs RENAME TO refs_v1;
+DROP TRIGGER IF EXISTS refs_insert;
+DROP TRIGGER IF EXISTS refs_delete;
+DROP INDEX IF EXISTS refs_digest;
+ALTER TABLE blobs ADD COLUMN orphaned_at REAL;
+"""
+
+_MIGRATE_V1_DATA = """
+INSERT INTO refs (dossier, ref, name, digest, added) SELECT dossier, name, name, digest, added FROM refs_v1;
+DROP TABLE refs_v1;
+UPDATE blobs SET refcount = (SELECT COUNT(*) FROM refs WHERE refs.digest = blobs.digest);
+UPDATE blobs SET orphaned_at = created WHERE refcount = 0;
+"""
+
+
+def normalize_bytes(data: bytes, name: Optional[str] = None) -> bytes:
+    """Contenu servant au hachage : BOM et fins de ligne normalisés pour les formats texte"""
+    if name and Path(name).suffix.lower() in TEXT_EXTENSIONS:
+        if data.startswith(b'\xef\xbb\xbf'):
+            data = data[3:]
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return data
+
+
+def content_digest(data: bytes, name: Optional[str] = None) -> str:
+    return hashlib.sha256(normalize_bytes(data, name)).hexdigest()
+
+
+@dataclass
+class DocumentHandle:
+    """
+    Poignée d'un document stocké : métadonnées seulement, le texte
+    (``text`` par tranches, ``content`` en entier) et les octets (``data``)
+    sont lus dans le stockage.
+
+    Expose les attributs lus sur les documents de session (title,
+    content, source, metadata).
+    """
+    digest: str
+    name: str
+    size: int
+    dossier: Optional[str] = None
+    mime_type: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.now)
+    store_root: str = DOCUMENT_STORE_DIR
+    # Identifiant de la référence dans le dossier (unique par import)
+    ref: Optional[str] = None
+
+    @property
+    def id(self) -> str:
+        return f"{self.dossier}/{self.name}" if self.dossier else self.name
+
+    @property
+    def title(self) -> str:
+        return Path(self.name).name
+
+    @property
+    def source(self) -> str:
+        return self.dossier or self.name
+
+    @property
+    def file_size(self) -> int:
+        return self.size
+
+    @property
+    def store(self) -> 'DocumentStore':
+        return get_document_store(self.store_root)
+
+    @property
+    def data(self) -> bytes:
+        return self.store.read_bytes(self.digest)
+
+    def release(self) -> bool:
+        """Retire la référence de ce document (le contenu part au prochain ramassage s'il n'en a plus)"""
+        if self.dossier is None or self.ref is None:
+            return False
+        return self.store.release(self.dossier, self.ref)
+
+    @property
+    def text(self) -> Union[MappedText, str]:
+        """Texte extrait projeté en mémoire, ou à défaut le contenu décodé"""
+        mapped = self.store.mapped_text(self.digest)
+        return mapped if mapped is not None else self.content
+
+    @property
+    def content(self) -> str:
+        """Texte extrait, ou à défaut le contenu décodé"""
+        text = self.store.read_text(self.digest)
+        if text is None:
+            text = self.data.decode('utf-8', errors='ignore')
+        return text
+
+
+class DocumentStore:
+    """
+    Fichiers rangés par empreinte (``objects/ab/abcd…`` et ``.txt`` pour le
+    texte extrait) et index SQLite des contenus et des références par
+    dossier ; le nombre de références est tenu à jour par déclencheurs.
+    """
+
+    def __init__(self, root: str = DOCUMENT_STORE_DIR, text_cache_bytes: int = TEXT_CACHE_BYTES):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / 'index.db'), timeout=5,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(refs)")]
+        migrate = bool(columns) and 'ref' not in columns
+        if migrate:
+            self._conn.executescript(_MIGRATE_V1)
+        self._conn.executescript(_SCHEMA)
+        if migrate:
+            self._conn.executescript(_MIGRATE_V1_DATA)
+        self._texts = LRUCache(max_entries=1024, max_bytes=text_cache_bytes)
+        self._mapped = LRUCache(max_entries=MAPPED_TEXTS)
+        self._extractions = SingleFlight()
+
+    # ---- Fichiers ----
+
+    def _path(self, digest: str, suffix: str = '') -> Path:
+        return self.objects / digest[:2] / f"{digest}{suffix}"
+
+    def _write_file(self, path: Path, data: bytes):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.blob-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # ---- Contenus ----
+
+    def put(self, data: bytes, name: str, dossier: Optional[str] = None,
+            mime_type: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
+            ref: Optional[str] = None) -> DocumentHandle:
+        """
+        Range un contenu (s'il est nouveau) et, si ``dossier`` est donné,
+        l'y référence. Chaque import reçoit sa propre référence : deux
+        fichiers homonymes ne se remplacent pas. Un ``ref`` explicite
+        remplace la référence existante de même identifiant.
+        """
+        digest = content_digest(data, name)
+        path = self._path(digest)
+        if not path.exists():
+            self._write_file(path, data)
+        if dossier is not None and ref is None:
+            ref = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, name, size, mime_type, created, orphaned_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, name, len(data), mime_type, now, now)
+                )
+                if dossier is not None:
+                    # DELETE puis INSERT pour que les déclencheurs tiennent les compteurs
+                    self._conn.execute("DELETE FROM refs WHERE dossier = ? AND ref = ?", (dossier, ref))
+                    self._conn.execute(
+                        "INSERT INTO refs (dossier, ref, name, digest, added) VALUES (?, ?, ?, ?, ?)",
+                        (dossier, ref, name, digest, now)
+                    )
+                else:
+                    # Contenu non référencé : le délai de grâce repart de maintenant
+                    self._conn.execute(
+                        "UPDATE blobs SET orphaned_at = ? WHERE digest = ? AND refcount <= 0", (now, digest)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            # Fichier supprimé par un ramassage concurrent entre l'écriture et l'enregistrement
+            if not path.exists():
+                self._write_file(path, data)
+        return DocumentHandle(digest=digest, name=name, size=len(data), dossier=dossier,
+                              mime_type=mime_type, metadata=dict(metadata or {}),
+                              store_root=str(self.root), ref=ref)
+
+    def contains(self, digest: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def read_bytes(self, digest: str) -> bytes:
+        return self._path(digest).read_bytes()
+
+    def read_text(self, digest: str) -> Optional[str]:
+        """Texte extrait (None s'il n'a pas encore été extrait)"""
+        text = self._texts.get(digest)
+        if text is not None:
+            return text
+        path = self._path(digest, '.txt')
+        if not path.exists():
+            return None
+        text = path.read_text(encoding='utf-8')
+        self._texts.set(digest, text)
+        return text
+
+    def mapped_text(self, digest: str) -> Optional[MappedText]:
+        """Texte extrait projeté en mémoire, partagé par toutes les sessions (None s'il n'a pas été extrait)"""
+        mapped = self._mapped.get(digest)
+        if mapped is not None:
+            return mapped
+        path = self._path(digest, '.txt')
+        if not path.exists():
+            return None
+        mapped = MappedText(path)
+        self._mapped.set(digest, mapped)
+        return mapped
+
+    def write_text(self, digest: str, text: str):
+        path = self._path(digest, '.txt')
+        self._write_file(path, text.encode('utf-8'))
+        # Les projections déjà remises restent valides : elles visent l'ancien fichier
+        self._mapped.pop(digest)
+        index_path = Path(f"{path}{INDEX_SUFFIX}")
+        if index_path.exists():
+            index_path.unlink()
+        self._texts.set(digest, text)
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET has_text = 1 WHERE digest = ?", (digest,))
+
+    def text_for(self, digest: str, extract: Callable[[bytes], str]) -> str:
+        """Texte extrait, calculé une seule fois par contenu (même entre sessions concurrentes)"""
+        text = self.read_text(digest)
+        if text is not None:
+            return text
+
+        def compute() -> str:
+            cached = self.read_text(digest)
+            if cached is not None:
+                return cached
+            extracted = extract(self.read_bytes(digest))
+            self.write_text(digest, extracted)
+            return extracted
+
+        return self._extractions.do(digest, compute)
+
+    # ---- Références ----
+
+    def release(self, dossier: str, ref: str) -> bool:
+        """Retire une référence ; le contenu est supprimé au prochain ramassage s'il n'est plus référencé"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM refs WHERE dossier = ? AND ref = ?", (dossier, ref)
+            ).rowcount > 0
+
+    def release_dossier(self, dossier: str) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM refs WHERE dossier = ?", (dossier,)).rowcount
+
+    def release_older_than(self, dossier: str, age: float) -> int:
+        """Retire les références d'un dossier ajoutées il y a plus de ``age`` secondes"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM refs WHERE dossier = ? AND added <= ?", (dossier, time.time() - age)
+            ).rowcount
+
+    def refcount(self, digest: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT refcount FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else 0
+
+    def documents(self, dossier: str) -> List[DocumentHandle]:
+        """Poignées des documents référencés par un dossier"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.ref, r.name, r.digest, b.size, b.mime_type, r.added FROM refs r "
+                "JOIN blobs b ON b.digest = r.digest WHERE r.dossier = ? ORDER BY r.added, r.name",
+                (dossier,)
+            ).fetchall()
+        return [
+            DocumentHandle(digest=digest, name=name, size=size, dossier=dossier, mime_type=mime_type,
+                           created_at=datetime.fromtimestamp(added), store_root=str(self.root), ref=ref)
+            for ref, name, digest, size, mime_type, added in rows
+        ]
+
+    def dossiers_of(self, digest: str) -> List[str]:
+        """Dossiers où figure un contenu"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT dossier FROM refs WHERE digest = ? ORDER BY dossier", (digest,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # ---- Maintenance ----
+
+    def collect_garbage(self, grace: float = GC_GRACE) -> int:
+        """Supprime les contenus sans référence depuis plus de ``grace`` secondes"""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute(
+                "SELECT digest FROM blobs WHERE refcount <= 0 AND orphaned_at <= ?", (time.time() - grace,)
+            ).fetchall()]
+            for digest in digests:
+                self._conn.execute("DELETE FROM blobs WHERE digest = ? AND refcount <= 0", (digest,))
+                # Fichiers supprimés sous le verrou : un put concurrent les réécrit après
+                self._texts.pop(digest)
+                mapped = self._mapped.pop(digest)
+                if mapped is not None:
+                    mapped.close()
+                for suffix in ('', '.txt', f'.txt{INDEX_SUFFIX}'):
+                    path = self._path(digest, suffix)
+                    if path.exists():
+                        path.unlink()
+        if digests:
+            logger.info(f"Stockage documents : {len(digests)} contenu(s) sans référence supprimé(s)")
+        return len(digests)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            blobs, size, extracted = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(has_text), 0) FROM blobs"
+            ).fetchone()
+            refs, referenced_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM refs r JOIN blobs b ON b.digest = r.digest"
+            ).fetchone()
+        return {
+            'blobs': blobs,
+            'bytes': size,
+            'extracted': extracted,
+            'references': refs,
+            'mapped': len(self._mapped),
+            # Octets qui auraient été stockés sans déduplication
+            'saved_bytes': max(0, referenced_size - size),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self._mapped.clear()
+
+
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_document_store(root: Optional[str] = None) -> DocumentStore:
+    """Stockage unique du processus pour un répertoire"""
+    root = str(root or os.getenv('DOCUMENT_STORE_DIR', DOCUMENT_STORE_DIR))
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = DocumentStore(root)
+            # Imports laissés par des sessions d'un processus précédent
+            store.release_older_than(IMPORT_DOSSIER, IMPORT_REF_TTL)
+            store.collect_garbage()
+        return store
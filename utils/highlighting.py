@@ -0,0 +1,122 @@
+# utils/highlighting.py
+"""
+Extraction d'extraits (highlights) en un seul passage sur le document
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.mapped_text import iter_matches
+
+
+@dataclass
+class Snippet:
+    """Extrait de document avec sa position"""
+    start: int
+    end: int
+    text: str
+    terms: List[str] = field(default_factory=list)
+    is_reference: bool = False
+
+
+class HighlightExtractor:
+    """
+    Extracteur construit une fois par requête.
+
+    Tous les mots-clés (et la référence éventuelle) sont réunis dans un
+    unique automate d'alternation : chaque document n'est parcouru qu'une
+    fois, sans les quantificateurs ``.{0,50}`` qui provoquaient des retours
+    arrière sur les longs procès-verbaux. Les fenêtres qui se chevauchent
+    sont fusionnées. Un texte projeté en mémoire (MappedText) est parcouru
+    fenêtre par fenêtre, sans être chargé en entier.
+    """
+
+    def __init__(self, keywords: Iterable[str], reference: Optional[str] = None,
+                 window: int = 50, reference_window: int = 100, max_per_term: int = 2):
+        self.window = window
+        self.reference_window = reference_window
+        self.max_per_term = max_per_term
+        self.keywords = [k.lower() for k in dict.fromkeys(keywords) if k]
+        self.reference = reference.lower() if reference else None
+
+        # Les alternatives les plus longues d'abord pour privilégier la correspondance complète
+        alternatives = [rf'\b{re.escape(k)}\b' for k in sorted(self.keywords, key=len, reverse=True)]
+        if self.reference:
+            alternatives.insert(0, f'(?P<ref>{re.escape(self.reference)})')
+        self._pattern = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def extract(self, text: Any, max_snippets: int = 3) -> List[Snippet]:
+        """
+        Extrait les passages pertinents d'un texte.
+
+        Args:
+            text: Contenu du document (str, bytes ou MappedText)
+            max_snippets: Nombre maximal d'extraits
+
+        Returns:
+            Extraits, celui de la référence en premier puis par position
+        """
+        if not self._pattern or not text:
+            return []
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='ignore')
+
+        length = len(text)
+        windows: List[Tuple[int, int, str, bool]] = []
+        counts: Dict[str, int] = {}
+        reference_found = not self.reference
+        saturated = 0
+
+        longest = max(len(term) for term in self.keywords + [self.reference or ''])
+        for start, end, match in iter_matches(self._pattern, text, longest):
+            is_reference = self.reference is not None and match.group('ref') is not None
+            if is_reference:
+                if reference_found:
+                    continue
+                reference_found = True
+                margin = self.reference_window
+                term = self.reference
+            else:
+                term = match.group(0).lower()
+                seen = counts.get(term, 0)
+                if seen >= self.max_per_term:
+                    continue
+                counts[term] = seen + 1
+                if seen + 1 == self.max_per_term:
+                    saturated += 1
+                margin = self.window
+
+            windows.append((
+                max(0, start - margin),
+                min(length, end + margin),
+                term,
+                is_reference,
+            ))
+
+            # Arrêt anticipé dès que tous les termes ont assez d'occurrences
+            if reference_found and saturated >= len(self.keywords):
+                break
+
+        return self._merge(text, windows)[:max_snippets]
+
+    @staticmethod
+    def _merge(text: str, windows: List[Tuple[int, int, str, bool]]) -> List[Snippet]:
+        """Fusionne les fenêtres qui se chevauchent"""
+        merged: List[List[Any]] = []
+        for start, end, term, is_reference in sorted(windows, key=lambda w: w[0]):
+            if merged and start <= merged[-1][1]:
+                last = merged[-1]
+                last[1] = max(last[1], end)
+                if term not in last[2]:
+                    last[2].append(term)
+                last[3] = last[3] or is_reference
+            else:
+                merged.append([start, end, [term], is_reference])
+
+        snippets = [
+            Snippet(start=start, end=end, text=text[start:end].strip(), terms=terms, is_reference=is_reference)
+            for start, end, terms, is_reference in merged
+        ]
+        # L'extrait de la référence passe en tête, les autres restent dans l'ordre du texte
+        snippets.sort(key=lambda snippet: not snippet.is_reference)
+        return [snippet for snippet in snippets if snippet.text]
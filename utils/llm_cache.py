@@ -0,0 +1,232 @@
+# utils/llm_cache.py
+"""
+Cache des réponses LLM adressé par contenu : mémoire (LRU) puis disque.
+
+La clé est l'empreinte SHA-256 du prompt normalisé, du prompt système, du
+fournisseur, du modèle, de la température et de max_tokens : deux appels
+identiques partagent la même réponse, quelle que soit la session. Le
+niveau disque est un ``SQLiteCacheStore`` : volume borné (éviction des
+entrées les moins récemment lues) et purge des entrées expirées.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils.lru_cache import LRUCache
+from utils.sqlite_cache import SQLiteCacheStore
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_DIR = os.path.join("cache_juridique", "llm")
+# Durée de vie des réponses sur disque (s)
+DEFAULT_TTL = 7 * 24 * 3600
+# Volume maximal des réponses sur disque (octets)
+DISK_MAX_BYTES = 256 * 1024 * 1024
+LLM_CACHE_DB_NAME = "llm.db"
+CACHE_TYPE = "llm"
+MEMORY_ENTRIES = 512
+MEMORY_BYTES = 32 * 1024 * 1024
+
+
+def normalize_prompt(text: str) -> str:
+    """Forme canonique d'un prompt : NFC, fins de ligne unifiées, espaces de fin retirés"""
+    text = unicodedata.normalize('NFC', text or '')
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def make_cache_key(prompt: str, system_prompt: str, provider: str, model: str,
+                   temperature: float, max_tokens: int) -> str:
+    """Empreinte hexadécimale d'une requête LLM"""
+    payload = json.dumps({
+        'prompt': normalize_prompt(prompt),
+        'system': normalize_prompt(system_prompt),
+        'provider': provider,
+        'model': model,
+        'temperature': round(float(temperature), 3),
+        'max_tokens': int(max_tokens),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache à deux niveaux des réponses LLM.
+
+    Les réponses sont conservées en mémoire (LRU borné) et écrites sur disque
+    dans ``<dossier>/llm.db``, limité à ``max_disk_bytes``. Les appels à température non nulle ne sont pas mis en cache,
+    sauf demande explicite (``use_cache=True``) ou ``allow_nondeterministic``.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = LLM_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_entries: int = MEMORY_ENTRIES, max_bytes: int = MEMORY_BYTES,
+                 max_disk_bytes: int = DISK_MAX_BYTES,
+                 allow_nondeterministic: bool = False, enabled: bool = True):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.allow_nondeterministic = allow_nondeterministic
+        self.enabled = enabled
+        self._memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                       'bypassed': 0, 'writes': 0, 'errors': 0, 'tokens_saved': 0}
+        self._store = self._open_store(max_disk_bytes) if self.cache_dir else None
+
+    def should_cache(self, temperature: float, use_cache: Optional[bool] = None) -> bool:
+        """Indique si un appel peut être servi depuis (et écrit dans) le cache"""
+        if not self.enabled or use_cache is False:
+            return False
+        if use_cache or self.allow_nondeterministic:
+            return True
+        return not temperature
+
+    def skip(self):
+        """Comptabilise un appel qui contourne le cache"""
+        self._count('bypassed')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrée en cache (``response``, ``provider``, ``model``, ``tokens``) ou None"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._hit('memory_hits', entry)
+            return entry
+
+        entry, expires = self._read(key)
+        if entry is not None:
+            self._memory.set(key, entry, ttl=max(expires - time.time(), 1))
+            self._hit('disk_hits', entry)
+            return entry
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, response: str, provider: str = '', model: str = '', tokens: int = 0):
+        """Enregistre une réponse dans les deux niveaux"""
+        entry = {
+            'response': response,
+            'provider': provider,
+            'model': model,
+            'tokens': int(tokens),
+            'created': time.time(),
+        }
+        self._memory.set(key, entry)
+        if self._write(key, entry):
+            self._count('writes')
+
+    def clear(self):
+        """Vide la mémoire et le disque"""
+        self._memory.clear()
+        if self._store is not None:
+            try:
+                self._store.clear(CACHE_TYPE)
+            except sqlite3.Error as e:
+                logger.warning(f"Vidage du cache LLM impossible: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Taux de réussite et tokens économisés"""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats.update({
+            'hits': hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        })
+        if self._store is not None:
+            try:
+                disk = self._store.totals().get(CACHE_TYPE, {})
+            except sqlite3.Error:
+                disk = {}
+            stats.update({'disk_entries': disk.get('entries', 0), 'disk_bytes': disk.get('bytes', 0)})
+        return stats
+
+    # ---- Disque ----
+
+    def _open_store(self, max_disk_bytes: int) -> Optional[SQLiteCacheStore]:
+        try:
+            store = SQLiteCacheStore(str(self.cache_dir / LLM_CACHE_DB_NAME), max_bytes=max_disk_bytes)
+            store.purge_expired()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Cache LLM sur disque indisponible: {e}")
+            return None
+        self._drop_legacy_files()
+        return store
+
+    def _drop_legacy_files(self):
+        """Supprime les entrées JSON de l'ancien format (un fichier par réponse)"""
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                path.unlink()
+                path.parent.rmdir()
+            except OSError:
+                pass
+
+    def _read(self, key: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Entrée sur disque et date d'expiration (``None, 0`` si absente ou expirée)"""
+        if self._store is None:
+            return None, 0
+        try:
+            row = self._store.get(key)
+            if row is None:
+                return None, 0
+            return json.loads(row[0].decode('utf-8')), row[3]
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Entrée de cache LLM illisible {key[:12]}: {e}")
+            self._count('errors')
+            return None, 0
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> bool:
+        if self._store is None:
+            return False
+        try:
+            value = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            self._store.set(key, value, CACHE_TYPE, self.ttl)
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Écriture du cache LLM impossible: {e}")
+            self._count('errors')
+            return False
+
+    # ---- Statistiques ----
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _hit(self, name: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._stats[name] += 1
+            self._stats['tokens_saved'] += entry.get('tokens', 0)
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Cache unique du processus.
+
+    Variables d'environnement : LLM_CACHE_DIR, LLM_CACHE_TTL (s),
+    LLM_CACHE_MAX_BYTES (volume sur disque), LLM_CACHE_ENABLED (0 pour désactiver), LLM_CACHE_NONDETERMINISTIC (1
+    pour mettre en cache les appels à température non nulle).
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(
+                cache_dir=os.getenv('LLM_CACHE_DIR', LLM_CACHE_DIR),
+                ttl=float(os.getenv('LLM_CACHE_TTL', DEFAULT_TTL)),
+                max_disk_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', DISK_MAX_BYTES)),
+                enabled=os.getenv('LLM_CACHE_ENABLED', '1') != '0',
+                allow_nondeterministic=os.getenv('LLM_CACHE_NONDETERMINISTIC', '0') == '1',
+            )
+        return _llm_cache
@@ -0,0 +1,127 @@
+# utils/llm_fusion.py
+"""
+Fusion hiérarchique (map-reduce) de plusieurs réponses : les paragraphes
+identiques sont dédupliqués, puis les réponses sont fusionnées deux à deux,
+en parallèle, niveau par niveau, sans dépasser un budget de tokens par
+étape de fusion.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from utils.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Tokens (estimés) de texte source envoyés au plus à une étape de fusion
+FUSION_TOKEN_BUDGET = 12_000
+# Nombre de réponses fusionnées par étape
+FUSION_FAN_IN = 2
+FUSION_WORKERS = 4
+# En dessous de cette longueur (titres, formules courtes), un paragraphe n'est pas dédupliqué
+MIN_DEDUPE_CHARS = 40
+
+# (libellé, texte)
+FusionItem = Tuple[str, str]
+# Fusionne un groupe de réponses ; None si la fusion a échoué
+MergeFunction = Callable[[List[FusionItem]], Optional[str]]
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in (text or '').replace('\r\n', '\n').split('\n\n') if p.strip()]
+
+
+def _fingerprint(paragraph: str) -> str:
+    return ' '.join(paragraph.lower().split())
+
+
+def dedupe_paragraphs(items: Sequence[FusionItem]) -> List[FusionItem]:
+    """
+    Retire de chaque réponse les paragraphes déjà présents dans une réponse
+    précédente (à la casse et aux espaces près) ; les réponses vidées sont
+    écartées.
+    """
+    seen = set()
+    result = []
+    for label, text in items:
+        kept = []
+        for paragraph in _paragraphs(text):
+            fingerprint = _fingerprint(paragraph)
+            if len(fingerprint) >= MIN_DEDUPE_CHARS:
+                if fingerprint in seen:
+                    continue
+                seen.add(fingerprint)
+            kept.append(paragraph)
+        if kept:
+            result.append((label, '\n\n'.join(kept)))
+    return result
+
+
+def fit_to_budget(text: str, tokens: int) -> str:
+    """Tronque un texte au dernier paragraphe complet tenant dans ``tokens`` tokens"""
+    if estimate_tokens(text) <= tokens:
+        return text
+    kept = []
+    used = 0
+    for paragraph in _paragraphs(text):
+        cost = estimate_tokens(paragraph)
+        if used + cost > tokens:
+            break
+        kept.append(paragraph)
+        used += cost
+    if not kept:
+        # Un seul paragraphe trop long : coupe franche
+        return text[:tokens * 4]
+    return '\n\n'.join(kept)
+
+
+def concatenate(items: Sequence[FusionItem]) -> str:
+    """Fusion sans modèle : les réponses mises bout à bout sous leur libellé"""
+    if len(items) == 1:
+        return items[0][1]
+    return '\n\n'.join(f"### {label}\n{text}" for label, text in items)
+
+
+def tree_fuse(items: Sequence[FusionItem], merge: Optional[MergeFunction] = None,
+              budget: int = FUSION_TOKEN_BUDGET, fan_in: int = FUSION_FAN_IN,
+              max_workers: int = FUSION_WORKERS) -> str:
+    """
+    Fusionne des réponses par réduction en arbre.
+
+    À chaque niveau, les réponses sont regroupées par ``fan_in`` et chaque
+    groupe est fusionné par ``merge`` (les groupes d'un même niveau en
+    parallèle) ; chaque réponse est tronquée à ``budget / fan_in`` tokens
+    pour qu'une étape ne dépasse jamais ``budget``. Un groupe dont la fusion
+    échoue est concaténé. Sans ``merge``, les réponses dédupliquées sont
+    simplement concaténées.
+    """
+    fan_in = max(2, fan_in)
+    level = dedupe_paragraphs(items)
+    if not level:
+        return ''
+    if merge is None:
+        return concatenate(level)
+
+    share = max(1, budget // fan_in)
+    depth = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="fusion") as executor:
+        while len(level) > 1:
+            depth += 1
+            level = [(label, fit_to_budget(text, share)) for label, text in level]
+            groups = [level[i:i + fan_in] for i in range(0, len(level), fan_in)]
+            logger.info(f"Fusion niveau {depth}: {len(level)} réponses, {len(groups)} groupe(s)")
+
+            def run(group: List[FusionItem]) -> FusionItem:
+                label = ' + '.join(label for label, _ in group)
+                if len(group) == 1:
+                    return group[0]
+                try:
+                    merged = merge(group)
+                except Exception as e:
+                    logger.warning(f"Fusion de {label} impossible: {e}")
+                    merged = None
+                return label, merged or concatenate(group)
+
+            level = list(executor.map(run, groups))
+
+    return level[0][1]
@@ -0,0 +1,238 @@
+# utils/llm_policies.py
+"""
+Politiques d'attente pour les appels simultanés à plusieurs modèles :
+tout attendre, première réponse valide, quorum de k réponses, ou envoi
+échelonné (« hedged ») vers le modèle suivant si le précédent tarde.
+"""
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Statut de chaque appel une fois la politique satisfaite
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timed_out'
+SKIPPED = 'skipped'
+
+STATUS_MESSAGES = {
+    CANCELLED: "Annulé : réponses suffisantes obtenues",
+    TIMED_OUT: "Délai dépassé",
+    SKIPPED: "Non lancé : réponse déjà obtenue",
+}
+
+
+@dataclass(frozen=True)
+class QueryPolicy:
+    """Nombre de réponses valides attendues et mode de lancement"""
+    mode: str = 'all'
+    k: int = 0
+    delay: float = 0.0
+
+    def required(self, count: int) -> int:
+        if self.mode == 'all':
+            return count
+        if self.mode == 'quorum':
+            return min(self.k, count)
+        return min(1, count)
+
+
+ALL = QueryPolicy()
+
+
+def first_success() -> QueryPolicy:
+    """Retour dès la première réponse valide, les autres appels sont annulés"""
+    return QueryPolicy('first_success')
+
+
+def quorum(k: int) -> QueryPolicy:
+    """Retour dès ``k`` réponses valides"""
+    if k < 1:
+        raise ValueError("Le quorum doit être d'au moins 1")
+    return QueryPolicy('quorum', k=k)
+
+
+def hedged(delay_ms: float = 1500) -> QueryPolicy:
+    """
+    Appels échelonnés dans l'ordre donné : le modèle suivant n'est sollicité
+    que si aucune réponse valide n'est arrivée après ``delay_ms`` (ou dès un
+    échec). La première réponse valide l'emporte.
+    """
+    return QueryPolicy('hedged', delay=max(0.0, delay_ms) / 1000)
+
+
+def as_policy(policy: Union[None, str, QueryPolicy]) -> QueryPolicy:
+    """Accepte une politique, None, ou un nom ('all', 'first_success', 'quorum:2', 'hedged:800')"""
+    if policy is None:
+        return ALL
+    if isinstance(policy, QueryPolicy):
+        return policy
+    name, _, arg = str(policy).partition(':')
+    if name == 'all':
+        return ALL
+    if name == 'first_success':
+        return first_success()
+    if name == 'quorum':
+        return quorum(int(arg or 1))
+    if name == 'hedged':
+        return hedged(float(arg)) if arg else hedged()
+    raise ValueError(f"Politique inconnue : {policy}")
+
+
+@dataclass
+class Outcome:
+    """Issue d'un appel lancé (ou non) sous une politique"""
+    name: str
+    status: str = SKIPPED
+    result: Any = None
+    error: Optional[str] = None
+    elapsed: Optional[float] = None
+    succeeded: bool = False
+
+    def to_result(self) -> Dict[str, Any]:
+        """Résultat au format de MultiLLMManager.query_single_llm, complété du statut"""
+        if isinstance(self.result, dict):
+            return {'status': self.status, **self.result}
+        return {
+            'success': False,
+            'provider': self.name,
+            'status': self.status,
+            'error': self.error or STATUS_MESSAGES.get(self.status, "Aucune réponse"),
+        }
+
+
+def _default_success(result: Any) -> bool:
+    if isinstance(result, dict):
+        return bool(result.get('success'))
+    return result is not None
+
+
+def _initial_launches(policy: QueryPolicy, count: int) -> int:
+    return min(1, count) if policy.mode == 'hedged' else count
+
+
+def run_policy(calls: Sequence[Tuple[str, Callable[[], Any]]],
+               policy: Union[None, str, QueryPolicy] = None,
+               executor: Optional[Executor] = None,
+               timeout: Optional[float] = None,
+               is_success: Callable[[Any], bool] = _default_success) -> List[Outcome]:
+    """
+    Exécute des appels synchrones dans ``executor`` selon la politique.
+
+    Les appels devenus inutiles sont annulés s'ils n'ont pas démarré, et
+    ignorés sinon (un thread ne peut pas être interrompu). Les issues sont
+    retournées dans l'ordre des appels.
+    """
+    policy = as_policy(policy)
+    outcomes = [Outcome(name) for name, _ in calls]
+    required = policy.required(len(calls))
+    owned = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=max(1, len(calls)))
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    pending: Dict[Future, int] = {}
+    launched = 0
+    successes = 0
+
+    def launch():
+        nonlocal launched
+        pending[executor.submit(calls[launched][1])] = launched
+        launched += 1
+
+    for _ in range(_initial_launches(policy, len(calls))):
+        launch()
+
+    try:
+        while pending and successes < required:
+            hedge = policy.mode == 'hedged' and launched < len(calls)
+            wait_time = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if hedge:
+                wait_time = policy.delay if wait_time is None else min(wait_time, policy.delay)
+
+            done, _ = wait(list(pending), timeout=wait_time, return_when=FIRST_COMPLETED)
+            failed = False
+            for future in done:
+                outcome = outcomes[pending.pop(future)]
+                outcome.status = FINISHED
+                outcome.elapsed = time.monotonic() - start
+                try:
+                    outcome.result = future.result()
+                except Exception as e:
+                    outcome.error = str(e)
+                outcome.succeeded = outcome.error is None and is_success(outcome.result)
+                successes += outcome.succeeded
+                failed = failed or not outcome.succeeded
+
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if hedge and successes < required and (failed or not done):
+                launch()
+    finally:
+        timed_out = deadline is not None and time.monotonic() >= deadline
+        for future, index in pending.items():
+            future.cancel()
+            outcomes[index].status = TIMED_OUT if timed_out else CANCELLED
+        if owned:
+            executor.shutdown(wait=False)
+
+    return outcomes
+
+
+async def arun_policy(calls: Sequence[Tuple[str, Callable[[], Awaitable[Any]]]],
+                      policy: Union[None, str, QueryPolicy] = None,
+                      timeout: Optional[float] = None,
+                      is_success: Callable[[Any], bool] = _default_success) -> List[Outcome]:
+    """Version asynchrone de run_policy : les appels devenus inutiles sont annulés"""
+    policy = as_policy(policy)
+    outcomes = [Outcome(name) for name, _ in calls]
+    required = policy.required(len(calls))
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    pending: Dict[asyncio.Task, int] = {}
+    launched = 0
+    successes = 0
+
+    def launch():
+        nonlocal launched
+        pending[asyncio.ensure_future(calls[launched][1]())] = launched
+        launched += 1
+
+    for _ in range(_initial_launches(policy, len(calls))):
+        launch()
+
+    try:
+        while pending and successes < required:
+            hedge = policy.mode == 'hedged' and launched < len(calls)
+            wait_time = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if hedge:
+                wait_time = policy.delay if wait_time is None else min(wait_time, policy.delay)
+
+            done, _ = await asyncio.wait(list(pending), timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+            failed = False
+            for task in done:
+                outcome = outcomes[pending.pop(task)]
+                outcome.status = FINISHED
+                outcome.elapsed = time.monotonic() - start
+                try:
+                    outcome.result = task.result()
+                except Exception as e:
+                    outcome.error = str(e)
+                outcome.succeeded = outcome.error is None and is_success(outcome.result)
+                successes += outcome.succeeded
+                failed = failed or not outcome.succeeded
+
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if hedge and successes < required and (failed or not done):
+                launch()
+    finally:
+        timed_out = deadline is not None and time.monotonic() >= deadline
+        for task, index in pending.items():
+            task.cancel()
+            outcomes[index].status = TIMED_OUT if timed_out else CANCELLED
+        if pending:
+            # Laisse les tâches annulées libérer leurs ressources (créneaux, connexions)
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    return outcomes
@@ -0,0 +1,262 @@
+# utils/llm_router.py
+"""
+Routage des appels LLM selon la santé des fournisseurs : latences
+glissantes (p50/p95) par classe de taille, taux d'erreur, coût estimé et
+disjoncteur (circuit breaker) par fournisseur
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# États du disjoncteur
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Classes de taille (tokens estimés : prompt + réponse maximale)
+SIZE_CLASSES = (('small', 2_000), ('medium', 16_000), ('large', float('inf')))
+
+# Fenêtre de contexte approximative des modèles utilisés (tokens)
+PROVIDER_CONTEXT = {
+    'openai': 128_000,
+    'azure_openai': 32_000,
+    'anthropic': 200_000,
+    'google': 30_000,
+    'mistral': 32_000,
+    'groq': 32_000,
+}
+
+# Coût indicatif (USD pour 1000 tokens, entrée et sortie confondues)
+COST_PER_1K_TOKENS = {
+    'openai': 0.02,
+    'azure_openai': 0.02,
+    'anthropic': 0.045,
+    'google': 0.001,
+    'mistral': 0.012,
+    'groq': 0.0005,
+}
+
+# Latence supposée d'un fournisseur encore jamais mesuré (s)
+PRIOR_LATENCY = 10.0
+# Échantillons nécessaires pour utiliser les latences d'une classe de taille
+MIN_SAMPLES = 5
+# Pénalité appliquée au score par point de taux d'erreur
+ERROR_PENALTY = 4.0
+# Secondes de latence jugées équivalentes à 1 USD
+COST_WEIGHT = 10.0
+
+
+def size_class(tokens: int) -> str:
+    """Classe de taille d'une requête"""
+    for name, limit in SIZE_CLASSES:
+        if tokens < limit:
+            return name
+    return SIZE_CLASSES[-1][0]
+
+
+def _percentile(values: Sequence[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ProviderHealth:
+    """Fenêtre glissante des appels d'un fournisseur et état de son disjoncteur"""
+
+    def __init__(self, window: int):
+        # (classe de taille, latence, succès, coût)
+        self.samples: Deque[Tuple[str, float, bool, float]] = deque(maxlen=window)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+        self.total_cost = 0.0
+        self.calls = 0
+
+    def latencies(self, klass: Optional[str] = None) -> List[float]:
+        return [latency for k, latency, ok, _ in self.samples if ok and (klass is None or k == klass)]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for *_, ok, _ in self.samples if not ok) / len(self.samples)
+
+    def expected_latency(self, klass: str) -> Optional[float]:
+        """p95 de la classe de taille (de tous les appels si trop peu d'échantillons)"""
+        values = self.latencies(klass)
+        if len(values) < MIN_SAMPLES:
+            values = self.latencies()
+        return _percentile(values, 95)
+
+
+class LLMRouter:
+    """
+    Choix du fournisseur et disjoncteurs.
+
+    Un fournisseur qui échoue ``failure_threshold`` fois de suite est exclu
+    (circuit ouvert) pendant ``cooldown`` secondes, puis un seul appel de
+    test est autorisé (semi-ouvert) : son succès referme le circuit, son
+    échec le rouvre.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0, window: int = 100,
+                 history: int = 50):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.window = window
+        self._health: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=history)
+
+    def _get(self, provider: str) -> ProviderHealth:
+        health = self._health.get(provider)
+        if health is None:
+            health = ProviderHealth(self.window)
+            self._health[provider] = health
+        return health
+
+    def _is_available(self, health: ProviderHealth, now: float) -> bool:
+        if health.state == CLOSED:
+            return True
+        if health.state == OPEN:
+            return now - health.opened_at >= self.cooldown
+        # Semi-ouvert : un seul appel de test à la fois (relancé s'il n'a jamais abouti)
+        return health.probe_started_at is None or now - health.probe_started_at >= self.cooldown
+
+    def allow(self, provider: str) -> bool:
+        """Autorise (ou non) un appel ; réserve l'appel de test d'un circuit semi-ouvert"""
+        now = time.monotonic()
+        with self._lock:
+            health = self._get(provider)
+            if not self._is_available(health, now):
+                return False
+            if health.state != CLOSED:
+                health.state = HALF_OPEN
+                health.probe_started_at = now
+                logger.info(f"{provider}: circuit semi-ouvert, appel de test")
+            return True
+
+    def release(self, provider: str):
+        """
+        Libère l'appel de test réservé par ``allow`` qui n'a pas été enregistré
+        (créneau refusé, annulation) : un autre appel peut tester aussitôt.
+        """
+        with self._lock:
+            health = self._health.get(provider)
+            if health is not None and health.state == HALF_OPEN:
+                health.probe_started_at = None
+
+    def record(self, provider: str, latency: float, success: bool, tokens: int = 0):
+        """Enregistre l'issue d'un appel réellement envoyé au fournisseur"""
+        cost = COST_PER_1K_TOKENS.get(provider, 0.0) * tokens / 1000
+        with self._lock:
+            health = self._get(provider)
+            health.samples.append((size_class(tokens), latency, success, cost))
+            health.calls += 1
+            health.total_cost += cost
+
+            if success:
+                if health.state != CLOSED:
+                    logger.info(f"{provider}: circuit refermé")
+                health.state = CLOSED
+                health.consecutive_failures = 0
+                health.probe_started_at = None
+                return
+
+            health.consecutive_failures += 1
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                if health.state != OPEN:
+                    logger.warning(f"{provider}: circuit ouvert après {health.consecutive_failures} échec(s)")
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probe_started_at = None
+
+    def _scores(self, candidates: Sequence[str], tokens: int,
+                exclude: Sequence[str]) -> Tuple[Dict[str, float], Dict[str, str]]:
+        klass = size_class(tokens)
+        now = time.monotonic()
+        scores: Dict[str, float] = {}
+        skipped: Dict[str, str] = {}
+        for provider in candidates:
+            if provider in exclude:
+                continue
+            if tokens > PROVIDER_CONTEXT.get(provider, float('inf')):
+                skipped[provider] = 'contexte insuffisant'
+                continue
+            health = self._get(provider)
+            if not self._is_available(health, now):
+                skipped[provider] = 'circuit ouvert'
+                continue
+            latency = health.expected_latency(klass)
+            if latency is None:
+                # Jamais mesuré : latence supposée, l'ordre des candidats départage
+                scores[provider] = PRIOR_LATENCY * (1 + ERROR_PENALTY * health.error_rate())
+                continue
+            cost = COST_PER_1K_TOKENS.get(provider, 0.0) * tokens / 1000
+            scores[provider] = latency * (1 + ERROR_PENALTY * health.error_rate()) + COST_WEIGHT * cost
+        return scores, skipped
+
+    def ranked(self, candidates: Sequence[str], tokens: int = 0,
+               exclude: Sequence[str] = ()) -> List[str]:
+        """
+        Fournisseurs sains classés du meilleur au moins bon (décision journalisée).
+
+        Score : latence p95 de la classe de taille, majorée par le taux
+        d'erreur, plus le coût estimé. Les fournisseurs jamais mesurés
+        valent PRIOR_LATENCY ; à score égal, l'ordre de ``candidates`` fait foi.
+        """
+        order = list(candidates)
+        with self._lock:
+            scores, skipped = self._scores(order, tokens, exclude)
+            ranking = sorted(scores, key=lambda p: (scores[p], order.index(p)))
+            self.decisions.append({
+                'time': datetime.now().strftime('%H:%M:%S'),
+                'size_class': size_class(tokens),
+                'tokens': tokens,
+                'chosen': ranking[0] if ranking else None,
+                'scores': {p: round(scores[p], 2) for p in ranking},
+                'skipped': skipped,
+            })
+        return ranking
+
+    def choose(self, candidates: Sequence[str], tokens: int = 0,
+               exclude: Sequence[str] = ()) -> Optional[str]:
+        """Meilleur fournisseur sain pour une requête de ``tokens`` tokens"""
+        ranking = self.ranked(candidates, tokens, exclude)
+        return ranking[0] if ranking else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latences, taux d'erreur, coût et état du disjoncteur par fournisseur"""
+        with self._lock:
+            return {
+                provider: {
+                    'state': health.state,
+                    'calls': health.calls,
+                    'p50': _percentile(health.latencies(), 50),
+                    'p95': _percentile(health.latencies(), 95),
+                    'error_rate': round(health.error_rate(), 3),
+                    'consecutive_failures': health.consecutive_failures,
+                    'cost_usd': round(health.total_cost, 4),
+                }
+                for provider, health in self._health.items()
+            }
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """Routeur unique du processus (partagé par toutes les sessions)"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter()
+        return _router
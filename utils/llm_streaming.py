@@ -0,0 +1,214 @@
+# utils/llm_streaming.py
+"""
+Réponses LLM en flux : mesures (délai du premier fragment, durée totale),
+affichage progressif dans Streamlit et fournisseur simulé hors ligne
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal entre deux rafraîchissements de l'affichage (s)
+RENDER_INTERVAL = 0.05
+CURSOR = " ▌"
+
+
+@dataclass
+class StreamMetrics:
+    """Mesures d'une réponse en flux (horloge monotone)"""
+    provider: str = ''
+    started_at: Optional[float] = None
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    characters: int = 0
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.started_at is None or self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def elapsed_time(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'provider': self.provider,
+            'time_to_first_token': self.time_to_first_token,
+            'elapsed_time': self.elapsed_time,
+            'chunks': self.chunks,
+            'characters': self.characters,
+            'cached': self.cached,
+            'error': self.error,
+        }
+
+
+class LLMStream:
+    """
+    Flux des fragments d'une réponse LLM.
+
+    S'itère avec ``for`` (source synchrone) ou ``async for`` (source
+    asynchrone) ; le texte complet et les mesures restent disponibles
+    ensuite via ``text``, ``metrics`` et ``result()``.
+    """
+
+    def __init__(self, source: Union[Iterable[str], AsyncIterator[str]], metrics: StreamMetrics):
+        self._source = source
+        self.metrics = metrics
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._parts)
+
+    def _start(self):
+        self.metrics.started_at = time.monotonic()
+
+    def _record(self, delta: str):
+        if self.metrics.first_token_at is None:
+            self.metrics.first_token_at = time.monotonic()
+        self._parts.append(delta)
+        self.metrics.chunks += 1
+        self.metrics.characters += len(delta)
+
+    def _finish(self):
+        self.metrics.finished_at = time.monotonic()
+        ttft = self.metrics.time_to_first_token
+        logger.info(
+            f"Flux {self.metrics.provider}: premier fragment "
+            f"{'-' if ttft is None else f'{ttft:.2f}s'}, total {self.metrics.elapsed_time:.2f}s, "
+            f"{self.metrics.characters} caractères"
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        self._start()
+        try:
+            for delta in self._source:
+                self._record(delta)
+                yield delta
+        finally:
+            self._finish()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        self._start()
+        try:
+            async for delta in self._source:
+                self._record(delta)
+                yield delta
+        finally:
+            self._finish()
+
+    def result(self) -> Dict[str, Any]:
+        """Résultat au format de MultiLLMManager.query_single_llm"""
+        if self.metrics.error:
+            return {'success': False, 'provider': self.metrics.provider, 'error': self.metrics.error}
+        return {
+            'success': True,
+            'provider': self.metrics.provider,
+            'response': self.text,
+            'elapsed_time': self.metrics.elapsed_time,
+            'time_to_first_token': self.metrics.time_to_first_token,
+            'cached': self.metrics.cached,
+        }
+
+
+# ========== AFFICHAGE STREAMLIT ==========
+
+def render_stream(stream: Iterable[str], placeholder: Any = None,
+                  min_interval: float = RENDER_INTERVAL) -> str:
+    """
+    Affiche un flux au fil de l'eau dans ``placeholder`` (``st.empty()`` par
+    défaut) et retourne le texte complet.
+
+    L'affichage est rafraîchi au plus toutes les ``min_interval`` secondes
+    pour ne pas saturer la connexion avec le navigateur.
+    """
+    if placeholder is None:
+        import streamlit as st
+        placeholder = st.empty()
+
+    parts: List[str] = []
+    last_render = 0.0
+    for delta in stream:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_render >= min_interval:
+            placeholder.markdown(''.join(parts) + CURSOR)
+            last_render = now
+
+    text = ''.join(parts)
+    placeholder.markdown(text)
+    return text
+
+
+async def arender_stream(stream: AsyncIterator[str], placeholder: Any = None,
+                         min_interval: float = RENDER_INTERVAL) -> str:
+    """Équivalent de render_stream pour un flux asynchrone"""
+    if placeholder is None:
+        import streamlit as st
+        placeholder = st.empty()
+
+    parts: List[str] = []
+    last_render = 0.0
+    async for delta in stream:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_render >= min_interval:
+            placeholder.markdown(''.join(parts) + CURSOR)
+            last_render = now
+
+    text = ''.join(parts)
+    placeholder.markdown(text)
+    return text
+
+
+# ========== FOURNISSEUR SIMULÉ ==========
+
+class FakeStreamingLLM:
+    """
+    Fournisseur local qui renvoie une réponse découpée en fragments.
+
+    Activé dans MultiLLMManager par la variable LLM_FAKE_PROVIDER (clé
+    ``fake``) pour tester l'interface et le flux sans clé d'API.
+    """
+
+    def __init__(self, response: Optional[str] = None, chunk_size: int = 12, delay: float = 0.0):
+        self.response = response
+        self.chunk_size = max(1, chunk_size)
+        self.delay = delay
+
+    def _text(self, prompt: str) -> str:
+        if self.response is not None:
+            return self.response
+        return f"Réponse simulée à : {prompt}"
+
+    def _chunks(self, prompt: str) -> List[str]:
+        text = self._text(prompt)
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def complete(self, prompt: str, system_prompt: str = '') -> str:
+        return ''.join(self.stream(prompt, system_prompt))
+
+    async def acomplete(self, prompt: str, system_prompt: str = '') -> str:
+        return ''.join([delta async for delta in self.astream(prompt, system_prompt)])
+
+    def stream(self, prompt: str, system_prompt: str = '') -> Iterator[str]:
+        for chunk in self._chunks(prompt):
+            if self.delay:
+                time.sleep(self.delay)
+            yield chunk
+
+    async def astream(self, prompt: str, system_prompt: str = '') -> AsyncIterator[str]:
+        for chunk in self._chunks(prompt):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield chunk
@@ -0,0 +1,173 @@
+# utils/lru_cache.py
+"""
+Cache mémoire LRU borné en nombre d'entrées et en octets, avec TTL
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+# Niveaux d'objets (attributs) parcourus ; les conteneurs ne comptent pas
+MAX_OBJECT_DEPTH = 4
+
+
+def estimate_size(obj: Any, _depth: int = 0, _seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimation (approximative) de l'empreinte mémoire d'un objet.
+
+    Parcourt les conteneurs en entier et les attributs d'objets sur
+    ``MAX_OBJECT_DEPTH`` niveaux, pour que les textes des documents
+    contenus dans un résultat soient comptés ; un objet partagé n'est
+    compté qu'une fois.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj, 64)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            estimate_size(k, _depth, _seen) + estimate_size(v, _depth, _seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _depth, _seen) for item in obj)
+    if _depth < MAX_OBJECT_DEPTH and hasattr(obj, '__dict__'):
+        return size + estimate_size(vars(obj), _depth + 1, _seen)
+    return size
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe.
+
+    Les entrées expirent après ``ttl`` secondes (horloge monotone) et les
+    moins récemment utilisées sont évincées dès que ``max_entries`` ou
+    ``max_bytes`` est dépassé.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, sizeof: Callable[[Any], int] = estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retourne la valeur associée (et la marque comme récemment utilisée)"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._discard(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Ajoute ou remplace une valeur puis applique les limites"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+
+        with self._lock:
+            if key in self._data:
+                self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Valeur trop volumineuse pour être mise en cache
+                self._stats['evictions'] += 1
+                return
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            self._enforce_limits()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self._discard(key)
+            return entry[0]
+
+    def remove_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Retire les entrées dont la clé satisfait le prédicat"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def purge_expired(self) -> int:
+        """Retire toutes les entrées expirées"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key for key, (_, expires_at, _) in self._data.items()
+                if expires_at is not None and now >= expires_at
+            ]
+            for key in expired:
+                self._discard(key)
+            self._stats['expirations'] += len(expired)
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or time.monotonic() < entry[1])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques d'utilisation du cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            total = stats['hits'] + stats['misses']
+            stats.update({
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_rate': stats['hits'] / total if total else 0.0,
+            })
+            return stats
+
+    def _discard(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def _enforce_limits(self):
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._discard(oldest)
+            self._stats['evictions'] += 1
@@ -0,0 +1,290 @@
+# utils/mapped_text.py
+"""
+Texte UTF-8 projeté en mémoire (mmap) et lu par tranches.
+
+Un ``MappedText`` se manipule comme une chaîne en lecture (``len``,
+découpage, ``in``) sans jamais charger le texte entier : un index de
+points de reprise (position en caractères → position en octets, un point
+par bloc) permet de ne décoder que les blocs couverts par la tranche
+demandée. Les pages du système de fichiers sont partagées par toutes les
+sessions qui ouvrent le même fichier.
+"""
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Set, Tuple, Union
+
+# Taille cible (octets) d'un bloc de l'index de reprise
+BLOCK_BYTES = 64 * 1024
+# Fenêtres de parcours pour la recherche et les extraits (caractères)
+WINDOW_CHARS = 256 * 1024
+# Suffixe du fichier d'index conservé à côté du texte
+INDEX_SUFFIX = '.idx'
+
+_PAGE_MARKER = b"--- Page "
+
+
+def _is_continuation(byte: int) -> bool:
+    return 0x80 <= byte < 0xC0
+
+
+class TextIndex:
+    """
+    Points de reprise d'un fichier UTF-8 : ``chars[i]`` caractères
+    précèdent l'octet ``offsets[i]``, qui commence toujours un caractère.
+    """
+
+    def __init__(self, chars: array, offsets: array, length: int, size: int):
+        self.chars = chars
+        self.offsets = offsets
+        self.length = length
+        self.size = size
+
+    @classmethod
+    def build(cls, data: Any, block_bytes: Optional[int] = None) -> 'TextIndex':
+        """Parcourt le fichier bloc par bloc (un seul bloc décodé à la fois)"""
+        block_bytes = block_bytes or BLOCK_BYTES
+        size = len(data)
+        chars, offsets = array('q'), array('q')
+        position = count = 0
+        while position < size:
+            end = min(size, position + block_bytes)
+            # Ne jamais couper une séquence UTF-8
+            while end < size and _is_continuation(data[end]):
+                end -= 1
+            chars.append(count)
+            offsets.append(position)
+            count += len(data[position:end].decode('utf-8', errors='replace'))
+            position = end
+        return cls(chars, offsets, count, size)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], size: int) -> Optional['TextIndex']:
+        """Index enregistré, ou None s'il est absent ou ne correspond plus au fichier"""
+        try:
+            values = array('q')
+            values.frombytes(Path(path).read_bytes())
+        except (OSError, ValueError):
+            return None
+        if len(values) < 2 or values[0] != size or (len(values) - 2) % 2:
+            return None
+        blocks = (len(values) - 2) // 2
+        return cls(values[2:2 + blocks], values[2 + blocks:], values[1], size)
+
+    def save(self, path: Union[str, Path]):
+        values = array('q', [self.size, self.length])
+        values.extend(self.chars)
+        values.extend(self.offsets)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                values.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # L'index n'est qu'une accélération : il sera reconstruit
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def block_of(self, char: int) -> int:
+        return max(0, bisect_right(self.chars, char) - 1)
+
+    def block_end(self, block: int) -> int:
+        """Octet de fin d'un bloc"""
+        return self.offsets[block + 1] if block + 1 < len(self.offsets) else self.size
+
+
+class MappedText:
+    """Texte d'un fichier UTF-8, lu à la demande par tranches"""
+
+    def __init__(self, path: Union[str, Path], persist_index: bool = True):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap refuse les fichiers vides
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        index_path = f"{self.path}{INDEX_SUFFIX}"
+        self.index = TextIndex.load(index_path, size) if persist_index else None
+        if self.index is None:
+            self.index = TextIndex.build(self._data)
+            if persist_index:
+                self.index.save(index_path)
+
+    # ---- Accès de type chaîne ----
+
+    def __len__(self) -> int:
+        return self.index.length
+
+    def __bool__(self) -> bool:
+        return self.index.length > 0
+
+    def __getitem__(self, key: Union[int, slice]) -> str:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                # Pas différent de 1 : cas marginal, le texte est décodé en entier
+                return str(self)[key]
+            return self.slice(start, stop)
+        length = len(self)
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
+            raise IndexError("indice hors du texte")
+        return self.slice(key, key + 1)
+
+    def __contains__(self, term: str) -> bool:
+        return self.find(term, ignore_case=False) >= 0
+
+    def __str__(self) -> str:
+        """Texte complet (à réserver aux exports)"""
+        return self._data[:].decode('utf-8', errors='replace')
+
+    def __repr__(self) -> str:
+        return f"MappedText({str(self.path)!r}, {len(self)} caractères)"
+
+    def slice(self, start: int, stop: int) -> str:
+        """Caractères ``start`` à ``stop`` : seuls les blocs couverts sont décodés"""
+        start, stop = max(0, start), min(len(self), stop)
+        if start >= stop:
+            return ''
+        index = self.index
+        first, last = index.block_of(start), index.block_of(stop - 1)
+        text = self._data[index.offsets[first]:index.block_end(last)].decode('utf-8', errors='replace')
+        base = index.chars[first]
+        return text[start - base:stop - base]
+
+    # ---- Tranches usuelles ----
+
+    def preview(self, max_chars: int = 500) -> str:
+        return self.slice(0, max_chars)
+
+    def chunk(self, number: int, size: int) -> str:
+        """Tranche ``number`` (à partir de 0) de ``size`` caractères"""
+        return self.slice(number * size, (number + 1) * size)
+
+    def page(self, number: int) -> str:
+        """Texte d'une page balisée ``--- Page N ---`` (chaîne vide si elle n'existe pas)"""
+        marker = b"%s%d ---\n" % (_PAGE_MARKER, number)
+        start = self._data.find(marker)
+        if start < 0:
+            return ''
+        start += len(marker)
+        end = self._data.find(b"\n" + _PAGE_MARKER, start)
+        return self._data[start:end if end >= 0 else len(self._data)].decode('utf-8', errors='replace')
+
+    def iter_windows(self, size: Optional[int] = None, overlap: int = 0) -> Iterator[Tuple[int, str]]:
+        """Fenêtres successives ``(début, texte)`` se chevauchant de ``overlap`` caractères"""
+        size = size or WINDOW_CHARS
+        length = len(self)
+        step = max(1, size - overlap)
+        start = 0
+        while start < length:
+            yield start, self.slice(start, start + size)
+            if start + size >= length:
+                break
+            start += step
+
+    # ---- Recherche ----
+
+    def find(self, term: str, start: int = 0, ignore_case: bool = True) -> int:
+        """Position du premier ``term`` à partir de ``start`` (-1 s'il est absent)"""
+        if not term:
+            return start if start <= len(self) else -1
+        needle = term.lower() if ignore_case else term
+        for offset, window in self.iter_windows(overlap=len(term) - 1):
+            if offset + len(window) <= start:
+                continue
+            haystack = window.lower() if ignore_case else window
+            position = haystack.find(needle, max(0, start - offset))
+            if position >= 0:
+                return offset + position
+        return -1
+
+    def contains(self, term: str, ignore_case: bool = True) -> bool:
+        return self.find(term, ignore_case=ignore_case) >= 0
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+TextLike = Union[str, MappedText]
+
+
+def document_text(doc: Any) -> TextLike:
+    """
+    Contenu d'un document (dict, Document, DocumentHandle…) : le texte
+    projeté s'il existe, sinon la chaîne ``content``.
+    """
+    if isinstance(doc, dict):
+        text = doc.get('text')
+        return text if isinstance(text, MappedText) else (doc.get('content') or '')
+    text = getattr(doc, 'text', None)
+    if isinstance(text, MappedText):
+        return text
+    return getattr(doc, 'content', '') or ''
+
+
+def matched_terms(text: TextLike, terms: Iterable[str]) -> Set[str]:
+    """Termes présents dans le texte (sans casse), en un seul parcours"""
+    wanted = {term.lower() for term in terms if term}
+    if not wanted or not text:
+        return set()
+    if isinstance(text, str):
+        lowered = text.lower()
+        return {term for term in wanted if term in lowered}
+    found: Set[str] = set()
+    overlap = max(len(term) for term in wanted) - 1
+    for _, window in text.iter_windows(overlap=overlap):
+        lowered = window.lower()
+        found.update(term for term in wanted - found if term in lowered)
+        if found == wanted:
+            break
+    return found
+
+
+def word_count(text: TextLike) -> int:
+    """Nombre de mots, fenêtre par fenêtre pour un texte projeté"""
+    if isinstance(text, str):
+        return len(text.split())
+    count = 0
+    previous_ends_in_word = False
+    for _, window in text.iter_windows():
+        count += len(window.split())
+        # Un mot coupé entre deux fenêtres ne compte qu'une fois
+        if previous_ends_in_word and window and not window[0].isspace():
+            count -= 1
+        previous_ends_in_word = bool(window) and not window[-1].isspace()
+    return count
+
+
+def iter_matches(pattern: re.Pattern, text: TextLike, max_length: int) -> Iterator[Tuple[int, int, re.Match]]:
+    """
+    Correspondances ``(début, fin, match)`` d'une expression sur tout le
+    texte ; pour un texte projeté, fenêtre par fenêtre. ``max_length`` borne
+    la longueur d'une correspondance : chaque fenêtre garde un caractère de
+    contexte de part et d'autre, de sorte que ``\\b`` reste exact aux jointures.
+    """
+    if isinstance(text, str):
+        for match in pattern.finditer(text):
+            yield match.start(), match.end(), match
+        return
+    overlap = max_length + 2
+    windows = text.iter_windows(size=max(WINDOW_CHARS, overlap * 4), overlap=overlap)
+    current = next(windows, None)
+    while current is not None:
+        offset, window = current
+        following = next(windows, None)
+        # Début accepté dans [offset + 1, début de la fenêtre suivante + 1)
+        low = 1 if offset else 0
+        high = following[0] + 1 - offset if following else len(window) + 1
+        for match in pattern.finditer(window):
+            if match.start() >= high:
+                break
+            if match.start() >= low:
+                yield offset + match.start(), offset + match.end(), match
+        current = following
@@ -0,0 +1,188 @@
+# utils/minhash.py
+"""
+Signatures MinHash et index LSH pour la détection de quasi-doublons
+"""
+import unicodedata
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Paramètres par défaut : 64 composantes, 16 bandes de 4 lignes
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.85
+
+_MAX_HASH = 0xFFFFFFFF
+
+Signature = Tuple[int, ...]
+
+
+def word_shingles(terms: Sequence[str], size: int = 3) -> Set[str]:
+    """
+    Shingles de ``size`` mots consécutifs.
+
+    Un texte plus court que ``size`` mots donne un seul shingle.
+    """
+    if not terms:
+        return set()
+    if len(terms) <= size:
+        return {' '.join(terms)}
+    return {' '.join(terms[i:i + size]) for i in range(len(terms) - size + 1)}
+
+
+def char_shingles(text: str, size: int = 3) -> Set[str]:
+    """Shingles de caractères (adaptés aux textes courts comme les titres)"""
+    if not text:
+        return set()
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    text = ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """
+    Calcul de signatures MinHash par « one permutation hashing ».
+
+    Chaque shingle n'est haché qu'une fois (crc32) puis réparti dans une des
+    ``num_perm`` cases dont on garde le minimum : le coût est linéaire en
+    nombre de shingles, indépendamment du nombre de composantes. Les cases
+    vides sont densifiées par emprunt à la case non vide suivante. Les
+    signatures sont stables d'un processus à l'autre.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM):
+        self.num_perm = num_perm
+
+    def signature(self, shingles: Iterable[str]) -> Signature:
+        """Signature MinHash d'un ensemble de shingles"""
+        bins = [_MAX_HASH] * self.num_perm
+        empty = True
+        for shingle in shingles:
+            value = zlib.crc32(shingle.encode('utf-8'))
+            slot = value % self.num_perm
+            if value < bins[slot]:
+                bins[slot] = value
+            empty = False
+
+        if empty:
+            return tuple(bins)
+
+        # Densification : une case vide reprend la valeur de la suivante
+        for slot in range(self.num_perm):
+            if bins[slot] == _MAX_HASH:
+                offset = 1
+                while bins[(slot + offset) % self.num_perm] == _MAX_HASH:
+                    offset += 1
+                bins[slot] = bins[(slot + offset) % self.num_perm] + offset
+        return tuple(bins)
+
+    def terms_signature(self, terms: Sequence[str], shingle_size: int = 3) -> Signature:
+        """Signature d'un texte déjà découpé en termes"""
+        return self.signature(word_shingles(terms, shingle_size))
+
+    def title_signature(self, title: str) -> Signature:
+        """Signature d'un titre (shingles de caractères)"""
+        return self.signature(char_shingles(title))
+
+
+def signature_similarity(sig_a: Signature, sig_b: Signature) -> float:
+    """Estimation de la similarité de Jaccard entre deux signatures"""
+    if not sig_a or not sig_b or len(sig_a) != len(sig_b):
+        return 0.0
+    if sig_a[0] == _MAX_HASH and sig_b[0] == _MAX_HASH:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class LSHIndex:
+    """
+    Index LSH par bandes : deux signatures partageant une bande complète
+    deviennent candidates, ce qui évite les comparaisons deux à deux.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Signature, Set[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, Signature] = {}
+
+    def _band_keys(self, signature: Signature) -> Iterable[Tuple[int, Signature]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def insert(self, key: Hashable, signature: Signature):
+        """Ajoute (ou remplace) une signature"""
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        """Retire une signature"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return False
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, key: Hashable) -> Optional[Signature]:
+        return self._signatures.get(key)
+
+    def candidates(self, signature: Signature) -> Set[Hashable]:
+        """Clés partageant au moins une bande avec la signature"""
+        found: Set[Hashable] = set()
+        for band, band_key in self._band_keys(signature):
+            found.update(self._buckets[band].get(band_key, ()))
+        return found
+
+    def query(self, signature: Signature, threshold: float = DEFAULT_THRESHOLD,
+              exclude: Optional[Hashable] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Quasi-doublons d'une signature.
+
+        Returns:
+            Liste ``(clé, similarité estimée)`` triée par similarité décroissante
+        """
+        matches = []
+        for key in self.candidates(signature):
+            if key == exclude:
+                continue
+            similarity = signature_similarity(signature, self._signatures[key])
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda item: item[1], reverse=True)
+
+    def duplicate_groups(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[Hashable]]:
+        """Regroupe les clés quasi identiques (composantes connexes)"""
+        seen: Set[Hashable] = set()
+        groups = []
+        for key, signature in self._signatures.items():
+            if key in seen:
+                continue
+            group = [key]
+            seen.add(key)
+            stack = [signature]
+            while stack:
+                for other, _ in self.query(stack.pop(), threshold):
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+                        stack.append(self._signatures[other])
+            if len(group) > 1:
+                groups.append(group)
+        return groups
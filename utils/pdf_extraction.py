@@ -0,0 +1,241 @@
+# utils/pdf_extraction.py
+"""
+Extraction du texte des PDF page par page.
+
+Les pages sont lues une à une (ou par lots dans des processus séparés pour
+les gros fichiers) et rendues au fil de l'eau. Le texte assemblé est écrit
+dans un fichier temporaire au-delà d'un seuil, et l'index des pages
+(position de chaque page dans le texte) permet de retrouver la page d'un
+passage ou de relire une seule page.
+"""
+import bisect
+import io
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+# Pages extraites par tâche du pool
+PAGE_BATCH = 50
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+# Au-delà (octets de texte), le texte assemblé est écrit sur disque
+SPOOL_THRESHOLD = 16 * 1024 * 1024
+
+PAGE_HEADER = "--- Page {number} ---\n"
+PAGE_SEPARATOR = "\n"
+_PAGE_HEADER_PATTERN = re.compile(r'^--- Page (\d+) ---$', re.MULTILINE)
+
+PdfSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+
+def _open_reader(source: PdfSource):
+    if not PYPDF2_AVAILABLE:
+        raise ImportError("PyPDF2 est requis pour lire les PDF")
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return PyPDF2.PdfReader(source)
+
+
+def _read_bytes(source: PdfSource) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    if workers is not None:
+        return workers
+    # Déjà dans un processus du pool d'import : pas de pool imbriqué
+    return PDF_WORKERS if multiprocessing.parent_process() is None else 1
+
+
+def _extract_batch(task: Tuple[str, int, int]) -> List[str]:
+    """Travail exécuté dans le pool : textes des pages [start, end) d'un fichier"""
+    path, start, end = task
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def page_count(source: PdfSource) -> int:
+    return len(_open_reader(source).pages)
+
+
+def iter_pdf_pages(source: PdfSource, first: int = 1, last: Optional[int] = None,
+                   workers: Optional[int] = None, page_batch: int = PAGE_BATCH) -> Iterator[Tuple[int, str]]:
+    """
+    (numéro de page, texte) des pages ``first`` à ``last`` (incluses), dans l'ordre.
+
+    Au-delà de ``page_batch`` pages, les lots sont extraits en parallèle par
+    ``workers`` processus, avec peu de lots en attente.
+    """
+    reader = _open_reader(source)
+    total = len(reader.pages)
+    last = total if last is None else min(last, total)
+    start = max(first, 1) - 1
+    workers = _resolve_workers(workers)
+
+    if workers <= 1 or last - start <= page_batch:
+        for i in range(start, last):
+            yield i + 1, reader.pages[i].extract_text() or ''
+        return
+
+    # Les processus relisent le fichier : il leur faut un chemin
+    temp_path = None
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+    else:
+        fd, temp_path = tempfile.mkstemp(prefix='pdf-', suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_read_bytes(source))
+        path = temp_path
+    del reader
+
+    try:
+        batches = ((path, s, min(s + page_batch, last)) for s in range(start, last, page_batch))
+        window = workers * 2
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures: deque = deque()
+            for task in batches:
+                futures.append((task[1], executor.submit(_extract_batch, task)))
+                if len(futures) >= window:
+                    yield from _batch_pages(*futures.popleft())
+            while futures:
+                yield from _batch_pages(*futures.popleft())
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+
+def _batch_pages(start: int, future) -> Iterator[Tuple[int, str]]:
+    for offset, text in enumerate(future.result()):
+        yield start + offset + 1, text
+
+
+def extract_page_range(source: PdfSource, first: int, last: Optional[int] = None) -> List[str]:
+    """Textes des pages ``first`` à ``last`` seulement (sans lire le reste du fichier)"""
+    return [text for _, text in iter_pdf_pages(source, first, last or first, workers=1)]
+
+
+@dataclass
+class PageIndex:
+    """Position (en caractères) du début de chaque page dans le texte extrait"""
+    numbers: List[int] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=list)
+
+    def add(self, number: int, offset: int):
+        self.numbers.append(number)
+        self.offsets.append(offset)
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """Page contenant le caractère ``offset`` (None avant la première page)"""
+        i = bisect.bisect_right(self.offsets, offset) - 1
+        return self.numbers[i] if i >= 0 else None
+
+    def offset_of(self, number: int) -> Optional[int]:
+        try:
+            return self.offsets[self.numbers.index(number)]
+        except ValueError:
+            return None
+
+    @classmethod
+    def from_text(cls, text: str) -> 'PageIndex':
+        """Index reconstruit à partir des en-têtes de page d'un texte déjà extrait"""
+        index = cls()
+        for match in _PAGE_HEADER_PATTERN.finditer(text):
+            index.add(int(match.group(1)), match.start())
+        return index
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+
+class PdfText:
+    """
+    Texte extrait d'un PDF, page par page, avec son index de pages.
+
+    Le texte est gardé en mémoire jusqu'à ``spool_threshold`` octets puis
+    écrit dans un fichier temporaire (supprimé à la fermeture).
+    """
+
+    def __init__(self, spool_threshold: int = SPOOL_THRESHOLD):
+        self.spool_threshold = spool_threshold
+        self.index = PageIndex()
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_threshold, mode='w+b')
+        self._byte_offsets: List[int] = []
+        self._chars = 0
+        self._bytes = 0
+
+    @property
+    def page_count(self) -> int:
+        return len(self.index)
+
+    @property
+    def spooled(self) -> bool:
+        return self._bytes > self.spool_threshold
+
+    def append(self, number: int, text: str):
+        separator = PAGE_SEPARATOR if self._chars else ''
+        chunk = f"{separator}{PAGE_HEADER.format(number=number)}{text}"
+        self.index.add(number, self._chars + len(separator))
+        data = chunk.encode('utf-8')
+        self._byte_offsets.append(self._bytes + len(separator.encode('utf-8')))
+        self._file.seek(self._bytes)
+        self._file.write(data)
+        self._chars += len(chunk)
+        self._bytes += len(data)
+
+    def read(self) -> str:
+        self._file.seek(0)
+        return self._file.read(self._bytes).decode('utf-8').strip()
+
+    def page(self, number: int) -> Optional[str]:
+        """Texte d'une page (sans son en-tête), relu depuis le tampon"""
+        try:
+            i = self.index.numbers.index(number)
+        except ValueError:
+            return None
+        start = self._byte_offsets[i]
+        end = self._byte_offsets[i + 1] - len(PAGE_SEPARATOR) if i + 1 < len(self._byte_offsets) else self._bytes
+        self._file.seek(start)
+        data = self._file.read(end - start).decode('utf-8')
+        return data.split('\n', 1)[1] if '\n' in data else ''
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'PdfText':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def extract_pdf(source: PdfSource, workers: Optional[int] = None,
+                spool_threshold: int = SPOOL_THRESHOLD, page_batch: int = PAGE_BATCH) -> PdfText:
+    """Extrait toutes les pages d'un PDF (fermer le résultat pour libérer le tampon)"""
+    result = PdfText(spool_threshold)
+    try:
+        for number, text in iter_pdf_pages(source, workers=workers, page_batch=page_batch):
+            result.append(number, text)
+    except BaseException:
+        result.close()
+        raise
+    if result.spooled:
+        logger.info(f"PDF de {result.page_count} pages : texte extrait écrit sur disque")
+    return result
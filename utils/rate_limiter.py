@@ -0,0 +1,404 @@
+# utils/rate_limiter.py
+"""
+Ordonnanceur partagé des appels LLM : seaux à jetons par fournisseur,
+file d'attente à priorités et concurrence adaptative (AIMD)
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Priorité d'un appel : l'interactif passe devant les traitements de fond"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+@dataclass
+class ProviderLimits:
+    """Budget d'un fournisseur"""
+    requests_per_minute: float = 60
+    tokens_per_minute: float = 100_000
+    max_concurrency: int = 4
+    min_concurrency: int = 1
+
+
+# Limites par défaut (surchargées par la variable LLM_RATE_LIMITS, en JSON)
+DEFAULT_LIMITS = {
+    'openai': ProviderLimits(500, 150_000, 8),
+    'azure_openai': ProviderLimits(300, 120_000, 8),
+    'anthropic': ProviderLimits(50, 40_000, 4),
+    'google': ProviderLimits(60, 120_000, 4),
+    'mistral': ProviderLimits(120, 200_000, 4),
+    'groq': ProviderLimits(30, 20_000, 4),
+}
+
+# Délai de blocage après un 429 sans en-tête Retry-After (s)
+DEFAULT_RETRY_AFTER = 2.0
+# Fraction de minute autorisée en rafale
+BURST_SECONDS = 10
+
+
+class RateLimitTimeout(TimeoutError):
+    """Attente d'un créneau plus longue que le délai accordé"""
+
+
+def estimate_tokens(text: str, max_tokens: int = 0) -> int:
+    """Estimation du coût d'un appel : ~4 caractères par token + moitié de la réponse maximale"""
+    return max(1, len(text or '') // 4 + max_tokens // 2)
+
+
+def classify_error(error: BaseException) -> str:
+    """Qualifie une exception de SDK : 'throttled', 'timeout' ou 'error'"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    name = type(error).__name__.lower()
+    if status == 429 or 'ratelimit' in name or 'rate limit' in str(error).lower():
+        return 'throttled'
+    if status in (408, 504) or 'timeout' in name:
+        return 'timeout'
+    return 'error'
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Valeur de l'en-tête Retry-After d'une erreur HTTP, si présente"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Secondes à attendre avant de pouvoir prélever ``amount``"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate else float('inf')
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Rend (positif) ou prélève (négatif) des jetons après coup"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Ticket:
+    """Demande en attente dans la file d'un fournisseur"""
+
+    __slots__ = ('priority', 'seq', 'cost', '_event', '_loop')
+
+    def __init__(self, priority: int, seq: int, cost: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.seq = seq
+        self.cost = cost
+        self._loop = loop
+        self._event = asyncio.Event() if loop else threading.Event()
+
+    def __lt__(self, other: '_Ticket') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self):
+        if self._loop is None:
+            self._event.set()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._event.set)
+
+
+class _ProviderState:
+    def __init__(self, limits: ProviderLimits):
+        self.limits = limits
+        self.requests = TokenBucket(limits.requests_per_minute)
+        self.tokens = TokenBucket(limits.tokens_per_minute)
+        self.limit = float(limits.max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.queue: List[_Ticket] = []
+        self.stats = {'completed': 0, 'throttled': 0, 'timeouts': 0, 'errors': 0}
+
+
+class Slot:
+    """
+    Créneau obtenu auprès de l'ordonnanceur (gestionnaire de contexte
+    synchrone ou asynchrone). ``report`` précise l'issue de l'appel ; à
+    défaut, une exception est qualifiée automatiquement et une sortie
+    normale vaut succès.
+    """
+
+    def __init__(self, scheduler: 'LLMScheduler', provider: str, cost: int,
+                 priority: Priority, timeout: Optional[float]):
+        self._scheduler = scheduler
+        self.provider = provider
+        self.cost = cost
+        self.priority = priority
+        self.timeout = timeout
+        self._outcome: Optional[str] = None
+        self._tokens_used: Optional[int] = None
+        self._retry_after: Optional[float] = None
+
+    def report(self, outcome: str = 'success', tokens_used: Optional[int] = None,
+               retry_after: Optional[float] = None):
+        self._outcome = outcome
+        self._tokens_used = tokens_used
+        self._retry_after = retry_after
+
+    def _finish(self, error: Optional[BaseException]):
+        outcome, retry_after = self._outcome, self._retry_after
+        if outcome is None:
+            if error is None:
+                outcome = 'success'
+            elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+                outcome = 'cancelled'
+            else:
+                outcome = classify_error(error)
+                retry_after = retry_after_seconds(error)
+        self._scheduler._release(self.provider, self.cost, outcome, self._tokens_used, retry_after)
+
+    def __enter__(self) -> 'Slot':
+        self._scheduler._acquire(self.provider, self.cost, self.priority, self.timeout)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._finish(exc)
+        return False
+
+    async def __aenter__(self) -> 'Slot':
+        await self._scheduler._aacquire(self.provider, self.cost, self.priority, self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._finish(exc)
+        return False
+
+
+class LLMScheduler:
+    """
+    Ordonnanceur partagé par toutes les sessions.
+
+    Pour chaque fournisseur :
+
+    - deux seaux à jetons (requêtes/min et tokens/min) ;
+    - une file à priorités : un appel ne part que s'il est en tête de file,
+      les appels interactifs passant devant les traitements par lots ;
+    - une limite de concurrence ajustée en AIMD : +1/limite après chaque
+      succès, divisée par deux sur 429 ou délai dépassé. Un 429 suspend en
+      outre le fournisseur pendant la durée Retry-After.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ProviderLimits]] = None,
+                 default_limits: Optional[ProviderLimits] = None):
+        self._limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._default = default_limits or ProviderLimits()
+        self._states: Dict[str, _ProviderState] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def configure(self, provider: str, **limits: Any):
+        """Modifie les limites d'un fournisseur (réinitialise son état)"""
+        base = self._limits.get(provider, self._default)
+        values = {**base.__dict__, **limits}
+        with self._lock:
+            self._limits[provider] = ProviderLimits(**values)
+            self._states.pop(provider, None)
+
+    def slot(self, provider: str, tokens: int = 1, priority: Priority = Priority.INTERACTIVE,
+             timeout: Optional[float] = None) -> Slot:
+        """
+        Réserve un créneau (``with`` ou ``async with``)
+
+        Args:
+            provider: Clé du fournisseur
+            tokens: Coût estimé en tokens (voir estimate_tokens)
+            priority: Priorité de l'appel
+            timeout: Attente maximale en secondes (RateLimitTimeout au-delà)
+        """
+        return Slot(self, provider, max(1, int(tokens)), priority, timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """État courant de chaque fournisseur"""
+        with self._lock:
+            return {
+                provider: {
+                    'concurrency_limit': round(state.limit, 2),
+                    'in_flight': state.in_flight,
+                    'queued': len(state.queue),
+                    'blocked_for': round(max(0.0, state.blocked_until - time.monotonic()), 2),
+                    **state.stats,
+                }
+                for provider, state in self._states.items()
+            }
+
+    # ---- Mécanique interne ----
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._states.get(provider)
+        if state is None:
+            state = _ProviderState(self._limits.get(provider, self._default))
+            self._states[provider] = state
+        return state
+
+    def _try_acquire(self, state: _ProviderState, ticket: _Ticket) -> Optional[float]:
+        """0 si le créneau est obtenu, sinon l'attente conseillée (None : attendre un signal)"""
+        if not state.queue or state.queue[0] is not ticket:
+            return None
+        now = time.monotonic()
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.in_flight >= max(1, int(state.limit)):
+            return None
+        wait = max(state.requests.wait_time(1, now), state.tokens.wait_time(ticket.cost, now))
+        if wait > 0:
+            return wait
+        state.requests.take(1)
+        state.tokens.take(ticket.cost)
+        state.in_flight += 1
+        heapq.heappop(state.queue)
+        self._wake_head(state)
+        return 0.0
+
+    @staticmethod
+    def _wake_head(state: _ProviderState):
+        if state.queue:
+            state.queue[0].wake()
+
+    def _enqueue(self, provider: str, cost: int, priority: Priority,
+                 loop: Optional[asyncio.AbstractEventLoop]) -> Tuple[_ProviderState, _Ticket]:
+        state = self._state(provider)
+        ticket = _Ticket(int(priority), next(self._seq), cost, loop)
+        heapq.heappush(state.queue, ticket)
+        return state, ticket
+
+    def _abandon(self, state: _ProviderState, ticket: _Ticket):
+        with self._lock:
+            if ticket in state.queue:
+                state.queue.remove(ticket)
+                heapq.heapify(state.queue)
+            self._wake_head(state)
+
+    def _acquire(self, provider: str, cost: int, priority: Priority, timeout: Optional[float]):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            state, ticket = self._enqueue(provider, cost, priority, None)
+        try:
+            while True:
+                with self._lock:
+                    ticket._event.clear()
+                    wait = self._try_acquire(state, ticket)
+                if wait == 0:
+                    return
+                wait = 1.0 if wait is None else wait
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"Aucun créneau {provider} après {timeout}s")
+                    wait = min(wait, remaining)
+                ticket._event.wait(wait)
+        except BaseException:
+            self._abandon(state, ticket)
+            raise
+
+    async def _aacquire(self, provider: str, cost: int, priority: Priority, timeout: Optional[float]):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            state, ticket = self._enqueue(provider, cost, priority, asyncio.get_running_loop())
+        try:
+            while True:
+                with self._lock:
+                    ticket._event.clear()
+                    wait = self._try_acquire(state, ticket)
+                if wait == 0:
+                    return
+                wait = 1.0 if wait is None else wait
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"Aucun créneau {provider} après {timeout}s")
+                    wait = min(wait, remaining)
+                try:
+                    await asyncio.wait_for(ticket._event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(state, ticket)
+            raise
+
+    def _release(self, provider: str, cost: int, outcome: str,
+                 tokens_used: Optional[int], retry_after: Optional[float]):
+        with self._lock:
+            state = self._state(provider)
+            state.in_flight = max(0, state.in_flight - 1)
+            limits = state.limits
+
+            if tokens_used is not None:
+                state.tokens.adjust(cost - tokens_used)
+
+            if outcome == 'success':
+                state.stats['completed'] += 1
+                state.limit = min(limits.max_concurrency, state.limit + 1.0 / max(state.limit, 1.0))
+            elif outcome == 'throttled':
+                state.stats['throttled'] += 1
+                state.limit = max(limits.min_concurrency, state.limit / 2)
+                pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+                state.blocked_until = max(state.blocked_until, time.monotonic() + pause)
+                logger.warning(f"{provider}: limitation (429), concurrence ramenée à {state.limit:.1f}")
+            elif outcome == 'timeout':
+                state.stats['timeouts'] += 1
+                state.limit = max(limits.min_concurrency, state.limit / 2)
+            elif outcome == 'error':
+                state.stats['errors'] += 1
+
+            self._wake_head(state)
+
+
+def _limits_from_env() -> Dict[str, ProviderLimits]:
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.getenv('LLM_RATE_LIMITS')
+    if raw:
+        try:
+            for provider, values in json.loads(raw).items():
+                base = limits.get(provider, ProviderLimits())
+                limits[provider] = ProviderLimits(**{**base.__dict__, **values})
+        except (ValueError, TypeError) as e:
+            logger.error(f"LLM_RATE_LIMITS invalide: {e}")
+    return limits
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Ordonnanceur unique du processus (partagé par toutes les sessions)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(_limits_from_env())
+        return _scheduler
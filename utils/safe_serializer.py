@@ -0,0 +1,140 @@
+# utils/safe_serializer.py
+"""
+Sérialisation sûre des valeurs mises en cache (remplace pickle).
+
+Les valeurs sont écrites en JSON ; les types que JSON ne connaît pas
+(dates, durées, ensembles, tuples, octets, Decimal, dataclasses et Enum de
+l'application) sont balisés. À la lecture, seules les classes des paquets
+de l'application, et seulement si ce sont des dataclasses ou des Enum, sont
+reconstruites : aucun code arbitraire ne peut être exécuté.
+"""
+import base64
+import dataclasses
+import importlib
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import PurePath
+from typing import Any
+
+# Paquets dont les dataclasses et Enum peuvent être reconstruites
+SAFE_MODULE_PREFIXES = ('models.', 'modules.', 'config.', 'managers.', 'services.', 'utils.')
+
+_TAG = '__t__'
+
+
+class SerializationError(ValueError):
+    """Valeur non sérialisable (ou donnée illisible)"""
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _encode(obj: Any) -> Any:
+    # Avant les types de base : IntEnum et StrEnum en dérivent
+    if isinstance(obj, Enum):
+        if not type(obj).__module__.startswith(SAFE_MODULE_PREFIXES):
+            raise SerializationError(f"Enum hors application : {_class_path(type(obj))}")
+        return {_TAG: 'enum', 'cls': _class_path(type(obj)), 'v': _encode(obj.value)}
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, list):
+        return [_encode(item) for item in obj]
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj) and _TAG not in obj:
+            return {k: _encode(v) for k, v in obj.items()}
+        return {_TAG: 'dict', 'v': [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, tuple):
+        return {_TAG: 'tuple', 'v': [_encode(item) for item in obj]}
+    if isinstance(obj, (set, frozenset)):
+        return {_TAG: 'set', 'v': [_encode(item) for item in obj]}
+    if isinstance(obj, datetime):
+        return {_TAG: 'datetime', 'v': obj.isoformat()}
+    if isinstance(obj, date):
+        return {_TAG: 'date', 'v': obj.isoformat()}
+    if isinstance(obj, time):
+        return {_TAG: 'time', 'v': obj.isoformat()}
+    if isinstance(obj, timedelta):
+        return {_TAG: 'timedelta', 'v': obj.total_seconds()}
+    if isinstance(obj, Decimal):
+        return {_TAG: 'decimal', 'v': str(obj)}
+    if isinstance(obj, (bytes, bytearray)):
+        return {_TAG: 'bytes', 'v': base64.b64encode(bytes(obj)).decode('ascii')}
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        if not type(obj).__module__.startswith(SAFE_MODULE_PREFIXES):
+            raise SerializationError(f"Dataclass hors application : {_class_path(type(obj))}")
+        fields = {f.name: _encode(getattr(obj, f.name)) for f in dataclasses.fields(obj)}
+        return {_TAG: 'dataclass', 'cls': _class_path(type(obj)), 'v': fields}
+    raise SerializationError(f"Type non sérialisable : {type(obj).__name__}")
+
+
+def _resolve(path: str) -> type:
+    module_name, _, qualname = path.partition(':')
+    if not module_name.startswith(SAFE_MODULE_PREFIXES):
+        raise SerializationError(f"Classe non autorisée : {path}")
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        obj = getattr(obj, part)
+    if not isinstance(obj, type) or not (dataclasses.is_dataclass(obj) or issubclass(obj, Enum)):
+        raise SerializationError(f"Classe non autorisée : {path}")
+    return obj
+
+
+def _decode(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [_decode(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    tag = obj.get(_TAG)
+    if tag is None:
+        return {k: _decode(v) for k, v in obj.items()}
+
+    value = obj.get('v')
+    if tag == 'dict':
+        return {_decode(k): _decode(v) for k, v in value}
+    if tag == 'tuple':
+        return tuple(_decode(item) for item in value)
+    if tag == 'set':
+        return set(_decode(item) for item in value)
+    if tag == 'datetime':
+        return datetime.fromisoformat(value)
+    if tag == 'date':
+        return date.fromisoformat(value)
+    if tag == 'time':
+        return time.fromisoformat(value)
+    if tag == 'timedelta':
+        return timedelta(seconds=value)
+    if tag == 'decimal':
+        return Decimal(value)
+    if tag == 'bytes':
+        return base64.b64decode(value)
+    if tag == 'enum':
+        return _resolve(obj['cls'])(_decode(value))
+    if tag == 'dataclass':
+        cls = _resolve(obj['cls'])
+        values = {k: _decode(v) for k, v in value.items()}
+        init = {f.name: values.pop(f.name) for f in dataclasses.fields(cls) if f.init and f.name in values}
+        instance = cls(**init)
+        for name, field_value in values.items():
+            object.__setattr__(instance, name, field_value)
+        return instance
+    raise SerializationError(f"Balise inconnue : {tag}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Sérialise une valeur (SerializationError si un type n'est pas pris en charge)"""
+    return json.dumps(_encode(obj), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Désérialise une valeur écrite par dumps"""
+    try:
+        return _decode(json.loads(data))
+    except SerializationError:
+        raise
+    except (ValueError, TypeError, KeyError, AttributeError, ImportError) as e:
+        raise SerializationError(f"Donnée de cache illisible : {e}") from e
@@ -0,0 +1,416 @@
+# utils/search_index.py
+"""
+Index inversé incrémental pour la recherche dans les documents locaux
+"""
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .mapped_text import MappedText, document_text
+from .minhash import DEFAULT_THRESHOLD, LSHIndex, MinHasher, Signature
+
+# Champs indexés pour chaque document
+INDEXED_FIELDS = ('title', 'content', 'parties', 'infractions')
+
+FRENCH_STOPWORDS = frozenset([
+    'le', 'la', 'les', 'l', 'de', 'des', 'du', 'd', 'un', 'une', 'et', 'ou',
+    'a', 'au', 'aux', 'en', 'dans', 'par', 'pour', 'sur', 'avec', 'sans',
+    'ce', 'ces', 'cet', 'cette', 'se', 'sa', 'son', 'ses', 'qui', 'que', 'qu',
+    'il', 'elle', 'ils', 'elles', 'on', 'nous', 'vous', 'leur', 'leurs',
+    'ne', 'pas', 'plus', 'est', 'sont', 'ete', 'etre', 'y', 'n', 's', 'c', 'j',
+])
+
+# Suffixes retirés par le raciniseur léger (du plus long au plus court)
+_FRENCH_SUFFIXES = (
+    'issements', 'issement', 'atrices', 'ateurs', 'ations', 'ements',
+    'atrice', 'ateur', 'ation', 'ement', 'ances', 'ences', 'ables', 'ibles',
+    'iques', 'ismes', 'istes', 'euses', 'ance', 'ence', 'able', 'ible',
+    'ique', 'isme', 'iste', 'euse', 'eurs', 'ment', 'eur',
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_MINHASHER = MinHasher()
+
+
+def fold_accents(text: str) -> str:
+    """
+    Met le texte en minuscules et supprime les accents.
+
+    Args:
+        text: Texte à normaliser
+
+    Returns:
+        Texte sans accents, en minuscules
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem_french(token: str) -> str:
+    """
+    Raciniseur français léger : pluriels, féminins et suffixes courants.
+
+    Volontairement conservateur pour que requête et documents produisent
+    la même racine (ex. "escroqueries" -> "escroqueri", "sociaux" -> "social").
+    """
+    if len(token) <= 3 or token.isdigit():
+        return token
+
+    # Pluriels
+    if token.endswith('aux') and len(token) > 4:
+        token = token[:-3] + 'al'
+    elif token.endswith(('s', 'x')) and not token.endswith(('ss', 'us', 'is')):
+        token = token[:-1]
+
+    # Suffixes dérivationnels (racine d'au moins 4 caractères)
+    for suffix in _FRENCH_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            token = token[:-len(suffix)]
+            break
+
+    # Féminin et participes
+    if token.endswith('ee') and len(token) > 5:
+        token = token[:-2]
+    elif token.endswith('e') and len(token) > 4:
+        token = token[:-1]
+
+    return token
+
+
+def analyze_text(text: Any, keep_stopwords: bool = False) -> List[str]:
+    """
+    Découpe un texte en termes normalisés (accents, casse, racine).
+
+    Args:
+        text: Texte (str ou bytes) à analyser
+        keep_stopwords: Conserver les mots vides
+
+    Returns:
+        Liste ordonnée des termes
+    """
+    if not text:
+        return []
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', errors='ignore')
+    elif not isinstance(text, str):
+        text = str(text)
+
+    terms = []
+    for token in _TOKEN_RE.findall(fold_accents(text)):
+        if not keep_stopwords and token in FRENCH_STOPWORDS:
+            continue
+        terms.append(stem_french(token))
+    return terms
+
+
+def _get_field(doc: Any, name: str, default: Any = None) -> Any:
+    """Lit un attribut sur un dict ou un objet document"""
+    if isinstance(doc, dict):
+        return doc.get(name, default)
+    return getattr(doc, name, default)
+
+
+def document_fields(doc: Any) -> Dict[str, str]:
+    """
+    Extrait le texte des champs indexés d'un document (dict ou objet).
+
+    Les parties et infractions sont lues dans les métadonnées si présentes.
+    """
+    metadata = _get_field(doc, 'metadata') or {}
+    content = document_text(doc)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', errors='ignore')
+
+    def _join(value: Any) -> str:
+        if not value:
+            return ''
+        if isinstance(value, dict):
+            value = [item for items in value.values() for item in (items or [])]
+        if isinstance(value, (list, tuple, set)):
+            return ' '.join(str(item) for item in value)
+        return str(value)
+
+    return {
+        'title': str(_get_field(doc, 'title', '') or ''),
+        'content': str(content),
+        'parties': _join(metadata.get('parties') if isinstance(metadata, dict) else None),
+        'infractions': _join(metadata.get('infractions') if isinstance(metadata, dict) else None),
+    }
+
+
+class InvertedIndex:
+    """
+    Index inversé maintenu de façon incrémentale.
+
+    Chaque champ possède ses listes de postings ``terme -> {doc_id: tf}``
+    ainsi que la longueur des documents, ce qui fournit directement les
+    statistiques nécessaires au classement BM25. Une signature MinHash du
+    contenu est calculée à l'indexation pour détecter les quasi-doublons.
+    """
+
+    def __init__(self, fields: Tuple[str, ...] = INDEXED_FIELDS):
+        self.fields = fields
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {f: {} for f in fields}
+        self._lengths: Dict[str, Dict[str, int]] = {f: {} for f in fields}
+        self._total_lengths: Dict[str, int] = {f: 0 for f in fields}
+        self._doc_terms: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._doc_freq: Counter = Counter()
+        self._fingerprints: Dict[str, Tuple[int, int, int]] = {}
+        self._lsh = LSHIndex()
+        self._lock = threading.RLock()
+        self.uid = uuid.uuid4().hex
+        self.version = 0
+
+    # ------------------------------------------------------------------
+    # Mise à jour
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def fingerprint(doc: Any) -> Tuple[int, int, int]:
+        """Empreinte peu coûteuse (le hash des str est mis en cache par Python)"""
+        title = _get_field(doc, 'title', '') or ''
+        digest = _get_field(doc, 'digest')
+        if digest:
+            # Contenu stocké, immuable pour une empreinte donnée : rien à lire
+            return (hash(title), hash(digest), 0)
+        content = document_text(doc)
+        if isinstance(content, MappedText):
+            # Texte stocké par empreinte : son chemin l'identifie sans le lire
+            return (hash(title), hash(str(content.path)), len(content))
+        return (hash(title), hash(content), len(content))
+
+    def add_document(self, doc_id: str, doc: Any) -> bool:
+        """
+        Indexe (ou réindexe) un document.
+
+        Returns:
+            True si l'index a été modifié
+        """
+        fingerprint = self.fingerprint(doc)
+        with self._lock:
+            if self._fingerprints.get(doc_id) == fingerprint:
+                return False
+            if doc_id in self._doc_terms:
+                self._remove_unlocked(doc_id)
+
+            fields = document_fields(doc)
+            doc_terms: Dict[str, Tuple[str, ...]] = {}
+            all_terms: Set[str] = set()
+            content_terms: List[str] = []
+
+            for field_name in self.fields:
+                terms = analyze_text(fields.get(field_name, ''))
+                counts = Counter(terms)
+                postings = self._postings[field_name]
+                for term, tf in counts.items():
+                    postings.setdefault(term, {})[doc_id] = tf
+                self._lengths[field_name][doc_id] = len(terms)
+                self._total_lengths[field_name] += len(terms)
+                doc_terms[field_name] = tuple(counts)
+                all_terms.update(counts)
+                if field_name == 'content':
+                    content_terms = terms
+
+            for term in all_terms:
+                self._doc_freq[term] += 1
+
+            self._lsh.insert(doc_id, _MINHASHER.terms_signature(content_terms))
+            self._doc_terms[doc_id] = doc_terms
+            self._fingerprints[doc_id] = fingerprint
+            self.version += 1
+            return True
+
+    def is_current(self, doc_id: str, doc: Any) -> bool:
+        """Indique si l'index contient cette version exacte du document"""
+        return self._fingerprints.get(doc_id) == self.fingerprint(doc)
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Retire un document de l'index"""
+        with self._lock:
+            if doc_id not in self._doc_terms:
+                return False
+            self._remove_unlocked(doc_id)
+            self.version += 1
+            return True
+
+    def _remove_unlocked(self, doc_id: str):
+        doc_terms = self._doc_terms.pop(doc_id)
+        all_terms: Set[str] = set()
+
+        for field_name, terms in doc_terms.items():
+            postings = self._postings[field_name]
+            for term in terms:
+                term_postings = postings.get(term)
+                if term_postings is not None:
+                    term_postings.pop(doc_id, None)
+                    if not term_postings:
+                        del postings[term]
+            self._total_lengths[field_name] -= self._lengths[field_name].pop(doc_id, 0)
+            all_terms.update(terms)
+
+        for term in all_terms:
+            self._doc_freq[term] -= 1
+            if self._doc_freq[term] <= 0:
+                del self._doc_freq[term]
+
+        self._fingerprints.pop(doc_id, None)
+        self._lsh.remove(doc_id)
+
+    def sync(self, documents: Dict[str, Any]) -> int:
+        """
+        Aligne l'index sur un ensemble de documents.
+
+        Seuls les documents ajoutés, modifiés ou supprimés depuis le
+        dernier appel sont (ré)indexés.
+
+        Returns:
+            Nombre de documents modifiés dans l'index
+        """
+        changes = 0
+        with self._lock:
+            for doc_id in [d for d in self._doc_terms if d not in documents]:
+                self._remove_unlocked(doc_id)
+                changes += 1
+            if changes:
+                self.version += 1
+            for doc_id, doc in documents.items():
+                if self.add_document(doc_id, doc):
+                    changes += 1
+        return changes
+
+    def clear(self):
+        """Vide l'index"""
+        with self._lock:
+            for field_name in self.fields:
+                self._postings[field_name].clear()
+                self._lengths[field_name].clear()
+                self._total_lengths[field_name] = 0
+            self._doc_terms.clear()
+            self._doc_freq.clear()
+            self._fingerprints.clear()
+            self._lsh = LSHIndex()
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Interrogation
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    @property
+    def corpus_version(self) -> Tuple[str, int]:
+        """Identifiant de l'état du corpus indexé (change à chaque modification)"""
+        return (self.uid, self.version)
+
+    @property
+    def doc_count(self) -> int:
+        return len(self._doc_terms)
+
+    def document_frequency(self, term: str) -> int:
+        """Nombre de documents contenant le terme (tous champs confondus)"""
+        return self._doc_freq.get(term, 0)
+
+    def average_length(self, field_name: str) -> float:
+        """Longueur moyenne d'un champ, en termes"""
+        count = len(self._doc_terms)
+        return self._total_lengths[field_name] / count if count else 0.0
+
+    def field_length(self, field_name: str, doc_id: str) -> int:
+        return self._lengths[field_name].get(doc_id, 0)
+
+    def postings(self, field_name: str, term: str) -> Dict[str, int]:
+        """Postings ``{doc_id: tf}`` d'un terme pour un champ"""
+        return self._postings[field_name].get(term, {})
+
+    def term_frequencies(self, doc_id: str, term: str) -> Dict[str, int]:
+        """Fréquences d'un terme dans chaque champ d'un document"""
+        return {
+            field_name: self._postings[field_name].get(term, {}).get(doc_id, 0)
+            for field_name in self.fields
+        }
+
+    def candidates(self, terms: Iterable[str]) -> Dict[str, Set[str]]:
+        """
+        Documents contenant au moins un des termes.
+
+        Returns:
+            ``{doc_id: termes trouvés}`` (coût proportionnel aux postings)
+        """
+        matches: Dict[str, Set[str]] = {}
+        with self._lock:
+            for term in set(terms):
+                for field_name in self.fields:
+                    for doc_id in self._postings[field_name].get(term, ()):
+                        matches.setdefault(doc_id, set()).add(term)
+        return matches
+
+    def search(self, query: str, min_match_ratio: float = 0.3,
+               required_terms: Optional[Iterable[str]] = None,
+               confirm: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Recherche les documents dont une part suffisante des termes correspond.
+
+        Args:
+            query: Texte de la requête
+            min_match_ratio: Part minimale des termes de la requête à trouver
+            required_terms: Termes (déjà analysés) qui, tous présents, suffisent à retenir un document
+            confirm: Vérification (par ex. de l'expression exacte) d'un document retenu
+                uniquement grâce à ``required_terms``
+
+        Returns:
+            Identifiants des documents correspondants
+        """
+        terms = list(dict.fromkeys(analyze_text(query)))
+        required = set(required_terms or ())
+        matches = self.candidates(terms + list(required))
+
+        results = []
+        for doc_id, found in matches.items():
+            if terms and len(found & set(terms)) / len(terms) >= min_match_ratio:
+                results.append(doc_id)
+            elif required and required <= found and (confirm is None or confirm(doc_id)):
+                results.append(doc_id)
+        return results
+
+    # ------------------------------------------------------------------
+    # Quasi-doublons
+    # ------------------------------------------------------------------
+
+    def signature(self, doc_id: str) -> Optional[Signature]:
+        """Signature MinHash du contenu d'un document indexé"""
+        return self._lsh.signature(doc_id)
+
+    def near_duplicates(self, doc_id: str, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float]]:
+        """Documents dont le contenu est quasi identique à celui de ``doc_id``"""
+        with self._lock:
+            signature = self._lsh.signature(doc_id)
+            if signature is None:
+                return []
+            return self._lsh.query(signature, threshold, exclude=doc_id)
+
+    def duplicate_groups(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[str]]:
+        """Groupes de documents quasi identiques"""
+        with self._lock:
+            return self._lsh.duplicate_groups(threshold)
+
+
+def content_signature(text: Any) -> Signature:
+    """Signature MinHash d'un texte, compatible avec celles de l'index"""
+    if isinstance(text, MappedText):
+        text = str(text)
+    return _MINHASHER.terms_signature(analyze_text(text))
+
+
+def title_signature(title: str) -> Signature:
+    """Signature MinHash d'un titre"""
+    return _MINHASHER.title_signature(title or '')
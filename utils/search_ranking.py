@@ -0,0 +1,135 @@
+# utils/search_ranking.py
+"""
+Classement BM25F des résultats de recherche
+"""
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from .mapped_text import TextLike, matched_terms
+from .search_index import INDEXED_FIELDS, InvertedIndex, analyze_text, document_fields
+
+# Poids par défaut de chaque champ
+DEFAULT_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'content': 1.0,
+    'parties': 2.0,
+    'infractions': 2.0,
+}
+
+
+class DocumentTerms:
+    """
+    Fréquences des termes d'un document par champ.
+
+    Lues directement dans l'index lorsque le document y figure dans la même
+    version, sinon calculées une seule fois (résultats Azure par exemple).
+    """
+
+    def __init__(self, index: InvertedIndex, doc_id: Optional[str], doc: Any):
+        self._index = index
+        self._doc_id = doc_id
+        self._counts: Optional[Dict[str, Counter]] = None
+        self._lengths: Dict[str, int] = {}
+
+        use_index = doc_id is not None and doc_id in index
+        if use_index and doc is not None:
+            use_index = index.is_current(doc_id, doc)
+
+        if not use_index:
+            fields = document_fields(doc)
+            self._counts = {}
+            for field_name in INDEXED_FIELDS:
+                terms = analyze_text(fields.get(field_name, ''))
+                self._counts[field_name] = Counter(terms)
+                self._lengths[field_name] = len(terms)
+
+    @property
+    def indexed(self) -> bool:
+        return self._counts is None
+
+    def tf(self, field_name: str, term: str) -> int:
+        if self._counts is None:
+            return self._index.postings(field_name, term).get(self._doc_id, 0)
+        return self._counts.get(field_name, {}).get(term, 0)
+
+    def length(self, field_name: str) -> int:
+        if self._counts is None:
+            return self._index.field_length(field_name, self._doc_id)
+        return self._lengths.get(field_name, 0)
+
+    def contains_all(self, field_name: str, terms: Iterable[str]) -> bool:
+        """Vrai si tous les termes apparaissent dans le champ"""
+        terms = list(terms)
+        return bool(terms) and all(self.tf(field_name, term) for term in terms)
+
+
+def contains_reference(doc_terms: DocumentTerms, text: TextLike, reference: str,
+                       reference_terms: Optional[List[str]] = None) -> bool:
+    """
+    Vrai si la référence figure telle quelle (sans casse) dans le texte.
+
+    Les termes analysés, lus dans l'index, écartent d'abord les documents où
+    l'un d'eux manque ; seuls les autres sont parcourus pour l'expression.
+    """
+    terms = analyze_text(reference) if reference_terms is None else reference_terms
+    if terms and not doc_terms.contains_all('content', terms):
+        return False
+    return bool(matched_terms(text, [reference]))
+
+
+class BM25FScorer:
+    """
+    Score BM25F multi-champs.
+
+    Les IDF et longueurs moyennes proviennent de l'index et sont calculés
+    une seule fois par requête ; chaque candidat est ensuite évalué en un
+    seul passage sur les termes de la requête.
+    """
+
+    def __init__(self, index: InvertedIndex, field_weights: Optional[Dict[str, float]] = None,
+                 k1: float = 1.2, b: float = 0.75):
+        self.index = index
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self.k1 = k1
+        self.b = b
+        self._idf: Dict[str, float] = {}
+        self._avg_lengths = {
+            field_name: index.average_length(field_name) for field_name in self.field_weights
+        }
+
+    def idf(self, term: str) -> float:
+        """IDF BM25 (toujours positif)"""
+        if term not in self._idf:
+            doc_count = max(self.index.doc_count, 1)
+            df = min(self.index.document_frequency(term), doc_count)
+            self._idf[term] = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        return self._idf[term]
+
+    def document_terms(self, doc_id: Optional[str], doc: Any) -> DocumentTerms:
+        return DocumentTerms(self.index, doc_id, doc)
+
+    def score(self, doc_terms: DocumentTerms, terms: List[str]) -> float:
+        """
+        Calcule le score BM25F d'un document.
+
+        Args:
+            doc_terms: Fréquences du document
+            terms: Termes analysés de la requête
+
+        Returns:
+            Score (0 si aucun terme ne correspond)
+        """
+        total = 0.0
+        for term in terms:
+            weighted_tf = 0.0
+            for field_name, weight in self.field_weights.items():
+                tf = doc_terms.tf(field_name, term)
+                if not tf:
+                    continue
+                avg_length = self._avg_lengths.get(field_name) or doc_terms.length(field_name) or 1
+                norm = 1 - self.b + self.b * doc_terms.length(field_name) / avg_length
+                weighted_tf += weight * tf / norm
+            if weighted_tf:
+                total += self.idf(term) * weighted_tf / (self.k1 + weighted_tf)
+        return total
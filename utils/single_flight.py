@@ -0,0 +1,90 @@
+# utils/single_flight.py
+"""
+Déduplication des calculs en cours (« single-flight ») : tant qu'un calcul
+est en cours pour une clé, les appels suivants avec la même clé attendent
+son résultat au lieu de le relancer. Fonctionne entre threads et entre
+tâches asyncio.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Un seul calcul à la fois par clé ; les autres appelants partagent son résultat (ou son exception)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], '_AsyncFlight'] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls or any(k == key for _, k in self._async_calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Exécute ``fn`` si aucun calcul n'est en cours pour ``key``, sinon attend celui-ci"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Équivalent asynchrone de do (par boucle d'événements)
+
+        Le calcul tourne dans une tâche propre au vol, que chaque appelant
+        attend sous ``shield`` : l'annulation d'un appelant, même celui qui
+        l'a lancé, n'atteint ni le calcul ni les autres appelants. Le calcul
+        n'est annulé que lorsque plus personne ne l'attend.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            flight = self._async_calls.get(flight_key)
+            if flight is None:
+                flight = self._async_calls[flight_key] = _AsyncFlight(loop.create_task(fn()))
+                flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and not flight.task.done()
+            if abandoned:
+                flight.task.cancel()
+
+    def _forget(self, flight_key: Tuple[int, Hashable], flight: '_AsyncFlight'):
+        with self._lock:
+            if self._async_calls.get(flight_key) is flight:
+                del self._async_calls[flight_key]
+
+
+class _AsyncFlight:
+    """Calcul asynchrone partagé et nombre d'appelants qui l'attendent"""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: 'asyncio.Task'):
+        self.task = task
+        self.waiters = 0
@@ -0,0 +1,175 @@
+# utils/sqlite_cache.py
+"""
+Stockage disque du cache dans un fichier SQLite unique (mode WAL).
+
+Chaque entrée porte sa date d'expiration et de dernier accès (indexées) et
+sa taille ; des déclencheurs tiennent à jour le nombre d'entrées et le
+volume par type. La purge des entrées expirées ne parcourt que celles-ci,
+les statistiques ne lisent qu'une ligne par type, et les entrées les moins
+récemment lues sont évincées au-delà de ``max_bytes``.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Volume maximal des valeurs stockées (octets)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Une lecture ne réécrit la date d'accès que si la précédente date d'au moins autant (s)
+ACCESS_RESOLUTION = 60
+# Entrées lues à la fois lors d'une éviction
+EVICTION_BATCH = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    cache_type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_type_created ON entries (cache_type, created);
+
+CREATE TABLE IF NOT EXISTS totals (
+    cache_type TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT OR IGNORE INTO totals (cache_type) VALUES (NEW.cache_type);
+    UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size
+    WHERE cache_type = NEW.cache_type;
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size
+    WHERE cache_type = OLD.cache_type;
+END;
+"""
+
+
+class SQLiteCacheStore:
+    """
+    Entrées clé → valeur sérialisée (octets), avec expiration et éviction LRU.
+
+    Une seule connexion, protégée par un verrou, est partagée par les
+    threads ; les écritures concurrentes d'autres processus sont gérées
+    par SQLite (WAL, attente de 5 s sur verrou).
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[str], float, float]]:
+        """(valeur, métadonnées JSON, création, expiration) ou None si absente ou expirée"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, metadata, created, expires, accessed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, metadata, created, expires, accessed = row
+            if expires <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            if now - accessed >= ACCESS_RESOLUTION:
+                self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return value, metadata, created, expires
+
+    def set(self, key: str, value: bytes, cache_type: str, ttl: float, metadata: Optional[str] = None):
+        """Écrit (ou remplace) une entrée puis évince au-delà de max_bytes"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # DELETE puis INSERT (et non REPLACE) pour que les déclencheurs tiennent les totaux
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute(
+                    "INSERT INTO entries (key, cache_type, value, size, created, expires, accessed, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, cache_type, sqlite3.Binary(value), len(value), now, now + ttl, now, metadata)
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM totals").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = 0
+        freed = 0
+        while freed < excess:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if freed >= excess:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+        logger.info(f"Cache disque : {evicted} entrée(s) évincée(s), {freed} octets libérés")
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées expirées (parcours de l'index d'expiration)"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),)).rowcount
+
+    def clear(self, cache_type: Optional[str] = None):
+        with self._lock:
+            if cache_type:
+                self._conn.execute("DELETE FROM entries WHERE cache_type = ?", (cache_type,))
+            else:
+                self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM totals WHERE entries <= 0")
+
+    def recent(self, cache_type: str, limit: int = 10) -> List[Tuple[bytes, Optional[str], float]]:
+        """Entrées valides d'un type, des plus récentes aux plus anciennes : (valeur, métadonnées, création)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, metadata, created FROM entries "
+                "WHERE cache_type = ? AND expires > ? ORDER BY created DESC, rowid DESC LIMIT ?",
+                (cache_type, time.time(), limit)
+            ).fetchall()
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        """Nombre d'entrées et octets par type (tenus à jour par déclencheurs)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cache_type, entries, bytes FROM totals WHERE entries > 0"
+            ).fetchall()
+        return {cache_type: {'entries': entries, 'bytes': size} for cache_type, entries, size in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
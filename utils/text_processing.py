@@ -8,6 +8,7 @@ import unicodedata
 from difflib import SequenceMatcher
 from typing import Any, Dict, List, Optional, Tuple
 
+from . import mapped_text
 from .helpers import truncate_text, clean_key
 
 
@@ -198,12 +199,12 @@ def generate_summary(text: str, max_sentences: int = 3) -> str:
 
 def calculate_read_time(text: str, words_per_minute: int = 200) -> int:
     """
-    Calcule le temps de lecture estimé en minutes
+    Calcule le temps de lecture estimé en minutes (str ou MappedText)
     """
     if not text:
         return 0
     
-    word_count = len(text.split())
+    word_count = mapped_text.word_count(text)
     minutes = word_count / words_per_minute
     
     return max(1, round(minutes))
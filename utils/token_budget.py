@@ -0,0 +1,242 @@
+# utils/token_budget.py
+"""
+Budget de tokens des prompts construits à partir des pièces du dossier.
+
+Les tokens sont comptés avec tiktoken quand il est disponible (estimation
+à ~4 caractères par token sinon), les comptes étant mis en cache par
+empreinte du texte. Le budget d'un appel (fenêtre du fournisseur moins la
+réponse attendue) est réparti entre les parties du prompt par ordre de
+priorité : les parties les moins prioritaires sont résumées (phrase
+d'ouverture de chaque paragraphe), tronquées ou écartées.
+"""
+import hashlib
+import logging
+import re
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.llm_router import PROVIDER_CONTEXT
+from utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+ENCODING_NAME = 'cl100k_base'
+# Fenêtre supposée quand le fournisseur est inconnu (la plus petite des fournisseurs courants)
+DEFAULT_CONTEXT_WINDOW = 30_000
+# Marge pour les écarts entre tokenizers et l'habillage des messages
+SAFETY_MARGIN = 0.1
+# En dessous, une partie optionnelle n'apporte plus rien : elle est écartée
+MIN_PART_TOKENS = 50
+
+TRUNCATE = 'truncate'
+CONDENSE = 'condense'
+
+ELLIPSIS = "[…]"
+# Coût forfaitaire d'un séparateur de paragraphes
+SEPARATOR_TOKENS = 1
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+')
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_token_counts = LRUCache(max_entries=4096)
+
+
+def _get_encoding():
+    """Encodeur tiktoken (chargé une fois), ou None s'il est indisponible"""
+    global _encoding, TIKTOKEN_AVAILABLE
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                # Fichier d'encodage non téléchargeable (hors ligne)
+                logger.warning(f"Tokenizer {ENCODING_NAME} indisponible, estimation utilisée: {e}")
+                TIKTOKEN_AVAILABLE = False
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Nombre de tokens d'un texte (mis en cache par empreinte)"""
+    if not text:
+        return 0
+    key = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+    count = _token_counts.get(key)
+    if count is None:
+        encoding = _get_encoding()
+        if encoding is not None:
+            count = len(encoding.encode(text, disallowed_special=()))
+        else:
+            count = max(1, len(text) // 4)
+        _token_counts.set(key, count)
+    return count
+
+
+def context_window(provider: Optional[str] = None) -> int:
+    """Fenêtre de contexte (tokens) du fournisseur"""
+    return PROVIDER_CONTEXT.get(provider, DEFAULT_CONTEXT_WINDOW)
+
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """Coupe un texte à ``tokens`` tokens, au dernier paragraphe complet si possible"""
+    if count_tokens(text) <= tokens:
+        return text
+    if tokens <= 0:
+        return ''
+
+    kept = []
+    used = 0
+    for paragraph in text.split('\n\n'):
+        cost = count_tokens(paragraph) + SEPARATOR_TOKENS
+        if used + cost > tokens:
+            break
+        kept.append(paragraph)
+        used += cost
+    # Les comptes par paragraphe ne s'additionnent pas exactement
+    while kept and count_tokens('\n\n'.join(kept)) > tokens:
+        kept.pop()
+    if kept:
+        return '\n\n'.join(kept)
+
+    # Premier paragraphe trop long : coupe franche
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:tokens])
+    return text[:tokens * 4]
+
+
+def condense(text: str, tokens: int) -> str:
+    """
+    Résumé extractif tenant dans ``tokens`` tokens.
+
+    Chaque paragraphe est d'abord réduit à sa première phrase ; les
+    paragraphes sont ensuite rétablis en entier, du premier au dernier,
+    tant que le budget le permet. Si même les premières phrases ne tiennent
+    pas, le résumé est tronqué.
+    """
+    if count_tokens(text) <= tokens:
+        return text
+
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    leads = [_SENTENCE_END.split(p, 1)[0] for p in paragraphs]
+    pieces = [lead if lead == p else f"{lead} {ELLIPSIS}" for lead, p in zip(leads, paragraphs)]
+
+    used = sum(count_tokens(piece) + SEPARATOR_TOKENS for piece in pieces)
+    if used <= tokens:
+        for i, paragraph in enumerate(paragraphs):
+            extra = count_tokens(paragraph) - count_tokens(pieces[i])
+            if used + extra > tokens:
+                break
+            pieces[i] = paragraph
+            used += extra
+    # Si même les premières phrases ne tiennent pas (ou à l'arrondi près)
+    return truncate_tokens('\n\n'.join(pieces), tokens)
+
+
+@dataclass
+class PromptPart:
+    """Partie d'un prompt : plus ``priority`` est faible, plus elle est prioritaire"""
+    name: str
+    text: str
+    priority: int = 0
+    required: bool = False
+    strategy: str = CONDENSE
+    min_tokens: int = MIN_PART_TOKENS
+
+
+@dataclass
+class BudgetResult:
+    """Parties ajustées (dans l'ordre d'origine) et répartition du budget"""
+    parts: List[PromptPart]
+    budget: int
+    # nom -> (tokens d'origine, tokens conservés)
+    allocations: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> str:
+        for part in self.parts:
+            if part.name == name:
+                return part.text
+        raise KeyError(name)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(kept for _, kept in self.allocations.values())
+
+    @property
+    def trimmed(self) -> List[str]:
+        """Noms des parties résumées, tronquées ou écartées"""
+        return [name for name, (original, kept) in self.allocations.items() if kept < original]
+
+    def join(self, separator: str = '\n\n') -> str:
+        return separator.join(part.text for part in self.parts if part.text)
+
+
+class TokenBudgeter:
+    """
+    Répartit la fenêtre d'un fournisseur entre les parties d'un prompt.
+
+    Le budget est la fenêtre du fournisseur, diminuée de ``reserve_tokens``
+    (réponse attendue) et d'une marge de sécurité. Les parties obligatoires
+    sont servies en premier, puis les autres par priorité croissante ; une
+    partie qui ne tient pas est résumée (CONDENSE) ou tronquée (TRUNCATE),
+    et écartée s'il lui reste moins de ``min_tokens``.
+    """
+
+    def __init__(self, provider: Optional[str] = None, reserve_tokens: int = 4000,
+                 context_tokens: Optional[int] = None, margin: float = SAFETY_MARGIN):
+        self.provider = provider
+        window = context_tokens or context_window(provider)
+        self.budget = max(0, int(window * (1 - margin)) - reserve_tokens)
+
+    def fit(self, parts: Sequence[PromptPart]) -> BudgetResult:
+        order = sorted(range(len(parts)), key=lambda i: (not parts[i].required, parts[i].priority, i))
+        fitted: List[Optional[PromptPart]] = [None] * len(parts)
+        allocations = {}
+        remaining = self.budget
+
+        for i in order:
+            part = parts[i]
+            need = count_tokens(part.text)
+            text = part.text
+            if need > remaining:
+                if not part.required and remaining < min(need, part.min_tokens):
+                    text = ''
+                elif part.strategy == CONDENSE:
+                    text = condense(part.text, remaining)
+                else:
+                    text = truncate_tokens(part.text, remaining)
+            kept = count_tokens(text)
+            remaining = max(0, remaining - kept)
+            fitted[i] = replace(part, text=text)
+            allocations[part.name] = (need, kept)
+
+        result = BudgetResult(parts=fitted, budget=self.budget, allocations=allocations)
+        if result.trimmed:
+            logger.info(
+                f"Budget de {self.budget} tokens ({self.provider or 'fournisseur inconnu'}) : "
+                f"{', '.join(result.trimmed)} réduit(s)"
+            )
+        return result
+
+
+def fit_prompt(prompt: str, system_prompt: str = '', provider: Optional[str] = None,
+               reserve_tokens: int = 4000) -> str:
+    """Résume un prompt trop long pour la fenêtre du fournisseur (le prompt système est conservé)"""
+    budgeter = TokenBudgeter(provider, reserve_tokens)
+    if len(prompt) + len(system_prompt or '') <= budgeter.budget:
+        # Un token couvre au moins un caractère : inutile de compter
+        return prompt
+    result = budgeter.fit([
+        PromptPart('system', system_prompt or '', required=True),
+        PromptPart('prompt', prompt, required=True),
+    ])
+    return result['prompt']